@@ -0,0 +1,186 @@
+"""
+JWT authentication without a user query per request.
+
+The access token already carries the user's username, email and
+is_staff/is_superuser/is_active flags, signed at login by
+CustomTokenObtainPairSerializer. CachedJWTAuthentication builds request.user
+from those claims for the token's lifetime instead of loading the User row.
+The instance is not loaded from the database: reload it before saving it.
+
+Views that change a user's account call invalidate_user(). The user's
+tokens then stop being trusted: for REFRESH_TOKEN_LIFETIME their requests
+load the User row (so a deactivated user is refused), keeping it in a small
+per-process LRU cache (AUTH_USER_CACHE_SIZE entries, AUTH_USER_CACHE_TTL
+seconds). Invalidations are stored in UserInvalidation and mirrored in
+memory like the revocation list: the process that made one sees it at once,
+the others within AUTH_USER_CHANGES_REFRESH_SECONDS (one indexed query per
+process per interval, none per request). Each load re-reads the last
+AUTH_USER_CHANGES_OVERLAP_SECONDS too, so a change whose transaction commits
+after later ones were loaded is not skipped.
+
+Revoked tokens (logout, rotated refresh tokens) are refused from memory, see
+revocation.py.
+"""
+import copy
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from . import revocation
+from .models import UserInvalidation
+
+CLAIMS = ('username', 'is_staff', 'is_superuser', 'is_active')
+
+_lock = threading.Lock()
+_users = OrderedDict()  # user id -> (loaded at, user), least recently used first
+
+
+class ChangedUsers:
+    """In-memory mirror of the UserInvalidation rows still in effect, refreshed incrementally by changed_at."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.changed = {}  # user id -> time of the latest change
+            self.synced_at = None  # wall-clock start of the last load
+            self.loaded_at = None
+
+    def _add(self, user_id, changed_at):
+        self.changed[user_id] = max(changed_at, self.changed.get(user_id, 0))
+
+    def add(self, user_id, changed_at):
+        with self._lock:
+            self._add(user_id, changed_at)
+
+    def refresh(self, force=False):
+        interval = getattr(settings, 'AUTH_USER_CHANGES_REFRESH_SECONDS', 5)
+        if not force and self.loaded_at is not None and time.monotonic() - self.loaded_at < interval:
+            return
+        lifetime = api_settings.REFRESH_TOKEN_LIFETIME
+        with self._lock:
+            started = timezone.now()
+            if self.synced_at is None:
+                since = started - lifetime
+            else:
+                since = self.synced_at - timedelta(seconds=getattr(settings, 'AUTH_USER_CHANGES_OVERLAP_SECONDS', 60))
+            # A failed load raises: answering from a stale mirror would trust
+            # the claims of a user deactivated meanwhile
+            for user_id, changed_at in UserInvalidation.objects.filter(changed_at__gte=since).values_list('user_id', 'changed_at'):
+                self._add(user_id, changed_at.timestamp())
+            self.synced_at = started
+            cutoff = time.time() - lifetime.total_seconds()
+            self.changed = {user_id: at for user_id, at in self.changed.items() if at > cutoff}
+            self.loaded_at = time.monotonic()
+
+    def changed_at(self, user_id):
+        """When the user last changed within REFRESH_TOKEN_LIFETIME, or None."""
+        self.refresh()
+        return self.changed.get(user_id)
+
+
+_changes = ChangedUsers()
+
+
+def invalidate_user(user_id):
+    """Stop trusting this user's token claims and drop their cached row."""
+    changed_at = timezone.now()
+    UserInvalidation.objects.create(user_id=user_id, changed_at=changed_at)
+    _changes.add(user_id, changed_at.timestamp())
+    with _lock:
+        _users.pop(user_id, None)
+
+
+def purge_invalidations():
+    """Delete the invalidations older than REFRESH_TOKEN_LIFETIME. Returns the number deleted."""
+    deleted, _ = UserInvalidation.objects.filter(
+        changed_at__lte=timezone.now() - api_settings.REFRESH_TOKEN_LIFETIME
+    ).delete()
+    return deleted
+
+
+def _cached_user(user_id, changed_at):
+    ttl = getattr(settings, 'AUTH_USER_CACHE_TTL', 60)
+    with _lock:
+        entry = _users.get(user_id)
+        if entry is None:
+            return None
+        loaded_at, user = entry
+        if loaded_at < changed_at or time.time() - loaded_at > ttl:
+            del _users[user_id]
+            return None
+        _users.move_to_end(user_id)
+        return user
+
+
+def _cache_user(user_id, user):
+    size = getattr(settings, 'AUTH_USER_CACHE_SIZE', 1024)
+    with _lock:
+        _users[user_id] = (time.time(), user)
+        _users.move_to_end(user_id)
+        while len(_users) > size:
+            _users.popitem(last=False)
+
+
+def clear_user_cache():
+    """Forget the cached rows and invalidations; the next lookup reloads them."""
+    with _lock:
+        _users.clear()
+    _changes.reset()
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication trusting the token's user claims unless the user changed since."""
+
+    def get_validated_token(self, raw_token):
+        validated_token = super().get_validated_token(raw_token)
+        if revocation.is_revoked(validated_token):
+            raise InvalidToken(_("Token is revoked"))
+        return validated_token
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        changed_at = _changes.changed_at(user_id)
+        if changed_at is None and all(claim in validated_token for claim in CLAIMS):
+            user = self.user_from_claims(user_id, validated_token)
+        else:
+            # Changed since login, or a token without the claims: load the row
+            user = _cached_user(user_id, changed_at or 0)
+            if user is None:
+                user = super().get_user(validated_token)
+                _cache_user(user_id, user)
+            # Requests must not share (and mutate) the cached instance
+            user = copy.copy(user)
+
+        if not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        return user
+
+    def user_from_claims(self, user_id, validated_token):
+        user = get_user_model()(
+            username=validated_token['username'],
+            email=validated_token.get('email', ''),
+            is_staff=validated_token['is_staff'],
+            is_superuser=validated_token['is_superuser'],
+            is_active=validated_token['is_active'],
+            **{api_settings.USER_ID_FIELD: user_id},
+        )
+        # Behaves like a row of the primary for foreign keys and routing
+        user._state.adding = False
+        user._state.db = 'default'
+        return user
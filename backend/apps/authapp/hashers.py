@@ -0,0 +1,18 @@
+"""
+Password hasher with a configurable work factor.
+
+PASSWORD_HASH_ITERATIONS sets the PBKDF2 iterations for new passwords
+(Django's default when unset). Stored hashes with another iteration count
+still verify and are rehashed to the configured count on the user's next
+successful login.
+"""
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+
+
+class ConfigurablePBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """PBKDF2-SHA256 (same algorithm name, so existing hashes verify) with settings-driven iterations."""
+
+    @property
+    def iterations(self):
+        return getattr(settings, 'PASSWORD_HASH_ITERATIONS', None) or PBKDF2PasswordHasher.iterations
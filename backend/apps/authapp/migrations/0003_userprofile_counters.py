@@ -0,0 +1,61 @@
+# Generated by Django 5.2.7 on 2026-10-19 05:26
+
+from django.db import migrations, models
+from django.db.models import Count, Max, Q
+
+
+def fill_counters(apps, schema_editor):
+    # Existing users start from their inputs on this database rather than
+    # zero. Inputs on other shards are counted by `manage.py
+    # repair_user_counters` once every shard is migrated.
+    db_alias = schema_editor.connection.alias
+    if db_alias != 'default':
+        return
+    ProductionInput = apps.get_model('prediction', 'ProductionInput')
+    UserProfile = apps.get_model('authapp', 'UserProfile')
+
+    rows = ProductionInput.objects.using(db_alias).order_by().exclude(created_by=None).values('created_by').annotate(
+        submitted=Count('id'),
+        approved=Count('id', filter=Q(status='approved')),
+        rejected=Count('id', filter=Q(status='rejected')),
+        last=Max('created_at'),
+    )
+    for row in rows.iterator():
+        UserProfile.objects.using(db_alias).filter(user_id=row['created_by']).update(
+            inputs_submitted=row['submitted'],
+            inputs_approved=row['approved'],
+            inputs_rejected=row['rejected'],
+            last_submission_at=row['last'],
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authapp', '0002_revokedtoken'),
+        ('prediction', '0007_prediction_rescores'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='inputs_approved',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='inputs_rejected',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='inputs_submitted',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='last_submission_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.7 on 2026-10-19 06:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authapp', '0003_userprofile_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserInvalidation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('user_id', models.BigIntegerField()),
+                ('changed_at', models.DateTimeField(db_index=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-19 06:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authapp', '0004_userinvalidation'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='revokedtoken',
+            name='rotated',
+            field=models.BooleanField(default=False),
+        ),
+    ]
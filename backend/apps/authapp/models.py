@@ -12,5 +12,44 @@ class UserProfile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='profile')
     role = models.CharField(max_length=20, choices=ROLE_CHOICES, default='user')
 
+    # Activity counters of the user's production inputs, kept up to date by the
+    # prediction views (backend/apps/core/utils/user_counters.py)
+    inputs_submitted = models.PositiveIntegerField(default=0)
+    inputs_approved = models.PositiveIntegerField(default=0)
+    inputs_rejected = models.PositiveIntegerField(default=0)
+    last_submission_at = models.DateTimeField(null=True, blank=True)
+
     def __str__(self):
         return f"{self.user.username} - {self.role}"
+
+
+class RevokedToken(models.Model):
+    """
+    A JWT that must no longer be accepted (logged out, or a refresh token
+    already rotated). Rows can be purged once the token has expired.
+    Rotated refresh tokens stay usable for REFRESH_TOKEN_REUSE_GRACE_SECONDS
+    after revoked_at.
+    """
+    jti = models.CharField(max_length=255, unique=True)
+    token_type = models.CharField(max_length=20)
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='revoked_tokens')
+    expires_at = models.DateTimeField(db_index=True)
+    revoked_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    rotated = models.BooleanField(default=False)
+
+    def __str__(self):
+        return f"{self.token_type} {self.jti}"
+
+
+class UserInvalidation(models.Model):
+    """
+    An account change (approval, role, deactivation, deletion) after which
+    the user's token claims are no longer trusted. Stored in the database so
+    every process sees it; rows older than REFRESH_TOKEN_LIFETIME can be
+    purged. user_id is not a foreign key: deleted users are recorded too.
+    """
+    user_id = models.BigIntegerField()
+    changed_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"user {self.user_id} changed at {self.changed_at}"
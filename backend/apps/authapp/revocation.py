@@ -0,0 +1,171 @@
+"""
+Revocation of JWTs (logout, rotated refresh tokens).
+
+Revoked token ids (jti) are stored in RevokedToken and mirrored into a
+per-process bloom filter plus an exact set. A lookup answers from memory:
+tokens missing from the bloom filter (almost all of them) are not revoked,
+and the exact set confirms the rest, so there are no false positives. Every
+TOKEN_REVOCATION_REFRESH_SECONDS a lookup loads the rows revoked since the
+last load (one indexed query per process, none per request). A revocation
+is therefore seen at once by the process that made it and within that
+interval by the others. Rows only become visible when their transaction
+commits, possibly after later ones, so each load re-reads the last
+TOKEN_REVOCATION_OVERLAP_SECONDS as well; adding an id twice is harmless.
+
+Expired tokens are refused by their signature check anyway, so their rows
+are dropped from memory when the filter is rebuilt (once it holds more than
+its capacity, TOKEN_REVOCATION_CAPACITY ids or twice the unexpired ids if
+that is more) and from the table by `python manage.py purge_revoked_tokens`.
+A failed load raises rather than answering from an incomplete mirror.
+"""
+import hashlib
+import logging
+import math
+import threading
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.utils import timezone
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import RevokedToken
+
+logger = logging.getLogger(__name__)
+
+
+class BloomFilter:
+    """Bloom filter over strings sized for capacity items at error_rate false positives."""
+
+    def __init__(self, capacity, error_rate):
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1, h2 = int.from_bytes(digest[:8], 'little'), int.from_bytes(digest[8:], 'little') | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, item):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class RevocationList:
+    """In-memory mirror of RevokedToken, refreshed incrementally by revoked_at."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._clear(getattr(settings, 'TOKEN_REVOCATION_CAPACITY', 100000))
+            self.synced_at = None  # wall-clock start of the last load
+            self.loaded_at = None
+
+    def _clear(self, capacity):
+        error_rate = getattr(settings, 'TOKEN_REVOCATION_ERROR_RATE', 0.001)
+        self.bloom = BloomFilter(capacity, error_rate)
+        self.jtis = set()
+        self.capacity = capacity
+
+    def _add(self, jti):
+        self.bloom.add(jti)
+        self.jtis.add(jti)
+
+    def add(self, jti):
+        with self._lock:
+            self._add(jti)
+
+    def refresh(self, force=False):
+        interval = getattr(settings, 'TOKEN_REVOCATION_REFRESH_SECONDS', 5)
+        if not force and self.loaded_at is not None and time.monotonic() - self.loaded_at < interval:
+            return
+        with self._lock:
+            started = timezone.now()
+            if self.synced_at is None:
+                rows = RevokedToken.objects.filter(expires_at__gt=started)
+            else:
+                overlap = getattr(settings, 'TOKEN_REVOCATION_OVERLAP_SECONDS', 60)
+                rows = RevokedToken.objects.filter(revoked_at__gte=self.synced_at - timedelta(seconds=overlap))
+            # Errors propagate: a token missing from a failed load would be
+            # accepted, so lookups fail until a load succeeds
+            self._load(rows)
+            if len(self.jtis) > self.capacity:
+                self._rebuild()
+            self.synced_at = started
+            self.loaded_at = time.monotonic()
+
+    def _load(self, rows):
+        for jti in rows.values_list('jti', flat=True).iterator():
+            self._add(jti)
+
+    def _rebuild(self):
+        """Reload the unexpired ids only, into a filter with room for twice as many."""
+        rows = RevokedToken.objects.filter(expires_at__gt=timezone.now())
+        configured = getattr(settings, 'TOKEN_REVOCATION_CAPACITY', 100000)
+        self._clear(max(configured, 2 * rows.count()))
+        self._load(rows)
+        logger.info(f"Rebuilt the revocation filter: {len(self.jtis)} ids, capacity {self.capacity}")
+
+    def __contains__(self, jti):
+        self.refresh()
+        return jti in self.bloom and jti in self.jtis
+
+
+_revoked = RevocationList()
+
+
+def is_revoked(token):
+    jti = token.get(api_settings.JTI_CLAIM)
+    return jti is not None and jti in _revoked
+
+
+def revoke(token, rotated=False):
+    """
+    Persist the token as revoked, by a rotation or for good (logout). Returns
+    False if it already was.
+    """
+    jti = token[api_settings.JTI_CLAIM]
+    row, created = RevokedToken.objects.get_or_create(jti=jti, defaults={
+        'token_type': token.get(api_settings.TOKEN_TYPE_CLAIM, ''),
+        'user_id': token.get(api_settings.USER_ID_CLAIM),
+        'expires_at': datetime.fromtimestamp(token['exp'], tz=dt_timezone.utc),
+        'rotated': rotated,
+    })
+    if not created and row.rotated and not rotated:
+        # Logging out ends the reuse grace of a rotated token
+        RevokedToken.objects.filter(pk=row.pk).update(rotated=False)
+    _revoked.add(jti)
+    return created
+
+
+def in_reuse_grace(token):
+    """
+    Whether the token was rotated less than REFRESH_TOKEN_REUSE_GRACE_SECONDS
+    ago, so a client that refreshed concurrently (two tabs, a retried
+    request) may still exchange it.
+    """
+    grace = getattr(settings, 'REFRESH_TOKEN_REUSE_GRACE_SECONDS', 5)
+    if grace <= 0:
+        return False
+    return RevokedToken.objects.filter(
+        jti=token[api_settings.JTI_CLAIM], rotated=True,
+        revoked_at__gt=timezone.now() - timedelta(seconds=grace),
+    ).exists()
+
+
+def purge_expired():
+    """Delete the rows of tokens that have expired. Returns the number deleted."""
+    deleted, _ = RevokedToken.objects.filter(expires_at__lte=timezone.now()).delete()
+    return deleted
+
+
+def reset():
+    """Forget the in-memory state; the next lookup reloads it."""
+    _revoked.reset()
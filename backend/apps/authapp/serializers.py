@@ -1,6 +1,9 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
-from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from . import revocation
 from .models import UserProfile
 
 User = get_user_model()
@@ -36,7 +39,15 @@ class UserSerializer(serializers.ModelSerializer):
         instance.save()
         return instance
 
+def user_role(user):
+    return 'admin' if user.is_superuser else 'staff' if user.is_staff else 'user'
+
 class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """
+    Authenticates once (one user lookup, one password hash) and returns the
+    token pair with the user's id, username and role both in the token
+    claims and in the response.
+    """
     @classmethod
     def get_token(cls, user):
         token = super().get_token(user)
@@ -45,12 +56,7 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
         token['is_active'] = user.is_active
         token['username'] = user.username
         token['email'] = user.email if user.email else ''
-        if user.is_superuser:
-            token['role'] = 'admin'
-        elif user.is_staff:
-            token['role'] = 'staff'
-        else:
-            token['role'] = 'user'
+        token['role'] = user_role(user)
         return token
     
     def validate(self, attrs):
@@ -61,6 +67,28 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
             'email': self.user.email or '',
             'is_superuser': self.user.is_superuser,
             'is_staff': self.user.is_staff,
-            'role': 'admin' if self.user.is_superuser else 'staff' if self.user.is_staff else 'user'
+            'role': user_role(self.user)
         }
-        return data
\ No newline at end of file
+        return data
+
+
+class RevokingTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Refuses revoked refresh tokens and, with BLACKLIST_AFTER_ROTATION,
+    revokes the refresh token it rotates. A rotated token is still accepted
+    for REFRESH_TOKEN_REUSE_GRACE_SECONDS, so concurrent refreshes with the
+    same token (two tabs, a retried request) do not log the user out; reuse
+    after that, or after logout, is refused.
+    """
+    def validate(self, attrs):
+        try:
+            refresh = self.token_class(attrs['refresh'])
+        except TokenError as e:
+            raise InvalidToken(e.args[0])
+        if api_settings.ROTATE_REFRESH_TOKENS and api_settings.BLACKLIST_AFTER_ROTATION:
+            revoked = not revocation.revoke(refresh, rotated=True) and not revocation.in_reuse_grace(refresh)
+        else:
+            revoked = revocation.is_revoked(refresh)
+        if revoked:
+            raise InvalidToken('Token is revoked')
+        return super().validate(attrs)
@@ -10,9 +10,25 @@ def create_user_profile(sender, instance, created, **kwargs):
     if created:
         UserProfile.objects.create(user=instance)
 
+def _only_last_login(update_fields):
+    # Logins save the user with update_fields={'last_login'}
+    return bool(update_fields) and set(update_fields) <= {'last_login'}
+
 @receiver(post_save, sender=User)
-def save_user_profile(sender, instance, **kwargs):
+def save_user_profile(sender, instance, created, update_fields=None, **kwargs):
+    if created or _only_last_login(update_fields):
+        return
     try:
         instance.profile.save()
     except UserProfile.DoesNotExist:
         UserProfile.objects.create(user=instance)
+
+@receiver(post_save, sender=UserProfile)
+def replicate_user_to_shards(sender, instance, using, **kwargs):
+    # Production shards keep a copy of every user and profile for their
+    # foreign keys and joins. Every user save other than a login saves the
+    # profile (above), so this copies both.
+    from backend.config.shard_router import get_shard_aliases
+    if using == 'default' and len(get_shard_aliases()) > 1:
+        from backend.apps.core.utils.sharding import replicate_users
+        replicate_users([instance.user])
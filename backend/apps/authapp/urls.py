@@ -1,7 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from rest_framework_simplejwt.views import TokenRefreshView
-from .views import UserViewSet, CustomTokenObtainPairView, register_user
+from .views import UserViewSet, CustomTokenObtainPairView, RevokingTokenRefreshView, register_user, revoke_token
 
 app_name = 'authapp'
 
@@ -11,7 +10,8 @@ router.register(r'users', UserViewSet)
 urlpatterns = [
     # JWT token endpoints - using custom view to check for inactive users
     path('token/', CustomTokenObtainPairView.as_view(), name='token_obtain_pair'),
-    path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    path('token/refresh/', RevokingTokenRefreshView.as_view(), name='token_refresh'),
+    path('token/revoke/', revoke_token, name='token_revoke'),
     
     # Registration endpoint
     path('register/', register_user, name='register'),
@@ -1,11 +1,15 @@
 from rest_framework import viewsets, permissions, status, serializers
 from rest_framework.decorators import action, api_view, permission_classes, authentication_classes
 from rest_framework.response import Response
-from rest_framework_simplejwt.views import TokenObtainPairView
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 from django.contrib.auth import get_user_model
 import logging
 
-from .serializers import UserSerializer, CustomTokenObtainPairSerializer
+from . import revocation
+from .authentication import invalidate_user
+from .serializers import UserSerializer, CustomTokenObtainPairSerializer, RevokingTokenRefreshSerializer
 from .permissions import IsAdmin, IsStaff
 
 User = get_user_model()
@@ -21,21 +25,8 @@ class CustomTokenObtainPairView(TokenObtainPairView):
 
     def post(self, request, *args, **kwargs):
         try:
-            response = super().post(request, *args, **kwargs)
-            if response.status_code == 200:
-                # Add user info to response
-                serializer = self.get_serializer(data=request.data)
-                if serializer.is_valid():
-                    user = serializer.user
-                    response.data['user'] = {
-                        'id': user.id,
-                        'username': user.username,
-                        'email': user.email or '',
-                        'is_superuser': user.is_superuser,
-                        'is_staff': user.is_staff,
-                        'role': 'admin' if user.is_superuser else 'staff' if user.is_staff else 'user'
-                    }
-            return response
+            # The serializer checks the password once and adds the user info
+            return super().post(request, *args, **kwargs)
         except Exception as e:
             logger.error(f"Login error: {str(e)}")
             return Response(
@@ -43,6 +34,34 @@ class CustomTokenObtainPairView(TokenObtainPairView):
                 status=status.HTTP_401_UNAUTHORIZED
             )
 
+class RevokingTokenRefreshView(TokenRefreshView):
+    """
+    Token refresh that refuses revoked refresh tokens and revokes rotated ones.
+    """
+    serializer_class = RevokingTokenRefreshSerializer
+
+
+@api_view(['POST'])
+@authentication_classes([])
+@permission_classes([permissions.AllowAny])
+def revoke_token(request):
+    """
+    Log out: revoke the refresh token and, if given, the access token.
+    Authentication is skipped so an expired access token does not block it.
+    """
+    try:
+        revocation.revoke(RefreshToken(request.data.get('refresh', '')))
+    except TokenError:
+        return Response({'error': 'A valid refresh token is required'}, status=status.HTTP_400_BAD_REQUEST)
+    if request.data.get('access'):
+        try:
+            revocation.revoke(AccessToken(request.data['access']))
+        except TokenError:
+            # Already expired, nothing left to revoke
+            pass
+    return Response({'message': 'Token revoked'}, status=status.HTTP_200_OK)
+
+
 class UserViewSet(viewsets.ModelViewSet):
     """
     API endpoint that allows users to be viewed or edited.
@@ -61,6 +80,15 @@ class UserViewSet(viewsets.ModelViewSet):
             permission_classes = [IsStaff]
         return [permission() for permission in permission_classes]
 
+    def perform_update(self, serializer):
+        super().perform_update(serializer)
+        invalidate_user(serializer.instance.id)
+
+    def perform_destroy(self, instance):
+        user_id = instance.id
+        super().perform_destroy(instance)
+        invalidate_user(user_id)
+
     @action(detail=True, methods=['post'])
     def set_password(self, request, pk=None):
         """
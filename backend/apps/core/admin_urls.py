@@ -10,6 +10,12 @@ from .admin_views import (
     AdminUserBulkApproveView,
     AdminUserCreateView,
     AdminInputReportsView,
+    AdminBatchReportsView,
+    AdminPredictionLatencyView,
+    AdminProfileTokenView,
+    AdminProfilesView,
+    AdminProfileDetailView,
+    AdminProfileDownloadView,
 )
 
 urlpatterns = [
@@ -21,5 +27,12 @@ urlpatterns = [
     path('users/bulk_approve/', AdminUserBulkApproveView.as_view(), name='admin-user-bulk-approve'),
     path('input-reports/users/', AdminInputReportsView.as_view(), {'action': 'users'}, name='admin-reports-users'),
     path('input-reports/<int:user_id>/inputs/', AdminInputReportsView.as_view(), {'action': 'inputs'}, name='admin-reports-inputs'),
+    path('input-reports/inputs/', AdminInputReportsView.as_view(), {'action': 'all_inputs'}, name='admin-reports-all-inputs'),
     path('input-reports/generate/', AdminInputReportsView.as_view(), {'action': 'generate'}, name='admin-reports-generate'),
+    path('input-reports/batch/', AdminBatchReportsView.as_view(), name='admin-reports-batch'),
+    path('prediction-latency/', AdminPredictionLatencyView.as_view(), name='admin-prediction-latency'),
+    path('profiles/', AdminProfilesView.as_view(), name='admin-profiles'),
+    path('profiles/token/', AdminProfileTokenView.as_view(), name='admin-profile-token'),
+    path('profiles/<str:profile_id>/', AdminProfileDetailView.as_view(), name='admin-profile-detail'),
+    path('profiles/<str:profile_id>/download/', AdminProfileDownloadView.as_view(), name='admin-profile-download'),
 ]
@@ -11,14 +11,16 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from django.contrib.auth import get_user_model
-from django.db.models import Avg, Sum, Count
+from django.db.models import Sum, Count, Q
 from django.utils import timezone
 from datetime import timedelta
 
+from backend.apps.authapp.authentication import invalidate_user
 from backend.apps.authapp.permissions import IsStaff
 from backend.apps.authapp.serializers import UserSerializer
 from backend.apps.prediction.models import ProductionOutput, ProductionInput
 from backend.apps.waste.models import WasteManagement
+from .utils import sharding
 
 User = get_user_model()
 
@@ -40,31 +42,48 @@ class AdminDashboardView(APIView):
                 'active': users.filter(is_active=True).count(),
             }
             
-            # Gather prediction statistics
-            predictions = ProductionOutput.objects.all()
+            # Gather prediction and waste statistics from every line shard
             one_week_ago = timezone.now() - timedelta(days=7)
-            avg_efficiency = predictions.aggregate(Avg('energy_efficiency'))['energy_efficiency__avg']
-            
+
+            def shard_stats(alias):
+                predictions = ProductionOutput.objects.using(alias)
+                waste = WasteManagement.objects.using(alias)
+                return {
+                    **predictions.aggregate(
+                        total=Count('id'),
+                        this_week=Count('id', filter=Q(created_at__gte=one_week_ago)),
+                        efficiency_count=Count('energy_efficiency'),
+                        efficiency_sum=Sum('energy_efficiency'),
+                    ),
+                    **waste.aggregate(
+                        total_records=Count('id'),
+                        total_amount=Sum('waste_amount'),
+                        reusable=Count('id', filter=Q(reuse_possible=True)),
+                    ),
+                }
+            totals = sharding.sum_results(sharding.fan_out(shard_stats))
+            avg_efficiency = totals['efficiency_sum'] / totals['efficiency_count'] if totals['efficiency_count'] else None
+
             predictions_stats = {
-                'total': predictions.count(),
-                'this_week': predictions.filter(created_at__gte=one_week_ago).count(),
+                'total': totals['total'],
+                'this_week': totals['this_week'],
                 'avg_efficiency': round(avg_efficiency, 2) if avg_efficiency else 0,
             }
-            
-            # Gather waste statistics
-            waste = WasteManagement.objects.all()
-            total_waste = waste.aggregate(Sum('waste_amount'))['waste_amount__sum']
-            
+
             waste_stats = {
-                'total_records': waste.count(),
-                'total_amount': float(total_waste) if total_waste else 0,
-                'reusable': waste.filter(reuse_possible=True).count(),
+                'total_records': totals['total_records'],
+                'total_amount': float(totals['total_amount']) if totals['total_amount'] else 0,
+                'reusable': totals['reusable'],
             }
-            
+
             # Recent activity
             recent_users = users.order_by('-date_joined')[:5]
-            recent_predictions = predictions.select_related('input_data').order_by('-created_at')[:5]
-            
+            recent_predictions = sharding.merged_list(
+                lambda alias: ProductionOutput.objects.using(alias).select_related('input_data').order_by('-created_at'),
+                key=lambda pred: pred.created_at,
+                limit=5
+            )
+
             recent_activity = {
                 'users': UserSerializer(recent_users, many=True).data,
                 'predictions': [
@@ -135,6 +154,7 @@ class AdminUserApproveView(APIView):
             user = User.objects.get(id=user_id)
             user.is_active = True
             user.save()
+            invalidate_user(user.id)
             return Response({'message': 'User approved successfully'}, status=status.HTTP_200_OK)
         except User.DoesNotExist:
             return Response({'error': 'User not found'}, status=status.HTTP_404_NOT_FOUND)
@@ -213,6 +233,7 @@ class AdminUserRejectView(APIView):
             user = User.objects.get(id=user_id)
             user.is_active = False
             user.save()
+            invalidate_user(user.id)
             return Response({'message': 'User deactivated successfully'}, status=status.HTTP_200_OK)
         except User.DoesNotExist:
             return Response({'error': 'User not found'}, status=status.HTTP_404_NOT_FOUND)
@@ -231,13 +252,145 @@ class AdminUserBulkApproveView(APIView):
             return Response({'error': 'No user IDs provided'}, status=status.HTTP_400_BAD_REQUEST)
         
         updated_count = User.objects.filter(id__in=user_ids).update(is_active=True)
+        for user_id in user_ids:
+            invalidate_user(user_id)
         
         return Response({
             'message': f'{updated_count} user(s) approved successfully',
             'count': updated_count
         }, status=status.HTTP_200_OK)
 
-from .staff_views import StaffInputReportsView
+class AdminPredictionLatencyView(APIView):
+    """
+    Prediction latency analytics: p50/p90/p99 and mean execution time,
+    throughput per minute, and the same broken down by model version and
+    production line, read from the per-minute latency histograms.
+
+    Query params: since and until (ISO date or datetime, default the last
+    24 hours), model_version, line.
+    """
+    permission_classes = [IsStaff]
+
+    def get(self, request):
+        from datetime import datetime, time
+        from django.utils.dateparse import parse_date, parse_datetime
+        from .utils.latency import latency_summary
+
+        def parse(name, default):
+            value = request.query_params.get(name)
+            if not value:
+                return default
+            moment = parse_datetime(value)
+            if moment is None:
+                day = parse_date(value)
+                if day is None:
+                    raise ValueError(name)
+                moment = datetime.combine(day, time.min)
+            return timezone.make_aware(moment) if timezone.is_naive(moment) else moment
+
+        try:
+            until = parse('until', timezone.now())
+            since = parse('since', until - timedelta(days=1))
+        except ValueError as e:
+            return Response(
+                {'error': f'{e} must be an ISO date or datetime'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if since >= until:
+            return Response({'error': 'since must be before until'}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(latency_summary(
+            since, until,
+            model_version=request.query_params.get('model_version'),
+            production_line=request.query_params.get('line'),
+        ))
+
+class AdminProfileTokenView(APIView):
+    """
+    Issue a signed token that profiles the caller's own requests until it
+    expires (PROFILING_TOKEN_MAX_AGE). Send it in the X-Profile header.
+    Body: mode (cprofile or sample).
+    """
+    permission_classes = [IsStaff]
+
+    def post(self, request):
+        from django.conf import settings
+        from . import profiling
+
+        mode = request.data.get('mode', 'cprofile')
+        try:
+            token = profiling.make_token(request.user, mode)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({
+            'token': token,
+            'mode': mode,
+            'header': 'X-Profile',
+            'expires_in': getattr(settings, 'PROFILING_TOKEN_MAX_AGE', 3600),
+        })
+
+
+class AdminProfilesView(APIView):
+    """
+    Stored request profiles, newest first.
+    """
+    permission_classes = [IsStaff]
+
+    def get(self, request):
+        from . import profiling
+
+        return Response({'profiles': profiling.list_profiles()})
+
+
+class AdminProfileDetailView(APIView):
+    """
+    GET: metadata of one profile. DELETE: remove it.
+    """
+    permission_classes = [IsStaff]
+
+    def get(self, request, profile_id):
+        from . import profiling
+
+        meta = profiling.get_profile(profile_id)
+        if meta is None:
+            return Response({'error': 'Profile not found'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(meta)
+
+    def delete(self, request, profile_id):
+        from . import profiling
+
+        if profiling.get_profile(profile_id) is None:
+            return Response({'error': 'Profile not found'}, status=status.HTTP_404_NOT_FOUND)
+        profiling.delete_profile(profile_id)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class AdminProfileDownloadView(APIView):
+    """
+    Download a profile. Query param: output (pstats for cprofile profiles,
+    speedscope for sampled ones, sql for the statement trace; default sql).
+    """
+    permission_classes = [IsStaff]
+
+    def get(self, request, profile_id):
+        import os
+        from django.http import FileResponse
+        from . import profiling
+
+        output_format = request.query_params.get('output', 'sql')
+        found = profiling.profile_file(profile_id, output_format)
+        if found is None:
+            return Response({'error': f'No {output_format} file for this profile'}, status=status.HTTP_404_NOT_FOUND)
+        path, content_type = found
+        return FileResponse(
+            open(path, 'rb'),
+            as_attachment=True,
+            filename=os.path.basename(path),
+            content_type=content_type
+        )
+
+
+from .staff_views import StaffInputReportsView, StaffBatchReportsView
 
 class AdminInputReportsView(StaffInputReportsView):
     """
@@ -245,3 +398,11 @@ class AdminInputReportsView(StaffInputReportsView):
     Inherits functionality from StaffInputReportsView.
     """
     pass
+
+
+class AdminBatchReportsView(StaffBatchReportsView):
+    """
+    Admin view for batch input reports.
+    Inherits functionality from StaffBatchReportsView.
+    """
+    pass
@@ -0,0 +1,29 @@
+"""
+System checks for AluOptimize.
+
+The MySQL availability probe used to run on every settings import. It now
+runs only as a database-tagged check, i.e. for `migrate` and
+`manage.py check --database default`.
+"""
+from django.core.checks import Error, Tags, register
+from django.db import connections
+
+from backend.config.db_driver import is_mysql_running
+
+
+@register(Tags.database)
+def check_mysql_reachable(app_configs, databases=None, **kwargs):
+    errors = []
+    for alias in databases or []:
+        connection = connections[alias]
+        if connection.vendor != 'mysql':
+            continue
+        host = connection.settings_dict.get('HOST') or 'localhost'
+        port = connection.settings_dict.get('PORT') or 3306
+        if not is_mysql_running(host, port):
+            errors.append(Error(
+                f"MySQL server is not running on {host}:{port}.",
+                hint="Please ensure your MySQL server is running before continuing.",
+                id='core.E001',
+            ))
+    return errors
@@ -0,0 +1,297 @@
+"""
+Server-sent events for the staff pending queue.
+
+Saving a ProductionInput publishes a small event once its transaction
+commits (see signals.py): 'new' when an input is submitted, 'approved' or
+'rejected' when its status changes, each carrying the input's id, line,
+status (and previous status), submitter id and creation time. Staff dashboards follow them on one
+EventSource connection to PATH instead of polling the pending list and
+dashboard counts.
+
+EventHub is an in-process pub/sub. It keeps the last EVENTS_BUFFER_SIZE
+events, so a reconnecting client (Last-Event-ID) gets what it missed, and
+hands every event to each subscriber's bounded queue. A client that falls
+more than EVENTS_QUEUE_SIZE events behind, or asks for events no longer
+buffered, gets a 'resync' event and should reload the list.
+
+The stream is a plain ASGI app mounted by backend/config/asgi.py, so it
+needs an ASGI server (e.g. uvicorn backend.config.asgi:application); idle
+connections cost no database queries. Authenticate with ?token=<access
+token> (EventSource cannot set headers) or an Authorization header. The
+stream ends when the token expires and the client reconnects with a fresh
+one.
+
+Without a broker each process only sees the writes it made itself. Set
+EVENTS_BROKER_URL (redis://..., needs the redis package) to publish through
+a Redis channel that every process listens to. A process subscribes when it
+first publishes or opens a stream, so one that only serves streams still
+receives the writes of the others.
+"""
+import asyncio
+import json
+import logging
+import threading
+import time
+import uuid
+from collections import deque
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+PATH = '/api/staff/events/'
+EVENT_TYPES = ('new', 'approved', 'rejected')
+RESYNC = {'id': None, 'event': 'resync', 'data': {}}
+
+
+class Subscription:
+    """One client's bounded queue, filled from any thread."""
+
+    def __init__(self, loop, maxsize):
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=maxsize)
+
+    def push(self, event):
+        try:
+            self.loop.call_soon_threadsafe(self._put, event)
+        except RuntimeError:
+            # The client's event loop is gone; it unsubscribes on its way out
+            pass
+
+    def _put(self, event):
+        if self.queue.full():
+            # Too far behind: drop the backlog and have the client reload
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            event = RESYNC
+        self.queue.put_nowait(event)
+
+
+class EventHub:
+    """In-process pub/sub with a replay buffer of the latest events."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = set()
+        self._recent = deque(maxlen=getattr(settings, 'EVENTS_BUFFER_SIZE', 100))
+
+    def subscribe(self, last_event_id=None):
+        """Subscribe from the running event loop. Returns (subscription, missed events)."""
+        subscription = Subscription(asyncio.get_running_loop(), getattr(settings, 'EVENTS_QUEUE_SIZE', 100))
+        with self._lock:
+            self._subscribers.add(subscription)
+            missed = self._since(last_event_id) if last_event_id else []
+        return subscription, missed
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def _since(self, last_event_id):
+        ids = [event['id'] for event in self._recent]
+        if last_event_id not in ids:
+            return [RESYNC]
+        return list(self._recent)[ids.index(last_event_id) + 1:]
+
+    def deliver(self, event):
+        with self._lock:
+            self._recent.append(event)
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            subscription.push(event)
+
+    @property
+    def subscriber_count(self):
+        return len(self._subscribers)
+
+
+class RedisBroker:
+    """Shares events between processes through a Redis pub/sub channel."""
+
+    def __init__(self, url, hub):
+        import redis
+        self.client = redis.Redis.from_url(url)
+        self.channel = getattr(settings, 'EVENTS_BROKER_CHANNEL', 'aluoptimize-events')
+        self.hub = hub
+        # Subscribed before returning, so the first event published from here is not missed
+        pubsub = self._subscribe()
+        threading.Thread(target=self._listen, args=(pubsub,), name='events-broker', daemon=True).start()
+
+    def publish(self, event):
+        self.client.publish(self.channel, json.dumps(event))
+
+    def _subscribe(self):
+        """A pubsub connection subscribed to the channel, once Redis confirmed it."""
+        pubsub = self.client.pubsub()
+        pubsub.subscribe(self.channel)
+        message = pubsub.get_message(timeout=5)
+        if message is None or message['type'] != 'subscribe':
+            pubsub.close()
+            raise ConnectionError(f"Redis did not confirm the subscription to {self.channel}")
+        return pubsub
+
+    def _listen(self, pubsub):
+        while True:
+            try:
+                pubsub = pubsub or self._subscribe()
+                for message in pubsub.listen():
+                    if message['type'] == 'message':
+                        self.hub.deliver(json.loads(message['data']))
+            except Exception as e:
+                logger.error(f"Event broker connection lost, retrying: {str(e)}")
+                pubsub = None
+                time.sleep(1)
+
+
+hub = EventHub()
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    """The shared broker if EVENTS_BROKER_URL is set and usable, else None."""
+    global _broker
+    url = getattr(settings, 'EVENTS_BROKER_URL', None)
+    if not url:
+        return None
+    with _broker_lock:
+        if _broker is None:
+            try:
+                _broker = RedisBroker(url, hub)
+            except Exception as e:
+                logger.error(f"Event broker unavailable, events stay in this process: {str(e)}")
+                _broker = False
+    return _broker or None
+
+
+def publish(event_type, data):
+    event = {'id': uuid.uuid4().hex, 'event': event_type, 'data': data}
+    broker = get_broker()
+    if broker is not None:
+        try:
+            broker.publish(event)
+            return
+        except Exception as e:
+            logger.error(f"Could not publish {event_type} event to the broker: {str(e)}")
+    hub.deliver(event)
+
+
+def input_event_data(production_input, previous_status=None):
+    return {
+        'id': production_input.id,
+        'production_line': production_input.production_line,
+        'status': production_input.status,
+        'previous_status': previous_status,
+        'created_by_id': production_input.created_by_id,
+        'created_at': production_input.created_at.isoformat(),
+    }
+
+
+def format_event(event):
+    lines = [f"id: {event['id']}"] if event['id'] else []
+    lines += [f"event: {event['event']}", f"data: {json.dumps(event['data'])}"]
+    return ('\n'.join(lines) + '\n\n').encode()
+
+
+def _authenticate(raw_token):
+    """The expiry timestamp of a staff user's access token, or (status, message) of the error."""
+    from rest_framework.exceptions import AuthenticationFailed
+    from backend.apps.authapp.authentication import CachedJWTAuthentication
+
+    authentication = CachedJWTAuthentication()
+    try:
+        token = authentication.get_validated_token(raw_token)
+        user = authentication.get_user(token)
+    except AuthenticationFailed as e:
+        # Invalid, expired or revoked tokens and inactive users alike
+        return None, (401, str(e.detail))
+    finally:
+        close_old_connections()
+    if not (user.is_staff or user.is_superuser):
+        return None, (403, 'Staff access required')
+    return token['exp'], None
+
+
+def _header(scope, name):
+    for key, value in scope.get('headers', []):
+        if key == name:
+            return value.decode('latin-1')
+    return None
+
+
+def _cors_headers(scope):
+    origin = _header(scope, b'origin')
+    if origin and (getattr(settings, 'CORS_ALLOW_ALL_ORIGINS', False)
+                   or origin in getattr(settings, 'CORS_ORIGIN_WHITELIST', [])):
+        return [(b'access-control-allow-origin', origin.encode())]
+    return []
+
+
+class EventStreamApp:
+    """ASGI app streaming the pending queue events to staff users."""
+
+    async def __call__(self, scope, receive, send):
+        if scope['method'] != 'GET':
+            return await self._error(scope, send, 405, 'Method not allowed')
+        query = parse_qs(scope.get('query_string', b'').decode())
+        authorization = _header(scope, b'authorization') or ''
+        raw_token = query.get('token', [''])[0] or authorization.removeprefix('Bearer ').strip()
+        if not raw_token:
+            return await self._error(scope, send, 401, 'Authentication credentials were not provided.')
+        expires, error = await sync_to_async(_authenticate)(raw_token.encode())
+        if error:
+            return await self._error(scope, send, *error)
+
+        # Start listening to the broker, if any: this process may publish nothing itself
+        await sync_to_async(get_broker)()
+        last_event_id = _header(scope, b'last-event-id') or query.get('last_event_id', [None])[0]
+        subscription, missed = hub.subscribe(last_event_id)
+        disconnected = asyncio.ensure_future(self._wait_for_disconnect(receive))
+        try:
+            await send({'type': 'http.response.start', 'status': 200, 'headers': [
+                (b'content-type', b'text/event-stream'),
+                (b'cache-control', b'no-cache'),
+                (b'x-accel-buffering', b'no'),
+                *_cors_headers(scope),
+            ]})
+            retry = getattr(settings, 'EVENTS_RETRY_MS', 5000)
+            await send({'type': 'http.response.body', 'more_body': True,
+                        'body': f'retry: {retry}\n\n'.encode() + b''.join(map(format_event, missed))})
+            await self._stream(subscription, disconnected, send, expires)
+        finally:
+            hub.unsubscribe(subscription)
+            disconnected.cancel()
+
+    async def _stream(self, subscription, disconnected, send, expires):
+        heartbeat = getattr(settings, 'EVENTS_HEARTBEAT_SECONDS', 15)
+        while True:
+            remaining = expires - time.time()
+            if remaining <= 0:
+                # The token expired: end the stream, the client reconnects with a new one
+                break
+            next_event = asyncio.ensure_future(subscription.queue.get())
+            done, _ = await asyncio.wait({next_event, disconnected}, timeout=min(heartbeat, remaining),
+                                         return_when=asyncio.FIRST_COMPLETED)
+            if disconnected in done:
+                next_event.cancel()
+                return
+            if next_event in done:
+                body = format_event(next_event.result())
+            else:
+                next_event.cancel()
+                # Comment line keeping proxies from closing an idle connection
+                body = b': keepalive\n\n'
+            await send({'type': 'http.response.body', 'body': body, 'more_body': True})
+        await send({'type': 'http.response.body', 'body': b'', 'more_body': False})
+
+    async def _wait_for_disconnect(self, receive):
+        while (await receive())['type'] != 'http.disconnect':
+            pass
+
+    async def _error(self, scope, send, status, message):
+        await send({'type': 'http.response.start', 'status': status,
+                    'headers': [(b'content-type', b'application/json'), *_cors_headers(scope)]})
+        await send({'type': 'http.response.body', 'body': json.dumps({'detail': message}).encode()})
@@ -1,7 +1,22 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
+from django.db import connections, DatabaseError
 from django.utils import timezone
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+def check_database(alias='default'):
+    """Run a trivial query on the given connection and time it."""
+    started = time.perf_counter()
+    with connections[alias].cursor() as cursor:
+        cursor.execute('SELECT 1')
+        cursor.fetchone()
+    return round((time.perf_counter() - started) * 1000, 2)
+
 
 class WelcomeView(APIView):
     def get(self, request):
@@ -18,3 +33,34 @@ class HealthCheckView(APIView):
             'timestamp': timezone.now(),
             'service': 'AluOptimize Backend'
         })
+
+class ReadinessView(APIView):
+    """
+    Readiness probe: reports ready only when the database answers a query.
+    Unlike the health check this touches the database, so it is the
+    endpoint for load balancers and orchestrators to poll.
+    """
+    authentication_classes = []
+    permission_classes = []
+
+    def get(self, request):
+        try:
+            latency_ms = check_database()
+        except DatabaseError as e:
+            # The driver's message names hosts and users; keep it in the logs
+            logger.error(f"Readiness check failed: {str(e)}")
+            return Response({
+                'status': 'unavailable',
+                'timestamp': timezone.now(),
+                'database': {'ok': False, 'error': 'Database unavailable'}
+            }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+
+        return Response({
+            'status': 'ready',
+            'timestamp': timezone.now(),
+            'database': {
+                'ok': True,
+                'vendor': connections['default'].vendor,
+                'latency_ms': latency_ms,
+            }
+        })
@@ -0,0 +1,70 @@
+"""
+Suggest composite indexes for the slow statements captured by SlowQueryMiddleware.
+
+Usage:
+    SLOW_QUERY_CAPTURE=1 gunicorn ...            # capture while serving traffic
+    python manage.py advise_indexes
+    python manage.py advise_indexes --min-calls 5 --show-plans
+    python manage.py advise_indexes --clear      # empty the buffers afterwards
+
+Statements are replayed through EXPLAIN on --database, which should run
+the same engine (and ideally hold the same data) as the one they were
+captured on; statements of another engine are skipped.
+"""
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from backend.apps.core import slow_queries
+from backend.apps.core.utils.index_advisor import advise
+
+
+class Command(BaseCommand):
+    help = 'Suggest composite indexes from captured slow queries'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default', help='Database alias to run EXPLAIN on')
+        parser.add_argument('--min-calls', type=int, default=1,
+                            help='Ignore suggestions backed by fewer captured calls')
+        parser.add_argument('--show-plans', action='store_true', help='Print the statements and their plans')
+        parser.add_argument('--clear', action='store_true', help='Empty the slow query buffers when done')
+
+    def handle(self, *args, **options):
+        entries = slow_queries.load_captured()
+        if not entries:
+            self.stdout.write('No slow queries captured. Enable SLOW_QUERY_CAPTURE and serve some traffic first.')
+            return
+
+        vendor = connections[options['database']].vendor
+        suggestions, errors = advise(entries, options['database'])
+        suggestions = [s for s in suggestions if s['calls'] >= options['min_calls']]
+        self.stdout.write(f'{len(entries)} captured statements replayed on {vendor}')
+
+        for suggestion in suggestions:
+            problems = ', '.join(name for name in ('full_scan', 'sort') if suggestion[name]).replace('_', ' ')
+            self.stdout.write('')
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f"{suggestion['table']} ({', '.join(suggestion['columns'])})"
+            ))
+            if suggestion['model']:
+                fields = ', '.join(f"'{name}'" for name in suggestion['fields'])
+                self.stdout.write(f"  {suggestion['model']}: models.Index(fields=[{fields}])")
+            self.stdout.write(
+                f"  {suggestion['statements']} statement(s), {suggestion['calls']} call(s), "
+                f"{suggestion['total_ms']:.1f} ms captured; plan: {problems}"
+            )
+            self.stdout.write(f"  views: {', '.join(sorted(suggestion['views']))}")
+            self.stdout.write(f"  call sites: {', '.join(sorted(suggestion['call_sites']))}")
+            if options['show_plans']:
+                for example in suggestion['examples']:
+                    self.stdout.write(f"    {example['sql']}")
+                    for line in example['plan']:
+                        self.stdout.write(f'      {line}')
+
+        for error in errors:
+            self.stderr.write(f"EXPLAIN failed: {error['error']}\n    {error['sql']}")
+
+        if not suggestions:
+            self.stdout.write(self.style.SUCCESS('No index suggestions: the captured plans already use indexes.'))
+        if options['clear']:
+            slow_queries.clear()
+            self.stdout.write('Cleared the slow query buffers.')
@@ -0,0 +1,46 @@
+"""
+Move prediction logs and prediction history past their retention period
+to compressed daily archive files and delete them from the live tables.
+
+Usage:
+    python manage.py archive_cold_rows
+    python manage.py archive_cold_rows --dataset prediction_logs --older-than-days 30
+    python manage.py archive_cold_rows --dry-run
+
+Safe to re-run after an interruption: rows already written to a partition
+are deleted without being archived twice. Archived rows stay readable via
+GET /api/staff/archive/<dataset>/<id>/.
+"""
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from backend.apps.core.utils.archive import DATASETS, archive_cold_rows, get_retention_days
+from backend.config.shard_router import get_shard_aliases
+
+
+class Command(BaseCommand):
+    help = 'Archive prediction logs/history older than the retention period'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dataset', action='append', dest='datasets', choices=list(DATASETS),
+                            help='Dataset to archive (repeatable), default: all')
+        parser.add_argument('--older-than-days', type=int, default=None,
+                            help='Override ARCHIVE_RETENTION_DAYS')
+        parser.add_argument('--dry-run', action='store_true', help='Only count the rows that would be archived')
+
+    def handle(self, *args, **options):
+        for dataset in options['datasets'] or DATASETS:
+            days = options['older_than_days']
+            days = days if days is not None else get_retention_days(dataset)
+
+            if options['dry_run']:
+                cutoff = timezone.now() - timedelta(days=days)
+                for alias in get_shard_aliases():
+                    count = DATASETS[dataset].objects.using(alias).filter(created_at__lt=cutoff).count()
+                    self.stdout.write(f'{dataset} on {alias}: {count} rows older than {days} days')
+                continue
+
+            for alias, count in archive_cold_rows(dataset, days).items():
+                self.stdout.write(self.style.SUCCESS(f'{dataset} on {alias}: archived {count} rows'))
@@ -0,0 +1,54 @@
+"""
+Create the missing waste records and recommendations of production outputs
+and link them, in keyset-ordered chunks on every shard.
+
+Usage:
+    python manage.py backfill_waste_records
+    python manage.py backfill_waste_records --workers 4 --chunk-size 1000
+    python manage.py backfill_waste_records --sleep 0.2      # during production hours
+    python manage.py backfill_waste_records --dry-run
+
+Progress is checkpointed after every chunk, so an interrupted run picks up
+where it stopped; --restart starts over from the first output.
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from backend.apps.core.utils.backfill import JOB_NAME, backfill_chunk, pending_outputs
+from backend.apps.core.utils.batch_jobs import run_chunked
+from backend.config.shard_router import get_shard_aliases
+
+
+class Command(BaseCommand):
+    help = 'Backfill waste records and recommendations for outputs without them'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=getattr(settings, 'BACKFILL_CHUNK_SIZE', 500),
+                            help='Outputs per chunk (one transaction each)')
+        parser.add_argument('--workers', type=int, default=1, help='Worker processes')
+        parser.add_argument('--sleep', type=float, default=0, help='Seconds to pause between chunks')
+        parser.add_argument('--restart', action='store_true', help='Ignore the checkpoint and start over')
+        parser.add_argument('--dry-run', action='store_true', help='Only count the outputs to backfill')
+
+    def handle(self, *args, **options):
+        for alias in get_shard_aliases():
+            if options['dry_run']:
+                self.stdout.write(f'{alias}: {pending_outputs(alias).count()} outputs without waste records')
+                continue
+
+            def report(checkpoint, rate):
+                if options['verbosity'] > 1:
+                    self.stdout.write(f'{alias}: {checkpoint.processed} outputs, up to id {checkpoint.last_id} ({rate:.0f}/s)')
+
+            stats = run_chunked(
+                JOB_NAME, alias, pending_outputs(alias), backfill_chunk,
+                chunk_size=options['chunk_size'],
+                workers=options['workers'],
+                sleep=options['sleep'],
+                restart=options['restart'],
+                on_progress=report,
+            )
+            self.stdout.write(self.style.SUCCESS(
+                f"{alias}: backfilled {stats['processed']} outputs in {stats['seconds']:.1f}s "
+                f"({stats['rows_per_second']:.0f}/s)"
+            ))
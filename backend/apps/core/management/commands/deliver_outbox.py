@@ -0,0 +1,40 @@
+"""
+Deliver queued outbox emails.
+
+Usage:
+    python manage.py deliver_outbox              # drain everything that is due, then exit
+    python manage.py deliver_outbox --loop       # keep polling, for a long-running worker
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from backend.apps.core.utils import outbox
+
+
+class Command(BaseCommand):
+    help = 'Send pending emails from the outbox, one SMTP connection per batch'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None, help='Messages per connection')
+        parser.add_argument('--loop', action='store_true', help='Keep running and poll for new messages')
+        parser.add_argument('--interval', type=float, default=5.0, help='Seconds between polls with --loop')
+
+    def handle(self, *args, **options):
+        while True:
+            total_sent = total_failed = 0
+            while True:
+                sent, failed = outbox.deliver_pending(batch_size=options['batch_size'])
+                total_sent += sent
+                total_failed += failed
+                # Stop once a batch sends nothing: failed rows have been
+                # rescheduled with backoff and must not be retried right away
+                if sent == 0:
+                    break
+
+            if total_sent or total_failed:
+                self.stdout.write(f"Sent {total_sent} email(s), {total_failed} failed")
+
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,51 @@
+"""
+Print the execution plans of the hot-path queries on the current database.
+
+Usage:
+    python manage.py explain_queries
+    python manage.py explain_queries --query user_outputs --analyze
+    DB_ENGINE=sqlite python manage.py explain_queries --output-dir plans/
+    DB_ENGINE=postgresql python manage.py explain_queries --output-dir plans/
+
+With --output-dir each plan is written to <vendor>_<query>.txt, so the
+files of two engines can be diffed side by side.
+"""
+import os
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from backend.apps.core.utils.query_plans import PLAN_QUERIES, explain_query
+
+
+class Command(BaseCommand):
+    help = 'Show EXPLAIN output for representative queries'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--query', action='append', dest='queries', choices=list(PLAN_QUERIES),
+                            help='Query to explain (repeatable), default: all')
+        parser.add_argument('--user-id', type=int, default=1, help='User id for per-user queries')
+        parser.add_argument('--database', default='default', help='Database alias')
+        parser.add_argument('--analyze', action='store_true',
+                            help='Execute the queries and report actual timings (PostgreSQL, MySQL 8.0.18+)')
+        parser.add_argument('--output-dir', default=None, help='Write one file per query instead of printing')
+
+    def handle(self, *args, **options):
+        vendor = connections[options['database']].vendor
+        explain_options = {'analyze': True} if options['analyze'] else {}
+        if options['output_dir']:
+            os.makedirs(options['output_dir'], exist_ok=True)
+
+        for name in options['queries'] or PLAN_QUERIES:
+            sql, plan = explain_query(name, options['user_id'], options['database'], **explain_options)
+            text = f"-- {name} ({vendor})\n{sql}\n\n{plan}\n"
+            if options['output_dir']:
+                path = os.path.join(options['output_dir'], f'{vendor}_{name}.txt')
+                with open(path, 'w') as f:
+                    f.write(text)
+                self.stdout.write(f'Wrote {path}')
+            else:
+                self.stdout.write(self.style.MIGRATE_HEADING(f'{name} ({vendor})'))
+                self.stdout.write(sql)
+                self.stdout.write(plan)
+                self.stdout.write('')
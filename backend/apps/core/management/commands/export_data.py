@@ -0,0 +1,61 @@
+"""
+Stream predictions, waste records or prediction logs to a CSV/NDJSON file.
+
+Usage:
+    python manage.py export_data predictions --output predictions.csv
+    python manage.py export_data logs --output-format ndjson --gzip --output logs.ndjson.gz
+    python manage.py export_data waste --since 2025-01-01 --line LINE_A > waste.csv
+"""
+import sys
+from datetime import date, datetime, time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from backend.apps.core.utils import exports
+
+
+class Command(BaseCommand):
+    help = 'Export a dataset as CSV or NDJSON with constant memory use'
+
+    def add_arguments(self, parser):
+        parser.add_argument('dataset', choices=list(exports.DATASETS))
+        parser.add_argument('--output-format', choices=list(exports.FORMATS), default='csv')
+        parser.add_argument('--gzip', action='store_true', help='Gzip-compress the output')
+        parser.add_argument('--since', help='Only rows created on or after this date (YYYY-MM-DD)')
+        parser.add_argument('--until', help='Only rows created before this date (YYYY-MM-DD)')
+        parser.add_argument('--line', help='Only rows of this production line')
+        parser.add_argument('--chunk-size', type=int, default=None, help='Rows per query (default: EXPORT_CHUNK_SIZE)')
+        parser.add_argument('--output', default=None, help='Output file (default: stdout)')
+
+    def _parse_date(self, value, option):
+        if not value:
+            return None
+        try:
+            return timezone.make_aware(datetime.combine(date.fromisoformat(value), time.min))
+        except ValueError:
+            raise CommandError(f'{option} must be in YYYY-MM-DD format')
+
+    def handle(self, *args, **options):
+        spec = exports.DATASETS[options['dataset']]
+        queryset = exports.filtered_queryset(
+            spec,
+            self._parse_date(options['since'], '--since'),
+            self._parse_date(options['until'], '--until'),
+            options['line'],
+        )
+        chunks = exports.stream_export(
+            spec, queryset, options['output_format'], options['gzip'], options['chunk_size']
+        )
+
+        written = 0
+        if options['output']:
+            with open(options['output'], 'wb') as output:
+                for chunk in chunks:
+                    output.write(chunk)
+                    written += len(chunk)
+            self.stderr.write(f"Wrote {written} bytes to {options['output']}")
+        else:
+            for chunk in chunks:
+                sys.stdout.buffer.write(chunk)
+            sys.stdout.buffer.flush()
@@ -0,0 +1,57 @@
+"""
+Generate production input reports in bulk.
+
+Usage:
+    python manage.py generate_batch_reports --user-id 7 --output reports.zip
+    python manage.py generate_batch_reports --month 2025-11 --format pdf --output nov.pdf
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from backend.apps.core.utils import batch_reports
+
+
+class Command(BaseCommand):
+    help = 'Render PDF reports for every input of a user and/or month into a ZIP or combined PDF'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user-id', type=int, help='Only inputs created by this user')
+        parser.add_argument('--month', help='Only inputs created in this month (YYYY-MM)')
+        parser.add_argument('--format', choices=['zip', 'pdf'], default='zip')
+        parser.add_argument('--workers', type=int, default=None, help='Render processes (default: CPU count)')
+        parser.add_argument('--output', required=True, help='File to write the ZIP or PDF to')
+
+    def handle(self, *args, **options):
+        if not options['user_id'] and not options['month']:
+            raise CommandError('Provide --user-id and/or --month')
+
+        try:
+            queryset = batch_reports.get_batch_queryset(
+                user_id=options['user_id'],
+                month=options['month']
+            )
+        except ValueError:
+            raise CommandError('--month must be in YYYY-MM format')
+
+        total = batch_reports.count_batch(queryset)
+        if total == 0:
+            raise CommandError('No inputs match the given filters')
+
+        self.stdout.write(f"Rendering {total} report(s) as {options['format']}...")
+        started = time.monotonic()
+        sections = batch_reports.iter_sections(queryset)
+
+        with open(options['output'], 'wb') as fileobj:
+            if options['format'] == 'pdf':
+                batch_reports.write_combined_pdf(sections, fileobj)
+            else:
+                reports = batch_reports.render_reports(sections, workers=options['workers'])
+                for chunk in batch_reports.stream_zip(reports):
+                    fileobj.write(chunk)
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {total} report(s) to {options['output']} in {elapsed:.1f}s "
+            f"({total / elapsed:.1f} reports/s)"
+        ))
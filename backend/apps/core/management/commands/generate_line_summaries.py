@@ -0,0 +1,81 @@
+"""
+Generate per-production-line summary reports from the rollup tables.
+
+Meant to be scheduled, for example with cron:
+    15 0 * * *  python manage.py generate_line_summaries --period daily --refresh
+    30 0 * * 1  python manage.py generate_line_summaries --period weekly --email
+    45 0 1 * *  python manage.py generate_line_summaries --period monthly --email
+"""
+import os
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from backend.apps.core.utils import line_summary
+from backend.apps.core.utils.outbox import enqueue_email
+from backend.apps.core.utils.rollups import refresh_range
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Write daily/weekly/monthly PDF summaries per production line'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--period', choices=line_summary.PERIODS, default='daily')
+        parser.add_argument(
+            '--date',
+            help='Any day inside the period to report on (YYYY-MM-DD). '
+                 'Defaults to yesterday, i.e. the last complete day/week/month when run just after midnight.'
+        )
+        parser.add_argument('--line', action='append', dest='lines', help='Production line (repeatable), default: all')
+        parser.add_argument('--refresh', action='store_true', help='Refresh the rollups for the period first')
+        parser.add_argument('--output-dir', default=None, help='Default: MEDIA_ROOT/summaries')
+        parser.add_argument('--email', action='store_true', help='Queue each PDF to active staff via the outbox')
+
+    def handle(self, *args, **options):
+        try:
+            day = date.fromisoformat(options['date']) if options['date'] else timezone.localdate() - timedelta(days=1)
+        except ValueError:
+            raise CommandError('--date must be in YYYY-MM-DD format')
+
+        period = options['period']
+        start, end = line_summary.period_range(period, day)
+        if options['refresh']:
+            refresh_range(start, end)
+
+        lines = options['lines'] or line_summary.lines_with_activity(start, end)
+        if not lines:
+            self.stdout.write(f"No production activity between {start} and {end}")
+            return
+
+        output_dir = options['output_dir'] or os.path.join(settings.MEDIA_ROOT, 'summaries')
+        os.makedirs(output_dir, exist_ok=True)
+
+        recipients = []
+        if options['email']:
+            recipients = list(
+                User.objects.filter(is_staff=True, is_active=True).exclude(email='').values_list('email', flat=True)
+            )
+
+        for production_line in lines:
+            summary = line_summary.build_line_summary(production_line, period, day)
+            pdf = line_summary.render_line_summary(summary).getvalue()
+            filename = line_summary.summary_filename(summary)
+            path = os.path.join(output_dir, filename)
+            with open(path, 'wb') as fileobj:
+                fileobj.write(pdf)
+            self.stdout.write(f"{production_line}: {path}")
+
+            if recipients:
+                enqueue_email(
+                    subject=f'AluOptimize {period} summary - {production_line} ({start} to {end})',
+                    body=f'Please find attached the {period} production summary for {production_line}.\n\nAluOptimize Team',
+                    to=recipients,
+                    attachment=(filename, pdf, 'application/pdf')
+                )
+
+        self.stdout.write(self.style.SUCCESS(f"Generated {len(lines)} {period} summary report(s)"))
@@ -0,0 +1,69 @@
+"""
+Fill the database with synthetic production data for load and scale tests.
+
+Usage:
+    DB_ENGINE=sqlite DB_NAME=/tmp/scale.sqlite3 python manage.py migrate
+    DB_ENGINE=sqlite DB_NAME=/tmp/scale.sqlite3 python manage.py generate_synthetic_data --inputs 1000000
+    python manage.py generate_synthetic_data --users 5000 --inputs 10000000 --seed 7 --end 2025-01-01
+
+The same --seed, volumes and --end reproduce the same rows on an empty
+database. Generated users are named synthetic_<n> and share the password
+'synthetic-pass'. Refuses to run with DEBUG off unless --force is given.
+"""
+from datetime import date, datetime, time, timedelta
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from backend.apps.core.utils.synthetic_data import generate
+
+
+class Command(BaseCommand):
+    help = 'Generate synthetic users and production data with bulk inserts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100, help='Users to create (about 2%% staff)')
+        parser.add_argument('--inputs', type=int, default=10000,
+                            help='Production inputs; about 80%% get an output, waste record, '
+                                 'recommendation and logs')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed')
+        parser.add_argument('--days', type=int, default=365, help='Length of the time window the rows span')
+        parser.add_argument('--end', default=None, help='Last day of the window (YYYY-MM-DD), default: now')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Inputs per bulk insert transaction')
+        parser.add_argument('--sent-ratio', type=float, default=0.7, help='Share of approved inputs sent to users')
+        parser.add_argument('--history-ratio', type=float, default=0.5, help='Share of outputs with RL history')
+        parser.add_argument('--transaction-ratio', type=float, default=0.6, help='Share of outputs with a transaction')
+        parser.add_argument('--rebuild-rollups', action='store_true',
+                            help='Run refresh_rollups and rebuild_latency_rollups for the window afterwards')
+        parser.add_argument('--force', action='store_true', help='Run even with DEBUG off')
+
+    def handle(self, *args, **options):
+        if not settings.DEBUG and not options['force']:
+            raise CommandError('DEBUG is off; pass --force to write synthetic data to this database')
+        end = None
+        if options['end']:
+            try:
+                end = timezone.make_aware(datetime.combine(date.fromisoformat(options['end']), time.max))
+            except ValueError:
+                raise CommandError('--end must be a date in YYYY-MM-DD format')
+
+        def report(done, total, rate):
+            self.stdout.write(f'{done}/{total} inputs ({rate:.0f} rows/s)')
+
+        counts = generate(
+            users=options['users'], inputs=options['inputs'], seed=options['seed'], days=options['days'],
+            end=end, batch_size=options['batch_size'], sent_ratio=options['sent_ratio'],
+            history_ratio=options['history_ratio'], transaction_ratio=options['transaction_ratio'],
+            on_progress=report if options['verbosity'] > 0 else None,
+        )
+        for name, count in counts.items():
+            self.stdout.write(f'{name}: {count}')
+
+        if options['rebuild_rollups']:
+            last_day = timezone.localtime(end).date() if end else timezone.localdate()
+            window = {'start': str(last_day - timedelta(days=options['days'])), 'end': str(last_day)}
+            call_command('refresh_rollups', **window, stdout=self.stdout)
+            call_command('rebuild_latency_rollups', **window, stdout=self.stdout)
+        self.stdout.write(self.style.SUCCESS(f"Generated synthetic data with seed {options['seed']}"))
@@ -0,0 +1,37 @@
+"""
+Prepare the production-line shards after `migrate --database <alias>`.
+
+Gives every shard its own id range for the sharded tables and copies all
+users and profiles from the default database, so foreign keys and joins
+resolve on each shard.
+
+Usage:
+    python manage.py migrate --database plant_north
+    python manage.py prepare_shards
+"""
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from backend.apps.core.utils.sharding import replicate_users, reserve_id_range
+from backend.config.shard_router import get_shard_aliases, get_line_shards
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Reserve per-shard id ranges and copy users to every shard'
+
+    def handle(self, *args, **options):
+        aliases = get_shard_aliases()
+        if len(aliases) == 1:
+            self.stdout.write('No shards configured (PRODUCTION_LINE_SHARDS is empty)')
+            return
+
+        users = User.objects.using('default').all()
+        for index, alias in enumerate(aliases[1:], start=1):
+            start = reserve_id_range(alias, index)
+            copied = replicate_users(users, [alias])
+            lines = sorted(line for line, target in get_line_shards().items() if target == alias)
+            self.stdout.write(self.style.SUCCESS(
+                f"{alias}: lines {', '.join(lines)}; ids from {start}; {copied} users copied"
+            ))
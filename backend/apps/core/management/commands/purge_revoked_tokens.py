@@ -0,0 +1,22 @@
+"""
+Delete revoked JWTs that have expired (they are refused by their expiry
+anyway) and user invalidations older than the refresh token lifetime,
+keeping both tables and their in-memory mirrors small.
+
+Usage:
+    python manage.py purge_revoked_tokens
+"""
+from django.core.management.base import BaseCommand
+
+from backend.apps.authapp.authentication import purge_invalidations
+from backend.apps.authapp.revocation import purge_expired
+
+
+class Command(BaseCommand):
+    help = 'Delete expired tokens from the revocation list and old user invalidations'
+
+    def handle(self, *args, **options):
+        deleted = purge_expired()
+        self.stdout.write(self.style.SUCCESS(f"Purged {deleted} expired revoked token(s)"))
+        deleted = purge_invalidations()
+        self.stdout.write(self.style.SUCCESS(f"Purged {deleted} old user invalidation(s)"))
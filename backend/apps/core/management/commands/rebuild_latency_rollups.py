@@ -0,0 +1,41 @@
+"""
+Recompute the per-minute prediction latency histograms from PredictionLog.
+
+New predictions update the histograms as they are logged; run this once to
+cover logs written before, or to repair a window.
+
+Usage:
+    python manage.py rebuild_latency_rollups --days 30
+    python manage.py rebuild_latency_rollups --start 2025-01-01 --end 2025-12-31
+"""
+from datetime import date, datetime, time, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from backend.apps.core.utils.latency import rebuild_range
+
+
+class Command(BaseCommand):
+    help = 'Rebuild prediction latency histograms from the prediction logs'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=7, help='Rebuild this many days ending today')
+        parser.add_argument('--start', help='First day to rebuild (YYYY-MM-DD)')
+        parser.add_argument('--end', help='Last day to rebuild (YYYY-MM-DD), defaults to today')
+
+    def handle(self, *args, **options):
+        today = timezone.localdate()
+        try:
+            end = date.fromisoformat(options['end']) if options['end'] else today
+            start = date.fromisoformat(options['start']) if options['start'] else end - timedelta(days=options['days'] - 1)
+        except ValueError:
+            raise CommandError('Dates must be in YYYY-MM-DD format')
+        if start > end:
+            raise CommandError('--start must not be after --end')
+
+        logs = rebuild_range(
+            timezone.make_aware(datetime.combine(start, time.min)),
+            timezone.make_aware(datetime.combine(end + timedelta(days=1), time.min)),
+        )
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt latency histograms from {logs} prediction logs ({start} to {end})"))
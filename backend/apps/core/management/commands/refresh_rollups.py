@@ -0,0 +1,36 @@
+"""
+Rebuild daily production rollups.
+
+Usage:
+    python manage.py refresh_rollups                 # the last 7 days, including today
+    python manage.py refresh_rollups --days 2        # cheap refresh for a frequent cron job
+    python manage.py refresh_rollups --start 2025-01-01 --end 2025-12-31   # backfill
+"""
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from backend.apps.core.utils.rollups import refresh_range
+
+
+class Command(BaseCommand):
+    help = 'Recompute per-day, per-line production rollups used by the summary reports'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=7, help='Refresh this many days ending today')
+        parser.add_argument('--start', help='First day to refresh (YYYY-MM-DD)')
+        parser.add_argument('--end', help='Last day to refresh (YYYY-MM-DD), defaults to today')
+
+    def handle(self, *args, **options):
+        today = timezone.localdate()
+        try:
+            end = date.fromisoformat(options['end']) if options['end'] else today
+            start = date.fromisoformat(options['start']) if options['start'] else end - timedelta(days=options['days'] - 1)
+        except ValueError:
+            raise CommandError('Dates must be in YYYY-MM-DD format')
+        if start > end:
+            raise CommandError('--start must not be after --end')
+
+        days = refresh_range(start, end)
+        self.stdout.write(self.style.SUCCESS(f"Refreshed rollups for {days} day(s) ({start} to {end})"))
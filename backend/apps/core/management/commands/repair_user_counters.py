@@ -0,0 +1,23 @@
+"""
+Recompute the per-user activity counters on UserProfile (inputs submitted,
+approved, rejected, last submission) from the production inputs on every
+shard. Run once after migrating, after bulk loads, or whenever the counters
+look off.
+
+Usage:
+    python manage.py repair_user_counters
+"""
+from django.core.management.base import BaseCommand
+
+from backend.apps.core.utils.user_counters import recompute
+
+
+class Command(BaseCommand):
+    help = 'Recompute the per-user input counters stored on user profiles'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Profiles updated per query')
+
+    def handle(self, *args, **options):
+        changed = recompute(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Repaired counters of {changed} user profile(s)"))
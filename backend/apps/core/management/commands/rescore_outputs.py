@@ -0,0 +1,73 @@
+"""
+Re-score every production output with the current engine
+(ml_engine.MODEL_VERSION) and compare the results with the live values or
+an earlier version.
+
+Usage:
+    python manage.py rescore_outputs
+    python manage.py rescore_outputs --workers 4 --chunk-size 2000
+    python manage.py rescore_outputs --report-only --baseline v1.0.0-simple --json report.json
+
+Results go to PredictionRescore, one row per output and version; the live
+values on ProductionOutput are not changed. Progress is checkpointed per
+version, so an interrupted run resumes where it stopped.
+"""
+import json
+
+from django.core.management.base import BaseCommand
+
+from backend.apps.core.utils.batch_jobs import run_chunked
+from backend.apps.core.utils.rescoring import LIVE, METRICS, compare_versions, job_name, rescore_chunk
+from backend.apps.prediction.ml_engine import MODEL_VERSION
+from backend.apps.prediction.models import ProductionOutput
+from backend.config.shard_router import get_shard_aliases
+
+
+class Command(BaseCommand):
+    help = 'Re-score historical outputs with the current model version and report the differences'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=2000, help='Outputs scored per chunk')
+        parser.add_argument('--workers', type=int, default=1, help='Worker processes')
+        parser.add_argument('--sleep', type=float, default=0, help='Seconds to pause between chunks')
+        parser.add_argument('--restart', action='store_true', help='Ignore the checkpoint and start over')
+        parser.add_argument('--report-only', action='store_true', help='Skip scoring, only compare')
+        parser.add_argument('--baseline', default=LIVE,
+                            help=f'Version to compare with, or "{LIVE}" for the values on ProductionOutput')
+        parser.add_argument('--tolerance', type=float, default=0.01, help='Differences above this count as changed')
+        parser.add_argument('--json', default=None, help='Also write the report to this file')
+
+    def handle(self, *args, **options):
+        if not options['report_only']:
+            for alias in get_shard_aliases():
+                stats = run_chunked(
+                    job_name(MODEL_VERSION), alias, ProductionOutput.objects.using(alias).all(), rescore_chunk,
+                    chunk_size=options['chunk_size'],
+                    workers=options['workers'],
+                    sleep=options['sleep'],
+                    restart=options['restart'],
+                )
+                self.stdout.write(self.style.SUCCESS(
+                    f"{alias}: scored {stats['processed']} outputs with {MODEL_VERSION} in {stats['seconds']:.1f}s "
+                    f"({stats['rows_per_second']:.0f}/s)"
+                ))
+
+        report = compare_versions(MODEL_VERSION, options['baseline'], options['tolerance'])
+        self.stdout.write(self.style.MIGRATE_HEADING(f"{report['candidate']} vs {report['baseline']}"))
+        for name, summary in [('All lines', report['total']), *report['lines'].items()]:
+            self.stdout.write(f"{name} ({summary['rows']} outputs)")
+            for metric in METRICS:
+                values = summary[metric]
+                if not values['compared']:
+                    self.stdout.write(f"  {metric:<18} nothing to compare")
+                    continue
+                self.stdout.write(
+                    f"  {metric:<18} mean {values['baseline_mean']:.2f} -> {values['candidate_mean']:.2f}, "
+                    f"mean |diff| {values['mean_abs_diff']:.3f}, max |diff| {values['max_abs_diff']:.3f}, "
+                    f"changed {values['changed']}/{values['compared']}"
+                )
+
+        if options['json']:
+            with open(options['json'], 'w') as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(f"Wrote {options['json']}")
@@ -0,0 +1,286 @@
+"""
+Per-request performance metrics in the Prometheus text format.
+
+RequestMetricsMiddleware records, per URL route and method, request counts
+by status, latency and response size histograms, database query counts
+and time, total response bytes and unhandled exceptions. Everything is
+aggregated in process memory (a few dict updates per request) and exposed
+at /api/metrics/.
+
+Under gunicorn every worker has its own registry. With METRICS_DIR set (a
+directory on the local host), each worker writes a snapshot there at most
+every METRICS_FLUSH_SECONDS and the metrics view merges the snapshots of
+all live workers; snapshots of exited workers are deleted when scraped.
+Without METRICS_DIR the endpoint reports the worker that serves it.
+"""
+import hmac
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from bisect import bisect_left
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse
+from rest_framework.views import APIView
+
+logger = logging.getLogger(__name__)
+
+PREFIX = 'aluoptimize_'
+
+# Upper bounds in seconds; +Inf is implied
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+# Upper bounds in bytes, 256 B to 4 MiB
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+COUNTERS = {
+    'http_requests_total': ('Requests served', ('view', 'method', 'status')),
+    'http_exceptions_total': ('Unhandled exceptions raised while serving requests', ('view', 'method')),
+    'http_response_bytes_total': ('Bytes of non-streaming response bodies', ('view', 'method')),
+    'db_queries_total': ('Database queries run while serving requests', ('view', 'method')),
+    'db_query_seconds_total': ('Time spent in database queries while serving requests', ('view', 'method')),
+}
+
+HISTOGRAMS = {
+    'http_request_duration_seconds': ('Request latency until the response is returned', ('view', 'method'), LATENCY_BUCKETS),
+    'http_response_size_bytes': ('Size of non-streaming response bodies', ('view', 'method'), SIZE_BUCKETS),
+}
+
+
+class MetricsRegistry:
+    """
+    Thread-safe counters and histograms keyed by label values. A histogram
+    value is [count per bucket..., count above the last bucket, sum].
+    """
+
+    def __init__(self, counters=COUNTERS, histograms=HISTOGRAMS):
+        self.counters = counters
+        self.histograms = histograms
+        self.values = {name: {} for name in [*counters, *histograms]}
+        self.lock = threading.Lock()
+
+    def inc(self, name, labels, amount=1):
+        with self.lock:
+            series = self.values[name]
+            series[labels] = series.get(labels, 0) + amount
+
+    def observe(self, name, labels, value):
+        buckets = self.histograms[name][2]
+        with self.lock:
+            series = self.values[name]
+            histogram = series.get(labels)
+            if histogram is None:
+                histogram = series[labels] = [0] * (len(buckets) + 2)
+            histogram[bisect_left(buckets, value)] += 1
+            histogram[-1] += value
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                name: [[list(labels), list(value) if isinstance(value, list) else value] for labels, value in series.items()]
+                for name, series in self.values.items()
+            }
+
+    def merge(self, snapshot):
+        """Add a snapshot (e.g. another worker's) into this registry."""
+        with self.lock:
+            for name, rows in snapshot.items():
+                series = self.values.get(name)
+                if series is None:
+                    continue
+                for labels, value in rows:
+                    labels = tuple(labels)
+                    if isinstance(value, list):
+                        current = series.setdefault(labels, [0] * len(value))
+                        for index, amount in enumerate(value):
+                            current[index] += amount
+                    else:
+                        series[labels] = series.get(labels, 0) + value
+
+    def render(self):
+        """The registry in the Prometheus text exposition format."""
+        lines = []
+        with self.lock:
+            for name, (help_text, label_names) in self.counters.items():
+                lines.append(f'# HELP {PREFIX}{name} {help_text}')
+                lines.append(f'# TYPE {PREFIX}{name} counter')
+                for labels, value in sorted(self.values[name].items()):
+                    lines.append(f'{PREFIX}{name}{_labels(label_names, labels)} {_number(value)}')
+            for name, (help_text, label_names, buckets) in self.histograms.items():
+                lines.append(f'# HELP {PREFIX}{name} {help_text}')
+                lines.append(f'# TYPE {PREFIX}{name} histogram')
+                for labels, value in sorted(self.values[name].items()):
+                    cumulative = 0
+                    for bound, count in zip([*buckets, '+Inf'], value[:-1]):
+                        cumulative += count
+                        lines.append(f'{PREFIX}{name}_bucket{_labels((*label_names, "le"), (*labels, bound))} {cumulative}')
+                    lines.append(f'{PREFIX}{name}_sum{_labels(label_names, labels)} {_number(value[-1])}')
+                    lines.append(f'{PREFIX}{name}_count{_labels(label_names, labels)} {cumulative}')
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names, values):
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + '}'
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+registry = MetricsRegistry()
+
+# Distinguishes this process's snapshot file from earlier processes with the same pid
+_process_token = uuid.uuid4().hex[:8]
+_last_flush = 0.0
+
+
+def get_metrics_dir():
+    return getattr(settings, 'METRICS_DIR', None)
+
+
+def flush(force=False):
+    """Write this process's snapshot to METRICS_DIR, at most every METRICS_FLUSH_SECONDS."""
+    global _last_flush
+    metrics_dir = get_metrics_dir()
+    now = time.monotonic()
+    if not metrics_dir or (not force and now - _last_flush < getattr(settings, 'METRICS_FLUSH_SECONDS', 5)):
+        return
+    _last_flush = now
+    try:
+        os.makedirs(metrics_dir, exist_ok=True)
+        path = os.path.join(metrics_dir, f'{os.getpid()}-{_process_token}.json')
+        with open(path + '.tmp', 'w') as f:
+            json.dump(registry.snapshot(), f)
+        os.replace(path + '.tmp', path)
+    except OSError as e:
+        logger.error(f"Could not write metrics snapshot: {str(e)}")
+
+
+def _is_stale(name):
+    """Whether a snapshot file (<pid>-<token>.json) was written by a process that has exited."""
+    pid, _, token = name[:-len('.json')].partition('-')
+    if not pid.isdigit() or os.name != 'posix':
+        return False
+    if int(pid) == os.getpid():
+        # An earlier process that had our pid
+        return token != _process_token
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return True
+    except PermissionError:
+        pass
+    return False
+
+
+def collect():
+    """A registry with the metrics of every live worker (just this one without METRICS_DIR)."""
+    metrics_dir = get_metrics_dir()
+    if not metrics_dir:
+        return registry
+    flush(force=True)
+    combined = MetricsRegistry()
+    for name in sorted(os.listdir(metrics_dir)):
+        if not name.endswith('.json'):
+            continue
+        if _is_stale(name):
+            try:
+                os.remove(os.path.join(metrics_dir, name))
+            except OSError:
+                pass
+            continue
+        try:
+            with open(os.path.join(metrics_dir, name)) as f:
+                combined.merge(json.load(f))
+        except (OSError, ValueError) as e:
+            logger.error(f"Skipping metrics snapshot {name}: {str(e)}")
+    return combined
+
+
+class _QueryTimer:
+    """
+    Database execute wrapper counting the queries of one request and their
+    time. Queries run in fan_out() worker threads use their own connections
+    and are not counted.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.seconds += time.perf_counter() - started
+
+
+class RequestMetricsMiddleware:
+    """Record latency, status, query and size metrics for every request."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = getattr(settings, 'METRICS_ENABLED', True)
+
+    def __call__(self, request):
+        if not self.enabled:
+            return self.get_response(request)
+
+        timer = _QueryTimer()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(timer))
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - started
+
+        match = getattr(request, 'resolver_match', None)
+        # The route pattern, not the path, keeps the number of series bounded
+        labels = (f'/{match.route}' if match else '<unmatched>', request.method)
+        registry.inc('http_requests_total', (*labels, str(response.status_code)))
+        registry.observe('http_request_duration_seconds', labels, elapsed)
+        registry.inc('db_queries_total', labels, timer.count)
+        registry.inc('db_query_seconds_total', labels, timer.seconds)
+        if not response.streaming:
+            registry.inc('http_response_bytes_total', labels, len(response.content))
+            registry.observe('http_response_size_bytes', labels, len(response.content))
+        flush()
+        return response
+
+    def process_exception(self, request, exception):
+        match = getattr(request, 'resolver_match', None)
+        registry.inc('http_exceptions_total', (f'/{match.route}' if match else '<unmatched>', request.method))
+
+
+class MetricsView(APIView):
+    """
+    Prometheus scrape endpoint. Scrapers send METRICS_TOKEN as a bearer
+    token and staff users can read it with their own credentials; it is
+    only open to anyone when METRICS_PUBLIC is set.
+    """
+    permission_classes = []
+
+    def perform_authentication(self, request):
+        # Authenticate lazily: a scrape token would otherwise be rejected as an invalid JWT
+        pass
+
+    def get(self, request):
+        token = getattr(settings, 'METRICS_TOKEN', '')
+        scraper = bool(token) and hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}')
+        if not (scraper or getattr(settings, 'METRICS_PUBLIC', False)):
+            if not request.user.is_authenticated:
+                return HttpResponse('Unauthorized\n', status=401, content_type='text/plain')
+            if not request.user.is_staff:
+                return HttpResponse('Forbidden\n', status=403, content_type='text/plain')
+        return HttpResponse(collect().render(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,73 @@
+# Generated by Django 5.2.7 on 2026-10-19 04:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_emailoutbox'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductionRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('date', models.DateField()),
+                ('production_line', models.CharField(max_length=50)),
+                ('inputs_submitted', models.PositiveIntegerField(default=0)),
+                ('inputs_approved', models.PositiveIntegerField(default=0)),
+                ('inputs_rejected', models.PositiveIntegerField(default=0)),
+                ('predictions', models.PositiveIntegerField(default=0)),
+                ('predicted_output_total', models.FloatField(default=0, help_text='Sum of predicted output in kg')),
+                ('energy_efficiency_total', models.FloatField(default=0, help_text='Sum of energy efficiency scores')),
+                ('output_quality_total', models.FloatField(default=0, help_text='Sum of output quality scores')),
+                ('waste_records', models.PositiveIntegerField(default=0)),
+                ('waste_amount_total', models.FloatField(default=0)),
+                ('estimated_savings_total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+            ],
+            options={
+                'ordering': ['-date', 'production_line'],
+                'constraints': [models.UniqueConstraint(fields=('production_line', 'date'), name='uniq_production_rollup_line_date')],
+            },
+        ),
+        migrations.CreateModel(
+            name='RecommendationRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('date', models.DateField()),
+                ('production_line', models.CharField(max_length=50)),
+                ('text_hash', models.CharField(help_text='SHA-1 of recommendation_text', max_length=40)),
+                ('recommendation_text', models.TextField()),
+                ('occurrences', models.PositiveIntegerField(default=0)),
+                ('estimated_savings_total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+            ],
+            options={
+                'ordering': ['-date', 'production_line', '-occurrences'],
+                'indexes': [models.Index(fields=['production_line', 'date'], name='core_recomm_product_226aab_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='WasteTypeRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('date', models.DateField()),
+                ('production_line', models.CharField(max_length=50)),
+                ('waste_type', models.CharField(max_length=100)),
+                ('unit', models.CharField(max_length=10)),
+                ('records', models.PositiveIntegerField(default=0)),
+                ('amount_total', models.FloatField(default=0)),
+            ],
+            options={
+                'ordering': ['-date', 'production_line', 'waste_type'],
+                'indexes': [models.Index(fields=['production_line', 'date'], name='core_wastet_product_a89204_idx')],
+            },
+        ),
+    ]
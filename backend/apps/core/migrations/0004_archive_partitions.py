@@ -0,0 +1,32 @@
+# Generated by Django 5.2.7 on 2026-10-19 04:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_production_rollups'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivePartition',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('dataset', models.CharField(max_length=50)),
+                ('source_db', models.CharField(default='default', max_length=50)),
+                ('day', models.DateField()),
+                ('path', models.CharField(help_text='Archive file, relative to ARCHIVE_ROOT', max_length=500)),
+                ('min_id', models.BigIntegerField()),
+                ('max_id', models.BigIntegerField()),
+                ('row_count', models.PositiveIntegerField()),
+            ],
+            options={
+                'ordering': ['dataset', 'day'],
+                'indexes': [models.Index(fields=['dataset', 'min_id', 'max_id'], name='core_archiv_dataset_27514d_idx'), models.Index(fields=['dataset', 'source_db', 'day'], name='core_archiv_dataset_7b40ad_idx')],
+            },
+        ),
+    ]
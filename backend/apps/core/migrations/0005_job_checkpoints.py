@@ -0,0 +1,30 @@
+# Generated by Django 5.2.7 on 2026-10-19 04:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_archive_partitions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('job', models.CharField(max_length=100)),
+                ('source_db', models.CharField(default='default', max_length=50)),
+                ('last_id', models.BigIntegerField(default=0)),
+                ('processed', models.PositiveIntegerField(default=0)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ['job', 'source_db'],
+                'constraints': [models.UniqueConstraint(fields=('job', 'source_db'), name='uniq_job_checkpoint_job_db')],
+            },
+        ),
+    ]
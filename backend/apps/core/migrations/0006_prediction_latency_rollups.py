@@ -0,0 +1,31 @@
+# Generated by Django 5.2.7 on 2026-10-19 04:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_job_checkpoints'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PredictionLatencyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('minute', models.DateTimeField()),
+                ('model_version', models.CharField(max_length=50)),
+                ('production_line', models.CharField(max_length=50)),
+                ('bucket', models.PositiveSmallIntegerField()),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('total_ms', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['-minute', 'model_version', 'production_line', 'bucket'],
+                'constraints': [models.UniqueConstraint(fields=('minute', 'model_version', 'production_line', 'bucket'), name='uniq_latency_rollup_minute_bucket')],
+            },
+        ),
+    ]
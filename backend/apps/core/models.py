@@ -1,5 +1,6 @@
-from django.db import models
+from django.db import models, router
 from django.conf import settings
+from django.utils import timezone
 
 class TimestampedModel(models.Model):
     """
@@ -13,6 +14,34 @@ class TimestampedModel(models.Model):
         ordering = ['-created_at']
 
 
+class ShardedQuerySet(models.QuerySet):
+    """
+    QuerySet for production data partitioned by production line (see
+    backend/config/shard_router.py). A plain create() or bulk_create() picks
+    its database before the rows exist, so here each new row is routed
+    individually instead.
+    """
+
+    def create(self, **kwargs):
+        if self._db is not None:
+            return super().create(**kwargs)
+        obj = self.model(**kwargs)
+        # Model.save() asks the router with the instance as a hint
+        obj.save(force_insert=True)
+        return obj
+
+    def bulk_create(self, objs, *args, **kwargs):
+        if self._db is not None:
+            return super().bulk_create(objs, *args, **kwargs)
+        objs = list(objs)
+        groups = {}
+        for obj in objs:
+            groups.setdefault(router.db_for_write(self.model, instance=obj), []).append(obj)
+        for alias, group in groups.items():
+            self.using(alias).bulk_create(group, *args, **kwargs)
+        return objs
+
+
 class Transaction(TimestampedModel):
     """
     Model to track payments and transactions for predictions.
@@ -100,3 +129,201 @@ class Transaction(TimestampedModel):
     
     def __str__(self):
         return f"{self.transaction_type} - {self.user.username} - {self.amount} {self.currency} ({self.payment_status})"
+
+
+class EmailOutbox(TimestampedModel):
+    """
+    Outgoing email queued for delivery by the outbox worker.
+    Attachments are stored on disk and referenced by path, not kept in the row.
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sending', 'Sending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ]
+
+    to = models.JSONField(help_text='List of recipient addresses')
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    attachment_path = models.CharField(
+        max_length=500,
+        blank=True,
+        help_text='Attachment file path relative to MEDIA_ROOT'
+    )
+    attachment_name = models.CharField(max_length=255, blank=True)
+    attachment_mimetype = models.CharField(max_length=100, blank=True)
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default='pending'
+    )
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(
+        default=timezone.now,
+        help_text='Earliest time the worker may (re)try this message'
+    )
+    last_error = models.TextField(blank=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='queued_emails'
+    )
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = 'Outbox Email'
+        verbose_name_plural = 'Outbox Emails'
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} -> {', '.join(self.to)} ({self.status})"
+
+
+class ProductionRollup(TimestampedModel):
+    """
+    Per-day, per-production-line totals, rebuilt by the refresh_rollups command.
+    Summary reports read these rows instead of scanning the production tables.
+    """
+    date = models.DateField()
+    production_line = models.CharField(max_length=50)
+    inputs_submitted = models.PositiveIntegerField(default=0)
+    inputs_approved = models.PositiveIntegerField(default=0)
+    inputs_rejected = models.PositiveIntegerField(default=0)
+    predictions = models.PositiveIntegerField(default=0)
+    predicted_output_total = models.FloatField(default=0, help_text='Sum of predicted output in kg')
+    energy_efficiency_total = models.FloatField(default=0, help_text='Sum of energy efficiency scores')
+    output_quality_total = models.FloatField(default=0, help_text='Sum of output quality scores')
+    waste_records = models.PositiveIntegerField(default=0)
+    waste_amount_total = models.FloatField(default=0)
+    estimated_savings_total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        ordering = ['-date', 'production_line']
+        constraints = [
+            models.UniqueConstraint(fields=['production_line', 'date'], name='uniq_production_rollup_line_date'),
+        ]
+
+    def __str__(self):
+        return f"{self.production_line} - {self.date}"
+
+
+class WasteTypeRollup(TimestampedModel):
+    """
+    Per-day waste totals by production line, waste type and unit.
+    """
+    date = models.DateField()
+    production_line = models.CharField(max_length=50)
+    waste_type = models.CharField(max_length=100)
+    unit = models.CharField(max_length=10)
+    records = models.PositiveIntegerField(default=0)
+    amount_total = models.FloatField(default=0)
+
+    class Meta:
+        ordering = ['-date', 'production_line', 'waste_type']
+        indexes = [
+            models.Index(fields=['production_line', 'date']),
+        ]
+
+    def __str__(self):
+        return f"{self.production_line} - {self.date} - {self.waste_type}"
+
+
+class RecommendationRollup(TimestampedModel):
+    """
+    Per-day counts of each distinct recommendation text by production line.
+    """
+    date = models.DateField()
+    production_line = models.CharField(max_length=50)
+    text_hash = models.CharField(max_length=40, help_text='SHA-1 of recommendation_text')
+    recommendation_text = models.TextField()
+    occurrences = models.PositiveIntegerField(default=0)
+    estimated_savings_total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        ordering = ['-date', 'production_line', '-occurrences']
+        indexes = [
+            models.Index(fields=['production_line', 'date']),
+        ]
+
+    def __str__(self):
+        return f"{self.production_line} - {self.date} - {self.occurrences}x"
+
+
+class PredictionLatencyRollup(TimestampedModel):
+    """
+    Per-minute latency histogram of predictions: how many predictions of a
+    model version and production line fell into one latency bucket (see
+    backend/apps/core/utils/latency.py). Incremented as PredictionLog rows
+    are created, so latency analytics never scan the log table.
+    """
+    minute = models.DateTimeField()
+    model_version = models.CharField(max_length=50)
+    production_line = models.CharField(max_length=50)
+    bucket = models.PositiveSmallIntegerField()
+    count = models.PositiveIntegerField(default=0)
+    total_ms = models.BigIntegerField(default=0)
+
+    class Meta:
+        ordering = ['-minute', 'model_version', 'production_line', 'bucket']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['minute', 'model_version', 'production_line', 'bucket'],
+                name='uniq_latency_rollup_minute_bucket'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.minute:%Y-%m-%d %H:%M} {self.model_version} {self.production_line} bucket {self.bucket}: {self.count}"
+
+
+class ArchivePartition(TimestampedModel):
+    """
+    One archive file of cold rows moved out of a live table: the rows of a
+    single dataset, source database and day. Lookups by id find the
+    partition through the id range, then read one block via the sidecar
+    index stored next to the file.
+    """
+    dataset = models.CharField(max_length=50)
+    source_db = models.CharField(max_length=50, default='default')
+    day = models.DateField()
+    path = models.CharField(max_length=500, help_text='Archive file, relative to ARCHIVE_ROOT')
+    min_id = models.BigIntegerField()
+    max_id = models.BigIntegerField()
+    row_count = models.PositiveIntegerField()
+
+    class Meta:
+        ordering = ['dataset', 'day']
+        indexes = [
+            models.Index(fields=['dataset', 'min_id', 'max_id']),
+            models.Index(fields=['dataset', 'source_db', 'day']),
+        ]
+
+    def __str__(self):
+        return f"{self.dataset} {self.day} ({self.row_count} rows)"
+
+
+class JobCheckpoint(TimestampedModel):
+    """
+    Progress of a resumable batch job over one database: every row up to
+    last_id has been handled, so a restarted run continues after it.
+    """
+    job = models.CharField(max_length=100)
+    source_db = models.CharField(max_length=50, default='default')
+    last_id = models.BigIntegerField(default=0)
+    processed = models.PositiveIntegerField(default=0)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['job', 'source_db']
+        constraints = [
+            models.UniqueConstraint(fields=['job', 'source_db'], name='uniq_job_checkpoint_job_db'),
+        ]
+
+    def __str__(self):
+        return f"{self.job} on {self.source_db}: {self.processed} rows, up to id {self.last_id}"
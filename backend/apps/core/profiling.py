@@ -0,0 +1,298 @@
+"""
+On-demand profiling of single requests.
+
+A staff user mints a short-lived signed token (POST
+/api/admin-panel/profiles/token/) and sends it in the X-Profile header of
+the request to profile (never in the URL, where it would end up in access
+logs). ProfilingMiddleware then runs that one request under a profiler and
+records every SQL statement it issues, with duration and call site:
+
+- mode 'cprofile': deterministic cProfile, downloadable as a .pstats file
+  (python -m pstats, snakeviz);
+- mode 'sample': a stack sampler thread (PROFILING_SAMPLE_INTERVAL_MS),
+  cheaper on long requests, downloadable as speedscope JSON.
+
+Profiles go to PROFILING_DIR, shared by all workers like the metrics
+snapshots; only the newest PROFILING_MAX_PROFILES are kept. The response
+carries the profile id in X-Profile-Id. A profile is only stored when the
+request authenticated as the user the token was minted for, so a leaked
+token cannot capture other users' requests. Requests without a valid token
+are not affected. Streaming responses are profiled up to the first byte
+only.
+"""
+import cProfile
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.utils import timezone
+
+from .slow_queries import _call_site, _json_param
+
+logger = logging.getLogger(__name__)
+
+HEADER = 'HTTP_X_PROFILE'
+MODES = ('cprofile', 'sample')
+FORMATS = {
+    # format: (file suffix, content type)
+    'pstats': ('.pstats', 'application/octet-stream'),
+    'speedscope': ('.speedscope.json', 'application/json'),
+    'sql': ('.sql.json', 'application/json'),
+}
+
+_SALT = 'aluoptimize.profiling'
+_PROFILE_ID = re.compile(r'^\d{20}-[0-9a-f]{8}$')
+
+
+def make_token(user, mode='cprofile'):
+    """Signed token letting user's requests be profiled until it expires."""
+    if mode not in MODES:
+        raise ValueError(f'mode must be one of {", ".join(MODES)}')
+    return signing.dumps({'user': user.pk, 'mode': mode}, salt=_SALT)
+
+
+def read_token(token):
+    """The (user, mode) of a valid token from an active staff user, else None."""
+    max_age = getattr(settings, 'PROFILING_TOKEN_MAX_AGE', 3600)
+    try:
+        payload = signing.loads(token, salt=_SALT, max_age=max_age)
+    except signing.BadSignature:
+        return None
+    user = get_user_model().objects.filter(pk=payload.get('user'), is_active=True).first()
+    if user is None or not (user.is_staff or user.is_superuser) or payload.get('mode') not in MODES:
+        return None
+    return user, payload['mode']
+
+
+class _SqlTrace:
+    """Database execute wrapper recording every statement of the request."""
+
+    def __init__(self, alias, statements):
+        self.alias = alias
+        self.statements = statements
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.statements.append({
+                'sql': sql,
+                'params': [] if many else [_json_param(value) for value in params or ()],
+                'many': many,
+                'ms': round((time.perf_counter() - started) * 1000, 3),
+                'database': self.alias,
+                'call_site': _call_site(),
+            })
+
+
+class StackSampler(threading.Thread):
+    """Samples the stack of one thread every interval seconds."""
+
+    def __init__(self, thread_id, interval):
+        super().__init__(daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append((code.co_name, code.co_filename, code.co_firstlineno))
+                frame = frame.f_back
+            if stack:
+                self.stacks[tuple(reversed(stack))] += 1
+
+    def stop(self):
+        self._stopped.set()
+        self.join()
+
+    def speedscope(self, name):
+        """The samples as a speedscope 'sampled' profile, weighted in milliseconds."""
+        frames, index, samples, weights = [], {}, [], []
+        for stack, count in self.stacks.items():
+            for frame in stack:
+                if frame not in index:
+                    index[frame] = len(frames)
+                    frames.append({'name': frame[0], 'file': frame[1], 'line': frame[2]})
+            samples.append([index[frame] for frame in stack])
+            weights.append(count * self.interval * 1000)
+        return {
+            '$schema': 'https://www.speedscope.app/file-format-schema.json',
+            'name': name,
+            'exporter': 'aluoptimize',
+            'shared': {'frames': frames},
+            'profiles': [{
+                'type': 'sampled', 'name': name, 'unit': 'milliseconds',
+                'startValue': 0, 'endValue': sum(weights), 'samples': samples, 'weights': weights,
+            }],
+        }
+
+
+def get_profiling_dir():
+    return getattr(settings, 'PROFILING_DIR', None)
+
+
+def _path(profile_id, suffix):
+    return os.path.join(get_profiling_dir(), profile_id + suffix)
+
+
+def _write(path, write):
+    with open(path + '.tmp', 'wb') as f:
+        write(f)
+    os.replace(path + '.tmp', path)
+
+
+def save_profile(meta, statements, profiler=None, sampler=None):
+    """Store one profile and drop the oldest beyond PROFILING_MAX_PROFILES. Returns its id."""
+    profiling_dir = get_profiling_dir()
+    profile_id = f"{timezone.now():%Y%m%d%H%M%S%f}-{uuid.uuid4().hex[:8]}"
+    meta = {'id': profile_id, **meta, 'formats': ['sql', 'pstats' if profiler else 'speedscope']}
+    os.makedirs(profiling_dir, exist_ok=True)
+    if profiler is not None:
+        profiler.dump_stats(_path(profile_id, FORMATS['pstats'][0]))
+    if sampler is not None:
+        speedscope = sampler.speedscope(f"{meta['method']} {meta['path']}")
+        _write(_path(profile_id, FORMATS['speedscope'][0]), lambda f: f.write(json.dumps(speedscope).encode()))
+    _write(_path(profile_id, FORMATS['sql'][0]), lambda f: f.write(json.dumps(statements).encode()))
+    # The metadata file is written last: a profile is listed once it is complete
+    _write(_path(profile_id, '.json'), lambda f: f.write(json.dumps(meta).encode()))
+    _prune()
+    return profile_id
+
+
+def _prune():
+    limit = getattr(settings, 'PROFILING_MAX_PROFILES', 50)
+    for meta in list_profiles()[limit:]:
+        delete_profile(meta['id'])
+
+
+def list_profiles():
+    """Metadata of the stored profiles, newest first."""
+    profiling_dir = get_profiling_dir()
+    if not profiling_dir or not os.path.isdir(profiling_dir):
+        return []
+    profiles = []
+    for name in sorted(os.listdir(profiling_dir), reverse=True):
+        profile_id = name[:-len('.json')]
+        if not name.endswith('.json') or not _PROFILE_ID.match(profile_id):
+            continue
+        try:
+            with open(os.path.join(profiling_dir, name)) as f:
+                profiles.append(json.load(f))
+        except (OSError, ValueError) as e:
+            logger.error(f"Skipping profile {name}: {str(e)}")
+    return profiles
+
+
+def get_profile(profile_id):
+    """Metadata of one profile, or None."""
+    if not _PROFILE_ID.match(profile_id or '') or not get_profiling_dir():
+        return None
+    try:
+        with open(_path(profile_id, '.json')) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def profile_file(profile_id, output_format):
+    """(path, content type) of a stored profile file, or None."""
+    meta = get_profile(profile_id)
+    if meta is None or output_format not in meta['formats']:
+        return None
+    suffix, content_type = FORMATS[output_format]
+    path = _path(profile_id, suffix)
+    return (path, content_type) if os.path.exists(path) else None
+
+
+def delete_profile(profile_id):
+    for suffix in ('.json', *(suffix for suffix, _ in FORMATS.values())):
+        try:
+            os.remove(_path(profile_id, suffix))
+        except FileNotFoundError:
+            pass
+
+
+class ProfilingMiddleware:
+    """Profile requests that carry a valid X-Profile token of their own user."""
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'PROFILING_ENABLED', True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = request.META.get(HEADER)
+        granted = read_token(token) if token else None
+        if granted is None:
+            return self.get_response(request)
+        user, mode = granted
+
+        statements = []
+        profiler = sampler = None
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(_SqlTrace(alias, statements)))
+            if mode == 'cprofile':
+                profiler = cProfile.Profile()
+                try:
+                    profiler.enable()
+                except ValueError:
+                    # Another profiler (or a debugger) already owns the hook
+                    profiler = None
+                    mode = 'sample'
+            if mode == 'sample':
+                interval = getattr(settings, 'PROFILING_SAMPLE_INTERVAL_MS', 1) / 1000
+                sampler = StackSampler(threading.get_ident(), interval)
+                sampler.start()
+            try:
+                response = self.get_response(request)
+            finally:
+                if profiler is not None:
+                    profiler.disable()
+                if sampler is not None:
+                    sampler.stop()
+        duration_ms = (time.perf_counter() - started) * 1000
+
+        # Authentication runs in the view (DRF sets request.user there), so
+        # the requester is only known now
+        if getattr(getattr(request, 'user', None), 'pk', None) != user.pk:
+            logger.warning(f"Profiling token of {user.username} used by another requester on {request.path}")
+            return response
+
+        match = getattr(request, 'resolver_match', None)
+        meta = {
+            'method': request.method,
+            'path': request.path,
+            'view': f'{request.method} /{match.route}' if match else f'{request.method} <unmatched>',
+            'status': response.status_code,
+            'mode': mode,
+            'requested_by': user.username,
+            'duration_ms': round(duration_ms, 3),
+            'queries': len(statements),
+            'sql_ms': round(sum(statement['ms'] for statement in statements), 3),
+            'created_at': timezone.now().isoformat(),
+        }
+        try:
+            response['X-Profile-Id'] = save_profile(meta, statements, profiler, sampler)
+        except OSError as e:
+            logger.error(f"Could not store profile of {request.path}: {str(e)}")
+        return response
@@ -0,0 +1,49 @@
+import logging
+
+from django.db import DatabaseError, transaction
+from django.db.models.signals import post_init, post_save
+from django.dispatch import receiver
+
+from backend.apps.prediction.models import PredictionLog, ProductionInput
+
+logger = logging.getLogger(__name__)
+
+
+@receiver(post_save, sender=PredictionLog)
+def record_prediction_latency(sender, instance, created, raw=False, **kwargs):
+    # Keep the latency histograms current; a failure must not fail the prediction.
+    # The savepoint rolls back just this update, so the caller's transaction
+    # stays usable (PostgreSQL aborts the whole transaction on an error).
+    if not created or raw:
+        return
+    from .utils.latency import record_prediction
+    try:
+        with transaction.atomic():
+            record_prediction(instance)
+    except DatabaseError as e:
+        logger.error(f"Could not record latency of prediction log {instance.pk}: {str(e)}")
+
+
+@receiver(post_init, sender=ProductionInput)
+def remember_input_status(sender, instance, **kwargs):
+    # Deferred loads (.only()) without the status are never published
+    instance._events_status = instance.__dict__.get('status')
+
+
+@receiver(post_save, sender=ProductionInput)
+def publish_input_event(sender, instance, created, raw=False, using=None, **kwargs):
+    # Push the pending queue change to staff dashboards once it is committed
+    if raw:
+        return
+    from . import events
+    status = instance.__dict__.get('status')
+    if created:
+        event_type = 'new'
+    elif status != instance._events_status and status in events.EVENT_TYPES:
+        event_type = status
+    else:
+        event_type = None
+    previous_status, instance._events_status = instance._events_status, status
+    if event_type:
+        data = events.input_event_data(instance, None if created else previous_status)
+        transaction.on_commit(lambda: events.publish(event_type, data), using=using)
@@ -0,0 +1,195 @@
+"""
+Opt-in capture of slow SQL statements.
+
+With SLOW_QUERY_CAPTURE enabled, SlowQueryMiddleware times every statement
+of a request and keeps those slower than SLOW_QUERY_THRESHOLD_MS in a ring
+buffer of the last SLOW_QUERY_BUFFER_SIZE entries: the normalized SQL (to
+group repeats), one sample with its parameters, the duration, the route
+and the innermost call site in the project code.
+
+Like the metrics snapshots, each worker process writes its buffer to
+SLOW_QUERY_DIR after a request that captured something, so the
+advise_indexes command can replay the statements of all workers through
+EXPLAIN (see backend/apps/core/utils/index_advisor.py). Parameters are
+stored in clear text, so keep the capture off where that is not acceptable.
+"""
+import json
+import logging
+import os
+import re
+import threading
+import time
+import traceback
+import uuid
+from collections import deque
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PLACEHOLDER = re.compile(r'%s|\?')
+_IN_LIST = re.compile(r'\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)', re.IGNORECASE)
+_SPACE = re.compile(r'\s+')
+
+_PROJECT_ROOT = str(settings.BASE_DIR.parent)
+
+_buffer = deque(maxlen=getattr(settings, 'SLOW_QUERY_BUFFER_SIZE', 200))
+_lock = threading.Lock()
+# Distinguishes this process's buffer file from earlier processes with the same pid
+_process_token = uuid.uuid4().hex[:8]
+
+
+def normalize_sql(sql):
+    """SQL with literals and placeholders replaced by ?, so repeats of one statement group together."""
+    sql = _STRING.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = _PLACEHOLDER.sub('?', sql)
+    sql = _IN_LIST.sub('IN (...)', sql)
+    return _SPACE.sub(' ', sql).strip()
+
+
+def _json_param(value):
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return str(value)
+
+
+# Execute wrappers sit between the ORM and the driver, so they are never the call site
+_WRAPPER_MODULES = tuple(os.path.join('core', name) for name in ('slow_queries.py', 'metrics.py', 'profiling.py'))
+
+
+def _call_site():
+    """The innermost frame in project code outside the execute wrappers, as path:line in function."""
+    for frame in reversed(traceback.extract_stack()[:-2]):
+        path = frame.filename
+        if path.startswith(_PROJECT_ROOT) and '/site-packages/' not in path and not path.endswith(_WRAPPER_MODULES):
+            return f'{os.path.relpath(path, _PROJECT_ROOT)}:{frame.lineno} in {frame.name}'
+    return '<unknown>'
+
+
+def _record(entry):
+    with _lock:
+        _buffer.append(entry)
+
+
+class _SlowQueryRecorder:
+    """Database execute wrapper keeping statements above the threshold."""
+
+    def __init__(self, alias, view, threshold_ms):
+        self.alias = alias
+        self.view = view
+        self.threshold_ms = threshold_ms
+        self.captured = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            if elapsed_ms >= self.threshold_ms and not many:
+                _record({
+                    'sql': normalize_sql(sql),
+                    'sample': sql,
+                    'params': [_json_param(value) for value in params or ()],
+                    'ms': round(elapsed_ms, 3),
+                    'database': self.alias,
+                    'vendor': context['connection'].vendor,
+                    'view': self.view() if callable(self.view) else self.view,
+                    'call_site': _call_site(),
+                    'captured_at': timezone.now().isoformat(),
+                })
+                self.captured += 1
+
+
+@contextmanager
+def capture_queries(view='', threshold_ms=None):
+    """
+    Capture the slow statements run on any database connection of this
+    thread inside the block. view may be a callable, evaluated per statement.
+    """
+    if threshold_ms is None:
+        threshold_ms = getattr(settings, 'SLOW_QUERY_THRESHOLD_MS', 100)
+    recorders = [_SlowQueryRecorder(alias, view, threshold_ms) for alias in connections]
+    with ExitStack() as stack:
+        for recorder in recorders:
+            stack.enter_context(connections[recorder.alias].execute_wrapper(recorder))
+        yield
+    if any(recorder.captured for recorder in recorders):
+        flush()
+
+
+def get_slow_query_dir():
+    return getattr(settings, 'SLOW_QUERY_DIR', None)
+
+
+def flush():
+    """Write this process's ring buffer to SLOW_QUERY_DIR."""
+    slow_query_dir = get_slow_query_dir()
+    if not slow_query_dir:
+        return
+    with _lock:
+        entries = list(_buffer)
+    try:
+        os.makedirs(slow_query_dir, exist_ok=True)
+        path = os.path.join(slow_query_dir, f'{os.getpid()}-{_process_token}.json')
+        with open(path + '.tmp', 'w') as f:
+            json.dump(entries, f)
+        os.replace(path + '.tmp', path)
+    except OSError as e:
+        logger.error(f"Could not write slow query buffer: {str(e)}")
+
+
+def load_captured():
+    """The captured statements of every worker, oldest first."""
+    slow_query_dir = get_slow_query_dir()
+    if not slow_query_dir or not os.path.isdir(slow_query_dir):
+        with _lock:
+            return list(_buffer)
+    entries = []
+    for name in sorted(os.listdir(slow_query_dir)):
+        if not name.endswith('.json'):
+            continue
+        try:
+            with open(os.path.join(slow_query_dir, name)) as f:
+                entries.extend(json.load(f))
+        except (OSError, ValueError) as e:
+            logger.error(f"Skipping slow query buffer {name}: {str(e)}")
+    return sorted(entries, key=lambda entry: entry['captured_at'])
+
+
+def clear():
+    """Empty this process's buffer and delete the buffer files of all workers."""
+    with _lock:
+        _buffer.clear()
+    slow_query_dir = get_slow_query_dir()
+    if not slow_query_dir or not os.path.isdir(slow_query_dir):
+        return
+    for name in os.listdir(slow_query_dir):
+        if name.endswith('.json'):
+            os.remove(os.path.join(slow_query_dir, name))
+
+
+class SlowQueryMiddleware:
+    """Capture the slow statements of every request when SLOW_QUERY_CAPTURE is on."""
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'SLOW_QUERY_CAPTURE', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        def view():
+            match = getattr(request, 'resolver_match', None)
+            return f'{request.method} /{match.route}' if match else f'{request.method} <unmatched>'
+
+        with capture_queries(view):
+            return self.get_response(request)
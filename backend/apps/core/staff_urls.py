@@ -8,6 +8,10 @@ from .staff_views import (
     StaffPredictionsView,
     StaffWasteRecommendationsView,
     StaffInputReportsView,
+    StaffBatchReportsView,
+    StaffLineSummaryView,
+    StaffExportView,
+    StaffArchiveView,
 )
 
 urlpatterns = [
@@ -20,5 +24,10 @@ urlpatterns = [
     path('waste/recommendations/', StaffWasteRecommendationsView.as_view(), name='staff-waste-recommendations'),
     path('input-reports/users/', StaffInputReportsView.as_view(), {'action': 'users'}, name='staff-reports-users'),
     path('input-reports/<int:user_id>/inputs/', StaffInputReportsView.as_view(), {'action': 'inputs'}, name='staff-reports-inputs'),
+    path('input-reports/inputs/', StaffInputReportsView.as_view(), {'action': 'all_inputs'}, name='staff-reports-all-inputs'),
     path('input-reports/generate/', StaffInputReportsView.as_view(), {'action': 'generate'}, name='staff-reports-generate'),
+    path('input-reports/batch/', StaffBatchReportsView.as_view(), name='staff-reports-batch'),
+    path('line-summaries/', StaffLineSummaryView.as_view(), name='staff-line-summaries'),
+    path('exports/<str:dataset>/', StaffExportView.as_view(), name='staff-exports'),
+    path('archive/<str:dataset>/<int:pk>/', StaffArchiveView.as_view(), name='staff-archive'),
 ]
@@ -1,15 +1,17 @@
 from rest_framework import views, permissions, status
 from rest_framework.response import Response
 from django.contrib.auth import get_user_model
-from django.db.models import Count, Avg, Sum, Q
+from django.db.models import Count, Exists, OuterRef, Sum, Q
 from django.utils import timezone
-from datetime import timedelta
+from datetime import date, datetime, time, timedelta
 import logging
 
+from backend.apps.authapp.authentication import invalidate_user
 from backend.apps.prediction.models import ProductionInput, ProductionOutput
 from backend.apps.waste.models import WasteManagement, WasteRecommendation
 from backend.apps.prediction.serializers import ProductionOutputSerializer, ProductionInputSerializer
 from backend.apps.waste.serializers import WasteRecommendationSerializer
+from .utils import sharding
 
 User = get_user_model()
 logger = logging.getLogger(__name__)
@@ -29,15 +31,33 @@ class StaffDashboardView(views.APIView):
         try:
             # Get counts
             total_users = User.objects.filter(is_staff=False, is_superuser=False).count()
-            pending_requests = ProductionInput.objects.filter(status='pending').count()
-            
+
+            # Production data may be spread over line shards: query each in
+            # parallel, then add up the counts and merge the recent rows
+            def shard_stats(alias):
+                outputs = ProductionOutput.objects.using(alias)
+                return {
+                    'pending_requests': ProductionInput.objects.using(alias).filter(status='pending').count(),
+                    **outputs.aggregate(
+                        total_predictions=Count('id'),
+                        efficiency_count=Count('energy_efficiency'),
+                        efficiency_sum=Sum('energy_efficiency'),
+                    ),
+                }
+            totals = sharding.sum_results(sharding.fan_out(shard_stats))
+            pending_requests = totals['pending_requests']
+            total_predictions = totals['total_predictions']
+            avg_efficiency = totals['efficiency_sum'] / totals['efficiency_count'] if totals['efficiency_count'] else 0
+
             # Get recent activity (last 5 approved predictions)
-            recent_predictions = ProductionOutput.objects.select_related('input_data', 'processed_by').order_by('-created_at')[:5]
-            
-            # Calculate stats
-            total_predictions = ProductionOutput.objects.count()
-            avg_efficiency = ProductionOutput.objects.aggregate(Avg('energy_efficiency'))['energy_efficiency__avg'] or 0
-            
+            recent_predictions = sharding.merged_list(
+                lambda alias: ProductionOutput.objects.using(alias).select_related(
+                    'input_data', 'input_data__created_by', 'processed_by'
+                ).order_by('-created_at'),
+                key=lambda pred: pred.created_at,
+                limit=5
+            )
+
             # Format recent activity
             activity_data = []
             for pred in recent_predictions:
@@ -66,6 +86,15 @@ class StaffDashboardView(views.APIView):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+def activity_counts(profile):
+    """A user's input counters from their profile (zero without one)."""
+    return {
+        'input_count': profile.inputs_submitted if profile else 0,
+        'approved_count': profile.inputs_approved if profile else 0,
+        'rejected_count': profile.inputs_rejected if profile else 0,
+        'last_submission': profile.last_submission_at if profile else None,
+    }
+
 class StaffUsersView(views.APIView):
     """
     API view for managing users (staff view).
@@ -74,12 +103,13 @@ class StaffUsersView(views.APIView):
 
     def get(self, request):
         try:
+            # Activity counters come from the joined profile (one query)
             users = User.objects.filter(is_staff=False, is_superuser=False).select_related('profile')
             user_data = []
             
             for user in users:
                 # Get user stats
-                input_count = ProductionInput.objects.filter(created_by=user).count()
+                profile = getattr(user, 'profile', None)
                 last_active = user.last_login
                 
                 user_data.append({
@@ -88,7 +118,7 @@ class StaffUsersView(views.APIView):
                     'email': user.email,
                     'date_joined': user.date_joined,
                     'last_active': last_active,
-                    'input_count': input_count,
+                    **activity_counts(profile),
                     'status': 'Active' if user.is_active else 'Inactive'
                 })
                 
@@ -154,6 +184,7 @@ class StaffUserApproveView(views.APIView):
             user = User.objects.get(id=user_id)
             user.is_active = True
             user.save()
+            invalidate_user(user.id)
             return Response({'message': f'User {user.username} approved'})
         except User.DoesNotExist:
             return Response({'error': 'User not found'}, status=status.HTTP_404_NOT_FOUND)
@@ -169,6 +200,7 @@ class StaffUserRejectView(views.APIView):
             user = User.objects.get(id=user_id)
             user.is_active = False
             user.save()
+            invalidate_user(user.id)
             return Response({'message': f'User {user.username} deactivated'})
         except User.DoesNotExist:
             return Response({'error': 'User not found'}, status=status.HTTP_404_NOT_FOUND)
@@ -181,13 +213,12 @@ class StaffPredictionsView(views.APIView):
 
     def get(self, request):
         try:
-            predictions = ProductionOutput.objects.select_related(
-                'input_data', 
-                'input_data__created_by',
-                'processed_by',
-                'waste_record',
-                'recommendation'
-            ).all().order_by('-created_at')
+            predictions = sharding.merged_list(
+                lambda alias: ProductionOutputSerializer.setup_eager_loading(
+                    ProductionOutput.objects.using(alias)
+                ).order_by('-created_at'),
+                key=lambda pred: pred.created_at
+            )
             
             # Use the serializer instead of manual construction
             serializer = ProductionOutputSerializer(predictions, many=True)
@@ -208,11 +239,12 @@ class StaffWasteRecommendationsView(views.APIView):
 
     def get(self, request):
         try:
-            recommendations = WasteRecommendation.objects.select_related(
-                'waste_record',
-                'waste_record__production_input',
-                'waste_record__production_input__created_by'
-            ).all().order_by('-created_at')
+            recommendations = sharding.merged_list(
+                lambda alias: WasteRecommendationSerializer.setup_eager_loading(
+                    WasteRecommendation.objects.using(alias)
+                ).order_by('-created_at'),
+                key=lambda rec: rec.created_at
+            )
             
             serializer = WasteRecommendationSerializer(recommendations, many=True)
             return Response(serializer.data)
@@ -224,6 +256,12 @@ class StaffWasteRecommendationsView(views.APIView):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+# Columns of the input report listings
+INPUT_REPORT_FIELDS = ['id', 'production_line', 'created_at', 'has_output', 'feed_rate', 'temperature']
+ALL_INPUT_REPORT_FIELDS = [*INPUT_REPORT_FIELDS, 'status', 'created_by_id', 'created_by__username']
+INPUT_REPORT_PAGE_SIZE = 100
+INPUT_REPORT_MAX_PAGE_SIZE = 1000
+
 class StaffInputReportsView(views.APIView):
     """
     API view for input reports.
@@ -234,35 +272,37 @@ class StaffInputReportsView(views.APIView):
         try:
             if action == 'users':
                 # Return users with input stats
-                users = User.objects.filter(is_staff=False).annotate(
-                    input_count=Count('production_inputs')
-                )
+                users = User.objects.filter(is_staff=False).select_related('profile')
                 data = [{
                     'id': u.id, 
                     'username': u.username, 
                     'email': u.email,
-                    'input_count': u.input_count
+                    **activity_counts(getattr(u, 'profile', None))
                 } for u in users]
                 return Response({'success': True, 'users': data})
                 
             elif action == 'inputs' and user_id:
-                # Return inputs for specific user
-                inputs = ProductionInput.objects.filter(created_by_id=user_id).order_by('-created_at')
-                
-                # Check for outputs
-                data = []
-                for inp in inputs:
-                    has_output = ProductionOutput.objects.filter(input_data=inp).exists()
-                    data.append({
-                        'id': inp.id,
-                        'production_line': inp.production_line,
-                        'created_at': inp.created_at,
-                        'has_output': has_output,
-                        'feed_rate': inp.feed_rate,
-                        'temperature': inp.temperature
-                    })
-                    
-                return Response({'success': True, 'inputs': data})
+                # Return inputs for specific user, all of them unless a limit is given
+                return self.list_inputs(request, INPUT_REPORT_FIELDS, {'created_by_id': user_id}, default_limit=None)
+
+            elif action == 'all_inputs':
+                # Inputs of all users, filtered and always paginated
+                filters = {}
+                if request.query_params.get('line'):
+                    filters['production_line'] = request.query_params['line']
+                if request.query_params.get('status'):
+                    filters['status'] = request.query_params['status']
+                if request.query_params.get('user'):
+                    filters['created_by_id'] = request.query_params['user']
+                try:
+                    # Same semantics as the exports: since inclusive, until exclusive
+                    for param, lookup in (('since', 'created_at__gte'), ('until', 'created_at__lt')):
+                        if request.query_params.get(param):
+                            day = date.fromisoformat(request.query_params[param])
+                            filters[lookup] = timezone.make_aware(datetime.combine(day, time.min))
+                except ValueError:
+                    return Response({'error': 'since and until must be in YYYY-MM-DD format'}, status=status.HTTP_400_BAD_REQUEST)
+                return self.list_inputs(request, ALL_INPUT_REPORT_FIELDS, filters, default_limit=INPUT_REPORT_PAGE_SIZE)
                 
             return Response({'error': 'Invalid action'}, status=status.HTTP_400_BAD_REQUEST)
             
@@ -273,6 +313,32 @@ class StaffInputReportsView(views.APIView):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+    def list_inputs(self, request, fields, filters, default_limit):
+        """
+        One page of inputs as compact rows, newest first, with has_output
+        computed in the same query. Pages follow next_cursor (keyset).
+        """
+        from .utils import keyset
+
+        try:
+            limit = int(request.query_params['limit']) if request.query_params.get('limit') else default_limit
+            if limit is not None and not 1 <= limit <= INPUT_REPORT_MAX_PAGE_SIZE:
+                raise ValueError
+        except ValueError:
+            return Response({'error': f'limit must be between 1 and {INPUT_REPORT_MAX_PAGE_SIZE}'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        def build(alias):
+            return ProductionInput.objects.using(alias).filter(**filters).annotate(
+                has_output=Exists(ProductionOutput.objects.filter(input_data=OuterRef('pk')))
+            ).values(*fields)
+
+        try:
+            inputs, next_cursor = keyset.paginate(build, request.query_params.get('cursor'), limit)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'success': True, 'inputs': inputs, 'next_cursor': next_cursor})
+
     def post(self, request, action=None):
         """Handle report generation"""
         if action == 'generate':
@@ -286,16 +352,21 @@ class StaffInputReportsView(views.APIView):
                 
                 # Fetch data
                 try:
-                    production_input = ProductionInput.objects.get(id=input_id)
+                    production_input = ProductionInput.objects.using(sharding.alias_for_id(input_id)).select_related(
+                        'created_by__profile'
+                    ).get(id=input_id)
                 except ProductionInput.DoesNotExist:
                     return Response({'error': 'Production Input not found'}, status=status.HTTP_404_NOT_FOUND)
                 
-                production_output = ProductionOutput.objects.filter(input_data=production_input).first()
-                waste_record = WasteManagement.objects.filter(production_input=production_input).first()
+                db = production_input._state.db
+                production_output = ProductionOutput.objects.using(db).select_related('processed_by').filter(
+                    input_data=production_input
+                ).first()
+                waste_record = WasteManagement.objects.using(db).filter(production_input=production_input).first()
                 
                 recommendations = []
                 if waste_record:
-                    recommendations = WasteRecommendation.objects.filter(waste_record=waste_record)
+                    recommendations = WasteRecommendation.objects.using(db).filter(waste_record=waste_record)
                 
                 # Generate PDF
                 from .utils.report_generator import ReportGenerator
@@ -307,28 +378,28 @@ class StaffInputReportsView(views.APIView):
                     recommendations
                 )
                 
-                # Handle Email
-                email_sent = False
+                # Handle Email: queued in the outbox and sent by the deliver_outbox worker
+                email_queued = False
                 email_error = None
                 
                 if email_to_user:
                     try:
-                        from django.core.mail import EmailMessage
+                        from .utils.outbox import enqueue_email
                         
                         user_email = production_input.created_by.email
                         if user_email:
-                            email = EmailMessage(
+                            enqueue_email(
                                 subject=f'AluOptimize Production Report - Input #{production_input.id}',
                                 body=f'Dear {production_input.created_by.username},\n\nPlease find attached the production report for Input #{production_input.id}.\n\nBest regards,\nAluOptimize Team',
-                                to=[user_email]
+                                to=[user_email],
+                                attachment=(f'report_input_{production_input.id}.pdf', pdf_buffer.getvalue(), 'application/pdf'),
+                                created_by=request.user
                             )
-                            email.attach(f'report_input_{production_input.id}.pdf', pdf_buffer.getvalue(), 'application/pdf')
-                            email.send()
-                            email_sent = True
+                            email_queued = True
                         else:
                             email_error = "User has no email address"
                     except Exception as e:
-                        logger.error(f"Failed to send email: {str(e)}")
+                        logger.error(f"Failed to queue email: {str(e)}")
                         email_error = str(e)
                 
                 # Handle Download
@@ -340,8 +411,8 @@ class StaffInputReportsView(views.APIView):
                 
                 return Response({
                     'success': True, 
-                    'message': 'Report generated successfully' + (' and emailed to user' if email_sent else ''),
-                    'email_sent': email_sent,
+                    'message': 'Report generated successfully' + (' and queued for email to user' if email_queued else ''),
+                    'email_queued': email_queued,
                     'email_error': email_error
                 })
                 
@@ -353,3 +424,190 @@ class StaffInputReportsView(views.APIView):
                 )
         
         return Response({'error': 'Invalid action'}, status=status.HTTP_400_BAD_REQUEST)
+
+def _parse_id(value):
+    """An id given as an integer or a string of digits. Raises ValueError otherwise."""
+    if isinstance(value, bool) or not isinstance(value, (int, str)) or not str(value).strip().isdigit():
+        raise ValueError(value)
+    return int(value)
+
+
+class StaffBatchReportsView(views.APIView):
+    """
+    API view for generating reports for many inputs at once.
+
+    Accepts any combination of user_id, month (YYYY-MM) and input_ids.
+    Returns a streamed ZIP of per-input PDFs (format=zip, the default)
+    or one combined multi-section PDF (format=pdf).
+    """
+    permission_classes = [permissions.IsAuthenticated, IsStaff]
+
+    def post(self, request):
+        from django.conf import settings
+        from django.http import FileResponse, StreamingHttpResponse
+        from .utils import batch_reports
+
+        user_id = request.data.get('user_id')
+        month = request.data.get('month')
+        input_ids = request.data.get('input_ids')
+        report_format = request.data.get('format', 'zip')
+
+        if not any([user_id, month, input_ids]):
+            return Response(
+                {'error': 'Provide user_id, month or input_ids'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if report_format not in ('zip', 'pdf'):
+            return Response({'error': 'format must be zip or pdf'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            user_id = _parse_id(user_id) if user_id else None
+        except ValueError:
+            return Response({'error': 'user_id must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            if input_ids and not isinstance(input_ids, list):
+                raise ValueError(input_ids)
+            input_ids = [_parse_id(input_id) for input_id in input_ids] if input_ids else None
+        except ValueError:
+            return Response({'error': 'input_ids must be a list of integers'}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            queryset = batch_reports.get_batch_queryset(user_id=user_id, month=month, input_ids=input_ids)
+        except ValueError:
+            return Response({'error': 'month must be in YYYY-MM format'}, status=status.HTTP_400_BAD_REQUEST)
+
+        total = batch_reports.count_batch(queryset)
+        if total == 0:
+            return Response({'error': 'No inputs match the request'}, status=status.HTTP_404_NOT_FOUND)
+
+        max_inputs = getattr(settings, 'REPORT_BATCH_MAX_INPUTS', 1000)
+        if total > max_inputs:
+            return Response(
+                {'error': f'Batch too large ({total} inputs, limit is {max_inputs})'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        label = month or (f'user_{user_id}' if user_id else 'selection')
+        logger.info(f"Batch report ({report_format}) for {total} inputs requested by {request.user.username}")
+
+        if report_format == 'pdf':
+            import tempfile
+            pdf_file = tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024)
+            batch_reports.write_combined_pdf(batch_reports.iter_sections(queryset), pdf_file)
+            pdf_file.seek(0)
+            return FileResponse(
+                pdf_file,
+                as_attachment=True,
+                filename=f'reports_{label}.pdf',
+                content_type='application/pdf'
+            )
+
+        reports = batch_reports.render_reports(batch_reports.iter_sections(queryset))
+        response = StreamingHttpResponse(batch_reports.stream_zip(reports), content_type='application/zip')
+        response['Content-Disposition'] = f'attachment; filename="reports_{label}.zip"'
+        return response
+
+class StaffLineSummaryView(views.APIView):
+    """
+    API view for per-production-line summaries built from the daily rollups.
+
+    Query params: period (daily/weekly/monthly), date (YYYY-MM-DD, any day
+    in the period, default today), line (optional; all lines when omitted).
+    With download=true and a line, returns the summary report as a PDF.
+    """
+    permission_classes = [permissions.IsAuthenticated, IsStaff]
+
+    def get(self, request):
+        from datetime import date
+        from django.http import HttpResponse
+        from .utils import line_summary
+
+        period = request.query_params.get('period', 'daily')
+        production_line = request.query_params.get('line')
+        try:
+            day = date.fromisoformat(request.query_params['date']) if request.query_params.get('date') else timezone.localdate()
+            start, end = line_summary.period_range(period, day)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        if request.query_params.get('download') in ('1', 'true'):
+            if not production_line:
+                return Response({'error': 'line is required for PDF output'}, status=status.HTTP_400_BAD_REQUEST)
+            summary = line_summary.build_line_summary(production_line, period, day)
+            response = HttpResponse(line_summary.render_line_summary(summary).getvalue(), content_type='application/pdf')
+            response['Content-Disposition'] = f'attachment; filename="{line_summary.summary_filename(summary)}"'
+            return response
+
+        lines = [production_line] if production_line else line_summary.lines_with_activity(start, end)
+        return Response({
+            'period': period,
+            'start_date': start,
+            'end_date': end,
+            'summaries': [line_summary.build_line_summary(line, period, day) for line in lines],
+        })
+
+class StaffExportView(views.APIView):
+    """
+    API view for streaming bulk exports of predictions, waste records and
+    prediction logs.
+
+    Query params: output (csv or ndjson, default csv), gzip=true, since and
+    until (YYYY-MM-DD, on created_at), line (production line).
+    """
+    permission_classes = [permissions.IsAuthenticated, IsStaff]
+
+    def get(self, request, dataset):
+        from datetime import date, datetime, time
+        from django.http import StreamingHttpResponse
+        from .utils import exports
+
+        spec = exports.DATASETS.get(dataset)
+        if spec is None:
+            return Response(
+                {'error': f"Unknown dataset, expected one of {', '.join(exports.DATASETS)}"},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        output_format = request.query_params.get('output', 'csv')
+        if output_format not in exports.FORMATS:
+            return Response({'error': 'output must be csv or ndjson'}, status=status.HTTP_400_BAD_REQUEST)
+        gzip = request.query_params.get('gzip') in ('1', 'true')
+
+        try:
+            since, until = [
+                timezone.make_aware(datetime.combine(date.fromisoformat(value), time.min)) if value else None
+                for value in (request.query_params.get('since'), request.query_params.get('until'))
+            ]
+        except ValueError:
+            return Response({'error': 'since and until must be in YYYY-MM-DD format'}, status=status.HTTP_400_BAD_REQUEST)
+
+        queryset = exports.filtered_queryset(spec, since, until, request.query_params.get('line'))
+        logger.info(f"Export of {dataset} ({output_format}{', gzip' if gzip else ''}) requested by {request.user.username}")
+
+        response = StreamingHttpResponse(
+            exports.stream_export(spec, queryset, output_format, gzip),
+            content_type=exports.content_type(output_format, gzip)
+        )
+        response['Content-Disposition'] = f'attachment; filename="{exports.export_filename(dataset, output_format, gzip)}"'
+        return response
+
+
+class StaffArchiveView(views.APIView):
+    """
+    API view for reading one archived prediction log or prediction history
+    row by id (see backend/apps/core/utils/archive.py).
+    """
+    permission_classes = [permissions.IsAuthenticated, IsStaff]
+
+    def get(self, request, dataset, pk):
+        from .utils import archive
+
+        if dataset not in archive.DATASETS:
+            return Response(
+                {'error': f"Unknown dataset, expected one of {', '.join(archive.DATASETS)}"},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        row = archive.get_archived_row(dataset, pk)
+        if row is None:
+            return Response({'error': f'No archived {dataset} row with id {pk}'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(row)
@@ -0,0 +1,225 @@
+"""
+Retention and archival of cold PredictionLog and PredictionHistory rows.
+
+Rows older than the dataset's retention period are written, one file per
+source database and day, to ARCHIVE_ROOT/<db>/<dataset>/<YYYY>/<MM>/ as
+gzip-compressed NDJSON, then deleted from the live table in chunks. Rows
+are read in keyset pages of one block and each block is written as it
+arrives, so memory use does not grow with the size of a day.
+
+Each file is a series of independent gzip members of ARCHIVE_BLOCK_ROWS
+rows sorted by id. The sidecar <file>.idx.json lists every block's first
+and last id, byte offset and length, so an archived row is served by
+finding its partition in ArchivePartition, reading one block and
+decompressing only that block.
+"""
+import gzip
+import json
+import logging
+import os
+from bisect import bisect_right
+from datetime import datetime, time, timedelta
+from functools import lru_cache
+from itertools import chain, islice
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils import timezone
+
+from backend.apps.core.models import ArchivePartition
+from backend.apps.prediction.models import PredictionLog, PredictionHistory
+from backend.config.shard_router import get_shard_aliases
+
+logger = logging.getLogger(__name__)
+
+DATASETS = {
+    'prediction_logs': PredictionLog,
+    'prediction_history': PredictionHistory,
+}
+
+
+def get_archive_root():
+    return getattr(settings, 'ARCHIVE_ROOT', os.path.join(settings.BASE_DIR, 'archive'))
+
+
+def get_retention_days(dataset):
+    return getattr(settings, 'ARCHIVE_RETENTION_DAYS', {}).get(dataset, 90)
+
+
+def _block_rows():
+    return getattr(settings, 'ARCHIVE_BLOCK_ROWS', 500)
+
+
+def _delete_chunk():
+    return getattr(settings, 'ARCHIVE_DELETE_CHUNK', 1000)
+
+
+def _columns(model):
+    return [field.attname for field in model._meta.concrete_fields]
+
+
+def _day_range(day):
+    start = timezone.make_aware(datetime.combine(day, time.min))
+    return start, start + timedelta(days=1)
+
+
+def _partition_path(alias, dataset, day, part):
+    suffix = f'.part{part}' if part else ''
+    return os.path.join(alias, dataset, f'{day:%Y}', f'{day:%m}', f'{day.isoformat()}{suffix}.ndjson.gz')
+
+
+def _iter_blocks(queryset, columns):
+    """Yield the rows of queryset in id order as lists of ARCHIVE_BLOCK_ROWS dicts, one query per block."""
+    size = _block_rows()
+    last_id = None
+    while True:
+        page = queryset.order_by('id')
+        if last_id is not None:
+            page = page.filter(id__gt=last_id)
+        block = list(page.values(*columns)[:size])
+        if block:
+            yield block
+        if len(block) < size:
+            return
+        last_id = block[-1]['id']
+
+
+def _write_block(block, fileobj):
+    """Write rows as one gzip member; return its [first id, last id, offset, length] index entry."""
+    data = gzip.compress(
+        ''.join(json.dumps(row, cls=DjangoJSONEncoder) + '\n' for row in block).encode('utf-8')
+    )
+    entry = [block[0]['id'], block[-1]['id'], fileobj.tell(), len(data)]
+    fileobj.write(data)
+    return entry
+
+
+def _archived_ids(relative_path):
+    """Yield the ids written to a partition file, reading it back row by row."""
+    with gzip.open(os.path.join(get_archive_root(), relative_path), 'rt', encoding='utf-8') as f:
+        for line in f:
+            yield json.loads(line)['id']
+
+
+def _delete_ids(model, alias, ids):
+    chunk = _delete_chunk()
+    ids = iter(ids)
+    deleted = 0
+    while True:
+        batch = list(islice(ids, chunk))
+        if not batch:
+            return deleted
+        with transaction.atomic(using=alias):
+            deleted += model.objects.using(alias).filter(id__in=batch).delete()[0]
+
+
+def archive_day(dataset, day, alias='default', cutoff=None):
+    """
+    Archive and delete one day of rows of dataset on alias, limited to rows
+    created before cutoff. Returns the number of rows archived.
+    """
+    model = DATASETS[dataset]
+    start, end = _day_range(day)
+    if cutoff is not None:
+        end = min(end, cutoff)
+    queryset = model.objects.using(alias).filter(created_at__gte=start, created_at__lt=end)
+
+    # Rows written to an earlier partition of this day but not deleted
+    # (interrupted run) are deleted without archiving them twice. Only the
+    # ids in its file are: a row created after that run's cutoff may have an
+    # id inside the partition's range and still needs archiving.
+    for low, high, relative_path in ArchivePartition.objects.filter(
+        dataset=dataset, source_db=alias, day=day
+    ).values_list('min_id', 'max_id', 'path'):
+        if queryset.filter(id__range=(low, high)).exists():
+            _delete_ids(model, alias, _archived_ids(relative_path))
+
+    blocks = _iter_blocks(queryset, _columns(model))
+    first = next(blocks, None)
+    if first is None:
+        return 0
+
+    part = ArchivePartition.objects.filter(dataset=dataset, source_db=alias, day=day).count()
+    relative_path = _partition_path(alias, dataset, day, part)
+    path = os.path.join(get_archive_root(), relative_path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    index, row_count = [], 0
+    with open(path + '.tmp', 'wb') as f:
+        for block in chain([first], blocks):
+            index.append(_write_block(block, f))
+            row_count += len(block)
+        f.flush()
+        os.fsync(f.fileno())
+    with open(path + '.idx.json', 'w') as f:
+        json.dump({'dataset': dataset, 'day': day.isoformat(), 'rows': row_count, 'blocks': index}, f)
+    os.replace(path + '.tmp', path)
+
+    ArchivePartition.objects.create(
+        dataset=dataset,
+        source_db=alias,
+        day=day,
+        path=relative_path,
+        min_id=index[0][0],
+        max_id=index[-1][1],
+        row_count=row_count,
+    )
+    _delete_ids(model, alias, _archived_ids(relative_path))
+    logger.info(f"Archived {row_count} {dataset} rows of {day} from {alias} to {relative_path}")
+    return row_count
+
+
+def archive_cold_rows(dataset, older_than_days=None, aliases=None):
+    """
+    Archive every day of dataset older than the retention period, oldest
+    first, on every shard. Returns {alias: rows archived}.
+    """
+    model = DATASETS[dataset]
+    days = older_than_days if older_than_days is not None else get_retention_days(dataset)
+    cutoff = timezone.now() - timedelta(days=days)
+
+    archived = {}
+    for alias in aliases or get_shard_aliases():
+        oldest = model.objects.using(alias).filter(created_at__lt=cutoff).order_by('created_at').values_list(
+            'created_at', flat=True
+        ).first()
+        archived[alias] = 0
+        if oldest is None:
+            continue
+        day = timezone.localdate(oldest)
+        while day <= timezone.localdate(cutoff):
+            archived[alias] += archive_day(dataset, day, alias, cutoff)
+            day += timedelta(days=1)
+    return archived
+
+
+@lru_cache(maxsize=64)
+def _read_index(path):
+    with open(path + '.idx.json') as f:
+        return json.load(f)['blocks']
+
+
+@lru_cache(maxsize=32)
+def _read_block(path, offset, length):
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        data = gzip.decompress(f.read(length))
+    return {row['id']: row for row in map(json.loads, data.decode('utf-8').splitlines())}
+
+
+def get_archived_row(dataset, pk):
+    """The archived row of dataset with id pk as a dict, or None."""
+    pk = int(pk)
+    partitions = ArchivePartition.objects.filter(dataset=dataset, min_id__lte=pk, max_id__gte=pk)
+    for relative_path in partitions.values_list('path', flat=True):
+        path = os.path.join(get_archive_root(), relative_path)
+        blocks = _read_index(path)
+        position = bisect_right([block[0] for block in blocks], pk) - 1
+        if position < 0 or pk > blocks[position][1]:
+            continue
+        _, _, offset, length = blocks[position]
+        row = _read_block(path, offset, length).get(pk)
+        if row is not None:
+            return dict(row, archived=True)
+    return None
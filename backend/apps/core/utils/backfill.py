@@ -0,0 +1,116 @@
+"""
+Backfill of waste records and recommendations for production outputs that
+were created without them.
+
+Each chunk of outputs is handled in one transaction with a fixed number of
+queries: waste records and recommendations are created with bulk_create
+and the outputs are linked with bulk_update. Records that already exist for
+an input (e.g. written by a concurrent approval) are linked, not duplicated.
+"""
+from datetime import date
+from decimal import Decimal
+
+from django.db import connections, transaction
+from django.utils import timezone
+
+from backend.apps.prediction.ml_engine import predict_output, generate_recommendation, calculate_estimated_savings
+from backend.apps.prediction.models import ProductionInput, ProductionOutput
+from backend.apps.waste.models import WasteManagement, WasteRecommendation
+
+JOB_NAME = 'backfill_waste_records'
+
+
+def pending_outputs(alias):
+    return ProductionOutput.objects.using(alias).filter(waste_record__isnull=True)
+
+
+def _latest_ids(queryset, key):
+    """Map key -> highest id of the rows in queryset."""
+    latest = {}
+    for key_value, pk in queryset.values_list(key, 'id').order_by('id'):
+        latest[key_value] = pk
+    return latest
+
+
+def backfill_chunk(alias, first_id, last_id):
+    """Create and link waste records for the pending outputs with ids in [first_id, last_id]."""
+    features = connections[alias].features
+    with transaction.atomic(using=alias):
+        outputs = pending_outputs(alias).filter(id__range=(first_id, last_id)).order_by('id')
+        if features.has_select_for_update:
+            # Outputs being approved right now are left for the next run
+            outputs = outputs.select_for_update(skip_locked=features.has_select_for_update_skip_locked)
+        outputs = list(outputs)
+        if not outputs:
+            return 0
+
+        inputs = ProductionInput.objects.using(alias).in_bulk([output.input_data_id for output in outputs])
+        for output in outputs:
+            if output.waste_estimate is None:
+                production_input = inputs[output.input_data_id]
+                prediction = predict_output(
+                    feed_rate=production_input.feed_rate,
+                    temperature=production_input.temperature,
+                    pressure=production_input.pressure,
+                    power_consumption=production_input.power_consumption
+                )
+                output.waste_estimate = prediction['waste_amount']
+                output.energy_efficiency = prediction['energy_efficiency']
+
+        waste_by_input = _latest_ids(
+            WasteManagement.objects.using(alias).filter(production_input_id__in=list(inputs)), 'production_input_id'
+        )
+        WasteManagement.objects.using(alias).bulk_create([
+            WasteManagement(
+                production_input_id=output.input_data_id,
+                waste_type='Aluminum Dross',
+                waste_amount=output.waste_estimate,
+                unit='KG',
+                date_recorded=date.today(),
+                reuse_possible=output.energy_efficiency > 50,
+                recorded_by_id=inputs[output.input_data_id].submitted_by_id,
+                production_line=inputs[output.input_data_id].production_line,
+                temperature=inputs[output.input_data_id].temperature,
+                pressure=inputs[output.input_data_id].pressure,
+                energy_used=inputs[output.input_data_id].power_consumption
+            )
+            for output in outputs if output.input_data_id not in waste_by_input
+        ])
+        # Not every backend returns ids from bulk_create (MySQL), so read them back
+        waste_by_input = _latest_ids(
+            WasteManagement.objects.using(alias).filter(production_input_id__in=list(inputs)), 'production_input_id'
+        )
+
+        recommendation_by_waste = _latest_ids(
+            WasteRecommendation.objects.using(alias).filter(waste_record_id__in=list(waste_by_input.values())),
+            'waste_record_id'
+        )
+        WasteRecommendation.objects.using(alias).bulk_create([
+            WasteRecommendation(
+                waste_record_id=waste_by_input[output.input_data_id],
+                recommendation_text=generate_recommendation(
+                    waste_amount=output.waste_estimate,
+                    energy_efficiency=output.energy_efficiency
+                ),
+                estimated_savings=Decimal(str(round(calculate_estimated_savings(
+                    waste_amount=output.waste_estimate,
+                    energy_efficiency=output.energy_efficiency
+                ), 2))),
+                ai_generated=True
+            )
+            for output in outputs if waste_by_input[output.input_data_id] not in recommendation_by_waste
+        ])
+        recommendation_by_waste = _latest_ids(
+            WasteRecommendation.objects.using(alias).filter(waste_record_id__in=list(waste_by_input.values())),
+            'waste_record_id'
+        )
+
+        now = timezone.now()
+        for output in outputs:
+            output.waste_record_id = waste_by_input[output.input_data_id]
+            output.recommendation_id = recommendation_by_waste[output.waste_record_id]
+            output.updated_at = now
+        ProductionOutput.objects.using(alias).bulk_update(
+            outputs, ['waste_estimate', 'energy_efficiency', 'waste_record', 'recommendation', 'updated_at']
+        )
+    return len(outputs)
@@ -0,0 +1,210 @@
+"""
+Batch PDF report generation.
+
+Collects every row the report layout needs in a few queries per chunk, then
+fans the CPU-bound ReportLab rendering out over a process pool. Rendered
+reports are yielded in input order as soon as they are ready, so callers can
+stream them to a client or to disk without holding the whole batch in memory.
+The batch queryset is run on every shard and the inputs merged by creation
+time.
+"""
+import calendar
+import heapq
+import logging
+import os
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db.models import Prefetch
+from django.utils import timezone
+
+from backend.apps.core.utils.sharding import fan_out, read_aliases
+from backend.apps.prediction.models import ProductionInput, ProductionOutput
+from backend.apps.waste.models import WasteManagement
+
+logger = logging.getLogger(__name__)
+
+# Rows fetched per round trip while iterating the batch queryset
+FETCH_CHUNK_SIZE = 200
+
+# Per-process generator, created lazily inside each pool worker
+_generator = None
+
+
+def parse_month(value):
+    """
+    Turn a 'YYYY-MM' string into an aware [start, end) datetime range.
+    Raises ValueError for malformed values.
+    """
+    if not isinstance(value, str):
+        raise ValueError(value)
+    year, month = (int(part) for part in value.split('-'))
+    last_day = calendar.monthrange(year, month)[1]
+    start = timezone.make_aware(datetime(year, month, 1))
+    end = timezone.make_aware(datetime(year, month, last_day)) + timedelta(days=1)
+    return start, end
+
+
+def get_batch_queryset(user_id=None, month=None, input_ids=None):
+    """
+    Build the queryset of inputs to report on, with everything the report
+    needs joined or prefetched so rendering never goes back to the database.
+    """
+    queryset = ProductionInput.objects.filter(
+        created_by__isnull=False
+    ).select_related(
+        'created_by',
+        'created_by__profile',
+        'output',
+        'output__processed_by',
+    ).prefetch_related(
+        Prefetch(
+            'waste_records',
+            queryset=WasteManagement.objects.prefetch_related('recommendations')
+        )
+    ).order_by('created_at', 'id')
+
+    if user_id:
+        queryset = queryset.filter(created_by_id=user_id)
+    if month:
+        start, end = parse_month(month)
+        queryset = queryset.filter(created_at__gte=start, created_at__lt=end)
+    if input_ids:
+        queryset = queryset.filter(id__in=input_ids)
+    return queryset
+
+
+def count_batch(queryset):
+    """Number of inputs the batch queryset matches on all shards."""
+    return sum(fan_out(lambda alias: queryset.using(alias).count()))
+
+
+def iter_sections(queryset):
+    """
+    Yield (input, output, waste, recommendations) tuples matching the
+    arguments of ReportGenerator.generate_input_report, in the queryset's
+    (created_at, id) order across shards.
+    """
+    inputs = heapq.merge(
+        *(queryset.using(alias).iterator(chunk_size=FETCH_CHUNK_SIZE) for alias in read_aliases()),
+        key=lambda production_input: (production_input.created_at, production_input.id),
+    )
+    for production_input in inputs:
+        try:
+            production_output = production_input.output
+        except ProductionOutput.DoesNotExist:
+            production_output = None
+
+        # Prefetched in '-created_at' order, so the first one is the latest
+        waste_records = list(production_input.waste_records.all())
+        waste_record = waste_records[0] if waste_records else None
+        recommendations = list(waste_record.recommendations.all()) if waste_record else []
+
+        yield production_input, production_output, waste_record, recommendations
+
+
+def report_filename(production_input):
+    return f'report_input_{production_input.id}.pdf'
+
+
+def _init_worker():
+    """Make sure Django is configured in spawned pool workers."""
+    import django
+    from django.apps import apps
+
+    if not apps.ready:
+        django.setup()
+
+
+def _render_section(section):
+    """Render one section in a pool worker and return (filename, pdf bytes)."""
+    global _generator
+    if _generator is None:
+        from .report_generator import ReportGenerator
+        _generator = ReportGenerator()
+
+    pdf_buffer = _generator.generate_input_report(*section)
+    return report_filename(section[0]), pdf_buffer.getvalue()
+
+
+def get_default_workers():
+    return getattr(settings, 'REPORT_BATCH_WORKERS', None) or os.cpu_count() or 1
+
+
+def render_reports(sections, workers=None):
+    """
+    Render sections across a process pool, yielding (filename, pdf bytes)
+    in input order.
+
+    Only a small window of sections is in flight at once, so memory use
+    stays bounded however long the batch is.
+    """
+    workers = workers or get_default_workers()
+    if workers <= 1:
+        for section in sections:
+            yield _render_section(section)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as executor:
+        pending = deque()
+        try:
+            for section in sections:
+                pending.append(executor.submit(_render_section, section))
+                if len(pending) >= workers * 2:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            # Client went away or a render failed: drop the queued work
+            for future in pending:
+                future.cancel()
+
+
+class _ChunkWriter:
+    """
+    Write-only file object that collects bytes until they are drained.
+    ZipFile falls back to streaming mode because it cannot seek.
+    """
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def stream_zip(reports):
+    """
+    Yield a ZIP archive chunk by chunk from (filename, content) pairs.
+
+    PDFs are already compressed, so entries are stored rather than deflated.
+    """
+    writer = _ChunkWriter()
+    with zipfile.ZipFile(writer, 'w', compression=zipfile.ZIP_STORED) as archive:
+        for filename, content in reports:
+            archive.writestr(filename, content)
+            yield writer.drain()
+    yield writer.drain()
+
+
+def write_combined_pdf(sections, fileobj):
+    """
+    Write all sections into a single multi-section PDF.
+
+    A PDF is laid out as one document, so this runs in the calling process;
+    write into a temporary file to keep the result out of memory.
+    """
+    from .report_generator import ReportGenerator
+    return ReportGenerator().generate_combined_report(sections, fileobj)
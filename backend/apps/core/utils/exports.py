@@ -0,0 +1,223 @@
+"""
+Streaming bulk exports of predictions, waste records and prediction logs.
+
+Rows are read with values_list() in primary-key pages of EXPORT_CHUNK_SIZE,
+formatted as CSV or NDJSON, optionally gzip-compressed, and yielded as byte
+chunks for a StreamingHttpResponse or a file. No model instances or
+serializers are involved and at most one page is held in memory, whatever
+the size of the table. Keyset paging is used rather than iterator() because
+the MySQL drivers buffer a whole result set client-side. The shards are
+read one after the other; each has its own id range (see sharding.py), so
+the rows still come out in primary-key order.
+"""
+import csv
+import json
+import zlib
+from datetime import date, datetime
+from decimal import Decimal
+
+from django.conf import settings
+from django.db.models.functions import Coalesce
+
+from backend.apps.core.utils.sharding import read_aliases
+from backend.apps.prediction.models import ProductionOutput, PredictionLog
+from backend.apps.waste.models import WasteManagement
+
+FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+}
+
+# Flush output once this many bytes are pending, to keep writes reasonably sized
+FLUSH_BYTES = 64 * 1024
+
+
+class ExportSpec:
+    """Columns and filter fields of one exportable dataset."""
+
+    def __init__(self, model, columns, line_field, json_columns=(), annotations=None):
+        self.model = model
+        self.columns = columns
+        self.line_field = line_field
+        self.json_columns = set(json_columns)
+        self.annotations = annotations or {}
+
+    @property
+    def headers(self):
+        return [header for header, _ in self.columns]
+
+    @property
+    def fields(self):
+        return [field for _, field in self.columns]
+
+
+DATASETS = {
+    'predictions': ExportSpec(ProductionOutput, [
+        ('id', 'id'),
+        ('input_id', 'input_data_id'),
+        ('production_line', 'input_data__production_line'),
+        ('created_by', 'input_data__created_by__username'),
+        ('predicted_output', 'predicted_output'),
+        ('actual_output', 'actual_output'),
+        ('output_quality', 'output_quality'),
+        ('energy_efficiency', 'energy_efficiency'),
+        ('deviation_percentage', 'deviation_percentage'),
+        ('waste_estimate', 'waste_estimate'),
+        ('reward', 'reward'),
+        ('status', 'status'),
+        ('is_approved', 'is_approved'),
+        ('approved_at', 'approved_at'),
+        ('processed_by', 'processed_by__username'),
+        ('sent_to_user', 'sent_to_user'),
+        ('created_at', 'created_at'),
+    ], line_field='input_data__production_line'),
+    'waste': ExportSpec(WasteManagement, [
+        ('id', 'id'),
+        ('input_id', 'production_input_id'),
+        ('production_line', 'line'),
+        ('waste_type', 'waste_type'),
+        ('waste_amount', 'waste_amount'),
+        ('unit', 'unit'),
+        ('date_recorded', 'date_recorded'),
+        ('reuse_possible', 'reuse_possible'),
+        ('recorded_by', 'recorded_by__username'),
+        ('temperature', 'temperature'),
+        ('pressure', 'pressure'),
+        ('energy_used', 'energy_used'),
+        ('sent_to_user', 'sent_to_user'),
+        ('created_at', 'created_at'),
+    ], line_field='line', annotations={
+        'line': Coalesce('production_line', 'production_input__production_line'),
+    }),
+    'logs': ExportSpec(PredictionLog, [
+        ('id', 'id'),
+        ('output_id', 'production_output_id'),
+        ('production_line', 'production_output__input_data__production_line'),
+        ('model_version', 'model_version'),
+        ('confidence_score', 'confidence_score'),
+        ('q10_prediction', 'q10_prediction'),
+        ('q50_prediction', 'q50_prediction'),
+        ('q90_prediction', 'q90_prediction'),
+        ('execution_time_ms', 'execution_time_ms'),
+        ('input_features', 'input_features'),
+        ('created_at', 'created_at'),
+    ], line_field='production_output__input_data__production_line', json_columns=['input_features']),
+}
+
+
+def get_chunk_size():
+    return getattr(settings, 'EXPORT_CHUNK_SIZE', 2000)
+
+
+def filtered_queryset(spec, since=None, until=None, production_line=None):
+    queryset = spec.model.objects.annotate(**spec.annotations)
+    if since:
+        queryset = queryset.filter(created_at__gte=since)
+    if until:
+        queryset = queryset.filter(created_at__lt=until)
+    if production_line:
+        queryset = queryset.filter(**{spec.line_field: production_line})
+    return queryset
+
+
+def iter_rows(spec, queryset, chunk_size=None):
+    """Yield value tuples in primary-key order, one keyset page at a time, shard by shard."""
+    for alias in read_aliases():
+        yield from _iter_shard_rows(spec, queryset.using(alias), chunk_size)
+
+
+def _iter_shard_rows(spec, queryset, chunk_size=None):
+    chunk_size = chunk_size or get_chunk_size()
+    fields = spec.fields
+    # Page on the primary key, fetched as an extra column unless it is exported
+    exported_key = 'id' in fields
+    values = fields if exported_key else ['pk', *fields]
+    key_index = values.index('id') if exported_key else 0
+    last_pk = None
+    while True:
+        page = queryset.order_by('pk')
+        if last_pk is not None:
+            page = page.filter(pk__gt=last_pk)
+        rows = list(page.values_list(*values)[:chunk_size])
+        if not rows:
+            return
+        yield from rows if exported_key else (row[1:] for row in rows)
+        last_pk = rows[-1][key_index]
+        if len(rows) < chunk_size:
+            return
+
+
+def _plain(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+
+class _Echo:
+    """csv.writer target that hands back each formatted line."""
+
+    def write(self, value):
+        return value
+
+
+def _csv_lines(spec, rows):
+    writer = csv.writer(_Echo())
+    fields = spec.fields
+    yield writer.writerow(spec.headers)
+    for row in rows:
+        yield writer.writerow([
+            json.dumps(value) if field in spec.json_columns and value is not None else _plain(value)
+            for field, value in zip(fields, row)
+        ])
+
+
+def _ndjson_lines(spec, rows):
+    headers = spec.headers
+    for row in rows:
+        yield json.dumps({header: _plain(value) for header, value in zip(headers, row)}) + '\n'
+
+
+def _batched(lines):
+    """Join small text lines into byte chunks of roughly FLUSH_BYTES."""
+    pending = []
+    size = 0
+    for line in lines:
+        data = line.encode('utf-8')
+        pending.append(data)
+        size += len(data)
+        if size >= FLUSH_BYTES:
+            yield b''.join(pending)
+            pending = []
+            size = 0
+    if pending:
+        yield b''.join(pending)
+
+
+def _gzipped(chunks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31 writes a gzip header
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def stream_export(spec, queryset, output_format='csv', gzip=False, chunk_size=None):
+    """Yield the export as byte chunks."""
+    rows = iter_rows(spec, queryset, chunk_size)
+    lines = _csv_lines(spec, rows) if output_format == 'csv' else _ndjson_lines(spec, rows)
+    chunks = _batched(lines)
+    return _gzipped(chunks) if gzip else chunks
+
+
+def export_filename(dataset, output_format, gzip=False):
+    extension = FORMATS[output_format][1]
+    return f"aluoptimize_{dataset}.{extension}" + ('.gz' if gzip else '')
+
+
+def content_type(output_format, gzip=False):
+    return 'application/gzip' if gzip else FORMATS[output_format][0]
@@ -0,0 +1,223 @@
+"""
+Composite index suggestions from captured slow statements.
+
+Each distinct captured SELECT (see backend/apps/core/slow_queries.py) is
+replayed through the database's EXPLAIN with its sample parameters. For
+every table the plan scans in full, or whose ORDER BY columns force a sort,
+the advisor proposes one composite index: the columns compared for
+equality in the WHERE clause, then the first range column or else the
+ORDER BY columns. A suggestion is dropped when an existing index already
+starts with the same columns.
+
+The SQL is read with simple patterns that match what the ORM generates
+(quoted table.column references, top-level AND conditions); conditions
+inside OR groups and subqueries are ignored.
+"""
+import re
+from collections import defaultdict
+
+from django.apps import apps
+from django.db import DatabaseError, connections
+
+_KEYWORDS = re.compile(r'\b(WHERE|GROUP BY|HAVING|ORDER BY|LIMIT|OFFSET|FOR UPDATE)\b', re.IGNORECASE)
+_TABLES = re.compile(r'\b(?:FROM|JOIN)\s+(\w+)(?:\s+(?:AS\s+)?(T\d+))?', re.IGNORECASE)
+_COLUMN = re.compile(r'^(NOT\s+)?(\w+)\.(\w+)\s*(.*)$', re.IGNORECASE | re.DOTALL)
+_ORDER_COLUMN = re.compile(r'^(\w+)\.(\w+)(?:\s+(?:ASC|DESC))?(?:\s+NULLS\s+(?:FIRST|LAST))?$', re.IGNORECASE)
+_RANGE = re.compile(r'^(<=|>=|<|>|BETWEEN\b|LIKE\b|IS NOT NULL\b)', re.IGNORECASE)
+_EQUALITY = re.compile(r'^(=\s*(%s|\?|\'|\d)|IN\b|IS NULL\b|$)', re.IGNORECASE)
+
+
+def _depths(sql):
+    depth, depths = 0, []
+    for char in sql:
+        if char == ')':
+            depth -= 1
+        depths.append(depth)
+        if char == '(':
+            depth += 1
+    return depths
+
+
+def _clauses(sql):
+    """Top-level WHERE and ORDER BY text of a statement."""
+    depths = _depths(sql)
+    found = [(m.group(1).upper(), m.start(), m.end()) for m in _KEYWORDS.finditer(sql) if depths[m.start()] == 0]
+    clauses = {}
+    for index, (keyword, _, end) in enumerate(found):
+        stop = found[index + 1][1] if index + 1 < len(found) else len(sql)
+        clauses.setdefault(keyword, sql[end:stop].strip())
+    return clauses.get('WHERE', ''), clauses.get('ORDER BY', '')
+
+
+def _split(text, separator):
+    """Split on a keyword or character outside parentheses."""
+    depths = _depths(text)
+    pattern = re.compile(rf'\s+{separator}\s+' if separator.isalpha() else re.escape(separator), re.IGNORECASE)
+    parts, start = [], 0
+    for match in pattern.finditer(text):
+        if depths[match.start()] == 0:
+            parts.append(text[start:match.start()].strip())
+            start = match.end()
+    parts.append(text[start:].strip())
+    return parts
+
+
+def _unwrap(text):
+    while text.startswith('(') and text.endswith(')') and min(_depths(text)[1:-1] or [1]) >= 1:
+        text = text[1:-1].strip()
+    return text
+
+
+def _conjuncts(text):
+    text = _unwrap(text)
+    parts = _split(text, 'AND')
+    if len(parts) == 1:
+        return [] if len(_split(text, 'OR')) > 1 else parts
+    return [conjunct for part in parts for conjunct in _conjuncts(part)]
+
+
+def parse_statement(sql):
+    """
+    Per table, the columns a SELECT compares for equality, in ranges and
+    orders by: {table: {'equality': [...], 'range': [...], 'order': [...]}}.
+    """
+    sql = sql.replace('"', '').replace('`', '')
+    aliases = {}
+    for table, alias in _TABLES.findall(sql):
+        aliases[table] = table
+        if alias:
+            aliases[alias] = table
+    columns = defaultdict(lambda: {'equality': [], 'range': [], 'order': []})
+    where, order_by = _clauses(sql)
+
+    for conjunct in _conjuncts(where) if where else []:
+        match = _COLUMN.match(conjunct)
+        if not match or match.group(2) not in aliases:
+            continue
+        negated, table, column, rest = match.groups()
+        kind = 'equality' if negated and not rest else (
+            'range' if _RANGE.match(rest) else 'equality' if _EQUALITY.match(rest) else None
+        )
+        if kind and column not in columns[aliases[table]][kind]:
+            columns[aliases[table]][kind].append(column)
+
+    order = [_ORDER_COLUMN.match(item) for item in _split(order_by, ',')] if order_by else []
+    # Ordering by an expression or by a column of a subquery: no index helps
+    if all(match and match.group(1) in aliases for match in order):
+        for match in order:
+            columns[aliases[match.group(1)]]['order'].append(match.group(2))
+    return dict(columns), aliases
+
+
+def explain(sql, params, using='default'):
+    """The EXPLAIN output of a statement as a list of lines."""
+    connection = connections[using]
+    with connection.cursor() as cursor:
+        cursor.execute(f'{connection.ops.explain_query_prefix()} {sql}', params)
+        return [' '.join(str(value) for value in row) for row in cursor.fetchall()]
+
+
+def plan_problems(plan, names, vendor):
+    """Full scans of a table (under any of its names) and sorts in a plan."""
+    names = '|'.join(re.escape(name) for name in names)
+    scan, sort = {
+        'sqlite': (rf'\bSCAN (?:TABLE )?(?:{names})\b', r'USE TEMP B-TREE FOR (?:RIGHT PART OF )?ORDER BY'),
+        'postgresql': (rf'Seq Scan on (?:{names})\b', r'^\s*(?:->\s*)?(?:Incremental )?Sort\b'),
+        'mysql': (rf'\b(?:{names})\b.*\bALL\b', r'Using filesort'),
+    }.get(vendor, (rf'\b(?:{names})\b', r'\bsort\b'))
+    text = '\n'.join(plan)
+    return {
+        'full_scan': bool(re.search(scan, text, re.MULTILINE)),
+        'sort': bool(re.search(sort, text, re.MULTILINE | re.IGNORECASE)),
+    }
+
+
+def existing_indexes(table, using='default'):
+    """Column lists of the indexes, unique constraints and primary key of a table."""
+    connection = connections[using]
+    with connection.cursor() as cursor:
+        constraints = connection.introspection.get_constraints(cursor, table)
+    return [c['columns'] for c in constraints.values() if c['columns'] and (c['index'] or c['unique'] or c['primary_key'])]
+
+
+def model_fields(table, columns):
+    """The model label and field names of table columns, for a models.Index line."""
+    for model in apps.get_models():
+        if model._meta.db_table == table:
+            by_column = {field.column: field.name for field in model._meta.concrete_fields}
+            return model._meta.label, [by_column.get(column, column) for column in columns]
+    return None, list(columns)
+
+
+def _candidate(usage, order_table):
+    columns = list(usage['equality'])
+    if usage['range']:
+        columns.append(usage['range'][0])
+    elif order_table:
+        columns.extend(column for column in usage['order'] if column not in columns)
+    return columns
+
+
+def group_statements(entries):
+    """Captured entries grouped by normalized SQL, keeping the slowest sample."""
+    groups = {}
+    for entry in entries:
+        group = groups.setdefault(entry['sql'], {
+            'sql': entry['sql'], 'calls': 0, 'total_ms': 0.0, 'max_ms': 0.0,
+            'views': set(), 'call_sites': set(), 'entry': entry,
+        })
+        group['calls'] += 1
+        group['total_ms'] += entry['ms']
+        group['views'].add(entry['view'])
+        group['call_sites'].add(entry['call_site'])
+        if entry['ms'] >= group['max_ms']:
+            group['max_ms'], group['entry'] = entry['ms'], entry
+    return sorted(groups.values(), key=lambda group: -group['total_ms'])
+
+
+def advise(entries, using='default'):
+    """
+    Replay captured statements through EXPLAIN on one database alias.
+    Returns (suggestions, errors): suggestions are sorted by the captured
+    time of the statements they would speed up.
+    """
+    vendor = connections[using].vendor
+    suggestions, errors = {}, []
+    for group in group_statements(entries):
+        entry = group['entry']
+        if entry['vendor'] != vendor or not entry['sql'].lstrip('( ').upper().startswith('SELECT'):
+            continue
+        try:
+            plan = explain(entry['sample'], entry['params'], using)
+        except DatabaseError as e:
+            errors.append({'sql': group['sql'], 'error': str(e)})
+            continue
+
+        usage, aliases = parse_statement(entry['sample'])
+        order_tables = {table for table, columns in usage.items() if columns['order']}
+        for table, columns in usage.items():
+            candidate = _candidate(columns, order_tables == {table})
+            names = [name for name, target in aliases.items() if target == table]
+            problems = plan_problems(plan, names, vendor)
+            if not candidate or not (problems['full_scan'] or (problems['sort'] and table in order_tables)):
+                continue
+            indexes = existing_indexes(table, using)
+            if any(index[:len(candidate)] == candidate for index in indexes):
+                continue
+
+            suggestion = suggestions.setdefault((table, tuple(candidate)), {
+                'table': table, 'columns': candidate, 'model': None, 'fields': [],
+                'statements': 0, 'calls': 0, 'total_ms': 0.0,
+                'full_scan': False, 'sort': False, 'views': set(), 'call_sites': set(), 'examples': [],
+            })
+            suggestion['model'], suggestion['fields'] = model_fields(table, candidate)
+            suggestion['statements'] += 1
+            suggestion['calls'] += group['calls']
+            suggestion['total_ms'] += group['total_ms']
+            suggestion['full_scan'] |= problems['full_scan']
+            suggestion['sort'] |= problems['sort']
+            suggestion['views'] |= group['views']
+            suggestion['call_sites'] |= group['call_sites']
+            suggestion['examples'].append({'sql': group['sql'], 'plan': plan})
+
+    return sorted(suggestions.values(), key=lambda suggestion: -suggestion['total_ms']), errors
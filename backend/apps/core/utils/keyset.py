@@ -0,0 +1,53 @@
+"""
+Keyset (seek) pagination for newest-first listings of sharded rows.
+
+Pages are ordered by (created_at, id), newest first, and the cursor is the
+position of the last row returned. Each page is one indexed range query per
+shard whatever its depth (no OFFSET), and rows added meanwhile do not shift
+the pages. Cursors are opaque url-safe strings.
+"""
+import base64
+from datetime import datetime
+
+from django.db.models import Q
+
+from . import sharding
+
+
+def encode_cursor(row):
+    raw = f"{row['created_at'].isoformat()}|{row['id']}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """The (created_at, id) position of a cursor. Raises ValueError if malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        created_at, pk = raw.split('|')
+        return datetime.fromisoformat(created_at), int(pk)
+    except (TypeError, UnicodeDecodeError, ValueError) as e:
+        raise ValueError('Invalid cursor') from e
+
+
+def paginate(build_queryset, cursor=None, limit=None):
+    """
+    Evaluate build_queryset(alias), a queryset of dicts with created_at and
+    id, on every shard and return (rows, next_cursor) for the page after
+    cursor. Without a limit all remaining rows are returned.
+    """
+    position = decode_cursor(cursor) if cursor else None
+
+    def build(alias):
+        queryset = build_queryset(alias).order_by('-created_at', '-id')
+        if position:
+            created_at, pk = position
+            queryset = queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk))
+        return queryset
+
+    # One extra row tells whether there is a next page
+    rows = sharding.merged_list(build, key=lambda row: (row['created_at'], row['id']),
+                                limit=limit + 1 if limit else None)
+    if limit and len(rows) > limit:
+        rows = rows[:limit]
+        return rows, encode_cursor(rows[-1])
+    return rows, None
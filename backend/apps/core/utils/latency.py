@@ -0,0 +1,164 @@
+"""
+Prediction latency analytics from incrementally maintained histograms.
+
+Every new PredictionLog increments one PredictionLatencyRollup row: its
+minute, model version, production line and latency bucket. Buckets grow
+geometrically by BUCKET_GROWTH, so a percentile read back from the
+histogram is within about 2.5% of the exact value while a day holds at
+most a few hundred rows per version and line. Summaries over any window
+aggregate those rows instead of scanning PredictionLog.
+"""
+import logging
+import math
+from collections import Counter
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, Sum
+
+from backend.apps.core.models import PredictionLatencyRollup
+from backend.apps.core.utils.sharding import fan_out
+from backend.apps.prediction.models import PredictionLog
+
+logger = logging.getLogger(__name__)
+
+BUCKET_GROWTH = 1.05
+PERCENTILES = (50, 90, 99)
+
+
+def bucket_for(ms):
+    """Bucket 0 holds 0 ms; bucket b >= 1 holds [GROWTH**(b-1), GROWTH**b) ms."""
+    if ms <= 0:
+        return 0
+    return int(math.log(ms) / math.log(BUCKET_GROWTH)) + 1
+
+
+def bucket_value(bucket):
+    """Representative latency of a bucket: the geometric middle of its bounds."""
+    if bucket == 0:
+        return 0.0
+    return BUCKET_GROWTH ** (bucket - 0.5)
+
+
+def truncate_minute(moment):
+    return moment.replace(second=0, microsecond=0)
+
+
+def _production_line(log):
+    line = (log.input_features or {}).get('production_line')
+    if line:
+        return line
+    return PredictionLog.objects.using(log._state.db).filter(pk=log.pk).values_list(
+        'production_output__input_data__production_line', flat=True
+    ).first() or ''
+
+
+def record_prediction(log):
+    """Count one new PredictionLog in its latency histogram row."""
+    key = {
+        'minute': truncate_minute(log.created_at),
+        'model_version': log.model_version,
+        'production_line': _production_line(log),
+        'bucket': bucket_for(log.execution_time_ms),
+    }
+    increment = {'count': F('count') + 1, 'total_ms': F('total_ms') + log.execution_time_ms}
+    if PredictionLatencyRollup.objects.filter(**key).update(**increment):
+        return
+    try:
+        with transaction.atomic():
+            PredictionLatencyRollup.objects.create(**key, count=1, total_ms=log.execution_time_ms)
+    except IntegrityError:
+        # Another request created the row first
+        PredictionLatencyRollup.objects.filter(**key).update(**increment)
+
+
+def rebuild_range(start, end):
+    """
+    Recompute the histogram rows of [start, end) from PredictionLog on
+    every shard, e.g. to backfill history. Returns the number of logs.
+    """
+    start, end = truncate_minute(start), truncate_minute(end)
+
+    def shard_counts(alias):
+        counts, total_ms = Counter(), Counter()
+        logs = PredictionLog.objects.using(alias).filter(created_at__gte=start, created_at__lt=end).values_list(
+            'created_at', 'model_version', 'production_output__input_data__production_line', 'execution_time_ms'
+        )
+        for created_at, model_version, line, ms in logs.iterator(chunk_size=2000):
+            key = (truncate_minute(created_at), model_version, line or '', bucket_for(ms))
+            counts[key] += 1
+            total_ms[key] += ms
+        return counts, total_ms
+
+    counts, total_ms = Counter(), Counter()
+    for shard, shard_ms in fan_out(shard_counts):
+        counts.update(shard)
+        total_ms.update(shard_ms)
+
+    with transaction.atomic():
+        PredictionLatencyRollup.objects.filter(minute__gte=start, minute__lt=end).delete()
+        PredictionLatencyRollup.objects.bulk_create([
+            PredictionLatencyRollup(
+                minute=minute, model_version=model_version, production_line=line, bucket=bucket,
+                count=count, total_ms=total_ms[minute, model_version, line, bucket]
+            )
+            for (minute, model_version, line, bucket), count in counts.items()
+        ], batch_size=1000)
+    logged = sum(counts.values())
+    logger.info(f"Rebuilt prediction latency histograms for {start}..{end} from {logged} logs")
+    return logged
+
+
+def _stats(histogram, total_ms):
+    count = sum(histogram.values())
+    if not count:
+        return {'count': 0, 'mean_ms': None, **{f'p{q}_ms': None for q in PERCENTILES}}
+    stats = {'count': count, 'mean_ms': round(total_ms / count, 2)}
+    cumulative = 0
+    buckets = iter(sorted(histogram.items()))
+    for q in PERCENTILES:
+        rank = math.ceil(count * q / 100)
+        while cumulative < rank:
+            bucket, bucket_count = next(buckets)
+            cumulative += bucket_count
+        stats[f'p{q}_ms'] = round(bucket_value(bucket), 2)
+    return stats
+
+
+def _grouped(queryset, field=None):
+    fields = [field, 'bucket'] if field else ['bucket']
+    groups = {}
+    for row in queryset.values(*fields).annotate(n=Sum('count'), ms=Sum('total_ms')).order_by():
+        histogram, totals = groups.setdefault(row[field] if field else None, (Counter(), Counter()))
+        histogram[row['bucket']] += row['n']
+        totals['ms'] += row['ms']
+    return {name: _stats(histogram, totals['ms']) for name, (histogram, totals) in sorted(groups.items())}
+
+
+def latency_summary(start, end, model_version=None, production_line=None):
+    """
+    Latency percentiles, mean and throughput of the predictions made in
+    [start, end), overall and by model version and production line.
+    """
+    start = truncate_minute(start)
+    rows = PredictionLatencyRollup.objects.filter(minute__gte=start, minute__lt=end)
+    if model_version:
+        rows = rows.filter(model_version=model_version)
+    if production_line:
+        rows = rows.filter(production_line=production_line)
+
+    overall = _grouped(rows).get(None) or _stats({}, 0)
+    per_minute = list(rows.values('minute').annotate(n=Sum('count')).order_by('-n', 'minute')[:1])
+    minutes = max((end - start) / timedelta(minutes=1), 1)
+
+    return {
+        'window': {'start': start, 'end': end},
+        'overall': overall,
+        'throughput': {
+            'per_minute': round(overall['count'] / minutes, 3),
+            'peak_per_minute': per_minute[0]['n'] if per_minute else 0,
+            'peak_minute': per_minute[0]['minute'] if per_minute else None,
+        },
+        'by_model_version': _grouped(rows, 'model_version'),
+        'by_production_line': _grouped(rows, 'production_line'),
+    }
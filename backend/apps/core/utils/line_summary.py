@@ -0,0 +1,252 @@
+"""
+Per-production-line summary reports.
+
+Summaries are computed only from the daily rollup tables (see rollups.py),
+so a monthly report reads about 30 rows per line however large the
+production history is.
+"""
+import calendar
+from datetime import timedelta
+
+from django.db.models import Sum
+from reportlab.graphics.charts.barcharts import VerticalBarChart
+from reportlab.graphics.charts.piecharts import Pie
+from reportlab.graphics.shapes import Drawing
+from reportlab.lib import colors
+from reportlab.lib.units import inch
+from reportlab.platypus import Paragraph
+
+from backend.apps.core.models import ProductionRollup, WasteTypeRollup, RecommendationRollup
+from .report_generator import (
+    BoxListSection,
+    ChartSection,
+    ReportGenerator,
+    ReportTemplate,
+    TableSection,
+)
+
+PERIODS = ('daily', 'weekly', 'monthly')
+
+TOP_RECOMMENDATIONS = 5
+
+CHART_COLORS = [
+    colors.HexColor('#1976d2'), colors.HexColor('#e65100'), colors.HexColor('#2e7d32'),
+    colors.HexColor('#6a1b9a'), colors.HexColor('#f9a825'), colors.HexColor('#00838f'),
+]
+
+
+def period_range(period, day):
+    """First and last date (inclusive) of the daily/weekly/monthly period containing day."""
+    if period == 'daily':
+        return day, day
+    if period == 'weekly':
+        start = day - timedelta(days=day.weekday())
+        return start, start + timedelta(days=6)
+    if period == 'monthly':
+        last_day = calendar.monthrange(day.year, day.month)[1]
+        return day.replace(day=1), day.replace(day=last_day)
+    raise ValueError(f"Unknown period '{period}', expected one of {', '.join(PERIODS)}")
+
+
+def lines_with_activity(start, end):
+    return list(
+        ProductionRollup.objects.filter(date__range=(start, end))
+        .values_list('production_line', flat=True).distinct().order_by('production_line')
+    )
+
+
+def build_line_summary(production_line, period, day):
+    """
+    Aggregate the rollups of one line over a period into a plain dict that
+    can be returned as JSON or rendered as a PDF.
+    """
+    start, end = period_range(period, day)
+    rollups = ProductionRollup.objects.filter(production_line=production_line, date__range=(start, end))
+
+    totals = rollups.aggregate(
+        inputs_submitted=Sum('inputs_submitted'),
+        inputs_approved=Sum('inputs_approved'),
+        inputs_rejected=Sum('inputs_rejected'),
+        predictions=Sum('predictions'),
+        predicted_output=Sum('predicted_output_total'),
+        energy_efficiency=Sum('energy_efficiency_total'),
+        output_quality=Sum('output_quality_total'),
+        waste_records=Sum('waste_records'),
+        waste_amount=Sum('waste_amount_total'),
+        estimated_savings=Sum('estimated_savings_total'),
+    )
+    totals = {key: value or 0 for key, value in totals.items()}
+    predictions = totals['predictions']
+
+    daily = [
+        {
+            'date': row['date'],
+            'predicted_output': round(row['predicted_output_total'], 2),
+            'waste_amount': round(row['waste_amount_total'], 2),
+        }
+        for row in rollups.order_by('date').values('date', 'predicted_output_total', 'waste_amount_total')
+    ]
+
+    waste_by_type = [
+        {
+            'waste_type': row['waste_type'],
+            'unit': row['unit'],
+            'records': row['records'],
+            'amount': round(row['amount'], 2),
+        }
+        for row in WasteTypeRollup.objects.filter(
+            production_line=production_line, date__range=(start, end)
+        ).values('waste_type', 'unit').annotate(
+            records=Sum('records'), amount=Sum('amount_total')
+        ).order_by('-amount')
+    ]
+
+    top_recommendations = [
+        {
+            'recommendation_text': row['recommendation_text'],
+            'occurrences': row['occurrences'],
+            'estimated_savings': float(row['savings'] or 0),
+        }
+        for row in RecommendationRollup.objects.filter(
+            production_line=production_line, date__range=(start, end)
+        ).values('text_hash', 'recommendation_text').annotate(
+            occurrences=Sum('occurrences'), savings=Sum('estimated_savings_total')
+        ).order_by('-occurrences', '-savings')[:TOP_RECOMMENDATIONS]
+    ]
+
+    return {
+        'production_line': production_line,
+        'period': period,
+        'start_date': start,
+        'end_date': end,
+        'totals': {
+            'inputs_submitted': totals['inputs_submitted'],
+            'inputs_approved': totals['inputs_approved'],
+            'inputs_rejected': totals['inputs_rejected'],
+            'predictions': predictions,
+            'predicted_output': round(totals['predicted_output'], 2),
+            'avg_energy_efficiency': round(totals['energy_efficiency'] / predictions, 2) if predictions else 0,
+            'avg_output_quality': round(totals['output_quality'] / predictions, 2) if predictions else 0,
+            'waste_records': totals['waste_records'],
+            'waste_amount': round(totals['waste_amount'], 2),
+            'estimated_savings': float(totals['estimated_savings']),
+        },
+        'daily': daily,
+        'waste_by_type': waste_by_type,
+        'top_recommendations': top_recommendations,
+    }
+
+
+# --- PDF layout ---
+
+def _period_rows(summary):
+    return [
+        ["Production Line", summary['production_line']],
+        ["Period", summary['period'].capitalize()],
+        ["From", str(summary['start_date'])],
+        ["To", str(summary['end_date'])],
+    ]
+
+
+def _totals_rows(summary):
+    totals = summary['totals']
+    return [
+        ["Metric", "Value"],
+        ["Inputs Submitted", totals['inputs_submitted']],
+        ["Inputs Approved", totals['inputs_approved']],
+        ["Inputs Rejected", totals['inputs_rejected']],
+        ["Predictions", totals['predictions']],
+        ["Total Predicted Output", f"{totals['predicted_output']} kg"],
+        ["Avg. Energy Efficiency", f"{totals['avg_energy_efficiency']}%"],
+        ["Avg. Output Quality", f"{totals['avg_output_quality']}%"],
+        ["Total Waste", f"{totals['waste_amount']}"],
+        ["Estimated Savings", f"${totals['estimated_savings']:.2f}"],
+    ]
+
+
+def _waste_rows(summary):
+    if not summary['waste_by_type']:
+        return None
+    return [["Waste Type", "Records", "Amount"]] + [
+        [row['waste_type'], row['records'], f"{row['amount']} {row['unit']}"]
+        for row in summary['waste_by_type']
+    ]
+
+
+def _daily_chart(summary):
+    daily = summary['daily']
+    if len(daily) < 2:
+        return None
+
+    drawing = Drawing(6 * inch, 2.6 * inch)
+    chart = VerticalBarChart()
+    chart.x, chart.y = 40, 30
+    chart.width, chart.height = 6 * inch - 60, 2.6 * inch - 50
+    chart.data = [
+        [row['predicted_output'] for row in daily],
+        [row['waste_amount'] for row in daily],
+    ]
+    chart.categoryAxis.categoryNames = [row['date'].strftime('%d %b') for row in daily]
+    chart.categoryAxis.labels.angle = 45 if len(daily) > 10 else 0
+    chart.categoryAxis.labels.boxAnchor = 'ne' if len(daily) > 10 else 'n'
+    chart.categoryAxis.labels.fontSize = 7
+    chart.valueAxis.valueMin = 0
+    chart.valueAxis.labels.fontSize = 7
+    chart.bars[0].fillColor = CHART_COLORS[0]
+    chart.bars[1].fillColor = CHART_COLORS[1]
+    drawing.add(chart)
+    return drawing
+
+
+def _waste_chart(summary):
+    rows = [row for row in summary['waste_by_type'] if row['amount'] > 0]
+    if not rows:
+        return None
+
+    drawing = Drawing(6 * inch, 2.4 * inch)
+    pie = Pie()
+    pie.x, pie.y = 2 * inch, 10
+    pie.width = pie.height = 2.2 * inch - 20
+    pie.data = [row['amount'] for row in rows]
+    pie.labels = [f"{row['waste_type']} ({row['unit']})" for row in rows]
+    pie.slices.fontSize = 8
+    for index in range(len(rows)):
+        pie.slices[index].fillColor = CHART_COLORS[index % len(CHART_COLORS)]
+    drawing.add(pie)
+    return drawing
+
+
+def _recommendation_box(rec, styles):
+    return [
+        [Paragraph(rec['recommendation_text'], styles['RecommendationText'])],
+        [Paragraph(
+            f"<b>Occurrences:</b> {rec['occurrences']} &nbsp; "
+            f"<b>Estimated Savings:</b> ${rec['estimated_savings']:.2f}",
+            styles['Normal']
+        )],
+    ]
+
+
+LINE_SUMMARY_REPORT = ReportTemplate("AluOptimize Production Line Summary", [
+    TableSection("Report Period", _period_rows, [2 * inch, 3.5 * inch], 'key_value'),
+    TableSection("Totals and Averages", _totals_rows, [2.5 * inch, 3 * inch], 'prediction'),
+    ChartSection("Daily Predicted Output (blue) and Waste (orange)", _daily_chart),
+    TableSection("Waste by Type", _waste_rows, [2.5 * inch, 1 * inch, 2 * inch], 'waste'),
+    ChartSection("Waste Distribution", _waste_chart),
+    BoxListSection(
+        "Top Recommendations",
+        lambda summary: summary['top_recommendations'],
+        _recommendation_box,
+        5.5 * inch,
+        'recommendation',
+    ),
+])
+
+
+def render_line_summary(summary):
+    """Render a summary dict from build_line_summary() into a PDF buffer."""
+    return ReportGenerator().generate_report(LINE_SUMMARY_REPORT, summary)
+
+
+def summary_filename(summary):
+    return f"summary_{summary['production_line']}_{summary['period']}_{summary['start_date']}.pdf"
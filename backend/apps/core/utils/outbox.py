@@ -0,0 +1,193 @@
+"""
+Transactional email outbox.
+
+Views call enqueue_email(), which writes any attachment under
+MEDIA_ROOT/outbox/ and stores a pending EmailOutbox row, so the request never
+waits on the mail server. deliver_pending() (run by the deliver_outbox
+management command) claims due rows in batches and sends each batch over a
+single mail connection, retrying failures with exponential backoff. An
+attachment is removed once its row is sent or has failed for good.
+"""
+import logging
+import os
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from backend.apps.core.models import EmailOutbox
+
+logger = logging.getLogger(__name__)
+
+ATTACHMENT_DIR = 'outbox'
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def enqueue_email(subject, body, to, attachment=None, created_by=None):
+    """
+    Queue an email for background delivery.
+
+    attachment is an optional (filename, content bytes, mimetype) tuple; the
+    content is written to disk and only its path is stored on the row.
+    """
+    if isinstance(to, str):
+        to = [to]
+
+    fields = {}
+    if attachment:
+        filename, content, mimetype = attachment
+        stored_name = default_storage.save(
+            os.path.join(ATTACHMENT_DIR, f'{uuid.uuid4().hex}_{filename}'),
+            ContentFile(content)
+        )
+        fields = {
+            'attachment_path': stored_name,
+            'attachment_name': filename,
+            'attachment_mimetype': mimetype,
+        }
+
+    try:
+        return EmailOutbox.objects.create(
+            subject=subject,
+            body=body,
+            to=list(to),
+            created_by=created_by,
+            **fields
+        )
+    except Exception:
+        # No row will ever reference the file
+        if fields:
+            _remove_attachment(fields['attachment_path'])
+        raise
+
+
+def _remove_attachment(path):
+    try:
+        default_storage.delete(path)
+    except OSError as e:
+        logger.warning(f"Could not remove outbox attachment {path}: {str(e)}")
+
+
+def get_backoff(attempts):
+    """Delay before retry number `attempts`: base * 2^(attempts-1), capped."""
+    base = _setting('EMAIL_OUTBOX_BACKOFF_SECONDS', 60)
+    cap = _setting('EMAIL_OUTBOX_MAX_BACKOFF_SECONDS', 3600)
+    return timedelta(seconds=min(base * 2 ** (attempts - 1), cap))
+
+
+def claim_batch(batch_size):
+    """
+    Lease up to batch_size due messages to this worker.
+
+    Rows move to 'sending' with next_attempt_at pushed out by the lease, so a
+    worker that dies mid-batch leaves them to be picked up again later.
+    """
+    now = timezone.now()
+    lease = timedelta(seconds=_setting('EMAIL_OUTBOX_LEASE_SECONDS', 300))
+
+    with transaction.atomic():
+        ids = list(
+            EmailOutbox.objects.select_for_update(skip_locked=True).filter(
+                status__in=['pending', 'sending'],
+                next_attempt_at__lte=now
+            ).order_by('next_attempt_at', 'id').values_list('id', flat=True)[:batch_size]
+        )
+        if not ids:
+            return []
+        EmailOutbox.objects.filter(id__in=ids).update(status='sending', next_attempt_at=now + lease)
+
+    return list(EmailOutbox.objects.filter(id__in=ids).order_by('next_attempt_at', 'id'))
+
+
+def build_message(item, connection):
+    message = EmailMessage(
+        subject=item.subject,
+        body=item.body,
+        to=item.to,
+        connection=connection
+    )
+    if item.attachment_path:
+        with default_storage.open(item.attachment_path, 'rb') as attachment:
+            message.attach(
+                item.attachment_name or os.path.basename(item.attachment_path),
+                attachment.read(),
+                item.attachment_mimetype or None
+            )
+    return message
+
+
+def _mark_sent(item):
+    item.status = 'sent'
+    item.sent_at = timezone.now()
+    item.attempts += 1
+    item.last_error = ''
+    item.save(update_fields=['status', 'sent_at', 'attempts', 'last_error', 'updated_at'])
+
+    if item.attachment_path:
+        _remove_attachment(item.attachment_path)
+
+
+def _mark_failed(item, error):
+    item.attempts += 1
+    item.last_error = str(error)
+    if item.attempts >= _setting('EMAIL_OUTBOX_MAX_ATTEMPTS', 5):
+        item.status = 'failed'
+        logger.error(f"Giving up on outbox email {item.id} after {item.attempts} attempts: {error}")
+    else:
+        item.status = 'pending'
+        item.next_attempt_at = timezone.now() + get_backoff(item.attempts)
+        logger.warning(f"Outbox email {item.id} failed (attempt {item.attempts}), retrying at {item.next_attempt_at}: {error}")
+    item.save(update_fields=['status', 'attempts', 'last_error', 'next_attempt_at', 'updated_at'])
+
+    if item.status == 'failed' and item.attachment_path:
+        _remove_attachment(item.attachment_path)
+
+
+def deliver_pending(batch_size=None):
+    """
+    Send one batch of due messages over a single connection.
+    Returns a (sent, failed) tuple of counts.
+    """
+    batch_size = batch_size or _setting('EMAIL_OUTBOX_BATCH_SIZE', 50)
+    items = claim_batch(batch_size)
+    if not items:
+        return 0, 0
+
+    sent = failed = 0
+    connection = get_connection(fail_silently=False)
+    try:
+        connection.open()
+    except Exception as e:
+        # Mail server unreachable: every message in the batch is retried later
+        for item in items:
+            _mark_failed(item, e)
+        return 0, len(items)
+
+    try:
+        for item in items:
+            try:
+                connection.send_messages([build_message(item, connection)])
+            except Exception as e:
+                _mark_failed(item, e)
+                failed += 1
+                # The connection may be unusable after an error; start a fresh one
+                connection.close()
+                try:
+                    connection.open()
+                except Exception:
+                    pass
+            else:
+                _mark_sent(item)
+                sent += 1
+    finally:
+        connection.close()
+
+    return sent, failed
@@ -0,0 +1,78 @@
+"""
+Representative hot-path queries and their execution plans.
+
+Each entry builds the same queryset the corresponding view runs, so plans
+can be captured with QuerySet.explain() on one engine and compared with
+another (run the explain_queries command once per DB_ENGINE).
+"""
+from datetime import timedelta
+
+from django.db.models import Count, Sum
+from django.utils import timezone
+
+from backend.apps.core.models import ProductionRollup
+from backend.apps.prediction.models import ProductionInput, ProductionOutput, PredictionLog
+from backend.apps.waste.models import WasteManagement
+
+
+def _user_outputs(user_id):
+    return ProductionOutput.objects.filter(
+        input_data__created_by_id=user_id, sent_to_user=True
+    ).select_related('input_data', 'processed_by', 'waste_record', 'recommendation').order_by('-created_at')
+
+
+def _user_inputs(user_id):
+    return ProductionInput.objects.filter(created_by_id=user_id).order_by('-created_at')
+
+
+def _pending_inputs(user_id):
+    return ProductionInput.objects.filter(status='pending').select_related('created_by').order_by('-created_at')
+
+
+def _staff_predictions(user_id):
+    return ProductionOutput.objects.select_related('input_data', 'processed_by').order_by('-created_at')[:5]
+
+
+def _input_status_counts(user_id):
+    return ProductionInput.objects.values('status').annotate(total=Count('id')).order_by()
+
+
+def _waste_by_line(user_id):
+    since = timezone.localdate() - timedelta(days=30)
+    return WasteManagement.objects.filter(date_recorded__gte=since).values(
+        'production_line', 'waste_type'
+    ).annotate(amount=Sum('waste_amount')).order_by()
+
+
+def _prediction_logs_by_version(user_id):
+    return PredictionLog.objects.values('model_version').annotate(
+        total=Count('id')
+    ).order_by('model_version')
+
+
+def _line_rollups(user_id):
+    since = timezone.localdate() - timedelta(days=30)
+    return ProductionRollup.objects.filter(date__gte=since).values('production_line').annotate(
+        output=Sum('predicted_output_total')
+    ).order_by('production_line')
+
+
+PLAN_QUERIES = {
+    'user_outputs': _user_outputs,
+    'user_inputs': _user_inputs,
+    'pending_inputs': _pending_inputs,
+    'staff_predictions': _staff_predictions,
+    'input_status_counts': _input_status_counts,
+    'waste_by_line': _waste_by_line,
+    'prediction_logs_by_version': _prediction_logs_by_version,
+    'line_rollups': _line_rollups,
+}
+
+
+def explain_query(name, user_id=1, using='default', **options):
+    """
+    Return (sql, plan) for one named query on the given database alias.
+    Extra options are passed to explain(), e.g. analyze=True on PostgreSQL.
+    """
+    queryset = PLAN_QUERIES[name](user_id).using(using)
+    return str(queryset.query), queryset.explain(**options)
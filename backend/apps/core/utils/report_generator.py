@@ -1,216 +1,385 @@
+"""
+PDF report generation for AluOptimize.
+
+Paragraph styles and table styles are built once per process and shared by
+every ReportGenerator. Flowables are built for each report: ReportLab
+mutates them while laying a document out, so they cannot be shared between
+documents or threads. Reports are described
+declaratively as a ReportTemplate made of sections, so a new report type
+only needs its own row functions and a template, not a copy of the layout
+code.
+"""
 import io
+from functools import lru_cache
+
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import letter
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image
-from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, PageBreak, KeepTogether
+from reportlab.lib.enums import TA_CENTER
 from django.utils import timezone
-from datetime import datetime
+
+
+@lru_cache(maxsize=None)
+def get_report_styles():
+    """Sample stylesheet plus the custom report styles, built once per process"""
+    styles = getSampleStyleSheet()
+
+    styles.add(ParagraphStyle(
+        name='ReportTitle',
+        parent=styles['Heading1'],
+        fontSize=24,
+        alignment=TA_CENTER,
+        spaceAfter=20,
+        textColor=colors.HexColor('#1976d2')
+    ))
+
+    styles.add(ParagraphStyle(
+        name='SectionHeader',
+        parent=styles['Heading2'],
+        fontSize=16,
+        spaceBefore=15,
+        spaceAfter=10,
+        textColor=colors.HexColor('#1976d2'),
+        borderPadding=(0, 0, 5, 0),
+        borderWidth=1,
+        borderColor=colors.HexColor('#e0e0e0'),
+        borderRadius=None
+    ))
+
+    styles.add(ParagraphStyle(
+        name='InfoLabel',
+        parent=styles['Normal'],
+        fontSize=10,
+        textColor=colors.gray,
+        spaceAfter=2
+    ))
+
+    styles.add(ParagraphStyle(
+        name='InfoValue',
+        parent=styles['Normal'],
+        fontSize=12,
+        textColor=colors.black,
+        spaceAfter=8
+    ))
+
+    styles.add(ParagraphStyle(
+        name='RecommendationText',
+        parent=styles['Normal'],
+        fontSize=11,
+        leading=14,
+        spaceAfter=10,
+        textColor=colors.HexColor('#2e7d32')
+    ))
+    return styles
+
+
+def _metric_table_style(header_background, header_text):
+    return TableStyle([
+        ('BACKGROUND', (0,0), (-1,0), colors.HexColor(header_background)),
+        ('TEXTCOLOR', (0,0), (-1,0), colors.HexColor(header_text)),
+        ('ALIGN', (0,0), (-1,-1), 'LEFT'),
+        ('FONTNAME', (0,0), (-1,0), 'Helvetica-Bold'),
+        ('GRID', (0,0), (-1,-1), 0.5, colors.lightgrey),
+    ])
+
+
+@lru_cache(maxsize=None)
+def get_table_styles():
+    """Table styles by name, built once per process and shared by all tables"""
+    return {
+        'key_value': TableStyle([
+            ('ALIGN', (0,0), (-1,-1), 'LEFT'),
+            ('VALIGN', (0,0), (-1,-1), 'TOP'),
+            ('TEXTCOLOR', (0,0), (0,-1), colors.gray),
+        ]),
+        'parameters': TableStyle([
+            ('BACKGROUND', (0,0), (-1,0), colors.HexColor('#f5f5f5')),
+            ('TEXTCOLOR', (0,0), (-1,0), colors.HexColor('#1976d2')),
+            ('ALIGN', (0,0), (-1,-1), 'LEFT'),
+            ('FONTNAME', (0,0), (-1,0), 'Helvetica-Bold'),
+            ('BOTTOMPADDING', (0,0), (-1,0), 12),
+            ('BACKGROUND', (0,1), (-1,-1), colors.white),
+            ('GRID', (0,0), (-1,-1), 0.5, colors.lightgrey),
+        ]),
+        'prediction': _metric_table_style('#e3f2fd', '#0d47a1'),
+        'waste': _metric_table_style('#fff3e0', '#e65100'),
+        'recommendation': TableStyle([
+            ('BOX', (0,0), (-1,-1), 1, colors.HexColor('#c8e6c9')),
+            ('BACKGROUND', (0,0), (-1,-1), colors.HexColor('#f1f8e9')),
+            ('TOPPADDING', (0,0), (-1,-1), 10),
+            ('BOTTOMPADDING', (0,0), (-1,-1), 10),
+            ('LEFTPADDING', (0,0), (-1,-1), 10),
+            ('RIGHTPADDING', (0,0), (-1,-1), 10),
+        ]),
+    }
+
+
+# Fixed paragraphs: name -> (text, style name)
+STATIC_PARAGRAPHS = {
+    'footer': ("Generated by AluOptimize AI System", 'InfoLabel'),
+    'username_label': ("<b>Username:</b>", 'Normal'),
+    'email_label': ("<b>Email:</b>", 'Normal'),
+    'role_label': ("<b>Role:</b>", 'Normal'),
+}
+
+
+def static_paragraph(name):
+    """A new Paragraph with fixed content, sharing only its style"""
+    text, style = STATIC_PARAGRAPHS[name]
+    return Paragraph(text, get_report_styles()[style])
+
+
+class TableSection:
+    """
+    A titled report section rendered as one table.
+
+    rows is called with the report context and returns the table rows, or
+    None to leave the section out of the report.
+    """
+
+    def __init__(self, title, rows, col_widths, style, space_after=15):
+        self.title = title
+        self.rows = rows
+        self.col_widths = col_widths
+        self.style = style
+        self.space_after = space_after
+
+    def build(self, context, styles):
+        data = self.rows(context)
+        if not data:
+            return []
+
+        table = Table(data, colWidths=self.col_widths)
+        table.setStyle(get_table_styles()[self.style])
+        return [
+            Paragraph(self.title, styles['SectionHeader']),
+            table,
+            Spacer(1, self.space_after),
+        ]
+
+
+class BoxListSection:
+    """
+    A titled report section with one boxed single-column table per item.
+
+    items is called with the report context and returns the objects to
+    render; box_rows turns one object into the rows of its box.
+    """
+
+    def __init__(self, title, items, box_rows, width, style, space_after=10):
+        self.title = title
+        self.items = items
+        self.box_rows = box_rows
+        self.width = width
+        self.style = style
+        self.space_after = space_after
+
+    def build(self, context, styles):
+        items = self.items(context)
+        if not items:
+            return []
+
+        story = [Paragraph(self.title, styles['SectionHeader'])]
+        for item in items:
+            box = Table(self.box_rows(item, styles), colWidths=[self.width])
+            box.setStyle(get_table_styles()[self.style])
+            story.append(box)
+            story.append(Spacer(1, self.space_after))
+        return story
+
+
+class ChartSection:
+    """
+    A titled report section holding one ReportLab graphics Drawing.
+
+    drawing is called with the report context and returns the Drawing, or
+    None to leave the section out of the report.
+    """
+
+    def __init__(self, title, drawing, space_after=15):
+        self.title = title
+        self.drawing = drawing
+        self.space_after = space_after
+
+    def build(self, context, styles):
+        drawing = self.drawing(context)
+        if drawing is None:
+            return []
+        return [
+            KeepTogether([Paragraph(self.title, styles['SectionHeader']), drawing]),
+            Spacer(1, self.space_after),
+        ]
+
+
+class ReportTemplate:
+    """
+    Title, generation timestamp, the given sections in order, and the
+    standard footer.
+    """
+
+    def __init__(self, title, sections):
+        self.title = title
+        self.sections = sections
+
+    def build_story(self, context, styles):
+        story = [
+            Paragraph(self.title, styles['ReportTitle']),
+            Paragraph(f"Generated on: {timezone.now().strftime('%Y-%m-%d %H:%M')}", styles['Normal']),
+            Spacer(1, 20),
+        ]
+        for section in self.sections:
+            story.extend(section.build(context, styles))
+
+        story.append(Spacer(1, 30))
+        story.append(static_paragraph('footer'))
+        return story
+
+
+# --- Production input report ---
+
+def _user_rows(context):
+    user = context['input'].created_by
+    return [
+        [static_paragraph('username_label'), user.username],
+        [static_paragraph('email_label'), user.email],
+        [static_paragraph('role_label'), user.profile.role.capitalize() if hasattr(user, 'profile') else 'User'],
+    ]
+
+
+def _input_rows(context):
+    input_obj = context['input']
+    return [
+        ["Parameter", "Value", "Unit"],
+        ["Production Line", input_obj.production_line, "-"],
+        ["Feed Rate", str(input_obj.feed_rate), "kg/h"],
+        ["Temperature", str(input_obj.temperature), "°C"],
+        ["Pressure", str(input_obj.pressure), "kPa"],
+        ["Power Consumption", str(input_obj.power_consumption), "kWh"],
+        ["Bath Ratio", str(input_obj.bath_ratio), "-"],
+        ["Alumina Conc.", str(input_obj.alumina_concentration), "%"],
+        ["Anode Effect", str(input_obj.anode_effect), "s/day"],
+    ]
+
+
+def _prediction_rows(context):
+    output_obj = context['output']
+    if not output_obj:
+        return None
+    return [
+        ["Metric", "Value"],
+        ["Predicted Output", f"{output_obj.predicted_output} kg"],
+        ["Energy Efficiency", f"{output_obj.energy_efficiency}%"],
+        ["Output Quality", f"{output_obj.output_quality}%"],
+        ["Status", output_obj.status],
+        ["Processed By", output_obj.processed_by.username if output_obj.processed_by else "System"],
+    ]
+
+
+def _waste_rows(context):
+    waste_obj = context['waste']
+    if not waste_obj:
+        return None
+    return [
+        ["Metric", "Value"],
+        ["Waste Type", waste_obj.waste_type],
+        ["Waste Amount", f"{waste_obj.waste_amount} {waste_obj.unit}"],
+        ["Reuse Possible", "Yes" if waste_obj.reuse_possible else "No"],
+        ["Date Recorded", str(waste_obj.date_recorded)],
+    ]
+
+
+def _recommendation_box(rec, styles):
+    return [
+        [Paragraph(f"<b>Recommendation:</b> {rec.recommendation_text}", styles['RecommendationText'])],
+        [Paragraph(f"<b>Estimated Savings:</b> ${rec.estimated_savings}", styles['Normal'])],
+        [Paragraph(f"<i>AI Generated: {'Yes' if rec.ai_generated else 'No'}</i>", styles['InfoLabel'])],
+    ]
+
+
+INPUT_REPORT = ReportTemplate("AluOptimize Production Report", [
+    TableSection("User Information", _user_rows, [1.5*inch, 4*inch], 'key_value'),
+    TableSection("Production Input Parameters", _input_rows, [2.5*inch, 1.5*inch, 1.5*inch], 'parameters'),
+    TableSection("Prediction Results", _prediction_rows, [2.5*inch, 3*inch], 'prediction'),
+    TableSection("Waste Management", _waste_rows, [2.5*inch, 3*inch], 'waste'),
+    BoxListSection(
+        "AI Recommendations",
+        lambda context: context['recommendations'],
+        _recommendation_box,
+        5.5*inch,
+        'recommendation',
+    ),
+])
+
 
 class ReportGenerator:
     """
     Utility class to generate PDF reports for AluOptimize
     """
-    
+
     def __init__(self):
-        self.styles = getSampleStyleSheet()
-        self.setup_styles()
-        
-    def setup_styles(self):
-        """Define custom styles for the report"""
-        self.styles.add(ParagraphStyle(
-            name='ReportTitle',
-            parent=self.styles['Heading1'],
-            fontSize=24,
-            alignment=TA_CENTER,
-            spaceAfter=20,
-            textColor=colors.HexColor('#1976d2')
-        ))
-        
-        self.styles.add(ParagraphStyle(
-            name='SectionHeader',
-            parent=self.styles['Heading2'],
-            fontSize=16,
-            spaceBefore=15,
-            spaceAfter=10,
-            textColor=colors.HexColor('#1976d2'),
-            borderPadding=(0, 0, 5, 0),
-            borderWidth=1,
-            borderColor=colors.HexColor('#e0e0e0'),
-            borderRadius=None
-        ))
-        
-        self.styles.add(ParagraphStyle(
-            name='InfoLabel',
-            parent=self.styles['Normal'],
-            fontSize=10,
-            textColor=colors.gray,
-            spaceAfter=2
-        ))
-        
-        self.styles.add(ParagraphStyle(
-            name='InfoValue',
-            parent=self.styles['Normal'],
-            fontSize=12,
-            textColor=colors.black,
-            spaceAfter=8
-        ))
-        
-        self.styles.add(ParagraphStyle(
-            name='RecommendationText',
-            parent=self.styles['Normal'],
-            fontSize=11,
-            leading=14,
-            spaceAfter=10,
-            textColor=colors.HexColor('#2e7d32')
-        ))
+        self.styles = get_report_styles()
 
-    def generate_input_report(self, input_obj, output_obj, waste_obj, recommendations):
-        """
-        Generate a PDF report for a specific production input
-        """
-        buffer = io.BytesIO()
+    def _build_document(self, story, fileobj):
+        """Lay out the given flowables into fileobj as a letter-size PDF"""
         doc = SimpleDocTemplate(
-            buffer,
+            fileobj,
             pagesize=letter,
             rightMargin=72,
             leftMargin=72,
             topMargin=72,
             bottomMargin=72
         )
-        
-        story = []
-        
-        # --- Header ---
-        story.append(Paragraph("AluOptimize Production Report", self.styles['ReportTitle']))
-        story.append(Paragraph(f"Generated on: {timezone.now().strftime('%Y-%m-%d %H:%M')}", self.styles['Normal']))
-        story.append(Spacer(1, 20))
-        
-        # --- User Information ---
-        story.append(Paragraph("User Information", self.styles['SectionHeader']))
-        
-        user_data = [
-            [Paragraph("<b>Username:</b>", self.styles['Normal']), input_obj.created_by.username],
-            [Paragraph("<b>Email:</b>", self.styles['Normal']), input_obj.created_by.email],
-            [Paragraph("<b>Role:</b>", self.styles['Normal']), input_obj.created_by.profile.role.capitalize() if hasattr(input_obj.created_by, 'profile') else 'User']
-        ]
-        
-        t_user = Table(user_data, colWidths=[1.5*inch, 4*inch])
-        t_user.setStyle(TableStyle([
-            ('ALIGN', (0,0), (-1,-1), 'LEFT'),
-            ('VALIGN', (0,0), (-1,-1), 'TOP'),
-            ('TEXTCOLOR', (0,0), (0,-1), colors.gray),
-        ]))
-        story.append(t_user)
-        story.append(Spacer(1, 15))
-        
-        # --- Production Input Details ---
-        story.append(Paragraph("Production Input Parameters", self.styles['SectionHeader']))
-        
-        input_data = [
-            ["Parameter", "Value", "Unit"],
-            ["Production Line", input_obj.production_line, "-"],
-            ["Feed Rate", str(input_obj.feed_rate), "kg/h"],
-            ["Temperature", str(input_obj.temperature), "°C"],
-            ["Pressure", str(input_obj.pressure), "kPa"],
-            ["Power Consumption", str(input_obj.power_consumption), "kWh"],
-            ["Bath Ratio", str(input_obj.bath_ratio), "-"],
-            ["Alumina Conc.", str(input_obj.alumina_concentration), "%"],
-            ["Anode Effect", str(input_obj.anode_effect), "s/day"],
-        ]
-        
-        t_input = Table(input_data, colWidths=[2.5*inch, 1.5*inch, 1.5*inch])
-        t_input.setStyle(TableStyle([
-            ('BACKGROUND', (0,0), (-1,0), colors.HexColor('#f5f5f5')),
-            ('TEXTCOLOR', (0,0), (-1,0), colors.HexColor('#1976d2')),
-            ('ALIGN', (0,0), (-1,-1), 'LEFT'),
-            ('FONTNAME', (0,0), (-1,0), 'Helvetica-Bold'),
-            ('BOTTOMPADDING', (0,0), (-1,0), 12),
-            ('BACKGROUND', (0,1), (-1,-1), colors.white),
-            ('GRID', (0,0), (-1,-1), 0.5, colors.lightgrey),
-        ]))
-        story.append(t_input)
-        story.append(Spacer(1, 15))
-        
-        # --- Prediction Results ---
-        if output_obj:
-            story.append(Paragraph("Prediction Results", self.styles['SectionHeader']))
-            
-            # Determine status color
-            status_color = colors.green if output_obj.is_approved else colors.orange
-            
-            output_data = [
-                ["Metric", "Value"],
-                ["Predicted Output", f"{output_obj.predicted_output} kg"],
-                ["Energy Efficiency", f"{output_obj.energy_efficiency}%"],
-                ["Output Quality", f"{output_obj.output_quality}%"],
-                ["Status", output_obj.status],
-                ["Processed By", output_obj.processed_by.username if output_obj.processed_by else "System"],
-            ]
-            
-            t_output = Table(output_data, colWidths=[2.5*inch, 3*inch])
-            t_output.setStyle(TableStyle([
-                ('BACKGROUND', (0,0), (-1,0), colors.HexColor('#e3f2fd')),
-                ('TEXTCOLOR', (0,0), (-1,0), colors.HexColor('#0d47a1')),
-                ('ALIGN', (0,0), (-1,-1), 'LEFT'),
-                ('FONTNAME', (0,0), (-1,0), 'Helvetica-Bold'),
-                ('GRID', (0,0), (-1,-1), 0.5, colors.lightgrey),
-            ]))
-            story.append(t_output)
-            story.append(Spacer(1, 15))
-        
-        # --- Waste Management ---
-        if waste_obj:
-            story.append(Paragraph("Waste Management", self.styles['SectionHeader']))
-            
-            waste_data = [
-                ["Metric", "Value"],
-                ["Waste Type", waste_obj.waste_type],
-                ["Waste Amount", f"{waste_obj.waste_amount} {waste_obj.unit}"],
-                ["Reuse Possible", "Yes" if waste_obj.reuse_possible else "No"],
-                ["Date Recorded", str(waste_obj.date_recorded)],
-            ]
-            
-            t_waste = Table(waste_data, colWidths=[2.5*inch, 3*inch])
-            t_waste.setStyle(TableStyle([
-                ('BACKGROUND', (0,0), (-1,0), colors.HexColor('#fff3e0')),
-                ('TEXTCOLOR', (0,0), (-1,0), colors.HexColor('#e65100')),
-                ('ALIGN', (0,0), (-1,-1), 'LEFT'),
-                ('FONTNAME', (0,0), (-1,0), 'Helvetica-Bold'),
-                ('GRID', (0,0), (-1,-1), 0.5, colors.lightgrey),
-            ]))
-            story.append(t_waste)
-            story.append(Spacer(1, 15))
-            
-        # --- Recommendations ---
-        if recommendations:
-            story.append(Paragraph("AI Recommendations", self.styles['SectionHeader']))
-            
-            for rec in recommendations:
-                # Recommendation Box
-                rec_content = [
-                    [Paragraph(f"<b>Recommendation:</b> {rec.recommendation_text}", self.styles['RecommendationText'])],
-                    [Paragraph(f"<b>Estimated Savings:</b> ${rec.estimated_savings}", self.styles['Normal'])],
-                    [Paragraph(f"<i>AI Generated: {'Yes' if rec.ai_generated else 'No'}</i>", self.styles['InfoLabel'])]
-                ]
-                
-                t_rec = Table(rec_content, colWidths=[5.5*inch])
-                t_rec.setStyle(TableStyle([
-                    ('BOX', (0,0), (-1,-1), 1, colors.HexColor('#c8e6c9')),
-                    ('BACKGROUND', (0,0), (-1,-1), colors.HexColor('#f1f8e9')),
-                    ('TOPPADDING', (0,0), (-1,-1), 10),
-                    ('BOTTOMPADDING', (0,0), (-1,-1), 10),
-                    ('LEFTPADDING', (0,0), (-1,-1), 10),
-                    ('RIGHTPADDING', (0,0), (-1,-1), 10),
-                ]))
-                story.append(t_rec)
-                story.append(Spacer(1, 10))
-        
-        # --- Footer ---
-        story.append(Spacer(1, 30))
-        story.append(Paragraph("Generated by AluOptimize AI System", self.styles['InfoLabel']))
-        
         doc.build(story)
+
+    def generate_report(self, template, context):
+        """
+        Render any ReportTemplate with the given context into a PDF buffer
+        """
+        buffer = io.BytesIO()
+        self._build_document(template.build_story(context, self.styles), buffer)
         buffer.seek(0)
         return buffer
+
+    def generate_input_report(self, input_obj, output_obj, waste_obj, recommendations):
+        """
+        Generate a PDF report for a specific production input
+        """
+        return self.generate_report(
+            INPUT_REPORT,
+            self._input_context(input_obj, output_obj, waste_obj, recommendations)
+        )
+
+    def generate_combined_report(self, sections, fileobj):
+        """
+        Write one multi-section PDF into fileobj.
+
+        Each item of sections is an (input, output, waste, recommendations)
+        tuple; every section starts on a new page.
+        """
+        story = []
+        for section in sections:
+            if story:
+                story.append(PageBreak())
+            story.extend(self.build_input_story(*section))
+        self._build_document(story, fileobj)
+        return fileobj
+
+    def build_input_story(self, input_obj, output_obj, waste_obj, recommendations):
+        """
+        Build the flowables for a single production input report
+        """
+        return INPUT_REPORT.build_story(
+            self._input_context(input_obj, output_obj, waste_obj, recommendations),
+            self.styles
+        )
+
+    @staticmethod
+    def _input_context(input_obj, output_obj, waste_obj, recommendations):
+        return {
+            'input': input_obj,
+            'output': output_obj,
+            'waste': waste_obj,
+            'recommendations': recommendations,
+        }
@@ -0,0 +1,145 @@
+"""
+Re-scoring of historical production outputs when the model version changes.
+
+rescore_chunk() runs the current engine (ml_engine.predict_batch) over a
+chunk of outputs in one call and upserts the results as PredictionRescore
+rows tagged with ml_engine.MODEL_VERSION, leaving the live values on
+ProductionOutput untouched. It is driven by batch_jobs.run_chunked, so a
+re-scoring run is checkpointed per version and can use several processes.
+
+compare_versions() reports, per production line and overall, how far a
+version's results are from the live values or from another version.
+"""
+from django.db import connections
+from django.db.models import Count, F, Max, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Abs
+
+from backend.apps.core.utils.sharding import fan_out
+from backend.apps.prediction.ml_engine import MODEL_VERSION, predict_batch
+from backend.apps.prediction.models import ProductionOutput, PredictionRescore
+
+# The live values currently stored on ProductionOutput
+LIVE = 'live'
+
+# PredictionRescore field -> ProductionOutput field holding the live value
+METRICS = {
+    'predicted_output': 'predicted_output',
+    'waste_amount': 'waste_estimate',
+    'energy_efficiency': 'energy_efficiency',
+    'output_quality': 'output_quality',
+}
+
+INPUT_COLUMNS = (
+    'input_data__feed_rate',
+    'input_data__temperature',
+    'input_data__pressure',
+    'input_data__power_consumption',
+)
+
+
+def job_name(version=MODEL_VERSION):
+    return f'rescore:{version}'
+
+
+def rescore_chunk(alias, first_id, last_id):
+    """Score the outputs with ids in [first_id, last_id] with the current engine."""
+    rows = list(
+        ProductionOutput.objects.using(alias).filter(id__range=(first_id, last_id))
+        .order_by('id').values_list('id', *INPUT_COLUMNS)
+    )
+    if not rows:
+        return 0
+
+    output_ids, feed_rates, temperatures, pressures, power_consumptions = zip(*rows)
+    results = predict_batch(feed_rates, temperatures, pressures, power_consumptions)
+
+    features = connections[alias].features
+    PredictionRescore.objects.using(alias).bulk_create(
+        [
+            PredictionRescore(
+                production_output_id=output_id,
+                model_version=MODEL_VERSION,
+                **{metric: results[metric][index] for metric in METRICS}
+            )
+            for index, output_id in enumerate(output_ids)
+        ],
+        update_conflicts=True,
+        # MySQL upserts on any unique key and rejects an explicit target
+        unique_fields=['production_output', 'model_version'] if features.supports_update_conflicts_with_target else None,
+        update_fields=[*METRICS, 'updated_at'],
+    )
+    return len(rows)
+
+
+def _baseline_values(baseline):
+    if baseline == LIVE:
+        return {f'base_{metric}': F(f'production_output__{field}') for metric, field in METRICS.items()}
+    other = PredictionRescore.objects.filter(production_output=OuterRef('production_output'), model_version=baseline)
+    return {f'base_{metric}': Subquery(other.values(metric)[:1]) for metric in METRICS}
+
+
+def _line_totals(alias, candidate, baseline, tolerance):
+    queryset = PredictionRescore.objects.using(alias).filter(model_version=candidate)
+    if baseline != LIVE:
+        queryset = queryset.filter(production_output__rescores__model_version=baseline)
+    queryset = queryset.annotate(
+        line=F('production_output__input_data__production_line'), **_baseline_values(baseline)
+    ).annotate(**{f'diff_{metric}': Abs(F(metric) - F(f'base_{metric}')) for metric in METRICS})
+
+    aggregates = {'rows': Count('id')}
+    for metric in METRICS:
+        compared = Q(**{f'base_{metric}__isnull': False})
+        aggregates.update({
+            f'{metric}__compared': Count('id', filter=compared),
+            f'{metric}__baseline_sum': Sum(f'base_{metric}'),
+            f'{metric}__candidate_sum': Sum(metric, filter=compared),
+            f'{metric}__abs_diff_sum': Sum(f'diff_{metric}'),
+            f'{metric}__max_abs_diff': Max(f'diff_{metric}'),
+            f'{metric}__changed': Count('id', filter=Q(**{f'diff_{metric}__gt': tolerance})),
+        })
+    return list(queryset.order_by().values('line').annotate(**aggregates))
+
+
+def _add(totals, row):
+    for name, value in row.items():
+        if name == 'line' or value is None:
+            continue
+        if name.endswith('max_abs_diff'):
+            totals[name] = max(totals.get(name, 0), value)
+        else:
+            totals[name] = totals.get(name, 0) + value
+
+
+def _summary(totals):
+    summary = {'rows': totals.get('rows', 0)}
+    for metric in METRICS:
+        compared = totals.get(f'{metric}__compared', 0)
+        summary[metric] = {
+            'compared': compared,
+            'baseline_mean': totals.get(f'{metric}__baseline_sum', 0) / compared if compared else None,
+            'candidate_mean': totals.get(f'{metric}__candidate_sum', 0) / compared if compared else None,
+            'mean_abs_diff': totals.get(f'{metric}__abs_diff_sum', 0) / compared if compared else None,
+            'max_abs_diff': totals.get(f'{metric}__max_abs_diff') if compared else None,
+            'changed': totals.get(f'{metric}__changed', 0),
+        }
+    return summary
+
+
+def compare_versions(candidate=MODEL_VERSION, baseline=LIVE, tolerance=0.01):
+    """
+    Compare the results of candidate with the baseline (LIVE or another
+    re-scored version) across all shards. A value counts as changed when
+    it differs by more than tolerance.
+    """
+    lines, overall = {}, {}
+    for rows in fan_out(lambda alias: _line_totals(alias, candidate, baseline, tolerance)):
+        for row in rows:
+            _add(lines.setdefault(row['line'], {}), row)
+            _add(overall, row)
+    return {
+        'candidate': candidate,
+        'baseline': baseline,
+        'tolerance': tolerance,
+        'total': _summary(overall),
+        'lines': {line: _summary(totals) for line, totals in sorted(lines.items())},
+    }
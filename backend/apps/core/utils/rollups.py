@@ -0,0 +1,177 @@
+"""
+Daily production rollups.
+
+refresh_day() recomputes one calendar day of ProductionRollup,
+WasteTypeRollup and RecommendationRollup rows with a handful of grouped
+queries over that day's rows only, so the cost depends on daily volume and
+not on how much history the production tables hold. The queries run on
+every shard and their groups are added up. Refreshing is idempotent: a
+day's rollups are replaced as a whole.
+"""
+import hashlib
+import logging
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from backend.apps.core.models import ProductionRollup, WasteTypeRollup, RecommendationRollup
+from backend.apps.core.utils.sharding import fan_out, sum_results
+from backend.apps.prediction.models import ProductionInput, ProductionOutput
+from backend.apps.waste.models import WasteManagement, WasteRecommendation
+
+logger = logging.getLogger(__name__)
+
+
+def day_bounds(day):
+    """Aware [start, end) datetimes covering a calendar day in the current timezone."""
+    start = timezone.make_aware(datetime.combine(day, time.min))
+    return start, start + timedelta(days=1)
+
+
+def _input_counts(alias, start, end):
+    return list(ProductionInput.objects.using(alias).filter(
+        created_at__gte=start, created_at__lt=end
+    ).values('production_line').annotate(
+        submitted=Count('id'),
+        approved=Count('id', filter=Q(status='approved')),
+        rejected=Count('id', filter=Q(status='rejected')),
+    ).order_by())
+
+
+def _prediction_totals(alias, start, end):
+    return list(ProductionOutput.objects.using(alias).filter(
+        created_at__gte=start, created_at__lt=end
+    ).values(line=F('input_data__production_line')).annotate(
+        count=Count('id'),
+        predicted_output=Sum('predicted_output'),
+        energy_efficiency=Sum('energy_efficiency'),
+        output_quality=Sum('output_quality'),
+    ).order_by())
+
+
+def _waste_rows(alias, day):
+    return list(
+        WasteManagement.objects.using(alias).filter(date_recorded=day).values(
+            'waste_type', 'unit',
+            line=Coalesce('production_line', 'production_input__production_line'),
+        ).annotate(
+            records=Count('id'),
+            amount=Sum('waste_amount'),
+        ).order_by()
+    )
+
+
+def _recommendation_rows(alias, start, end):
+    return list(
+        WasteRecommendation.objects.using(alias).filter(
+            created_at__gte=start, created_at__lt=end
+        ).values(
+            'recommendation_text',
+            line=Coalesce('waste_record__production_line', 'waste_record__production_input__production_line'),
+        ).annotate(
+            occurrences=Count('id'),
+            savings=Sum('estimated_savings'),
+        ).order_by()
+    )
+
+
+def _shard_rows(alias, day, start, end):
+    return (
+        _input_counts(alias, start, end),
+        _prediction_totals(alias, start, end),
+        _waste_rows(alias, day),
+        _recommendation_rows(alias, start, end),
+    )
+
+
+def _combine(shard_rows, *keys):
+    """Merge the grouped rows of every shard that share keys, adding up their counts and sums."""
+    groups = {}
+    for rows in shard_rows:
+        for row in rows:
+            values = {name: value for name, value in row.items() if name not in keys}
+            groups.setdefault(tuple(row[key] for key in keys), []).append(values)
+    return [dict(zip(keys, key), **sum_results(values)) for key, values in groups.items()]
+
+
+def refresh_day(day):
+    """Rebuild all rollup rows for one date. Returns the number of lines touched."""
+    start, end = day_bounds(day)
+    inputs, predictions, waste, recommendations = zip(*fan_out(lambda alias: _shard_rows(alias, day, start, end)))
+    inputs = {row['production_line']: row for row in _combine(inputs, 'production_line')}
+    predictions = {row['line']: row for row in _combine(predictions, 'line')}
+    waste = [row for row in _combine(waste, 'line', 'waste_type', 'unit') if row['line']]
+    recommendations = [row for row in _combine(recommendations, 'line', 'recommendation_text') if row['line']]
+
+    lines = {}
+    for line in set(inputs) | set(predictions) | {row['line'] for row in waste} | {row['line'] for row in recommendations}:
+        if not line:
+            continue
+        counts = inputs.get(line, {})
+        totals = predictions.get(line, {})
+        lines[line] = ProductionRollup(
+            date=day,
+            production_line=line,
+            inputs_submitted=counts.get('submitted', 0),
+            inputs_approved=counts.get('approved', 0),
+            inputs_rejected=counts.get('rejected', 0),
+            predictions=totals.get('count', 0),
+            predicted_output_total=totals.get('predicted_output') or 0,
+            energy_efficiency_total=totals.get('energy_efficiency') or 0,
+            output_quality_total=totals.get('output_quality') or 0,
+        )
+
+    for row in waste:
+        rollup = lines[row['line']]
+        rollup.waste_records += row['records']
+        rollup.waste_amount_total += row['amount'] or 0
+
+    for row in recommendations:
+        lines[row['line']].estimated_savings_total += row['savings'] or Decimal('0')
+
+    with transaction.atomic():
+        ProductionRollup.objects.filter(date=day).delete()
+        WasteTypeRollup.objects.filter(date=day).delete()
+        RecommendationRollup.objects.filter(date=day).delete()
+
+        ProductionRollup.objects.bulk_create(lines.values())
+        WasteTypeRollup.objects.bulk_create([
+            WasteTypeRollup(
+                date=day,
+                production_line=row['line'],
+                waste_type=row['waste_type'],
+                unit=row['unit'],
+                records=row['records'],
+                amount_total=row['amount'] or 0,
+            )
+            for row in waste
+        ])
+        RecommendationRollup.objects.bulk_create([
+            RecommendationRollup(
+                date=day,
+                production_line=row['line'],
+                text_hash=hashlib.sha1(row['recommendation_text'].encode('utf-8')).hexdigest(),
+                recommendation_text=row['recommendation_text'],
+                occurrences=row['occurrences'],
+                estimated_savings_total=row['savings'] or 0,
+            )
+            for row in recommendations
+        ])
+
+    return len(lines)
+
+
+def refresh_range(start_date, end_date):
+    """Refresh every day from start_date to end_date inclusive."""
+    day = start_date
+    refreshed = 0
+    while day <= end_date:
+        refresh_day(day)
+        refreshed += 1
+        day += timedelta(days=1)
+    logger.info(f"Refreshed production rollups for {refreshed} day(s) {start_date}..{end_date}")
+    return refreshed
@@ -0,0 +1,250 @@
+"""
+Cross-shard helpers for production data partitioned by production line.
+
+fan_out() runs one function per shard alias in parallel threads (inline
+when only 'default' exists, i.e. sharding is off) and returns the results
+in alias order. merged_list() and sum_results() combine those results for
+staff/admin lists and aggregates, and ShardedViewSetMixin does the same for
+the API ViewSets. The remaining helpers keep the shards consistent: users
+and their profiles are copied to every shard, and every shard gets its own
+id range so primary keys never collide, which also tells which shard an id
+lives on.
+"""
+import contextvars
+import heapq
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.db import connections, models
+from rest_framework.generics import get_object_or_404
+from rest_framework.response import Response
+
+from backend.config.shard_router import SHARDED_MODELS, get_shard_aliases
+
+logger = logging.getLogger(__name__)
+
+# Ids reserved per shard: shard n allocates from n * SHARD_ID_SPAN upwards
+SHARD_ID_SPAN = 10 ** 12
+
+
+def _read_alias(alias):
+    # None lets reads on the default database still go through the replica router
+    return None if alias == 'default' else alias
+
+
+def _run_on(fn, alias):
+    try:
+        return fn(alias)
+    finally:
+        # Worker threads open their own connections; don't leak them
+        connections.close_all()
+
+
+def fan_out(fn, aliases=None, parallel=True):
+    """
+    Call fn(alias) for every shard and return the results in alias order.
+    The default database is passed as None, which QuerySet.using() treats
+    as "let the routers decide". parallel=False runs them one after the
+    other in the calling thread, on its connections.
+    """
+    aliases = [_read_alias(alias) for alias in aliases or get_shard_aliases()]
+    if len(aliases) == 1 or not parallel:
+        return [fn(alias) for alias in aliases]
+    with ThreadPoolExecutor(max_workers=len(aliases)) as pool:
+        # Each task runs in a copy of the caller's context so the request
+        # state the routers read is visible in the worker thread
+        futures = [pool.submit(contextvars.copy_context().run, _run_on, fn, alias) for alias in aliases]
+        return [future.result() for future in futures]
+
+
+def read_aliases():
+    """
+    The shard aliases as fan_out() passes them ('default' as None), for
+    reads that stream one shard after the other instead of in parallel.
+    """
+    return [_read_alias(alias) for alias in get_shard_aliases()]
+
+
+def merged_list(build_queryset, key, reverse=True, limit=None):
+    """
+    Evaluate build_queryset(alias) on every shard and merge the rows, each
+    already sorted by key, into one sorted list (newest first by default).
+    """
+    def fetch(alias):
+        queryset = build_queryset(alias)
+        return list(queryset[:limit] if limit else queryset)
+
+    merged = heapq.merge(*fan_out(fetch), key=key, reverse=reverse)
+    return list(islice(merged, limit) if limit else merged)
+
+
+def sum_results(results):
+    """Add up the numeric values of per-shard dicts (None counts as 0)."""
+    totals = {}
+    for result in results:
+        for name, value in result.items():
+            totals[name] = totals.get(name, 0) + (value or 0)
+    return totals
+
+
+def get_from_shards(model, **lookup):
+    """Fetch one sharded row by a lookup such as id=..., searching every shard."""
+    for alias in get_shard_aliases():
+        obj = model.objects.using(_read_alias(alias)).filter(**lookup).first()
+        if obj is not None:
+            return obj
+    raise model.DoesNotExist(f"{model.__name__} matching {lookup} not found on any shard")
+
+
+def alias_for_id(pk):
+    """
+    The alias to read the sharded row with this id from, following the id
+    ranges of reserve_id_range(). Ids that fit no shard fall back to default.
+    """
+    aliases = get_shard_aliases()
+    try:
+        index = int(pk) // SHARD_ID_SPAN
+    except (TypeError, ValueError):
+        index = 0
+    return _read_alias(aliases[index] if 0 <= index < len(aliases) else 'default')
+
+
+def _ordering_key(field):
+    """Sort key for one order_by() field name, e.g. 'created_at' or 'input_data__production_line'."""
+    def key(obj):
+        value = obj
+        for part in field.split('__'):
+            value = getattr(value, part, None)
+            if value is None:
+                break
+        if isinstance(value, models.Model):
+            value = value.pk
+        # Rows with None sort first, as they would in ascending SQL order on most backends
+        return (value is not None, value)
+    return key
+
+
+def sort_rows(rows, ordering):
+    """Sort model instances in Python the way order_by(*ordering) sorts them in SQL."""
+    rows = list(rows)
+    for field in reversed([field for field in ordering if isinstance(field, str) and field != '?']):
+        rows.sort(key=_ordering_key(field.lstrip('-')), reverse=field.startswith('-'))
+    return rows
+
+
+class ShardedRows:
+    """
+    The rows of a queryset on every shard, in its order, shaped for DRF's
+    paginators: count() adds up the shards' counts and a slice reads only
+    the first `stop` rows of each shard before merging them.
+    """
+
+    def __init__(self, queryset):
+        self.queryset = queryset
+        self.ordering = queryset.query.order_by or queryset.model._meta.ordering
+
+    def count(self):
+        return sum(fan_out(lambda alias: self.queryset.using(alias).count()))
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        stop = index.stop
+
+        def fetch(alias):
+            queryset = self.queryset.using(alias)
+            return list(queryset[:stop] if stop is not None else queryset)
+
+        rows = sort_rows([row for rows in fan_out(fetch) for row in rows], self.ordering)
+        return rows[index]
+
+    def __iter__(self):
+        return iter(self[:])
+
+
+class ShardedViewSetMixin:
+    """
+    Cross-shard reads for ViewSets over sharded models. list() runs the
+    ViewSet's queryset on every shard and merges the rows in its order,
+    reading no more than the requested page from each shard when the
+    ViewSet paginates; get_object() reads the shard the id belongs to. With
+    sharding off both fall through to DRF unchanged.
+    """
+
+    def list(self, request, *args, **kwargs):
+        if len(get_shard_aliases()) == 1:
+            return super().list(request, *args, **kwargs)
+
+        rows = ShardedRows(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(self.get_serializer(page, many=True).data)
+        return Response(self.get_serializer(rows[:], many=True).data)
+
+    def get_object(self):
+        if len(get_shard_aliases()) == 1:
+            return super().get_object()
+
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        pk = self.kwargs[lookup_url_kwarg]
+        queryset = self.filter_queryset(self.get_queryset()).using(alias_for_id(pk))
+        obj = get_object_or_404(queryset, **{self.lookup_field: pk})
+        self.check_object_permissions(self.request, obj)
+        return obj
+
+
+def _copy_rows(model, rows, alias):
+    existing = set(model.objects.using(alias).filter(pk__in=[row.pk for row in rows]).values_list('pk', flat=True))
+    model.objects.using(alias).bulk_create([row for row in rows if row.pk not in existing])
+    updates = [row for row in rows if row.pk in existing]
+    if updates:
+        fields = [field.attname for field in model._meta.concrete_fields if not field.primary_key]
+        model.objects.using(alias).bulk_update(updates, fields)
+
+
+def replicate_users(users, aliases=None):
+    """
+    Copy user rows and their profiles from 'default' to the shards, keeping
+    their ids. The copies only serve foreign keys and joins; the profile
+    counters are read from 'default'.
+    """
+    from backend.apps.authapp.models import UserProfile
+
+    users = list(users)
+    profiles = list(UserProfile.objects.using('default').filter(user_id__in=[u.pk for u in users]))
+    for alias in aliases or get_shard_aliases()[1:]:
+        _copy_rows(get_user_model(), users, alias)
+        _copy_rows(UserProfile, profiles, alias)
+    return len(users)
+
+
+def reserve_id_range(alias, index):
+    """
+    Move the id sequences of the sharded tables on alias to start at
+    index * SHARD_ID_SPAN, unless they are already past it.
+    """
+    from django.apps import apps
+
+    start = index * SHARD_ID_SPAN
+    connection = connections[alias]
+    with connection.cursor() as cursor:
+        for app_label, model_name in sorted(SHARDED_MODELS):
+            table = apps.get_model(app_label, model_name)._meta.db_table
+            cursor.execute(f'SELECT MAX(id) FROM {connection.ops.quote_name(table)}')
+            current = cursor.fetchone()[0] or 0
+            if current >= start:
+                continue
+            if connection.vendor == 'mysql':
+                cursor.execute(f'ALTER TABLE {connection.ops.quote_name(table)} AUTO_INCREMENT = {int(start)}')
+            elif connection.vendor == 'postgresql':
+                cursor.execute("SELECT setval(pg_get_serial_sequence(%s, 'id'), %s, false)", [table, start])
+            elif connection.vendor == 'sqlite':
+                cursor.execute('DELETE FROM sqlite_sequence WHERE name = %s', [table])
+                cursor.execute('INSERT INTO sqlite_sequence (name, seq) VALUES (%s, %s)', [table, start - 1])
+    logger.info(f"Reserved ids from {start} on shard {alias}")
+    return start
@@ -0,0 +1,354 @@
+"""
+Synthetic production data for load and scale testing.
+
+generate() creates users, production inputs, outputs, waste records,
+recommendations, prediction logs, prediction history and transactions
+with per-line distributions (LINE_PROFILES), a status mix like the staff
+workflow produces and timestamps spread evenly over a window ending at
+`end`. Everything comes from one random.Random(seed), so the same seed,
+volumes and end time give the same data.
+
+Rows are written with bulk_create in batches of batch_size inputs plus
+their dependants, each batch in one transaction per database. Primary
+keys are assigned here rather than by the database, because MySQL does
+not return the ids of bulk-inserted rows, and the children need them.
+Rows land on the shard of their production line and take ids from that
+shard's range. No signals fire, so afterwards run refresh_rollups and
+rebuild_latency_rollups for the generated window.
+"""
+import logging
+import random
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+from itertools import accumulate
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.color import no_style
+from django.db import connections, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from backend.apps.authapp.models import UserProfile
+from backend.apps.core.models import Transaction
+from backend.apps.core.utils.sharding import SHARD_ID_SPAN, replicate_users
+from backend.apps.core.utils.user_counters import recompute as recompute_user_counters
+from backend.apps.prediction.ml_engine import (
+    MODEL_VERSION, calculate_estimated_savings, generate_recommendation, predict_batch
+)
+from backend.apps.prediction.models import PredictionHistory, PredictionLog, ProductionInput, ProductionOutput
+from backend.apps.waste.models import WasteManagement, WasteRecommendation
+from backend.config.shard_router import get_shard_aliases, shard_for_line
+
+logger = logging.getLogger(__name__)
+
+User = get_user_model()
+
+USERNAME_PREFIX = 'synthetic'
+SYNTHETIC_PASSWORD = 'synthetic-pass'
+
+# Share of inputs and (mean, standard deviation) of each process parameter.
+# LINE_C is the older potline: hotter, less stable, more anode effects.
+LINE_PROFILES = {
+    'LINE_A': {
+        'share': 0.5, 'temperature': (960, 5), 'pressure': (101325, 600), 'feed_rate': (1000, 90),
+        'power_consumption': (1500, 120), 'anode_effect': (0.25, 0.08), 'bath_ratio': (1.2, 0.04),
+        'alumina_concentration': (3.0, 0.3),
+    },
+    'LINE_B': {
+        'share': 0.3, 'temperature': (965, 8), 'pressure': (101325, 900), 'feed_rate': (1150, 130),
+        'power_consumption': (1750, 160), 'anode_effect': (0.35, 0.1), 'bath_ratio': (1.22, 0.05),
+        'alumina_concentration': (2.8, 0.35),
+    },
+    'LINE_C': {
+        'share': 0.2, 'temperature': (972, 12), 'pressure': (101000, 1500), 'feed_rate': (850, 110),
+        'power_consumption': (1650, 200), 'anode_effect': (0.6, 0.2), 'bath_ratio': (1.3, 0.07),
+        'alumina_concentration': (2.6, 0.45),
+    },
+}
+PARAMETERS = ('temperature', 'pressure', 'feed_rate', 'power_consumption', 'anode_effect', 'bath_ratio',
+              'alumina_concentration')
+
+STATUS_WEIGHTS = {'approved': 0.8, 'pending': 0.15, 'rejected': 0.05}
+# Older logs come from the previous engine
+LOG_VERSION_WEIGHTS = {MODEL_VERSION: 0.85, 'v0.9.0-simple': 0.15}
+STAFF_SHARE = 0.02
+
+TRANSACTION_TYPES = {'prediction': 0.7, 'report': 0.2, 'subscription': 0.08, 'other': 0.02}
+PAYMENT_STATUSES = {'paid': 0.85, 'pending': 0.08, 'failed': 0.05, 'refunded': 0.02}
+PAYMENT_METHODS = ('card', 'bank_transfer', 'invoice')
+
+GENERATED_MODELS = (
+    ProductionInput, WasteManagement, WasteRecommendation, ProductionOutput, PredictionLog, PredictionHistory,
+)
+
+
+class _Weighted:
+    """rng.choices with precomputed cumulative weights."""
+
+    def __init__(self, weights):
+        self.values = list(weights)
+        self.cum_weights = list(accumulate(weights.values()))
+
+    def pick(self, rng):
+        return rng.choices(self.values, cum_weights=self.cum_weights)[0]
+
+
+class _Ids:
+    """Next primary key per (database, model), after the rows already there."""
+
+    def __init__(self):
+        self.next = {}
+
+    def take(self, model, alias):
+        key = (alias, model)
+        if key not in self.next:
+            index = get_shard_aliases().index(alias) if alias in get_shard_aliases() else 0
+            current = model.objects.using(alias).aggregate(top=Max('pk'))['top'] or 0
+            self.next[key] = max(current, index * SHARD_ID_SPAN - 1) + 1
+        pk = self.next[key]
+        self.next[key] += 1
+        return pk
+
+
+@contextmanager
+def _explicit_timestamps():
+    """Let bulk_create keep the created_at/updated_at values set here."""
+    fields = [
+        field for model in (*GENERATED_MODELS, Transaction) for field in model._meta.concrete_fields
+        if field.name in ('created_at', 'updated_at')
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def _gauss(rng, mean_sd, minimum=0.0):
+    mean, sd = mean_sd
+    return round(max(rng.gauss(mean, sd), minimum), 3)
+
+
+def create_users(count, rng, ids, start, end):
+    """
+    Bulk-create count users (STAFF_SHARE of them staff) with profiles.
+    Returns (user ids, staff ids).
+    """
+    offset = User.objects.filter(username__startswith=f'{USERNAME_PREFIX}_').count()
+    password = make_password(SYNTHETIC_PASSWORD)
+    span = (end - start).total_seconds()
+    users, profiles = [], []
+    for number in range(offset, offset + count):
+        is_staff = rng.random() < STAFF_SHARE
+        user = User(
+            pk=ids.take(User, 'default'), username=f'{USERNAME_PREFIX}_{number:08d}',
+            email=f'{USERNAME_PREFIX}_{number:08d}@example.com', password=password, is_staff=is_staff,
+            date_joined=start + timedelta(seconds=rng.random() * span),
+        )
+        users.append(user)
+        profiles.append(UserProfile(pk=ids.take(UserProfile, 'default'), user=user, role='staff' if is_staff else 'user'))
+
+    with transaction.atomic():
+        User.objects.bulk_create(users, batch_size=2000)
+        UserProfile.objects.bulk_create(profiles, batch_size=2000)
+    if len(get_shard_aliases()) > 1:
+        replicate_users(users)
+    return [u.pk for u in users if not u.is_staff], [u.pk for u in users if u.is_staff]
+
+
+def _build_batch(rng, ids, first, count, moments, user_ids, user_weights, staff_ids, options):
+    """Rows of count inputs and their dependants, grouped by database alias."""
+    lines = _Weighted({line: profile['share'] for line, profile in LINE_PROFILES.items()})
+    statuses = _Weighted(STATUS_WEIGHTS)
+    versions = _Weighted(LOG_VERSION_WEIGHTS)
+    transaction_types = _Weighted(TRANSACTION_TYPES)
+    payment_statuses = _Weighted(PAYMENT_STATUSES)
+    rows = {}
+
+    inputs = []
+    for index in range(first, first + count):
+        line = lines.pick(rng)
+        profile = LINE_PROFILES[line]
+        created_at = moments(index, rng)
+        status = statuses.pick(rng)
+        user_id = rng.choices(user_ids, cum_weights=user_weights)[0]
+        reviewed = status != 'pending' and bool(staff_ids)
+        sent = status == 'approved' and rng.random() < options['sent_ratio']
+        alias = shard_for_line(line)
+        production_input = ProductionInput(
+            pk=ids.take(ProductionInput, alias), production_line=line, status=status,
+            created_by_id=user_id, submitted_by_id=user_id,
+            approved_by_id=rng.choice(staff_ids) if reviewed else None,
+            sent_to_user=sent, sent_at=created_at + timedelta(hours=rng.uniform(1, 48)) if sent else None,
+            created_at=created_at, updated_at=created_at,
+            **{name: _gauss(rng, profile[name]) for name in PARAMETERS},
+        )
+        rows.setdefault(alias, {}).setdefault(ProductionInput, []).append(production_input)
+        inputs.append((alias, production_input))
+
+    approved = [(alias, row) for alias, row in inputs if row.status == 'approved']
+    predictions = predict_batch(*(
+        [row.feed_rate for _, row in approved], [row.temperature for _, row in approved],
+        [row.pressure for _, row in approved], [row.power_consumption for _, row in approved],
+    ))
+    transactions = []
+    for position, (alias, production_input) in enumerate(approved):
+        prediction = {name: values[position] for name, values in predictions.items()}
+        reviewed_at = production_input.created_at + timedelta(minutes=rng.uniform(5, 600))
+        savings = calculate_estimated_savings(prediction['waste_amount'], prediction['energy_efficiency'])
+        group = rows[alias]
+
+        waste = WasteManagement(
+            pk=ids.take(WasteManagement, alias), production_input_id=production_input.pk,
+            waste_type='Aluminum Dross', waste_amount=prediction['waste_amount'], unit='KG',
+            date_recorded=reviewed_at.date(), reuse_possible=prediction['energy_efficiency'] > 50,
+            sent_to_user=production_input.sent_to_user, recorded_by_id=production_input.approved_by_id,
+            production_line=production_input.production_line, temperature=production_input.temperature,
+            pressure=production_input.pressure, energy_used=production_input.power_consumption,
+            created_at=reviewed_at, updated_at=reviewed_at,
+        )
+        recommendation = WasteRecommendation(
+            pk=ids.take(WasteRecommendation, alias), waste_record_id=waste.pk,
+            recommendation_text=generate_recommendation(prediction['waste_amount'], prediction['energy_efficiency']),
+            estimated_savings=Decimal(str(round(savings, 2))), sent_to_user=production_input.sent_to_user,
+            created_at=reviewed_at, updated_at=reviewed_at,
+        )
+        actual = round(prediction['predicted_output'] * rng.gauss(1, 0.03), 2) if rng.random() < 0.6 else None
+        waste_penalty = prediction['waste_amount'] / 10
+        quality_bonus = prediction['output_quality'] / 10
+        output = ProductionOutput(
+            pk=ids.take(ProductionOutput, alias), input_data_id=production_input.pk,
+            predicted_output=prediction['predicted_output'], actual_output=actual,
+            deviation_percentage=(actual - prediction['predicted_output']) / prediction['predicted_output'] * 100
+            if actual and prediction['predicted_output'] else None,
+            output_quality=prediction['output_quality'], energy_efficiency=prediction['energy_efficiency'],
+            is_approved=True, approved_at=reviewed_at, processed_by_id=production_input.approved_by_id,
+            status='Approved', sent_to_user=production_input.sent_to_user, waste_estimate=prediction['waste_amount'],
+            waste_record_id=waste.pk, recommendation_id=recommendation.pk,
+            reward=round(prediction['energy_efficiency'] - waste_penalty + quality_bonus, 3),
+            rl_reward_breakdown={
+                'efficiency_score': prediction['energy_efficiency'],
+                'waste_penalty': round(waste_penalty, 3),
+                'quality_bonus': round(quality_bonus, 3),
+            },
+            created_at=reviewed_at, updated_at=reviewed_at,
+        )
+        group.setdefault(WasteManagement, []).append(waste)
+        group.setdefault(WasteRecommendation, []).append(recommendation)
+        group.setdefault(ProductionOutput, []).append(output)
+
+        features = {'production_line': production_input.production_line,
+                    **{name: getattr(production_input, name) for name in PARAMETERS}}
+        # Some predictions were regenerated, e.g. after a parameter fix
+        for _ in range(1 + (rng.random() < options['log_repeat_ratio'])):
+            logged_at = reviewed_at + timedelta(seconds=rng.uniform(0, 5))
+            group.setdefault(PredictionLog, []).append(PredictionLog(
+                pk=ids.take(PredictionLog, alias), production_output_id=output.pk,
+                confidence_score=round(min(rng.gauss(0.9, 0.04), 0.99), 3),
+                q10_prediction=round(prediction['predicted_output'] * 0.9, 2),
+                q50_prediction=prediction['predicted_output'],
+                q90_prediction=round(prediction['predicted_output'] * 1.1, 2),
+                model_version=versions.pick(rng), input_features=features,
+                execution_time_ms=max(int(rng.lognormvariate(3.2, 0.6)), 1),
+                created_at=logged_at, updated_at=logged_at,
+            ))
+        if rng.random() < options['history_ratio']:
+            group.setdefault(PredictionHistory, []).append(PredictionHistory(
+                pk=ids.take(PredictionHistory, alias), production_output_id=output.pk,
+                state=features, action={'temperature_delta': round(960 - production_input.temperature, 2)},
+                reward=output.reward, reward_breakdown=output.rl_reward_breakdown,
+                actual_efficiency=prediction['energy_efficiency'], actual_waste=prediction['waste_amount'],
+                was_approved=True, production_line=production_input.production_line,
+                submitted_by_id=production_input.created_by_id,
+                created_at=reviewed_at, updated_at=reviewed_at,
+            ))
+        if rng.random() < options['transaction_ratio']:
+            payment_status = payment_statuses.pick(rng)
+            pk = ids.take(Transaction, 'default')
+            transactions.append(Transaction(
+                pk=pk, user_id=production_input.created_by_id,
+                # Transactions stay on 'default'; outputs on other shards are not linked
+                prediction_output_id=output.pk if alias == 'default' else None,
+                transaction_type=transaction_types.pick(rng),
+                amount=Decimal(str(round(rng.lognormvariate(4, 0.7), 2))),
+                payment_status=payment_status, payment_method=rng.choice(PAYMENT_METHODS),
+                transaction_id=f'{USERNAME_PREFIX}-{pk}',
+                processed_by_id=production_input.approved_by_id if payment_status != 'pending' else None,
+                processed_at=reviewed_at if payment_status != 'pending' else None,
+                created_at=reviewed_at, updated_at=reviewed_at,
+            ))
+    if transactions:
+        rows.setdefault('default', {})[Transaction] = transactions
+    return rows
+
+
+def _reset_sequences(aliases):
+    """PostgreSQL sequences do not advance on explicit ids; move them past the new rows."""
+    for alias in aliases:
+        connection = connections[alias]
+        statements = connection.ops.sequence_reset_sql(no_style(), [*GENERATED_MODELS, Transaction, User, UserProfile])
+        if statements:
+            with connection.cursor() as cursor:
+                for sql in statements:
+                    cursor.execute(sql)
+
+
+def generate(users=100, inputs=10000, seed=42, days=365, end=None, batch_size=5000, sent_ratio=0.7,
+             history_ratio=0.5, transaction_ratio=0.6, log_repeat_ratio=0.1, on_progress=None):
+    """
+    Create users and inputs (with their dependants) and return the number
+    of rows written per model name. on_progress(done, total, rows_per_second)
+    is called after every batch.
+    """
+    rng = random.Random(seed)
+    end = end or timezone.now()
+    start = end - timedelta(days=days)
+    ids = _Ids()
+    counts = {}
+    options = {'sent_ratio': sent_ratio, 'history_ratio': history_ratio,
+               'transaction_ratio': transaction_ratio, 'log_repeat_ratio': log_repeat_ratio}
+
+    user_ids, staff_ids = create_users(users, rng, ids, start, end)
+    if not user_ids:
+        raise ValueError('Generate at least one non-staff user')
+    counts['User'] = users
+    # A few heavy submitters and a long tail, as on a real plant
+    user_weights = list(accumulate(rng.paretovariate(1.2) for _ in user_ids))
+
+    step = (end - start) / max(inputs, 1)
+
+    def moments(index, rng):
+        # Evenly spread and jittered, so ids grow with time as in production
+        return start + step * (index + rng.random())
+
+    started = time.monotonic()
+    written = 0
+    touched = {'default'}
+    with _explicit_timestamps():
+        for first in range(0, inputs, batch_size):
+            count = min(batch_size, inputs - first)
+            batch = _build_batch(rng, ids, first, count, moments, user_ids, user_weights, staff_ids, options)
+            for alias, models in sorted(batch.items()):
+                touched.add(alias)
+                with transaction.atomic(using=alias):
+                    # Parents before children
+                    for model in (*GENERATED_MODELS, Transaction):
+                        objs = models.get(model)
+                        if objs:
+                            model.objects.using(alias).bulk_create(objs, batch_size=batch_size)
+                            counts[model.__name__] = counts.get(model.__name__, 0) + len(objs)
+                            written += len(objs)
+            if on_progress:
+                on_progress(first + count, inputs, written / max(time.monotonic() - started, 1e-9))
+
+    _reset_sequences(touched)
+    # Bulk inserts bypass the views that maintain the profile counters
+    recompute_user_counters()
+    logger.info(f"Generated {written} synthetic production rows for {users} users (seed {seed})")
+    return counts
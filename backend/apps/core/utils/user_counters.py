@@ -0,0 +1,104 @@
+"""
+Per-user activity counters stored on UserProfile.
+
+inputs_submitted, inputs_approved, inputs_rejected and last_submission_at
+let user listings read each user's activity from the profile row they
+already join, instead of counting production inputs (spread over every
+shard) per user. The prediction views keep them up to date with F()
+increments when an input is submitted, reviewed, edited or deleted.
+recompute() rebuilds them from the inputs after bulk loads or any drift
+(python manage.py repair_user_counters).
+"""
+import logging
+
+from django.db.models import Count, F, Max, Q
+from django.db.models.functions import Greatest
+
+from backend.apps.authapp.models import UserProfile
+from backend.apps.prediction.models import ProductionInput
+from . import sharding
+
+logger = logging.getLogger(__name__)
+
+# Input status -> profile counter
+STATUS_COUNTERS = {'approved': 'inputs_approved', 'rejected': 'inputs_rejected'}
+COUNTER_FIELDS = ['inputs_submitted', 'inputs_approved', 'inputs_rejected', 'last_submission_at']
+
+
+def _increment(field):
+    return F(field) + 1
+
+
+def _decrement(field):
+    # Never below zero, even if the counter drifted
+    return Greatest(F(field) - 1, 0)
+
+
+def _update(user_id, changes):
+    if user_id is not None and changes:
+        UserProfile.objects.filter(user_id=user_id).update(**changes)
+
+
+def record_submission(production_input):
+    changes = {'inputs_submitted': _increment('inputs_submitted'), 'last_submission_at': production_input.created_at}
+    if production_input.status in STATUS_COUNTERS:
+        changes[STATUS_COUNTERS[production_input.status]] = _increment(STATUS_COUNTERS[production_input.status])
+    _update(production_input.created_by_id, changes)
+
+
+def record_status_change(production_input, old_status):
+    """Move the input from the counter of old_status to that of its current status."""
+    new_status = production_input.status
+    if new_status == old_status:
+        return
+    changes = {}
+    if old_status in STATUS_COUNTERS:
+        changes[STATUS_COUNTERS[old_status]] = _decrement(STATUS_COUNTERS[old_status])
+    if new_status in STATUS_COUNTERS:
+        changes[STATUS_COUNTERS[new_status]] = _increment(STATUS_COUNTERS[new_status])
+    _update(production_input.created_by_id, changes)
+
+
+def record_deletion(production_input):
+    # last_submission_at is left as is until the next repair
+    changes = {'inputs_submitted': _decrement('inputs_submitted')}
+    if production_input.status in STATUS_COUNTERS:
+        changes[STATUS_COUNTERS[production_input.status]] = _decrement(STATUS_COUNTERS[production_input.status])
+    _update(production_input.created_by_id, changes)
+
+
+def _aggregate(alias):
+    return list(
+        ProductionInput.objects.using(alias).order_by().exclude(created_by=None).values('created_by').annotate(
+            submitted=Count('id'),
+            approved=Count('id', filter=Q(status='approved')),
+            rejected=Count('id', filter=Q(status='rejected')),
+            last=Max('created_at'),
+        )
+    )
+
+
+def recompute(batch_size=1000):
+    """
+    Recompute every profile's counters from the inputs on all shards.
+    Returns the number of profiles whose counters changed.
+    """
+    totals = {}
+    for rows in sharding.fan_out(_aggregate):
+        for row in rows:
+            submitted, approved, rejected, last = totals.get(row['created_by'], (0, 0, 0, None))
+            if last is None or (row['last'] is not None and row['last'] > last):
+                last = row['last']
+            totals[row['created_by']] = (submitted + row['submitted'], approved + row['approved'],
+                                         rejected + row['rejected'], last)
+
+    changed = []
+    for profile in UserProfile.objects.only('user_id', *COUNTER_FIELDS).iterator(chunk_size=batch_size):
+        values = totals.get(profile.user_id, (0, 0, 0, None))
+        if tuple(getattr(profile, field) for field in COUNTER_FIELDS) != values:
+            for field, value in zip(COUNTER_FIELDS, values):
+                setattr(profile, field, value)
+            changed.append(profile)
+    UserProfile.objects.bulk_update(changed, COUNTER_FIELDS, batch_size=batch_size)
+    logger.info(f"Recomputed activity counters: {len(changed)} profile(s) changed")
+    return len(changed)
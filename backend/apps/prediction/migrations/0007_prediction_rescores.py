@@ -0,0 +1,33 @@
+# Generated by Django 5.2.7 on 2026-10-19 04:35
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('prediction', '0006_productionoutput_sent_to_user'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PredictionRescore',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('model_version', models.CharField(max_length=50)),
+                ('predicted_output', models.FloatField()),
+                ('waste_amount', models.FloatField()),
+                ('energy_efficiency', models.FloatField()),
+                ('output_quality', models.FloatField()),
+                ('production_output', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rescores', to='prediction.productionoutput')),
+            ],
+            options={
+                'ordering': ['production_output', 'model_version'],
+                'indexes': [models.Index(fields=['model_version'], name='prediction__model_v_a71239_idx')],
+                'constraints': [models.UniqueConstraint(fields=('production_output', 'model_version'), name='uniq_rescore_output_version')],
+            },
+        ),
+    ]
@@ -6,6 +6,11 @@ waste calculation, and efficiency metrics.
 """
 
 
+# Recorded in PredictionLog.model_version and on re-scored results; bump it
+# whenever the prediction logic below changes
+MODEL_VERSION = 'v1.0.0-simple'
+
+
 def predict_output(feed_rate, temperature, pressure, power_consumption):
     """
     Predict aluminum production output based on input parameters.
@@ -23,33 +28,46 @@ def predict_output(feed_rate, temperature, pressure, power_consumption):
             - energy_efficiency: Energy efficiency percentage
             - output_quality: Output quality score (0-100)
     """
+    batch = predict_batch([feed_rate], [temperature], [pressure], [power_consumption])
+    return {name: values[0] for name, values in batch.items()}
+
+
+def predict_batch(feed_rates, temperatures, pressures, power_consumptions):
+    """
+    Column-wise version of predict_output for many inputs at once.
+    
+    Args:
+        feed_rates, temperatures, pressures, power_consumptions (sequences
+        of float): One value per input, all of the same length
+    
+    Returns:
+        dict: The keys of predict_output, each mapped to a list with one
+        value per input
+    """
     # Simple conversion rate (82% efficiency)
-    predicted_output = feed_rate * 0.82
+    predicted = [feed_rate * 0.82 for feed_rate in feed_rates]
     
     # Calculate waste
-    waste_amount = feed_rate - predicted_output
+    waste = [feed_rate - output for feed_rate, output in zip(feed_rates, predicted)]
     
-    # Calculate energy efficiency
-    if power_consumption > 0:
-        energy_efficiency = (feed_rate / power_consumption) * 100
-        # Cap efficiency at 100%
-        energy_efficiency = min(energy_efficiency, 100.0)
-    else:
-        energy_efficiency = 0.0
+    # Calculate energy efficiency, capped at 100%
+    efficiency = [
+        min((feed_rate / power) * 100, 100.0) if power > 0 else 0.0
+        for feed_rate, power in zip(feed_rates, power_consumptions)
+    ]
     
     # Calculate output quality based on temperature and pressure
     # Optimal temperature: 960°C, Optimal pressure: 101325 Pa (1 atm)
-    temp_factor = 1.0 - abs(temperature - 960) / 1000
-    pressure_factor = 1.0 - abs(pressure - 101325) / 200000
-    
-    output_quality = (temp_factor + pressure_factor) * 50
-    output_quality = max(0, min(100, output_quality))  # Clamp between 0-100
+    quality = [
+        max(0, min(100, ((1.0 - abs(temperature - 960) / 1000) + (1.0 - abs(pressure - 101325) / 200000)) * 50))
+        for temperature, pressure in zip(temperatures, pressures)
+    ]
     
     return {
-        'predicted_output': round(predicted_output, 2),
-        'waste_amount': round(waste_amount, 2),
-        'energy_efficiency': round(energy_efficiency, 2),
-        'output_quality': round(output_quality, 2)
+        'predicted_output': [round(value, 2) for value in predicted],
+        'waste_amount': [round(value, 2) for value in waste],
+        'energy_efficiency': [round(value, 2) for value in efficiency],
+        'output_quality': [round(value, 2) for value in quality]
     }
 
 
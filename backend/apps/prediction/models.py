@@ -1,6 +1,6 @@
 from django.db import models
 from django.conf import settings
-from backend.apps.core.models import TimestampedModel
+from backend.apps.core.models import TimestampedModel, ShardedQuerySet
 
 class ProductionInput(TimestampedModel):
     """
@@ -54,6 +54,8 @@ class ProductionInput(TimestampedModel):
         related_name='production_inputs'
     )
 
+    objects = ShardedQuerySet.as_manager()
+
     class Meta:
         ordering = ['-created_at']
         verbose_name = 'Production Input'
@@ -164,6 +166,8 @@ class ProductionOutput(TimestampedModel):
         help_text="Detailed reward breakdown (efficiency_score, waste_penalty, quality_bonus)"
     )
 
+    objects = ShardedQuerySet.as_manager()
+
     class Meta:
         ordering = ['-created_at']
         verbose_name = 'Production Output'
@@ -211,6 +215,8 @@ class PredictionHistory(TimestampedModel):
         related_name='prediction_history'
     )
     
+    objects = ShardedQuerySet.as_manager()
+
     class Meta:
         ordering = ['-created_at']
         verbose_name = 'Prediction History'
@@ -242,6 +248,8 @@ class PredictionLog(TimestampedModel):
     input_features = models.JSONField(help_text="Input features used for prediction")
     execution_time_ms = models.IntegerField(help_text="Prediction execution time in milliseconds")
 
+    objects = ShardedQuerySet.as_manager()
+
     class Meta:
         ordering = ['-created_at']
         verbose_name = 'Prediction Log'
@@ -252,4 +260,35 @@ class PredictionLog(TimestampedModel):
         ]
 
     def __str__(self):
-        return f"Prediction {self.id} - {self.model_version}"
\ No newline at end of file
+        return f"Prediction {self.id} - {self.model_version}"
+
+class PredictionRescore(TimestampedModel):
+    """
+    The result of re-running a model version over a historical output,
+    stored next to the live values on ProductionOutput so versions can be
+    compared before a new engine is trusted (see rescore_outputs).
+    """
+    production_output = models.ForeignKey(
+        ProductionOutput,
+        on_delete=models.CASCADE,
+        related_name='rescores'
+    )
+    model_version = models.CharField(max_length=50)
+    predicted_output = models.FloatField()
+    waste_amount = models.FloatField()
+    energy_efficiency = models.FloatField()
+    output_quality = models.FloatField()
+
+    objects = ShardedQuerySet.as_manager()
+
+    class Meta:
+        ordering = ['production_output', 'model_version']
+        constraints = [
+            models.UniqueConstraint(fields=['production_output', 'model_version'], name='uniq_rescore_output_version'),
+        ]
+        indexes = [
+            models.Index(fields=['model_version']),
+        ]
+
+    def __str__(self):
+        return f"Rescore of {self.production_output_id} with {self.model_version}"
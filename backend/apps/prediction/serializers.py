@@ -1,9 +1,13 @@
 from rest_framework import serializers
 from .models import ProductionInput, ProductionOutput, PredictionLog, PredictionHistory
 from decimal import Decimal
-from backend.apps.waste.serializers import WasteManagementSerializer, WasteRecommendationSerializer
+from backend.apps.waste.serializers import (
+    EagerLoadingMixin, WasteManagementSerializer, WasteRecommendationSerializer, nested_paths,
+)
+
+class ProductionInputSerializer(EagerLoadingMixin, serializers.ModelSerializer):
+    select_related_fields = ['created_by', 'approved_by']
 
-class ProductionInputSerializer(serializers.ModelSerializer):
     # Accept both field names for compatibility
     anode_effect_frequency = serializers.FloatField(
         source='anode_effect', 
@@ -65,7 +69,19 @@ class ProductionInputSerializer(serializers.ModelSerializer):
         validated_data['submitted_by'] = self.context['request'].user
         return super().create(validated_data)
 
-class ProductionOutputSerializer(serializers.ModelSerializer):
+class ProductionOutputSerializer(EagerLoadingMixin, serializers.ModelSerializer):
+    select_related_fields = [
+        'input_data', 'input_data__submitted_by',
+        *nested_paths('input_data', ProductionInputSerializer.select_related_fields),
+        'processed_by',
+        'waste_record', *nested_paths('waste_record', WasteManagementSerializer.select_related_fields),
+        'recommendation', *nested_paths('recommendation', WasteRecommendationSerializer.select_related_fields),
+    ]
+    prefetch_related_fields = [
+        *nested_paths('waste_record', WasteManagementSerializer.prefetch_related_fields),
+        *nested_paths('recommendation', WasteRecommendationSerializer.prefetch_related_fields),
+    ]
+
     production_line = serializers.SerializerMethodField()
     output_kg = serializers.FloatField(source='predicted_output', read_only=True)
     efficiency = serializers.FloatField(source='energy_efficiency', read_only=True)
@@ -148,7 +164,12 @@ class PredictionHistorySerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at', 'updated_at']
 
 
-class PredictionLogSerializer(serializers.ModelSerializer):
+class PredictionLogSerializer(EagerLoadingMixin, serializers.ModelSerializer):
+    select_related_fields = [
+        'production_output', *nested_paths('production_output', ProductionOutputSerializer.select_related_fields),
+    ]
+    prefetch_related_fields = nested_paths('production_output', ProductionOutputSerializer.prefetch_related_fields)
+
     production_output = ProductionOutputSerializer(read_only=True)
     
     class Meta:
@@ -8,11 +8,14 @@ from django.utils.decorators import method_decorator
 from django.views.decorators.cache import cache_page
 from django.views.decorators.vary import vary_on_headers, vary_on_cookie
 from django.db.models import Q, Avg, Max, Min, Count
+from django.http import Http404
 from django.utils import timezone
 from datetime import timedelta
 import logging
 from .models import ProductionInput, ProductionOutput, PredictionLog
 from .serializers import ProductionInputSerializer, ProductionOutputSerializer, PredictionLogSerializer
+from backend.apps.core.utils import user_counters
+from backend.apps.core.utils.sharding import ShardedViewSetMixin
 
 logger = logging.getLogger(__name__)
 
@@ -31,7 +34,7 @@ class IsUser(BasePermission):
         # Users can only access their own objects
         return obj.created_by == request.user
 
-class ProductionInputViewSet(viewsets.ModelViewSet):
+class ProductionInputViewSet(ShardedViewSetMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing production inputs.
     """
@@ -46,12 +49,23 @@ class ProductionInputViewSet(viewsets.ModelViewSet):
         """Filter based on user role and status"""
         user = self.request.user
         
+        queryset = ProductionInputSerializer.setup_eager_loading(ProductionInput.objects.all())
+
         # Staff and admin can see all inputs
         if user.is_staff or user.is_superuser:
-            return ProductionInput.objects.all()
+            return queryset
         
         # Regular users only see their own inputs
-        return ProductionInput.objects.filter(created_by=user)
+        return queryset.filter(created_by=user)
+
+    def perform_update(self, serializer):
+        old_status = serializer.instance.status
+        super().perform_update(serializer)
+        user_counters.record_status_change(serializer.instance, old_status)
+
+    def perform_destroy(self, instance):
+        super().perform_destroy(instance)
+        user_counters.record_deletion(instance)
     
     def list(self, request, *args, **kwargs):
         """Override list to handle empty data gracefully"""
@@ -83,6 +97,7 @@ class ProductionInputViewSet(viewsets.ModelViewSet):
         # For backward compatibility
         production_input.submitted_by = request.user
         production_input.save()
+        user_counters.record_submission(production_input)
         
         logger.info(f"Production input {production_input.id} submitted by {request.user.username} with status 'pending'")
         
@@ -98,7 +113,7 @@ class ProductionInputViewSet(viewsets.ModelViewSet):
         """Staff action: Generate prediction for a pending input"""
         import time
         try:
-            from .ml_engine import predict_output, generate_recommendation, calculate_estimated_savings
+            from .ml_engine import MODEL_VERSION, predict_output, generate_recommendation, calculate_estimated_savings
             from backend.apps.waste.models import WasteManagement, WasteRecommendation
             from datetime import date
             from django.utils import timezone
@@ -111,6 +126,8 @@ class ProductionInputViewSet(viewsets.ModelViewSet):
             )
         
         production_input = self.get_object()
+        # Outputs, waste and logs live on the input's shard
+        db = production_input._state.db
         
         # Allow re-generating prediction if needed, or stick to pending only?
         # User request says "Staff approves & calculates".
@@ -128,7 +145,7 @@ class ProductionInputViewSet(viewsets.ModelViewSet):
             )
             
             # Check if ProductionOutput already exists
-            production_output, created = ProductionOutput.objects.update_or_create(
+            production_output, created = ProductionOutput.objects.using(db).update_or_create(
                 input_data=production_input,
                 defaults={
                     'predicted_output': prediction['predicted_output'],
@@ -142,7 +159,7 @@ class ProductionInputViewSet(viewsets.ModelViewSet):
             )
             
             # Create or update WasteManagement
-            waste_record, waste_created = WasteManagement.objects.update_or_create(
+            waste_record, waste_created = WasteManagement.objects.using(db).update_or_create(
                 production_input=production_input,
                 defaults={
                     'waste_type': "Aluminum Dross",
@@ -170,7 +187,7 @@ class ProductionInputViewSet(viewsets.ModelViewSet):
             )
             
             # Create or update WasteRecommendation
-            waste_recommendation, rec_created = WasteRecommendation.objects.update_or_create(
+            waste_recommendation, rec_created = WasteRecommendation.objects.using(db).update_or_create(
                 waste_record=waste_record,
                 defaults={
                     'recommendation_text': recommendation_text,
@@ -185,9 +202,11 @@ class ProductionInputViewSet(viewsets.ModelViewSet):
             production_output.save()
             
             # Update input status
+            old_status = production_input.status
             production_input.status = 'approved'
             production_input.approved_by = request.user
             production_input.save()
+            user_counters.record_status_change(production_input, old_status)
             
             # Calculate execution time
             execution_time_ms = int((time.time() - start_time) * 1000)
@@ -199,7 +218,7 @@ class ProductionInputViewSet(viewsets.ModelViewSet):
                 q10_prediction=prediction['predicted_output'] * 0.9,
                 q50_prediction=prediction['predicted_output'],
                 q90_prediction=prediction['predicted_output'] * 1.1,
-                model_version='v1.0.0-simple',
+                model_version=MODEL_VERSION,
                 input_features={
                     'production_line': production_input.production_line,
                     'temperature': production_input.temperature,
@@ -256,7 +275,7 @@ class ProductionInputViewSet(viewsets.ModelViewSet):
 
         # Update all related objects to sent_to_user=True
         try:
-            production_output = ProductionOutput.objects.get(input_data=production_input)
+            production_output = ProductionOutput.objects.using(production_input._state.db).get(input_data=production_input)
             production_output.sent_to_user = True
             production_output.save()
             
@@ -267,7 +286,7 @@ class ProductionInputViewSet(viewsets.ModelViewSet):
                 waste_record.save()
                 # Update all recommendations for this waste record
                 from backend.apps.waste.models import WasteRecommendation
-                WasteRecommendation.objects.filter(waste_record=waste_record).update(sent_to_user=True)
+                WasteRecommendation.objects.using(waste_record._state.db).filter(waste_record=waste_record).update(sent_to_user=True)
             
             # Also update the specific recommendation linked to output (if different)
             recommendation = production_output.recommendation
@@ -326,6 +345,7 @@ class ProductionInputViewSet(viewsets.ModelViewSet):
         production_input.status = 'rejected'
         production_input.approved_by = request.user
         production_input.save()
+        user_counters.record_status_change(production_input, 'pending')
         
         logger.info(f"Input {production_input.id} rejected by {request.user.username}")
         
@@ -333,11 +353,11 @@ class ProductionInputViewSet(viewsets.ModelViewSet):
             {"message": "Input rejected successfully"}
         )
 
-class ProductionOutputViewSet(viewsets.ModelViewSet):
+class ProductionOutputViewSet(ShardedViewSetMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing production outputs.
     """
-    queryset = ProductionOutput.objects.select_related('input_data').all()
+    queryset = ProductionOutputSerializer.setup_eager_loading(ProductionOutput.objects.all())
     serializer_class = ProductionOutputSerializer
     permission_classes = [IsUser]
     filterset_fields = ['created_at', 'input_data__production_line']
@@ -386,12 +406,12 @@ class ProductionOutputViewSet(viewsets.ModelViewSet):
         
         return Response(serializer.data)
 
-class PredictionLogViewSet(viewsets.ReadOnlyModelViewSet):
+class PredictionLogViewSet(ShardedViewSetMixin, viewsets.ReadOnlyModelViewSet):
     """
     ViewSet for viewing prediction logs.
     Read-only - logs are created automatically when predictions are made.
     """
-    queryset = PredictionLog.objects.all()
+    queryset = PredictionLogSerializer.setup_eager_loading(PredictionLog.objects.all())
     serializer_class = PredictionLogSerializer
     permission_classes = [IsUser]
     filterset_fields = ['model_version', 'created_at']
@@ -410,11 +430,23 @@ class PredictionLogViewSet(viewsets.ReadOnlyModelViewSet):
             logger.error(f"Error fetching prediction logs: {str(e)}")
             return Response([], status=status.HTTP_200_OK)
 
-class PendingRequestsViewSet(viewsets.ReadOnlyModelViewSet):
+    def retrieve(self, request, *args, **kwargs):
+        """Fall back to the archive for logs moved out by archive_cold_rows"""
+        try:
+            return super().retrieve(request, *args, **kwargs)
+        except Http404:
+            from backend.apps.core.utils.archive import get_archived_row
+
+            row = get_archived_row('prediction_logs', kwargs['pk']) if str(kwargs['pk']).isdigit() else None
+            if row is None:
+                raise
+            return Response(row)
+
+class PendingRequestsViewSet(ShardedViewSetMixin, viewsets.ReadOnlyModelViewSet):
     """
     ViewSet for staff to view pending production inputs.
     """
-    queryset = ProductionInput.objects.filter(status='pending')
+    queryset = ProductionInputSerializer.setup_eager_loading(ProductionInput.objects.filter(status='pending'))
     serializer_class = ProductionInputSerializer
     permission_classes = [IsStaff]
     filterset_fields = ['production_line', 'created_at']
@@ -433,7 +465,7 @@ class PendingRequestsViewSet(viewsets.ReadOnlyModelViewSet):
             logger.error(f"Error fetching pending requests: {str(e)}")
             return Response([], status=status.HTTP_200_OK)
 
-class PredictionViewSet(viewsets.ReadOnlyModelViewSet):
+class PredictionViewSet(ShardedViewSetMixin, viewsets.ReadOnlyModelViewSet):
     """
     ViewSet for admin/staff to view all predictions with full details.
     Admin sees ALL, staff sees ALL.
@@ -449,7 +481,7 @@ class PredictionViewSet(viewsets.ReadOnlyModelViewSet):
         user = self.request.user
         if user.is_superuser or user.is_staff:
             # Staff and Admin see ALL predictions
-            return ProductionOutput.objects.select_related('input_data', 'processed_by').all()
+            return ProductionOutputSerializer.setup_eager_loading(ProductionOutput.objects.all())
         return ProductionOutput.objects.none()
     
     def list(self, request, *args, **kwargs):
@@ -464,7 +496,7 @@ class PredictionViewSet(viewsets.ReadOnlyModelViewSet):
             logger.error(f"Error fetching predictions: {str(e)}")
             return Response([], status=status.HTTP_200_OK)
 
-class UserPredictionViewSet(viewsets.ReadOnlyModelViewSet):
+class UserPredictionViewSet(ShardedViewSetMixin, viewsets.ReadOnlyModelViewSet):
     """
     GET /api/prediction/user/
     Returns only predictions for request.user with sent_to_user=True, including nested waste and recommendation data.
@@ -477,17 +509,10 @@ class UserPredictionViewSet(viewsets.ReadOnlyModelViewSet):
     def get_queryset(self):
         """Only return predictions that have been sent to the user"""
         user = self.request.user
-        return ProductionOutput.objects.filter(
+        return ProductionOutputSerializer.setup_eager_loading(ProductionOutput.objects.filter(
             input_data__created_by=user,
             sent_to_user=True
-        ).select_related(
-            'input_data', 
-            'processed_by',
-            'waste_record',
-            'recommendation'
-        ).prefetch_related(
-            'waste_record__recommendations'
-        ).order_by('-created_at')
+        )).order_by('-created_at')
     
     def list(self, request, *args, **kwargs):
         """Override list to handle empty data gracefully"""
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.7 on 2026-10-19 06:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('waste', '0003_wastemanagement_sent_to_user_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='wasterecommendation',
+            index=models.Index(fields=['created_at'], name='waste_waste_created_1d5b18_idx'),
+        ),
+    ]
@@ -1,6 +1,6 @@
 from django.db import models
 from django.conf import settings
-from backend.apps.core.models import TimestampedModel
+from backend.apps.core.models import TimestampedModel, ShardedQuerySet
 from backend.apps.prediction.models import ProductionInput
 
 class WasteManagement(TimestampedModel):
@@ -41,6 +41,8 @@ class WasteManagement(TimestampedModel):
 	pressure = models.FloatField(null=True, blank=True, help_text="Pressure in Pa")
 	energy_used = models.FloatField(null=True, blank=True, help_text="Energy consumption in kWh")
 
+	objects = ShardedQuerySet.as_manager()
+
 	class Meta:
 		ordering = ['-created_at']
 		verbose_name = 'Waste Record'
@@ -68,10 +70,15 @@ class WasteRecommendation(TimestampedModel):
 	# Whether this recommendation has been sent back to the end user
 	sent_to_user = models.BooleanField(default=False)
 
+	objects = ShardedQuerySet.as_manager()
+
 	class Meta:
 		ordering = ['-created_at']
 		verbose_name = 'Waste Recommendation'
 		verbose_name_plural = 'Waste Recommendations'
+		indexes = [
+			models.Index(fields=['created_at']),
+		]
 
 	def __str__(self):
 		return f"Recommendation for {self.waste_record} - {self.estimated_savings or 'N/A'}"
@@ -1,7 +1,41 @@
 from rest_framework import serializers
 from .models import WasteManagement, WasteRecommendation
 
-class WasteManagementSerializer(serializers.ModelSerializer):
+
+def nested_paths(prefix, paths):
+    """Prefix relation paths for a serializer nested under prefix."""
+    return [f'{prefix}__{path}' for path in paths]
+
+
+def first_related(manager):
+    """
+    Like manager.first(), but served from prefetch_related when the
+    relation was prefetched instead of issuing a query per object.
+    """
+    return next(iter(manager.all()), None)
+
+
+class EagerLoadingMixin:
+    """
+    Serializers list the relations they read in select_related_fields and
+    prefetch_related_fields; views pass their queryset through
+    setup_eager_loading() so a list costs a fixed number of queries.
+    """
+    select_related_fields = []
+    prefetch_related_fields = []
+
+    @classmethod
+    def setup_eager_loading(cls, queryset):
+        return queryset.select_related(*cls.select_related_fields).prefetch_related(*cls.prefetch_related_fields)
+
+
+class WasteManagementSerializer(EagerLoadingMixin, serializers.ModelSerializer):
+    select_related_fields = [
+        'production_input', 'production_input__output',
+        'production_input__created_by', 'production_input__submitted_by',
+    ]
+    prefetch_related_fields = ['recommendations']
+
     production_line = serializers.CharField(read_only=True)
     created_by_username = serializers.SerializerMethodField()
     submitted_by_username = serializers.SerializerMethodField()
@@ -34,13 +68,13 @@ class WasteManagementSerializer(serializers.ModelSerializer):
 
     def get_estimated_savings(self, obj):
         try:
-            return float(obj.recommendations.first().estimated_savings)
+            return float(first_related(obj.recommendations).estimated_savings)
         except Exception:
             return None
 
     def get_recommendation_text(self, obj):
         try:
-            return obj.recommendations.first().recommendation_text
+            return first_related(obj.recommendations).recommendation_text
         except Exception:
             return None
 
@@ -83,7 +117,10 @@ class WasteManagementSerializer(serializers.ModelSerializer):
             validated_data['recorded_by'] = request.user
         return super().create(validated_data)
 
-class WasteRecommendationSerializer(serializers.ModelSerializer):
+class WasteRecommendationSerializer(EagerLoadingMixin, serializers.ModelSerializer):
+    select_related_fields = ['waste_record', *nested_paths('waste_record', WasteManagementSerializer.select_related_fields)]
+    prefetch_related_fields = nested_paths('waste_record', WasteManagementSerializer.prefetch_related_fields)
+
     production_line = serializers.SerializerMethodField()
     output_kg = serializers.SerializerMethodField()
     efficiency = serializers.SerializerMethodField()
@@ -144,10 +181,13 @@ class WasteRecommendationSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
 
-class UserWasteRecommendationSerializer(serializers.ModelSerializer):
+class UserWasteRecommendationSerializer(EagerLoadingMixin, serializers.ModelSerializer):
     """
     Serializer for user-facing waste recommendations with production context.
     """
+    select_related_fields = ['waste_record', 'waste_record__production_input']
+    prefetch_related_fields = ['production_outputs']
+
     waste_amount = serializers.FloatField(source='waste_record.waste_amount', read_only=True)
     waste_type = serializers.CharField(source='waste_record.waste_type', read_only=True)
     unit = serializers.CharField(source='waste_record.unit', read_only=True)
@@ -191,7 +231,7 @@ class UserWasteRecommendationSerializer(serializers.ModelSerializer):
     def get_energy_efficiency(self, obj):
         """Get energy efficiency from related production output."""
         try:
-            production_output = obj.production_outputs.first()
+            production_output = first_related(obj.production_outputs)
             return production_output.energy_efficiency if production_output else None
         except:
             return None
@@ -199,7 +239,7 @@ class UserWasteRecommendationSerializer(serializers.ModelSerializer):
     def get_predicted_output(self, obj):
         """Get predicted output from related production output."""
         try:
-            production_output = obj.production_outputs.first()
+            production_output = first_related(obj.production_outputs)
             return production_output.predicted_output if production_output else None
         except:
             return None
@@ -207,7 +247,7 @@ class UserWasteRecommendationSerializer(serializers.ModelSerializer):
     def get_output_quality(self, obj):
         """Get output quality from related production output."""
         try:
-            production_output = obj.production_outputs.first()
+            production_output = first_related(obj.production_outputs)
             return production_output.output_quality if production_output else None
         except:
             return None
@@ -215,7 +255,7 @@ class UserWasteRecommendationSerializer(serializers.ModelSerializer):
     def get_reward(self, obj):
         """Get RL reward from related production output."""
         try:
-            production_output = obj.production_outputs.first()
+            production_output = first_related(obj.production_outputs)
             return production_output.reward if production_output else None
         except:
             return None
\ No newline at end of file
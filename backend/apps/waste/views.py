@@ -5,6 +5,7 @@ from rest_framework.permissions import IsAuthenticated, IsAdminUser, BasePermiss
 from django.db.models import Q, Sum, Count
 from .models import WasteManagement, WasteRecommendation
 from .serializers import WasteManagementSerializer, WasteRecommendationSerializer, UserWasteRecommendationSerializer
+from backend.apps.core.utils.sharding import ShardedViewSetMixin
 import logging
 
 logger = logging.getLogger(__name__)
@@ -14,7 +15,7 @@ class IsStaff(BasePermission):
     def has_permission(self, request, view):
         return request.user and request.user.is_staff
 
-class WasteManagementViewSet(viewsets.ModelViewSet):
+class WasteManagementViewSet(ShardedViewSetMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing waste records.
     """
@@ -29,12 +30,13 @@ class WasteManagementViewSet(viewsets.ModelViewSet):
         user = self.request.user
         
         # Staff and Admin see all waste records
+        queryset = WasteManagementSerializer.setup_eager_loading(WasteManagement.objects.all())
         if user.is_staff or user.is_superuser:
-            return WasteManagement.objects.all().order_by('-date_recorded')
+            return queryset.order_by('-date_recorded')
             
         # Regular users only see waste records from their own inputs
         # that have been sent to them
-        return WasteManagement.objects.filter(
+        return queryset.filter(
             production_input__created_by=user,
             sent_to_user=True
         ).order_by('-date_recorded')
@@ -50,7 +52,7 @@ class WasteManagementViewSet(viewsets.ModelViewSet):
             logger.error(f"Error fetching waste records: {str(e)}")
             return Response([], status=status.HTTP_200_OK)
 
-class WasteRecommendationViewSet(viewsets.ModelViewSet):
+class WasteRecommendationViewSet(ShardedViewSetMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing waste recommendations.
     """
@@ -64,12 +66,13 @@ class WasteRecommendationViewSet(viewsets.ModelViewSet):
         user = self.request.user
         
         # Staff and Admin see all recommendations
+        queryset = WasteRecommendationSerializer.setup_eager_loading(WasteRecommendation.objects.all())
         if user.is_staff or user.is_superuser:
-            return WasteRecommendation.objects.all().order_by('-created_at')
+            return queryset.order_by('-created_at')
             
         # Regular users only see recommendations for their waste
         # that have been sent to them
-        return WasteRecommendation.objects.filter(
+        return queryset.filter(
             waste_record__production_input__created_by=user,
             sent_to_user=True
         ).order_by('-created_at')
@@ -85,7 +88,7 @@ class WasteRecommendationViewSet(viewsets.ModelViewSet):
             logger.error(f"Error fetching waste recommendations: {str(e)}")
             return Response([], status=status.HTTP_200_OK)
 
-class UserWasteViewSet(viewsets.ReadOnlyModelViewSet):
+class UserWasteViewSet(ShardedViewSetMixin, viewsets.ReadOnlyModelViewSet):
     """
     GET /api/waste/user/
     Returns only waste records for request.user with sent_to_user=True
@@ -95,7 +98,7 @@ class UserWasteViewSet(viewsets.ReadOnlyModelViewSet):
     
     def get_queryset(self):
         user = self.request.user
-        return WasteManagement.objects.filter(
+        return WasteManagementSerializer.setup_eager_loading(WasteManagement.objects.all()).filter(
             production_input__created_by=user,
             sent_to_user=True
         ).order_by('-date_recorded')
@@ -111,7 +114,7 @@ class UserWasteViewSet(viewsets.ReadOnlyModelViewSet):
             logger.error(f"Error fetching user waste: {str(e)}")
             return Response([], status=status.HTTP_200_OK)
 
-class UserRecommendationViewSet(viewsets.ReadOnlyModelViewSet):
+class UserRecommendationViewSet(ShardedViewSetMixin, viewsets.ReadOnlyModelViewSet):
     """
     GET /api/waste/user-recommendations/
     Returns only recommendations for request.user with sent_to_user=True
@@ -121,7 +124,7 @@ class UserRecommendationViewSet(viewsets.ReadOnlyModelViewSet):
     
     def get_queryset(self):
         user = self.request.user
-        return WasteRecommendation.objects.filter(
+        return WasteRecommendationSerializer.setup_eager_loading(WasteRecommendation.objects.all()).filter(
             waste_record__production_input__created_by=user,
             sent_to_user=True
         ).order_by('-created_at')
@@ -137,7 +140,7 @@ class UserRecommendationViewSet(viewsets.ReadOnlyModelViewSet):
             logger.error(f"Error fetching user recommendations: {str(e)}")
             return Response([], status=status.HTTP_200_OK)
 
-class UserWasteRecommendationViewSet(viewsets.ReadOnlyModelViewSet):
+class UserWasteRecommendationViewSet(ShardedViewSetMixin, viewsets.ReadOnlyModelViewSet):
 	"""
 	User-facing endpoint for waste recommendations.
 	Returns only recommendations linked to approved predictions for the logged-in user.
@@ -155,15 +158,10 @@ class UserWasteRecommendationViewSet(viewsets.ReadOnlyModelViewSet):
 		# Get recommendations where:
 		# 1. The waste record's production input was created by this user
 		# 2. The recommendation has been sent to the user
-		queryset = WasteRecommendation.objects.filter(
+		queryset = UserWasteRecommendationSerializer.setup_eager_loading(WasteRecommendation.objects.filter(
 			waste_record__production_input__created_by=user,
 			sent_to_user=True
-		).select_related(
-			'waste_record',
-			'waste_record__production_input'
-		).prefetch_related(
-			'production_outputs'
-		).distinct().order_by('-created_at')
+		)).distinct().order_by('-created_at')
 		
 		logger.info(f"User {user.username} fetching recommendations: {queryset.count()} records")
 		return queryset
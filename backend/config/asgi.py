@@ -2,6 +2,8 @@
 ASGI config for backend project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Requests for the staff event stream (backend/apps/core/events.py) are served
+by its own ASGI app, everything else by Django.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
@@ -13,4 +15,14 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.config.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from backend.apps.core import events  # noqa: E402 (needs the apps loaded)
+
+event_stream = events.EventStreamApp()
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'http' and scope['path'] == events.PATH:
+        return await event_stream(scope, receive, send)
+    return await django_application(scope, receive, send)
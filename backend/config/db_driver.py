@@ -4,42 +4,139 @@ import sys
 import os
 import socket
 
+DB_ENGINES = ('mysql', 'postgresql', 'sqlite', 'sqlite-memory')
+
 logger = logging.getLogger(__name__)
 
-def is_mysql_running() -> bool:
-    """Check if MySQL server is running on localhost:3306"""
+def is_mysql_running(host: str = 'localhost', port: int = 3306, timeout: float = 1) -> bool:
+    """Check if a MySQL server accepts TCP connections on host:port"""
     try:
         sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        sock.settimeout(1)  # 1 second timeout
-        result = sock.connect_ex(('localhost', 3306))
+        sock.settimeout(timeout)
+        result = sock.connect_ex((host, int(port)))
         sock.close()
         return result == 0
     except:
         return False
 
-def get_database_config() -> Dict[str, Any]:
+def get_database_config(conn_max_age: int = 60, conn_health_checks: bool = True, pool_size: int = 0,
+                        engine: str = None, sqlite_path=None) -> Dict[str, Any]:
     """
-    Configure database connection with driver fallback logic.
-    Tries mysql-connector-python first, falls back to PyMySQL if needed.
-    Includes robust error handling and server availability checks.
+    Build the default database configuration for the engine named by
+    engine or the DB_ENGINE environment variable: mysql (default),
+    postgresql, sqlite (file at DB_NAME or sqlite_path) or sqlite-memory.
+    DB_NAME, DB_USER, DB_PASSWORD, DB_HOST and DB_PORT override the
+    connection details of the server engines.
+
+    Connections are persistent (kept for conn_max_age seconds and checked
+    with a ping before reuse). With pool_size > 0 the server engines keep a
+    driver-side pool of at most pool_size connections per process instead,
+    and Django hands its connection back to the pool after every request.
+
+    Settings import does not probe the server; availability is checked
+    lazily by the readiness endpoint and the `check --database` system check.
+    """
+    engine = (engine or os.environ.get('DB_ENGINE') or 'mysql').lower()
+    if engine not in DB_ENGINES:
+        raise ValueError(f"Unknown DB_ENGINE '{engine}', expected one of {', '.join(DB_ENGINES)}")
+
+    if engine == 'postgresql':
+        return _postgresql_config(conn_max_age, conn_health_checks, pool_size)
+    if engine in ('sqlite', 'sqlite-memory'):
+        name = ':memory:' if engine == 'sqlite-memory' else os.environ.get('DB_NAME', sqlite_path or 'db.sqlite3')
+        logger.info(f"Using SQLite database {name}")
+        return {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': name,
+            'CONN_MAX_AGE': conn_max_age,
+            'CONN_HEALTH_CHECKS': conn_health_checks,
+        }
+    return _mysql_config(conn_max_age, conn_health_checks, pool_size)
+
+def get_replica_configs(primary: Dict[str, Any], replicas=None) -> Dict[str, Dict[str, Any]]:
+    """
+    Build read-replica aliases (replica1, replica2, ...) from a comma-separated
+    list in replicas or the DB_REPLICAS environment variable. Entries are
+    hosts for the server engines and file paths for SQLite; everything else
+    is copied from the primary. Under the test runner replicas mirror the
+    primary's test database.
     """
-    # First check if MySQL server is running
-    if not is_mysql_running():
-        error_msg = (
-            "MySQL server is not running on localhost:3306.\n"
-            "Please ensure your MySQL server is running before continuing."
-        )
-        logger.error(error_msg)
-        raise ConnectionError(error_msg)
+    if replicas is None:
+        replicas = os.environ.get('DB_REPLICAS', '')
+    if isinstance(replicas, str):
+        replicas = [entry.strip() for entry in replicas.split(',') if entry.strip()]
 
+    configs = {}
+    for index, entry in enumerate(replicas, start=1):
+        config = dict(primary, OPTIONS=dict(primary.get('OPTIONS', {})), TEST={'MIRROR': 'default'})
+        if primary['ENGINE'] == 'django.db.backends.sqlite3':
+            config['NAME'] = entry
+        else:
+            config['HOST'] = entry
+        # A driver pool name is per process and must not be shared between aliases
+        if 'pool_name' in config['OPTIONS']:
+            config['OPTIONS']['pool_name'] = f"{config['OPTIONS']['pool_name']}_replica{index}"
+        configs[f'replica{index}'] = config
+    return configs
+
+def get_shard_configs(primary: Dict[str, Any], shards: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """
+    Build one alias per production shard. Each entry of shards maps an alias
+    to {'lines': [...], 'location': host or SQLite path, plus optional NAME,
+    USER, PASSWORD, PORT overrides}; the rest is copied from the primary.
+    """
+    configs = {}
+    for alias, shard in shards.items():
+        config = dict(primary, OPTIONS=dict(primary.get('OPTIONS', {})))
+        config.pop('TEST', None)
+        if primary['ENGINE'] == 'django.db.backends.sqlite3':
+            config['NAME'] = shard['location']
+        else:
+            config['HOST'] = shard['location']
+        for key in ('NAME', 'USER', 'PASSWORD', 'PORT'):
+            if key in shard:
+                config[key] = shard[key]
+        if 'pool_name' in config['OPTIONS']:
+            config['OPTIONS']['pool_name'] = f"{config['OPTIONS']['pool_name']}_{alias}"
+        configs[alias] = config
+    return configs
+
+def _postgresql_config(conn_max_age: int, conn_health_checks: bool, pool_size: int) -> Dict[str, Any]:
+    """PostgreSQL via psycopg; pooled mode uses Django's native psycopg pool."""
+    config = {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': os.environ.get('DB_NAME', 'aluoptimize'),
+        'USER': os.environ.get('DB_USER', 'postgres'),
+        'PASSWORD': os.environ.get('DB_PASSWORD', ''),
+        'HOST': os.environ.get('DB_HOST', 'localhost'),
+        'PORT': os.environ.get('DB_PORT', '5432'),
+        'CONN_MAX_AGE': conn_max_age,
+        'CONN_HEALTH_CHECKS': conn_health_checks,
+        'OPTIONS': {},
+    }
+    if pool_size:
+        # Requires psycopg[pool]; Django rejects persistent connections with a pool
+        config['OPTIONS']['pool'] = {'min_size': 1, 'max_size': pool_size}
+        config['CONN_MAX_AGE'] = 0
+        logger.info(f"Using a connection pool of {pool_size} per process")
+    logger.info("Using PostgreSQL as database backend")
+    return config
+
+def _mysql_config(conn_max_age: int, conn_health_checks: bool, pool_size: int) -> Dict[str, Any]:
+    """
+    MySQL with driver fallback logic.
+    Tries mysql-connector-python first, falls back to PyMySQL if needed.
+    """
     # Base configuration that works with both drivers
     base_config = {
         'ENGINE': 'django.db.backends.mysql',
-        'NAME': 'AluOptimize',
-        'USER': 'root',
-        'PASSWORD': 'root123',
-        'HOST': 'localhost',
-        'PORT': '3306',
+        'NAME': os.environ.get('DB_NAME', 'AluOptimize'),
+        'USER': os.environ.get('DB_USER', 'root'),
+        'PASSWORD': os.environ.get('DB_PASSWORD', 'root123'),
+        'HOST': os.environ.get('DB_HOST', 'localhost'),
+        'PORT': os.environ.get('DB_PORT', '3306'),
+        'CONN_MAX_AGE': conn_max_age,
+        'CONN_HEALTH_CHECKS': conn_health_checks,
         'OPTIONS': {
             'charset': 'utf8mb4',
             'init_command': "SET sql_mode='STRICT_TRANS_TABLES', default_storage_engine=InnoDB, character_set_connection=utf8mb4, collation_connection=utf8mb4_unicode_ci",
@@ -52,6 +149,13 @@ def get_database_config() -> Dict[str, Any]:
         base_config['ENGINE'] = 'mysql.connector.django'
         base_config['OPTIONS']['use_unicode'] = True
         base_config['OPTIONS']['use_pure'] = True
+        if pool_size:
+            # Pooled mode: the driver caps connections per process and
+            # Django returns its connection to the pool at request end.
+            base_config['OPTIONS']['pool_name'] = 'aluoptimize'
+            base_config['OPTIONS']['pool_size'] = pool_size
+            base_config['CONN_MAX_AGE'] = 0
+            logger.info(f"Using a connection pool of {pool_size} per process")
         return base_config
     except ImportError:
         logger.warning("mysql-connector-python not available, falling back to PyMySQL")
@@ -60,6 +164,8 @@ def get_database_config() -> Dict[str, Any]:
             # Register PyMySQL as MySQLdb
             pymysql.install_as_MySQLdb()
             logger.warning("Using PyMySQL as fallback database driver")
+            if pool_size:
+                logger.warning("PyMySQL has no connection pool; using persistent connections instead")
             return base_config
         except ImportError as e:
             error_msg = (
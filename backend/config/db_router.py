@@ -0,0 +1,131 @@
+"""
+Primary/replica database routing.
+
+Reads made while serving a request go to one of the replica aliases
+(DATABASE_REPLICAS), writes always go to 'default'. Reads fall back to the
+primary when:
+
+* the request is not a safe method (POST, PUT, PATCH, DELETE),
+* the request already wrote something, or is inside a transaction,
+* the authenticated user wrote something less than DB_REPLICA_PIN_SECONDS
+  ago (read-your-writes while the replica catches up).
+
+Recent writers are remembered in the default cache, so multi-process
+deployments need a shared cache backend for pinning to follow a user
+across workers. Reads outside a request (management commands, shell) stay
+on the primary; use .using('replica1') explicitly to offload them.
+"""
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+_request_state = ContextVar('db_request_state', default=None)
+
+
+class _RequestState:
+    def __init__(self, request):
+        self.request = request
+        self.force_primary = request.method not in SAFE_METHODS
+        self.wrote = False
+        self.user_pinned = None
+        self.replica = None
+        self._resolving_user = False
+
+    def user_id(self):
+        user = getattr(self.request, 'user', None)
+        if user is not None and user.is_authenticated:
+            return user.pk
+        return None
+
+    def check_user_pinned(self):
+        """
+        Look up the pin once the user is known. Resolving request.user can
+        itself query the database (session auth), hence the re-entry guard.
+        """
+        if self.user_pinned is None and not self._resolving_user:
+            self._resolving_user = True
+            try:
+                user_id = self.user_id()
+            finally:
+                self._resolving_user = False
+            if user_id is not None:
+                self.user_pinned = is_user_pinned(user_id)
+        return bool(self.user_pinned)
+
+
+def _pin_key(user_id):
+    return f'db-pin:{user_id}'
+
+
+def pin_user(user_id, seconds=None):
+    """Send this user's reads to the primary for the next few seconds."""
+    seconds = seconds if seconds is not None else getattr(settings, 'DB_REPLICA_PIN_SECONDS', 5)
+    if user_id is not None and seconds:
+        cache.set(_pin_key(user_id), True, timeout=seconds)
+
+
+def is_user_pinned(user_id):
+    return user_id is not None and cache.get(_pin_key(user_id)) is not None
+
+
+def get_replicas():
+    return list(getattr(settings, 'DATABASE_REPLICAS', []))
+
+
+class PrimaryReplicaRouter:
+    """Route request reads to replicas unless the request must see its own writes."""
+
+    def db_for_read(self, model, **hints):
+        state = _request_state.get()
+        replicas = get_replicas()
+        if state is None or not replicas:
+            return None
+        if state.force_primary or state.wrote or connections['default'].in_atomic_block:
+            return 'default'
+        # The user is only known once authentication ran, so check lazily
+        if state.check_user_pinned():
+            return 'default'
+        if state.replica is None:
+            # One replica per request, so all its reads see the same snapshot
+            state.replica = random.choice(replicas)
+        return state.replica
+
+    def db_for_write(self, model, **hints):
+        state = _request_state.get()
+        if state is not None:
+            state.wrote = True
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in get_replicas()
+
+
+class ReplicaPinningMiddleware:
+    """
+    Tracks the current request for PrimaryReplicaRouter and pins the user to
+    the primary after any request that wrote to the database.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        state = _RequestState(request)
+        token = _request_state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_state.reset(token)
+
+        if state.wrote or state.force_primary:
+            pin_user(state.user_id())
+        return response
@@ -7,6 +7,7 @@ are defined directly in manage.py for easier maintenance.
 """
 
 from pathlib import Path
+import json
 import os
 import logging.config
 
@@ -93,6 +94,9 @@ if DEBUG:
 
 # Core middleware that should always be enabled
 MIDDLEWARE = [
+    'backend.apps.core.metrics.RequestMetricsMiddleware',
+    'backend.apps.core.slow_queries.SlowQueryMiddleware',
+    'backend.apps.core.profiling.ProfilingMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -101,6 +105,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'backend.config.db_router.ReplicaPinningMiddleware',
 ]
 
 # Add debug middleware only if DEBUG is True
@@ -132,12 +137,43 @@ TEMPLATES = [
 WSGI_APPLICATION = 'backend.config.wsgi.application'
 
 # Database configuration with driver fallback support
-from .db_driver import get_database_config
+from .db_driver import get_database_config, get_replica_configs, get_shard_configs
 
+# Engine comes from DB_ENGINE (mysql, postgresql, sqlite, sqlite-memory) in the
+# environment, then manage.py. Connection reuse: persistent connections with a
+# ping before reuse, or a per-process driver pool when DB_POOL_SIZE > 0
 DATABASES = {
-    'default': get_database_config()
+    'default': get_database_config(
+        engine=os.environ.get('DB_ENGINE') or getattr(project_manage, 'DB_ENGINE', 'mysql'),
+        sqlite_path=str(BASE_DIR / 'db.sqlite3'),
+        conn_max_age=getattr(project_manage, 'DB_CONN_MAX_AGE', 60),
+        conn_health_checks=getattr(project_manage, 'DB_CONN_HEALTH_CHECKS', True),
+        pool_size=getattr(project_manage, 'DB_POOL_SIZE', 0),
+    )
 }
 
+# Read replicas: DB_REPLICAS (comma-separated hosts, or SQLite paths) in the
+# environment, then manage.py. Request reads go to a replica unless the user
+# wrote within the last DB_REPLICA_PIN_SECONDS (see config/db_router.py)
+_replicas = get_replica_configs(
+    DATABASES['default'],
+    os.environ.get('DB_REPLICAS') or getattr(project_manage, 'DB_REPLICAS', []),
+)
+
+# Production-line shards: DB_SHARDS (JSON in the environment, then manage.py)
+# maps an alias to the lines it owns and its location (see
+# config/shard_router.py). Lines not listed stay on the default database.
+_shards = json.loads(os.environ.get('DB_SHARDS') or 'null') or getattr(project_manage, 'DB_SHARDS', {})
+DATABASES.update(get_shard_configs(DATABASES['default'], _shards))
+DATABASES.update(_replicas)
+DATABASE_REPLICAS = list(_replicas)
+PRODUCTION_LINE_SHARDS = {line: alias for alias, shard in _shards.items() for line in shard['lines']}
+DATABASE_ROUTERS = [
+    'backend.config.shard_router.ProductionShardRouter',
+    'backend.config.db_router.PrimaryReplicaRouter',
+]
+DB_REPLICA_PIN_SECONDS = getattr(project_manage, 'DB_REPLICA_PIN_SECONDS', 5)
+
 
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
@@ -180,7 +216,7 @@ AUTH_USER_MODEL = 'auth.User'
 # REST Framework settings
 REST_FRAMEWORK = {
 	'DEFAULT_AUTHENTICATION_CLASSES': (
-		'rest_framework_simplejwt.authentication.JWTAuthentication',
+		'backend.apps.authapp.authentication.CachedJWTAuthentication',
 	),
 	'DEFAULT_PERMISSION_CLASSES': (
 		'rest_framework.permissions.IsAuthenticated',
@@ -211,6 +247,112 @@ SIMPLE_JWT = {
 	'USER_ID_CLAIM': 'user_id',
 }
 
+# API authentication trusts the access token's user claims (no user query per
+# request). Users changed through the user views are loaded from the database
+# instead, kept in a per-process LRU cache of this size for this many seconds
+# (backend/apps/authapp/authentication.py). Other processes learn of a change
+# within AUTH_USER_CHANGES_REFRESH_SECONDS; each reload re-reads the last
+# AUTH_USER_CHANGES_OVERLAP_SECONDS so changes committed late are not skipped.
+AUTH_USER_CACHE_SIZE = getattr(project_manage, 'AUTH_USER_CACHE_SIZE', 1024)
+AUTH_USER_CACHE_TTL = getattr(project_manage, 'AUTH_USER_CACHE_TTL', 60)
+AUTH_USER_CHANGES_REFRESH_SECONDS = getattr(project_manage, 'AUTH_USER_CHANGES_REFRESH_SECONDS', 5)
+AUTH_USER_CHANGES_OVERLAP_SECONDS = getattr(project_manage, 'AUTH_USER_CHANGES_OVERLAP_SECONDS', 60)
+
+# Token revocation (backend/apps/authapp/revocation.py): revoked token ids are
+# mirrored into a per-process bloom filter sized for TOKEN_REVOCATION_CAPACITY
+# ids at TOKEN_REVOCATION_ERROR_RATE, reloaded every TOKEN_REVOCATION_REFRESH_SECONDS.
+# Each reload re-reads the last TOKEN_REVOCATION_OVERLAP_SECONDS so revocations
+# committed late are not skipped; keep it above the longest transaction.
+TOKEN_REVOCATION_CAPACITY = getattr(project_manage, 'TOKEN_REVOCATION_CAPACITY', 100000)
+TOKEN_REVOCATION_ERROR_RATE = getattr(project_manage, 'TOKEN_REVOCATION_ERROR_RATE', 0.001)
+TOKEN_REVOCATION_REFRESH_SECONDS = getattr(project_manage, 'TOKEN_REVOCATION_REFRESH_SECONDS', 5)
+TOKEN_REVOCATION_OVERLAP_SECONDS = getattr(project_manage, 'TOKEN_REVOCATION_OVERLAP_SECONDS', 60)
+# A rotated refresh token may be exchanged again for this many seconds, so
+# concurrent refreshes from the same client both succeed (0 disables it).
+REFRESH_TOKEN_REUSE_GRACE_SECONDS = getattr(project_manage, 'REFRESH_TOKEN_REUSE_GRACE_SECONDS', 5)
+
+# Password hashing: PBKDF2 iterations for new passwords (Django's default when
+# unset, see backend/apps/authapp/hashers.py). Existing hashes are upgraded or
+# downgraded to this work factor on each user's next login.
+PASSWORD_HASH_ITERATIONS = int(os.environ.get('PASSWORD_HASH_ITERATIONS') or 0) or \
+    getattr(project_manage, 'PASSWORD_HASH_ITERATIONS', None)
+PASSWORD_HASHERS = [
+    'backend.apps.authapp.hashers.ConfigurablePBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+
+# Batch report generation (process pool size and per-request input cap)
+REPORT_BATCH_WORKERS = getattr(project_manage, 'REPORT_BATCH_WORKERS', None)
+REPORT_BATCH_MAX_INPUTS = getattr(project_manage, 'REPORT_BATCH_MAX_INPUTS', 1000)
+
+# Email outbox delivery (see backend/apps/core/utils/outbox.py)
+EMAIL_OUTBOX_BATCH_SIZE = getattr(project_manage, 'EMAIL_OUTBOX_BATCH_SIZE', 50)
+EMAIL_OUTBOX_MAX_ATTEMPTS = getattr(project_manage, 'EMAIL_OUTBOX_MAX_ATTEMPTS', 5)
+EMAIL_OUTBOX_BACKOFF_SECONDS = getattr(project_manage, 'EMAIL_OUTBOX_BACKOFF_SECONDS', 60)
+EMAIL_OUTBOX_MAX_BACKOFF_SECONDS = getattr(project_manage, 'EMAIL_OUTBOX_MAX_BACKOFF_SECONDS', 3600)
+EMAIL_OUTBOX_LEASE_SECONDS = getattr(project_manage, 'EMAIL_OUTBOX_LEASE_SECONDS', 300)
+
+# Bulk exports: rows fetched per keyset page (see backend/apps/core/utils/exports.py)
+EXPORT_CHUNK_SIZE = getattr(project_manage, 'EXPORT_CHUNK_SIZE', 2000)
+
+# Retention: prediction logs/history older than ARCHIVE_RETENTION_DAYS are moved
+# to compressed daily files under ARCHIVE_ROOT (see backend/apps/core/utils/archive.py)
+ARCHIVE_ROOT = getattr(project_manage, 'ARCHIVE_ROOT', str(BASE_DIR / 'archive'))
+ARCHIVE_RETENTION_DAYS = getattr(project_manage, 'ARCHIVE_RETENTION_DAYS', {
+    'prediction_logs': 90,
+    'prediction_history': 180,
+})
+ARCHIVE_BLOCK_ROWS = getattr(project_manage, 'ARCHIVE_BLOCK_ROWS', 500)
+ARCHIVE_DELETE_CHUNK = getattr(project_manage, 'ARCHIVE_DELETE_CHUNK', 1000)
+
+# Batch jobs: rows per chunk (one transaction each) of backfill_waste_records
+BACKFILL_CHUNK_SIZE = getattr(project_manage, 'BACKFILL_CHUNK_SIZE', 500)
+
+# Request metrics served at /api/metrics/ (see backend/apps/core/metrics.py).
+# Metrics stay in process memory unless METRICS_DIR names a local directory,
+# where each worker writes its snapshot so the endpoint can combine all
+# gunicorn workers. Scrapers send METRICS_TOKEN as a bearer token and staff
+# users can read it when logged in; METRICS_PUBLIC opens it to anyone.
+METRICS_ENABLED = getattr(project_manage, 'METRICS_ENABLED', True)
+METRICS_DIR = os.environ.get('METRICS_DIR') or getattr(project_manage, 'METRICS_DIR', None)
+METRICS_FLUSH_SECONDS = getattr(project_manage, 'METRICS_FLUSH_SECONDS', 5)
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN') or getattr(project_manage, 'METRICS_TOKEN', '')
+METRICS_PUBLIC = os.environ.get('METRICS_PUBLIC', '').lower() in ('1', 'true', 'yes') or \
+    getattr(project_manage, 'METRICS_PUBLIC', False)
+
+# Slow query capture (opt-in, see backend/apps/core/slow_queries.py): statements
+# slower than SLOW_QUERY_THRESHOLD_MS go to a per-worker ring buffer of
+# SLOW_QUERY_BUFFER_SIZE entries in SLOW_QUERY_DIR, read by advise_indexes.
+SLOW_QUERY_CAPTURE = os.environ.get('SLOW_QUERY_CAPTURE', '').lower() in ('1', 'true', 'yes') or \
+    getattr(project_manage, 'SLOW_QUERY_CAPTURE', False)
+SLOW_QUERY_THRESHOLD_MS = getattr(project_manage, 'SLOW_QUERY_THRESHOLD_MS', 100)
+SLOW_QUERY_BUFFER_SIZE = getattr(project_manage, 'SLOW_QUERY_BUFFER_SIZE', 200)
+SLOW_QUERY_DIR = os.environ.get('SLOW_QUERY_DIR') or getattr(project_manage, 'SLOW_QUERY_DIR', '/tmp/aluoptimize-slow-queries')
+
+# On-demand request profiling (see backend/apps/core/profiling.py): staff mint
+# a token valid for PROFILING_TOKEN_MAX_AGE seconds at
+# /api/admin-panel/profiles/token/; the newest PROFILING_MAX_PROFILES
+# profiles are kept in PROFILING_DIR.
+PROFILING_ENABLED = getattr(project_manage, 'PROFILING_ENABLED', True)
+PROFILING_DIR = os.environ.get('PROFILING_DIR') or getattr(project_manage, 'PROFILING_DIR', '/tmp/aluoptimize-profiles')
+PROFILING_MAX_PROFILES = getattr(project_manage, 'PROFILING_MAX_PROFILES', 50)
+PROFILING_TOKEN_MAX_AGE = getattr(project_manage, 'PROFILING_TOKEN_MAX_AGE', 3600)
+PROFILING_SAMPLE_INTERVAL_MS = getattr(project_manage, 'PROFILING_SAMPLE_INTERVAL_MS', 1)
+
+# Staff pending queue events (see backend/apps/core/events.py): the newest
+# EVENTS_BUFFER_SIZE events are replayed to reconnecting clients, a client
+# more than EVENTS_QUEUE_SIZE events behind is told to resync. Set
+# EVENTS_BROKER_URL (redis://...) to share events between processes.
+EVENTS_BUFFER_SIZE = getattr(project_manage, 'EVENTS_BUFFER_SIZE', 100)
+EVENTS_QUEUE_SIZE = getattr(project_manage, 'EVENTS_QUEUE_SIZE', 100)
+EVENTS_HEARTBEAT_SECONDS = getattr(project_manage, 'EVENTS_HEARTBEAT_SECONDS', 15)
+EVENTS_RETRY_MS = getattr(project_manage, 'EVENTS_RETRY_MS', 5000)
+EVENTS_BROKER_URL = os.environ.get('EVENTS_BROKER_URL') or getattr(project_manage, 'EVENTS_BROKER_URL', None)
+EVENTS_BROKER_CHANNEL = getattr(project_manage, 'EVENTS_BROKER_CHANNEL', 'aluoptimize-events')
+
 # CORS settings
 CORS_ORIGIN_WHITELIST = getattr(project_manage, 'CORS_ORIGIN_WHITELIST', [])
 CORS_ALLOW_CREDENTIALS = True
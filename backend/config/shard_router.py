@@ -0,0 +1,110 @@
+"""
+Horizontal partitioning of production data by production line.
+
+Production inputs, outputs, waste records, recommendations, prediction
+logs, prediction history and re-scored results live on the shard that owns
+their production_line (PRODUCTION_LINE_SHARDS); lines without an entry stay
+on 'default'. Child rows follow their parent, so a ProductionOutput is stored
+next to its ProductionInput. Everything else (users, profiles, rollups,
+outbox) stays on 'default'; users are copied to every shard so foreign keys
+resolve locally (see backend/apps/core/utils/sharding.py).
+
+Each shard carries the full schema (`migrate --database <alias>`) and its
+own id range (`manage.py prepare_shards`), so ids stay unique across shards.
+"""
+from django.conf import settings
+
+SHARDED_MODELS = {
+    ('prediction', 'productioninput'),
+    ('prediction', 'productionoutput'),
+    ('prediction', 'predictionlog'),
+    ('prediction', 'predictionhistory'),
+    ('prediction', 'predictionrescore'),
+    ('waste', 'wastemanagement'),
+    ('waste', 'wasterecommendation'),
+}
+
+# Parent relations a sharded row inherits its shard from, in lookup order
+PARENT_FIELDS = ('input_data', 'production_input', 'production_output', 'waste_record')
+
+
+def get_line_shards():
+    return getattr(settings, 'PRODUCTION_LINE_SHARDS', {})
+
+
+def get_shard_aliases():
+    """Every alias that may hold production data, 'default' first."""
+    aliases = ['default']
+    for alias in get_line_shards().values():
+        if alias not in aliases:
+            aliases.append(alias)
+    return aliases
+
+
+def shard_for_line(production_line):
+    return get_line_shards().get(production_line, 'default')
+
+
+def is_sharded(model):
+    return (model._meta.app_label, model._meta.model_name) in SHARDED_MODELS
+
+
+def shard_for_instance(instance):
+    """The alias a sharded row belongs on, or None when it cannot be told."""
+    if instance._state.db and not instance._state.adding:
+        return instance._state.db
+
+    production_line = getattr(instance, 'production_line', None)
+    if production_line:
+        return shard_for_line(production_line)
+
+    for name in PARENT_FIELDS:
+        try:
+            field = instance._meta.get_field(name)
+        except Exception:
+            continue
+        if field.is_cached(instance):
+            parent = field.get_cached_value(instance)
+            if parent is not None:
+                return shard_for_instance(parent)
+    return None
+
+
+class ProductionShardRouter:
+    """
+    Route sharded models by production line. Returns None (no opinion) for
+    everything else and for reads that carry no instance, so the next
+    router decides; cross-shard reads go through the fan-out helpers.
+    """
+
+    def _shard(self, model, hints):
+        if not get_line_shards() or not is_sharded(model):
+            return None
+        instance = hints.get('instance')
+        if instance is None or not is_sharded(type(instance)):
+            # e.g. user.production_inputs spans shards; let the next router decide
+            return None
+        return shard_for_instance(instance)
+
+    def db_for_read(self, model, **hints):
+        return self._shard(model, hints)
+
+    def db_for_write(self, model, **hints):
+        return self._shard(model, hints)
+
+    def allow_relation(self, obj1, obj2, **hints):
+        if not get_line_shards():
+            return None
+        sharded = [obj for obj in (obj1, obj2) if is_sharded(type(obj))]
+        if len(sharded) == 2:
+            return obj1._state.db == obj2._state.db
+        if sharded:
+            # Users are replicated to every shard
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db != 'default' and db in get_shard_aliases():
+            # Shards carry the full schema so foreign keys to users resolve
+            return True
+        return None
@@ -12,7 +12,8 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
-from backend.apps.core.health import WelcomeView, HealthCheckView
+from backend.apps.core.health import WelcomeView, HealthCheckView, ReadinessView
+from backend.apps.core.metrics import MetricsView
 
 # API endpoints
 api_urlpatterns = [
@@ -24,6 +25,8 @@ api_urlpatterns = [
     path('admin-panel/', include('backend.apps.core.admin_urls')),
     path('staff/', include('backend.apps.core.staff_urls')),
     path('health/', HealthCheckView.as_view(), name='api-health'),
+    path('health/ready/', ReadinessView.as_view(), name='api-ready'),
+    path('metrics/', MetricsView.as_view(), name='api-metrics'),
 ]
 
 # Main URL patterns
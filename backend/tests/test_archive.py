@@ -0,0 +1,123 @@
+"""
+Unit tests for the archival of cold prediction logs and history.
+
+Run with Django's test runner:
+    python manage.py test backend.tests.test_archive
+"""
+import os
+import shutil
+import tempfile
+from datetime import datetime, time, timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from backend.apps.core.models import ArchivePartition
+from backend.apps.core.utils import archive
+from backend.apps.prediction.models import ProductionInput, ProductionOutput, PredictionLog
+
+
+class ArchiveTests(TestCase):
+
+    def setUp(self):
+        self.archive_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(ARCHIVE_ROOT=self.archive_root, ARCHIVE_BLOCK_ROWS=4)
+        self.settings_override.enable()
+        archive._read_index.cache_clear()
+        archive._read_block.cache_clear()
+
+        production_input = ProductionInput.objects.create(
+            production_line='LINE_A', temperature=960, pressure=101325, feed_rate=1000,
+            power_consumption=13000, anode_effect=0.3, bath_ratio=1.2, alumina_concentration=3.0
+        )
+        self.output = ProductionOutput.objects.create(
+            input_data=production_input, predicted_output=950, output_quality=90, energy_efficiency=85
+        )
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.archive_root, ignore_errors=True)
+
+    def _log(self, days_ago, version='v1', created_at=None):
+        log = PredictionLog.objects.create(
+            production_output=self.output, confidence_score=0.9, q10_prediction=900,
+            q50_prediction=950, q90_prediction=1000, model_version=version,
+            input_features={'temperature': 960}, execution_time_ms=12
+        )
+        PredictionLog.objects.filter(pk=log.pk).update(created_at=created_at or timezone.now() - timedelta(days=days_ago))
+        return log
+
+    def test_cold_rows_are_archived_and_deleted(self):
+        cold = [self._log(120) for _ in range(10)] + [self._log(100)]
+        recent = self._log(5)
+
+        archived = archive.archive_cold_rows('prediction_logs', older_than_days=90)
+
+        self.assertEqual(archived, {'default': 11})
+        self.assertEqual(list(PredictionLog.objects.values_list('pk', flat=True)), [recent.pk])
+        partitions = ArchivePartition.objects.filter(dataset='prediction_logs')
+        self.assertEqual(partitions.count(), 2)
+        self.assertEqual(sum(partitions.values_list('row_count', flat=True)), len(cold))
+        for partition in partitions:
+            self.assertTrue(os.path.exists(os.path.join(self.archive_root, partition.path)))
+
+    def test_day_is_written_block_by_block(self):
+        for _ in range(10):
+            self._log(120)
+        day = timezone.localdate(timezone.now() - timedelta(days=120))
+        with mock.patch.object(archive, '_write_block', wraps=archive._write_block) as write_block:
+            self.assertEqual(archive.archive_day('prediction_logs', day), 10)
+        # Blocks of 4, 4 and 2 rows
+        self.assertEqual([len(call.args[0]) for call in write_block.call_args_list], [4, 4, 2])
+
+    def test_archived_row_is_read_back_by_id(self):
+        logs = [self._log(120, version=f'v{i}') for i in range(10)]
+        archive.archive_cold_rows('prediction_logs', older_than_days=90)
+
+        row = archive.get_archived_row('prediction_logs', logs[6].pk)
+        self.assertEqual(row['id'], logs[6].pk)
+        self.assertEqual(row['model_version'], 'v6')
+        self.assertEqual(row['input_features'], {'temperature': 960})
+        self.assertTrue(row['archived'])
+        self.assertIsNone(archive.get_archived_row('prediction_logs', logs[-1].pk + 100))
+
+    def test_rerun_does_not_archive_twice(self):
+        logs = [self._log(120) for _ in range(3)]
+        archive.archive_cold_rows('prediction_logs', older_than_days=90)
+
+        # Simulate a run interrupted after writing the file: the rows reappear
+        for log in logs:
+            PredictionLog.objects.bulk_create([log])
+        PredictionLog.objects.filter(pk__in=[log.pk for log in logs]).update(
+            created_at=timezone.now() - timedelta(days=120)
+        )
+
+        archived = archive.archive_cold_rows('prediction_logs', older_than_days=90)
+        self.assertEqual(archived, {'default': 0})
+        self.assertFalse(PredictionLog.objects.exists())
+        self.assertEqual(ArchivePartition.objects.count(), 1)
+
+    def test_rows_after_a_cutoff_inside_an_archived_id_range_are_kept(self):
+        day = timezone.localdate() - timedelta(days=120)
+
+        def at(hour):
+            return timezone.make_aware(datetime.combine(day, time(hour)))
+
+        # Ids are not in created_at order: the middle id comes after the cutoff
+        early, late, also_early = (self._log(None, created_at=at(hour)) for hour in (9, 16, 10))
+        self.assertEqual(archive.archive_day('prediction_logs', day, cutoff=at(12)), 2)
+        self.assertEqual(list(PredictionLog.objects.values_list('pk', flat=True)), [late.pk])
+
+        self.assertEqual(archive.archive_day('prediction_logs', day), 1)
+        self.assertFalse(PredictionLog.objects.exists())
+        for log in (early, late, also_early):
+            self.assertEqual(archive.get_archived_row('prediction_logs', log.pk)['id'], log.pk)
+
+    def test_dry_run_keeps_rows(self):
+        self._log(120)
+        call_command('archive_cold_rows', '--dataset', 'prediction_logs', '--dry-run', stdout=StringIO())
+        self.assertEqual(PredictionLog.objects.count(), 1)
+        self.assertFalse(ArchivePartition.objects.exists())
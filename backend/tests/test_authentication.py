@@ -0,0 +1,129 @@
+"""
+Unit tests for the JWT authentication trusting token claims.
+
+Run with Django's test runner:
+    python manage.py test backend.tests.test_authentication
+"""
+from collections import OrderedDict
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from backend.apps.authapp import authentication
+from backend.apps.authapp.models import UserInvalidation
+from backend.apps.authapp.serializers import CustomTokenObtainPairSerializer
+from backend.apps.prediction.models import ProductionInput
+
+from .test_query_counts import INPUT
+
+User = get_user_model()
+
+
+@override_settings(PASSWORD_HASH_ITERATIONS=1000)
+class CachedJWTAuthenticationTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        authentication.clear_user_cache()
+        self.staff = User.objects.create_user(username='auth_staff', password='pass', is_staff=True)
+        self.operator = User.objects.create_user(username='auth_operator', password='pass')
+        self.staff_client = self._client(self.staff)
+        self.operator_client = self._client(self.operator)
+
+    def _client(self, user):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {CustomTokenObtainPairSerializer.get_token(user).access_token}')
+        return client
+
+    def _user_lookups(self, client, path):
+        queries = []
+        with connection.execute_wrapper(lambda execute, sql, *args: queries.append(sql) or execute(sql, *args)):
+            response = client.get(path)
+        return response, sum(sql.startswith('SELECT') and 'FROM "auth_user" WHERE' in sql for sql in queries)
+
+    def test_requests_trust_the_role_claims(self):
+        response, lookups = self._user_lookups(self.staff_client, '/api/prediction/pending/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(lookups, 0)
+        self.assertEqual(self.operator_client.get('/api/prediction/pending/').status_code, 403)
+
+    def test_claim_users_can_be_stored_as_foreign_keys(self):
+        response = self.operator_client.post('/api/prediction/inputs/', INPUT, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(ProductionInput.objects.get().created_by, self.operator)
+
+    def test_rejected_user_is_refused_and_reloaded_once_approved(self):
+        self.assertEqual(self.staff_client.post(f'/api/staff/users/{self.operator.id}/reject/').status_code, 200)
+        self.assertEqual(self.operator_client.get('/api/prediction/inputs/').status_code, 401)
+
+        self.staff_client.post(f'/api/admin-panel/users/{self.operator.id}/approve/')
+        first, first_lookups = self._user_lookups(self.operator_client, '/api/prediction/inputs/')
+        second, second_lookups = self._user_lookups(self.operator_client, '/api/prediction/inputs/')
+        self.assertEqual((first.status_code, second.status_code), (200, 200))
+        self.assertEqual((first_lookups, second_lookups), (1, 0))
+
+    @override_settings(AUTH_USER_CHANGES_REFRESH_SECONDS=0)
+    def test_changes_reach_processes_with_their_own_cache(self):
+        self.assertEqual(self.operator_client.get('/api/prediction/inputs/').status_code, 200)
+        other_process = {
+            'changes': authentication.ChangedUsers(),
+            'users': OrderedDict(),
+            'cache': {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'other-process'}},
+        }
+        self.assertIsNone(other_process['changes'].changed_at(self.operator.id))
+
+        self.assertEqual(self.staff_client.post(f'/api/staff/users/{self.operator.id}/reject/').status_code, 200)
+
+        with override_settings(CACHES=other_process['cache']), \
+                mock.patch.object(authentication, '_changes', other_process['changes']), \
+                mock.patch.object(authentication, '_users', other_process['users']):
+            self.assertEqual(self.operator_client.get('/api/prediction/inputs/').status_code, 401)
+            self.assertIn(self.operator.id, other_process['changes'].changed)
+
+    @override_settings(AUTH_USER_CHANGES_REFRESH_SECONDS=0)
+    def test_changes_committed_late_are_still_loaded(self):
+        UserInvalidation.objects.create(id=10, user_id=self.staff.id, changed_at=timezone.now())
+        changes = authentication.ChangedUsers()
+        self.assertIsNone(changes.changed_at(self.operator.id))
+
+        # A lower id, changed earlier, whose transaction committed after the last load
+        UserInvalidation.objects.create(id=5, user_id=self.operator.id, changed_at=timezone.now() - timedelta(seconds=10))
+
+        self.assertIsNotNone(changes.changed_at(self.operator.id))
+
+    def test_purge_deletes_invalidations_past_the_refresh_lifetime(self):
+        UserInvalidation.objects.create(user_id=self.staff.id, changed_at=timezone.now() - timedelta(days=30))
+        authentication.invalidate_user(self.operator.id)
+        out = StringIO()
+
+        call_command('purge_revoked_tokens', stdout=out)
+
+        self.assertIn('Purged 1 old user invalidation', out.getvalue())
+        self.assertEqual(list(UserInvalidation.objects.values_list('user_id', flat=True)), [self.operator.id])
+
+    @override_settings(AUTH_USER_CACHE_SIZE=1)
+    def test_user_cache_is_bounded(self):
+        for user in (self.staff, self.operator):
+            authentication.invalidate_user(user.id)
+            self._client(user).get('/api/prediction/inputs/')
+
+        self.assertEqual(list(authentication._users), [self.operator.id])
+
+    def test_tokens_without_claims_load_the_user(self):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.staff)}')
+        response, lookups = self._user_lookups(client, '/api/prediction/pending/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(lookups, 1)
@@ -0,0 +1,97 @@
+"""
+Unit tests for the chunked, resumable waste record backfill.
+
+Run with Django's test runner:
+    python manage.py test backend.tests.test_backfill
+"""
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from backend.apps.core.models import JobCheckpoint
+from backend.apps.core.utils import backfill
+from backend.apps.core.utils.batch_jobs import run_chunked
+from backend.apps.prediction.models import ProductionInput, ProductionOutput
+from backend.apps.waste.models import WasteManagement, WasteRecommendation
+
+_calls = []
+
+
+def failing_chunk(alias, first_id, last_id):
+    """Backfill two chunks, then fail as if the process had been killed."""
+    _calls.append(first_id)
+    if len(_calls) > 2:
+        raise RuntimeError('interrupted')
+    return backfill.backfill_chunk(alias, first_id, last_id)
+
+
+class BackfillTests(TestCase):
+
+    def _outputs(self, count, waste_estimate=None):
+        outputs = []
+        for i in range(count):
+            production_input = ProductionInput.objects.create(
+                production_line='LINE_A', temperature=960, pressure=101325, feed_rate=1000 + i,
+                power_consumption=1500, anode_effect=0.3, bath_ratio=1.2, alumina_concentration=3.0
+            )
+            outputs.append(ProductionOutput.objects.create(
+                input_data=production_input, predicted_output=820, output_quality=90,
+                energy_efficiency=60, waste_estimate=waste_estimate
+            ))
+        return outputs
+
+    def _run(self, process_chunk=backfill.backfill_chunk, chunk_size=3):
+        return run_chunked(
+            backfill.JOB_NAME, 'default', backfill.pending_outputs('default'), process_chunk, chunk_size=chunk_size
+        )
+
+    def test_outputs_are_linked_to_new_waste_records(self):
+        outputs = self._outputs(5) + self._outputs(2, waste_estimate=42.0)
+
+        stats = self._run()
+
+        self.assertEqual(stats['processed'], 7)
+        self.assertFalse(backfill.pending_outputs('default').exists())
+        self.assertEqual(WasteManagement.objects.count(), 7)
+        self.assertEqual(WasteRecommendation.objects.count(), 7)
+        first = ProductionOutput.objects.select_related('waste_record', 'recommendation').get(pk=outputs[0].pk)
+        self.assertEqual(first.waste_estimate, 180.0)
+        self.assertEqual(first.waste_record.waste_amount, 180.0)
+        self.assertEqual(first.recommendation.waste_record_id, first.waste_record_id)
+        self.assertEqual(ProductionOutput.objects.get(pk=outputs[-1].pk).waste_record.waste_amount, 42.0)
+
+    def test_existing_waste_record_is_linked_not_duplicated(self):
+        output = self._outputs(1)[0]
+        existing = WasteManagement.objects.create(
+            production_input=output.input_data, waste_type='Aluminum Dross', waste_amount=10, date_recorded='2025-01-01'
+        )
+
+        self._run()
+
+        self.assertEqual(WasteManagement.objects.count(), 1)
+        self.assertEqual(ProductionOutput.objects.get(pk=output.pk).waste_record_id, existing.pk)
+
+    def test_chunk_query_count_does_not_grow_with_chunk_size(self):
+        small, large = self._outputs(2), self._outputs(20)
+        with CaptureQueriesContext(connection) as few:
+            backfill.backfill_chunk('default', small[0].pk, small[-1].pk)
+        with CaptureQueriesContext(connection) as many:
+            backfill.backfill_chunk('default', large[0].pk, large[-1].pk)
+        self.assertEqual(len(few), len(many))
+
+    def test_interrupted_run_resumes_after_last_chunk(self):
+        self._outputs(9)
+        _calls.clear()
+
+        with self.assertRaises(RuntimeError):
+            self._run(failing_chunk)
+        checkpoint = JobCheckpoint.objects.get(job=backfill.JOB_NAME)
+        self.assertEqual(checkpoint.processed, 6)
+        self.assertIsNone(checkpoint.finished_at)
+
+        stats = self._run()
+        self.assertEqual(stats['processed'], 3)
+        self.assertFalse(backfill.pending_outputs('default').exists())
+        checkpoint.refresh_from_db()
+        self.assertEqual(checkpoint.processed, 9)
+        self.assertIsNotNone(checkpoint.finished_at)
@@ -0,0 +1,76 @@
+"""
+Unit tests for batch report generation (streamed ZIP, combined PDF, command).
+
+Run with Django's test runner:
+    python manage.py test backend.tests.test_batch_reports
+"""
+import io
+import os
+import tempfile
+import zipfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from backend.apps.prediction.models import ProductionInput
+
+from .test_query_counts import INPUT
+
+User = get_user_model()
+
+
+@override_settings(REPORT_BATCH_WORKERS=1)
+class BatchReportsTests(TestCase):
+
+    def setUp(self):
+        self.staff = User.objects.create_user(username='batch_staff', password='pass', is_staff=True)
+        self.operator = User.objects.create_user(username='batch_operator', password='pass')
+        self.inputs = [ProductionInput.objects.create(created_by=self.operator, **INPUT) for _ in range(3)]
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+
+    def _post(self, data):
+        return self.client.post('/api/staff/input-reports/batch/', data, format='json')
+
+    def test_zip_has_one_report_per_input(self):
+        response = self._post({'user_id': self.operator.id})
+
+        self.assertEqual(response.status_code, 200)
+        archive = zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content)))
+        self.assertEqual(archive.namelist(), [f'report_input_{i.id}.pdf' for i in self.inputs])
+        self.assertTrue(archive.read(archive.namelist()[0]).startswith(b'%PDF'))
+
+    def test_combined_pdf_of_selected_inputs(self):
+        response = self._post({'input_ids': [self.inputs[0].id, str(self.inputs[2].id)], 'format': 'pdf'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(b''.join(response.streaming_content).startswith(b'%PDF'))
+        self.assertIn('reports_selection.pdf', response['Content-Disposition'])
+
+    def test_invalid_parameters_are_reported_separately(self):
+        cases = [
+            ({'user_id': 'abc'}, 'user_id must be an integer'),
+            ({'user_id': self.operator.id, 'input_ids': '123'}, 'input_ids must be a list of integers'),
+            ({'input_ids': [1, 'x']}, 'input_ids must be a list of integers'),
+            ({'month': '2025/11'}, 'month must be in YYYY-MM format'),
+            ({'user_id': self.operator.id, 'format': 'docx'}, 'format must be zip or pdf'),
+            ({}, 'Provide user_id, month or input_ids'),
+        ]
+        for data, error in cases:
+            response = self._post(data)
+            self.assertEqual((response.status_code, response.data['error']), (400, error), data)
+        self.assertEqual(self._post({'user_id': self.staff.id}).status_code, 404)
+
+    def test_command_writes_the_archive(self):
+        fd, path = tempfile.mkstemp(suffix='.zip')
+        os.close(fd)
+        self.addCleanup(os.remove, path)
+        out = StringIO()
+
+        call_command('generate_batch_reports', user_id=self.operator.id, workers=1, output=path, stdout=out)
+
+        self.assertIn('Wrote 3 report(s)', out.getvalue())
+        self.assertEqual(len(zipfile.ZipFile(path).namelist()), 3)
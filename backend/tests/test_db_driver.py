@@ -0,0 +1,47 @@
+"""
+Unit tests for database engine selection in config/db_driver.py.
+
+Run with Django's test runner:
+    python manage.py test backend.tests.test_db_driver
+"""
+import os
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from backend.config.db_driver import get_database_config
+
+
+class DatabaseConfigTests(SimpleTestCase):
+
+    def test_sqlite_file_uses_given_path_and_env_override(self):
+        with mock.patch.dict(os.environ, {}, clear=True):
+            config = get_database_config(engine='sqlite', sqlite_path='/tmp/alu.sqlite3')
+        self.assertEqual(config['ENGINE'], 'django.db.backends.sqlite3')
+        self.assertEqual(config['NAME'], '/tmp/alu.sqlite3')
+
+        with mock.patch.dict(os.environ, {'DB_ENGINE': 'sqlite', 'DB_NAME': '/tmp/other.sqlite3'}, clear=True):
+            self.assertEqual(get_database_config()['NAME'], '/tmp/other.sqlite3')
+
+    def test_sqlite_memory_profile(self):
+        with mock.patch.dict(os.environ, {'DB_ENGINE': 'sqlite-memory'}, clear=True):
+            config = get_database_config()
+        self.assertEqual(config['NAME'], ':memory:')
+
+    def test_postgresql_reads_environment(self):
+        env = {'DB_NAME': 'alu', 'DB_USER': 'bench', 'DB_HOST': 'db', 'DB_PORT': '6432'}
+        with mock.patch.dict(os.environ, env, clear=True):
+            config = get_database_config(engine='postgresql', conn_max_age=30)
+        self.assertEqual(config['ENGINE'], 'django.db.backends.postgresql')
+        self.assertEqual((config['NAME'], config['USER'], config['HOST'], config['PORT']), ('alu', 'bench', 'db', '6432'))
+        self.assertEqual(config['CONN_MAX_AGE'], 30)
+        self.assertTrue(config['CONN_HEALTH_CHECKS'])
+
+    def test_postgresql_pooled_mode_disables_persistent_connections(self):
+        config = get_database_config(engine='postgresql', pool_size=8)
+        self.assertEqual(config['OPTIONS']['pool'], {'min_size': 1, 'max_size': 8})
+        self.assertEqual(config['CONN_MAX_AGE'], 0)
+
+    def test_unknown_engine_is_rejected(self):
+        with self.assertRaises(ValueError):
+            get_database_config(engine='oracle')
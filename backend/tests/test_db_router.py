@@ -0,0 +1,83 @@
+"""
+Unit tests for primary/replica read routing and read-your-writes pinning.
+
+Routing decisions are checked through QuerySet.db, so no replica needs to
+exist. To exercise real replica connections, point DB_REPLICAS at a second
+SQLite file, e.g.:
+    DB_ENGINE=sqlite DB_REPLICAS=/tmp/replica.sqlite3 python manage.py test backend.tests.test_db_router
+"""
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from backend.apps.prediction.models import ProductionInput
+from backend.config.db_router import PrimaryReplicaRouter, ReplicaPinningMiddleware, pin_user
+
+
+class FakeUser:
+    is_authenticated = True
+
+    def __init__(self, pk):
+        self.pk = pk
+
+
+@override_settings(DATABASE_REPLICAS=['replica1'], DB_REPLICA_PIN_SECONDS=5)
+class PrimaryReplicaRouterTests(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+
+    def run_request(self, method, user=None, view=None):
+        """Run view through the middleware and return the alias it read from."""
+        seen = {}
+
+        def get_response(request):
+            if view:
+                view(request)
+            seen['db'] = ProductionInput.objects.all().db
+            return HttpResponse()
+
+        request = getattr(self.factory, method)('/api/prediction/input/')
+        request.user = user or AnonymousUser()
+        ReplicaPinningMiddleware(get_response)(request)
+        return seen['db']
+
+    def test_reads_outside_requests_use_primary(self):
+        self.assertEqual(ProductionInput.objects.all().db, 'default')
+
+    def test_safe_request_reads_from_replica(self):
+        self.assertEqual(self.run_request('get', FakeUser(1)), 'replica1')
+
+    def test_unsafe_request_reads_from_primary(self):
+        self.assertEqual(self.run_request('post', FakeUser(1)), 'default')
+
+    def test_write_pins_user_to_primary(self):
+        self.run_request('post', FakeUser(7))
+
+        self.assertEqual(self.run_request('get', FakeUser(7)), 'default')
+        self.assertEqual(self.run_request('get', FakeUser(8)), 'replica1')
+
+        cache.clear()  # pin window elapsed
+        self.assertEqual(self.run_request('get', FakeUser(7)), 'replica1')
+
+    def test_write_during_safe_request_moves_later_reads_to_primary(self):
+        def writes(request):
+            PrimaryReplicaRouter().db_for_write(ProductionInput)
+
+        self.assertEqual(self.run_request('get', FakeUser(3), view=writes), 'default')
+        self.assertEqual(self.run_request('get', FakeUser(3)), 'default')
+
+    def test_explicit_pin(self):
+        pin_user(4)
+        self.assertEqual(self.run_request('get', FakeUser(4)), 'default')
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_no_replicas_configured(self):
+        self.assertEqual(self.run_request('get', FakeUser(1)), 'default')
+
+    def test_migrations_only_run_on_primary(self):
+        router = PrimaryReplicaRouter()
+        self.assertTrue(router.allow_migrate('default', 'prediction'))
+        self.assertFalse(router.allow_migrate('replica1', 'prediction'))
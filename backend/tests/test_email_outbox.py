@@ -0,0 +1,135 @@
+"""
+Unit tests for the transactional email outbox.
+
+Run with Django's test runner (uses the locmem mail backend):
+    python manage.py test backend.tests.test_email_outbox
+"""
+import shutil
+import tempfile
+from datetime import timedelta
+from unittest import mock
+
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend as LocmemBackend
+from django.db import DatabaseError
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from backend.apps.core.models import EmailOutbox
+from backend.apps.core.utils import outbox
+
+
+class CountingBackend(LocmemBackend):
+    """locmem backend that records how many connections were opened."""
+    opened = 0
+
+    def open(self):
+        CountingBackend.opened += 1
+        return True
+
+
+class FailingBackend(LocmemBackend):
+    def send_messages(self, messages):
+        raise ConnectionRefusedError('mail server down')
+
+
+@override_settings(
+    EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+    EMAIL_OUTBOX_BACKOFF_SECONDS=60,
+    EMAIL_OUTBOX_MAX_ATTEMPTS=3,
+)
+class EmailOutboxTests(TestCase):
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.media_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.media_override.enable()
+        CountingBackend.opened = 0
+
+    def tearDown(self):
+        self.media_override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def test_enqueue_stores_attachment_path_not_content(self):
+        item = outbox.enqueue_email(
+            'Report', 'Body', 'user@example.com',
+            attachment=('report.pdf', b'%PDF-1.4 data', 'application/pdf')
+        )
+        self.assertEqual(item.status, 'pending')
+        self.assertEqual(item.to, ['user@example.com'])
+        self.assertTrue(item.attachment_path.startswith('outbox/'))
+        self.assertEqual(len(mail.outbox), 0)
+
+    def test_deliver_sends_with_attachment_and_cleans_up(self):
+        item = outbox.enqueue_email(
+            'Report', 'Body', ['user@example.com'],
+            attachment=('report.pdf', b'%PDF-1.4 data', 'application/pdf')
+        )
+
+        self.assertEqual(outbox.deliver_pending(), (1, 0))
+
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].attachments[0][0], 'report.pdf')
+        self.assertEqual(mail.outbox[0].attachments[0][1], b'%PDF-1.4 data')
+        item.refresh_from_db()
+        self.assertEqual(item.status, 'sent')
+        self.assertIsNotNone(item.sent_at)
+        self.assertFalse(outbox.default_storage.exists(item.attachment_path))
+
+    @override_settings(EMAIL_BACKEND='backend.tests.test_email_outbox.CountingBackend')
+    def test_batch_reuses_one_connection(self):
+        for i in range(5):
+            outbox.enqueue_email(f'Report {i}', 'Body', 'user@example.com')
+
+        self.assertEqual(outbox.deliver_pending(batch_size=10), (5, 0))
+        self.assertEqual(CountingBackend.opened, 1)
+        self.assertEqual(len(mail.outbox), 5)
+
+    @override_settings(EMAIL_BACKEND='backend.tests.test_email_outbox.FailingBackend')
+    def test_failure_is_retried_with_backoff_then_given_up(self):
+        item = outbox.enqueue_email(
+            'Report', 'Body', 'user@example.com',
+            attachment=('report.pdf', b'%PDF-1.4 data', 'application/pdf')
+        )
+
+        before = timezone.now()
+        self.assertEqual(outbox.deliver_pending(), (0, 1))
+        item.refresh_from_db()
+        self.assertEqual(item.status, 'pending')
+        self.assertEqual(item.attempts, 1)
+        self.assertIn('mail server down', item.last_error)
+        self.assertGreaterEqual(item.next_attempt_at, before + timedelta(seconds=60))
+
+        # Not due yet, so nothing is claimed
+        self.assertEqual(outbox.deliver_pending(), (0, 0))
+
+        for expected_attempts in (2, 3):
+            EmailOutbox.objects.filter(id=item.id).update(next_attempt_at=timezone.now())
+            outbox.deliver_pending()
+            item.refresh_from_db()
+            self.assertEqual(item.attempts, expected_attempts)
+            # Kept while the message may still be retried
+            self.assertEqual(outbox.default_storage.exists(item.attachment_path), expected_attempts < 3)
+        self.assertEqual(item.status, 'failed')
+
+    def test_attachment_is_removed_when_the_row_cannot_be_created(self):
+        with mock.patch.object(EmailOutbox.objects, 'create', side_effect=DatabaseError('insert failed')):
+            with self.assertRaises(DatabaseError):
+                outbox.enqueue_email('Report', 'Body', 'user@example.com',
+                                     attachment=('report.pdf', b'%PDF-1.4 data', 'application/pdf'))
+
+        self.assertEqual(outbox.default_storage.listdir(outbox.ATTACHMENT_DIR)[1], [])
+
+    def test_backoff_is_exponential_and_capped(self):
+        with self.settings(EMAIL_OUTBOX_BACKOFF_SECONDS=10, EMAIL_OUTBOX_MAX_BACKOFF_SECONDS=50):
+            self.assertEqual(
+                [outbox.get_backoff(n).total_seconds() for n in range(1, 5)],
+                [10, 20, 40, 50]
+            )
+
+    def test_expired_lease_is_reclaimed(self):
+        item = outbox.enqueue_email('Report', 'Body', 'user@example.com')
+        EmailOutbox.objects.filter(id=item.id).update(
+            status='sending', next_attempt_at=timezone.now() - timedelta(seconds=1)
+        )
+        self.assertEqual(outbox.deliver_pending(), (1, 0))
@@ -0,0 +1,187 @@
+"""
+Unit tests for the staff pending queue event stream (server-sent events).
+
+The ASGI application is driven directly: each test opens the stream,
+submits or reviews inputs through the API and reads the events sent.
+
+Run with Django's test runner:
+    python manage.py test backend.tests.test_events
+
+The Redis broker tests need a server and are skipped unless
+TEST_EVENTS_BROKER_URL names one:
+    TEST_EVENTS_BROKER_URL=redis://localhost:6379/15 python manage.py test backend.tests.test_events
+"""
+import asyncio
+import json
+import os
+import uuid
+from unittest import mock, skipUnless
+
+from asgiref.sync import async_to_sync, sync_to_async
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.test import APIClient
+
+from backend.apps.authapp import authentication, revocation
+from backend.apps.authapp.serializers import CustomTokenObtainPairSerializer
+from backend.apps.core import events
+from backend.config.asgi import application
+
+from .test_query_counts import INPUT
+
+User = get_user_model()
+
+
+def parse_events(body):
+    parsed = []
+    for block in body.decode().split('\n\n'):
+        fields = dict(line.split(': ', 1) for line in block.splitlines() if not line.startswith(':') and ': ' in line)
+        if 'event' in fields:
+            parsed.append({'id': fields.get('id'), 'event': fields['event'], 'data': json.loads(fields['data'])})
+    return parsed
+
+
+class EventStreamTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        authentication.clear_user_cache()
+        revocation.reset()
+        events.hub._recent.clear()
+        self.staff = User.objects.create_user(username='events_staff', password='pass', is_staff=True)
+        self.operator = User.objects.create_user(username='events_operator', password='pass')
+        self.staff_client, self.operator_client = APIClient(), APIClient()
+        self.staff_client.force_authenticate(self.staff)
+        self.operator_client.force_authenticate(self.operator)
+
+    def _token(self, user):
+        return str(CustomTokenObtainPairSerializer.get_token(user).access_token)
+
+    def _submit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.operator_client.post('/api/prediction/inputs/', INPUT, format='json').data['id']
+
+    def _review(self, input_id, action):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.staff_client.post(f'/api/prediction/inputs/{input_id}/{action}/')
+
+    def _open(self, actions=(), token=None, headers=(), wait_for=0):
+        """
+        Open the stream, run actions (sync callables) once it is established
+        and collect what is sent until wait_for events arrived. Returns
+        (status, events).
+        """
+        token = self._token(self.staff) if token is None else token
+        scope = {
+            'type': 'http', 'method': 'GET', 'path': events.PATH,
+            'query_string': f'token={token}'.encode() if token else b'',
+            'headers': list(headers),
+        }
+
+        async def run():
+            disconnect = asyncio.Event()
+            messages = []
+
+            async def receive():
+                await disconnect.wait()
+                return {'type': 'http.disconnect'}
+
+            async def send(message):
+                messages.append(message)
+                if message['type'] != 'http.response.body':
+                    return
+                body = b''.join(m.get('body', b'') for m in messages)
+                if len(parse_events(body)) >= wait_for or not message.get('more_body', False):
+                    disconnect.set()
+
+            stream = asyncio.ensure_future(application(scope, receive, send))
+            while not messages and not stream.done():
+                await asyncio.sleep(0.01)
+            for action in actions:
+                await sync_to_async(action)()
+            await asyncio.wait_for(stream, timeout=5)
+            return messages
+
+        messages = async_to_sync(run)()
+        body = b''.join(message.get('body', b'') for message in messages)
+        return messages[0]['status'], parse_events(body)
+
+    def test_staff_receive_new_approved_and_rejected_events(self):
+        ids = []
+        status, received = self._open(actions=[
+            lambda: ids.append(self._submit()),
+            lambda: ids.append(self._submit()),
+            lambda: self._review(ids[0], 'generate_prediction'),
+            lambda: self._review(ids[1], 'reject'),
+        ], wait_for=4)
+
+        self.assertEqual(status, 200)
+        self.assertEqual([(event['event'], event['data']['id']) for event in received],
+                         [('new', ids[0]), ('new', ids[1]), ('approved', ids[0]), ('rejected', ids[1])])
+        self.assertEqual(received[0]['data']['created_by_id'], self.operator.id)
+        self.assertEqual((received[3]['data']['status'], received[3]['data']['previous_status']), ('rejected', 'pending'))
+        self.assertEqual(events.hub.subscriber_count, 0)
+
+    def test_only_staff_can_subscribe(self):
+        self.assertEqual(self._open(token='')[0], 401)
+        self.assertEqual(self._open(token='not-a-token')[0], 401)
+        self.assertEqual(self._open(token=self._token(self.operator))[0], 403)
+        header = (b'authorization', f'Bearer {self._token(self.staff)}'.encode())
+        self.assertEqual(self._open(token='', headers=[header], actions=[self._submit], wait_for=1)[0], 200)
+
+    def test_reconnecting_client_gets_missed_events_or_resync(self):
+        self._submit()
+        second = self._submit()
+        missed_from = events.hub._recent[0]['id']
+
+        _, received = self._open(headers=[(b'last-event-id', missed_from.encode())], wait_for=1)
+        self.assertEqual([(event['event'], event['data']['id']) for event in received], [('new', second)])
+
+        _, received = self._open(headers=[(b'last-event-id', b'no-longer-buffered')], wait_for=1)
+        self.assertEqual([event['event'] for event in received], ['resync'])
+
+    def test_streams_start_listening_to_the_broker(self):
+        with mock.patch.object(events, 'get_broker', return_value=None) as get_broker:
+            self.assertEqual(self._open()[0], 200)
+        get_broker.assert_called_once_with()
+
+    @override_settings(EVENTS_QUEUE_SIZE=2)
+    def test_slow_client_is_told_to_resync(self):
+        def flood():
+            for i in range(4):
+                events.hub.deliver({'id': f'flood-{i}', 'event': 'new', 'data': {'id': i}})
+
+        async def run():
+            subscription, _ = events.hub.subscribe()
+            try:
+                await sync_to_async(flood)()
+                await asyncio.sleep(0.05)
+                return [subscription.queue.get_nowait() for _ in range(subscription.queue.qsize())]
+            finally:
+                events.hub.unsubscribe(subscription)
+
+        queued = async_to_sync(run)()
+        # The backlog was dropped for a resync, then delivery went on
+        self.assertEqual([event['id'] for event in queued], [None, 'flood-3'])
+
+
+@skipUnless(os.environ.get('TEST_EVENTS_BROKER_URL'), 'TEST_EVENTS_BROKER_URL names no Redis server')
+class RedisBrokerTests(SimpleTestCase):
+
+    @override_settings(EVENTS_BROKER_CHANNEL=f'aluoptimize-test-{uuid.uuid4().hex}')
+    def test_hub_receives_events_published_by_another_process(self):
+        url = os.environ['TEST_EVENTS_BROKER_URL']
+        this_hub, other_hub = events.EventHub(), events.EventHub()
+        events.RedisBroker(url, this_hub)
+        other_process = events.RedisBroker(url, other_hub)
+
+        async def run():
+            subscription, _ = this_hub.subscribe()
+            try:
+                await sync_to_async(other_process.publish)({'id': 'remote-1', 'event': 'new', 'data': {'id': 1}})
+                return await asyncio.wait_for(subscription.queue.get(), timeout=5)
+            finally:
+                this_hub.unsubscribe(subscription)
+
+        self.assertEqual(async_to_sync(run)()['id'], 'remote-1')
@@ -0,0 +1,103 @@
+"""
+Unit tests for the streamed CSV/NDJSON exports.
+
+Run with Django's test runner:
+    python manage.py test backend.tests.test_exports
+"""
+import csv
+import gzip
+import io
+import json
+import os
+import tempfile
+from datetime import datetime, timezone as dt_timezone
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from backend.apps.core.utils import exports
+from backend.apps.prediction.models import ProductionInput, ProductionOutput
+
+from .test_query_counts import INPUT
+
+User = get_user_model()
+
+
+class ExportTests(TestCase):
+
+    def setUp(self):
+        self.operator = User.objects.create_user(username='export_operator', password='pass')
+        self.staff = User.objects.create_user(username='export_staff', password='pass', is_staff=True)
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+        # Seven outputs, one per day from June 1st; the last three on LINE_B
+        self.outputs = []
+        for day in range(1, 8):
+            production_input = ProductionInput.objects.create(
+                created_by=self.operator, **{**INPUT, 'production_line': 'LINE_B' if day > 4 else 'LINE_A'}
+            )
+            output = ProductionOutput.objects.create(
+                input_data=production_input, predicted_output=900 + day, output_quality=90, energy_efficiency=80
+            )
+            ProductionOutput.objects.filter(id=output.id).update(created_at=datetime(2025, 6, day, 12, tzinfo=dt_timezone.utc))
+            self.outputs.append(output)
+
+    def _csv(self, response):
+        return list(csv.DictReader(io.StringIO(b''.join(response.streaming_content).decode())))
+
+    def test_pages_cross_chunk_boundaries(self):
+        spec = exports.DATASETS['predictions']
+        queryset = exports.filtered_queryset(spec)
+
+        # Pages of 3, 3 and 1 rows
+        with self.assertNumQueries(3):
+            rows = list(exports.iter_rows(spec, queryset, chunk_size=3))
+        self.assertEqual([row[0] for row in rows], [output.id for output in self.outputs])
+
+        # 7 rows fill the last page exactly, so one more (empty) page is read
+        with self.assertNumQueries(2):
+            self.assertEqual(len(list(exports.iter_rows(spec, queryset, chunk_size=7))), 7)
+
+    def test_key_is_looked_up_by_name(self):
+        spec = exports.ExportSpec(ProductionOutput, [
+            ('predicted_output', 'predicted_output'),
+            ('output_id', 'id'),
+        ], line_field='input_data__production_line')
+        rows = list(exports.iter_rows(spec, exports.filtered_queryset(spec), chunk_size=2))
+        self.assertEqual([row[1] for row in rows], [output.id for output in self.outputs])
+
+        without_key = exports.ExportSpec(ProductionOutput, [('predicted_output', 'predicted_output')],
+                                         line_field='input_data__production_line')
+        rows = list(exports.iter_rows(without_key, exports.filtered_queryset(without_key), chunk_size=2))
+        self.assertEqual(rows, [(output.predicted_output,) for output in self.outputs])
+
+    @override_settings(EXPORT_CHUNK_SIZE=2)
+    def test_endpoint_filters_by_date_and_line(self):
+        response = self.client.get('/api/staff/exports/predictions/', {'since': '2025-06-02', 'until': '2025-06-06'})
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertEqual([row['id'] for row in self._csv(response)], [str(output.id) for output in self.outputs[1:5]])
+
+        response = self.client.get('/api/staff/exports/predictions/', {'line': 'LINE_B', 'output': 'ndjson', 'gzip': 'true'})
+        lines = gzip.decompress(b''.join(response.streaming_content)).decode().splitlines()
+        self.assertEqual([json.loads(line)['production_line'] for line in lines], ['LINE_B'] * 3)
+
+    def test_only_listed_datasets_are_exported(self):
+        self.assertEqual(self.client.get('/api/staff/exports/users/').status_code, 404)
+        self.assertEqual(self.client.get('/api/staff/exports/waste/', {'output': 'xml'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/staff/exports/logs/', {'since': '06/01/2025'}).status_code, 400)
+        operator_client = APIClient()
+        operator_client.force_authenticate(self.operator)
+        self.assertEqual(operator_client.get('/api/staff/exports/predictions/').status_code, 403)
+
+    def test_command_writes_the_file(self):
+        fd, path = tempfile.mkstemp(suffix='.csv')
+        os.close(fd)
+        self.addCleanup(os.remove, path)
+
+        call_command('export_data', 'predictions', since='2025-06-05', chunk_size=2, output=path, stderr=StringIO())
+
+        with open(path, newline='') as fileobj:
+            self.assertEqual(len(list(csv.DictReader(fileobj))), 3)
@@ -0,0 +1,58 @@
+"""
+Unit tests for the readiness endpoint and the lazy MySQL availability check.
+
+Run with Django's test runner:
+    python manage.py test backend.tests.test_health
+"""
+from types import SimpleNamespace
+from unittest import mock
+
+from django.db import OperationalError
+from django.test import SimpleTestCase, TestCase
+from rest_framework.test import APIClient
+
+from backend.apps.core import checks
+
+
+class ReadinessTests(TestCase):
+
+    def test_ready_when_the_database_answers(self):
+        response = APIClient().get('/api/health/ready/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['status'], 'ready')
+        self.assertTrue(response.data['database']['ok'])
+        self.assertIn('latency_ms', response.data['database'])
+
+    def test_failure_details_are_logged_not_returned(self):
+        error = OperationalError("Can't connect to MySQL server on 'db.internal' (user 'alu_app')")
+        with mock.patch('backend.apps.core.health.check_database', side_effect=error), \
+                self.assertLogs('backend.apps.core.health', level='ERROR') as logs:
+            response = APIClient().get('/api/health/ready/')
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.data['database'], {'ok': False, 'error': 'Database unavailable'})
+        self.assertNotIn(b'db.internal', response.content)
+        self.assertIn('db.internal', logs.output[0])
+
+
+class MySQLCheckTests(SimpleTestCase):
+
+    def _check(self, vendor, reachable, databases=('default',)):
+        connection = SimpleNamespace(vendor=vendor, settings_dict={'HOST': 'db.internal', 'PORT': '3307'})
+        with mock.patch.object(checks, 'connections', {'default': connection}), \
+                mock.patch.object(checks, 'is_mysql_running', return_value=reachable) as probe:
+            return checks.check_mysql_reachable(None, databases=databases), probe
+
+    def test_unreachable_mysql_is_reported(self):
+        errors, probe = self._check('mysql', reachable=False)
+        self.assertEqual([error.id for error in errors], ['core.E001'])
+        probe.assert_called_once_with('db.internal', '3307')
+
+        self.assertEqual(self._check('mysql', reachable=True)[0], [])
+
+    def test_probe_runs_only_for_database_checks_on_mysql(self):
+        for vendor, databases in (('sqlite', ('default',)), ('mysql', None)):
+            errors, probe = self._check(vendor, reachable=False, databases=databases)
+            self.assertEqual(errors, [])
+            probe.assert_not_called()
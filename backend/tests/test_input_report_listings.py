@@ -0,0 +1,85 @@
+"""
+Unit tests for the input report listings (has_output, keyset pagination).
+
+Run with Django's test runner:
+    python manage.py test backend.tests.test_input_report_listings
+"""
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from backend.apps.prediction.models import ProductionInput, ProductionOutput
+
+from .test_query_counts import INPUT
+
+User = get_user_model()
+
+
+class InputReportsTests(TestCase):
+
+    def setUp(self):
+        self.staff = User.objects.create_user(username='reports_staff', password='pass', is_staff=True)
+        self.operators = [User.objects.create_user(username=f'reports_operator{i}', password='pass') for i in range(2)]
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+        now = timezone.now()
+        fields = {name: value for name, value in INPUT.items() if name != 'production_line'}
+        self.inputs = []
+        for i in range(7):
+            production_input = ProductionInput.objects.create(
+                created_by=self.operators[i % 2], production_line=('LINE_A', 'LINE_B')[i % 3 == 0],
+                status=('pending', 'approved')[i % 2], **fields
+            )
+            # Two inputs share a timestamp, so pages must break ties by id
+            ProductionInput.objects.filter(id=production_input.id).update(created_at=now - timedelta(days=min(i, 5)))
+            self.inputs.append(production_input)
+        for production_input in self.inputs[::3]:
+            ProductionOutput.objects.create(input_data=production_input, predicted_output=1000, output_quality=95, energy_efficiency=0.9)
+
+    def _pages(self, path, **params):
+        pages = []
+        cursor = None
+        while True:
+            response = self.client.get(path, {**params, **({'cursor': cursor} if cursor else {})})
+            self.assertEqual(response.status_code, 200)
+            pages.append([row['id'] for row in response.data['inputs']])
+            cursor = response.data['next_cursor']
+            if cursor is None:
+                return pages
+
+    def test_user_inputs_report_has_output_newest_first(self):
+        operator = self.operators[0]
+        response = self.client.get(f'/api/staff/input-reports/{operator.id}/inputs/')
+
+        mine = sorted((inp for inp in self.inputs if inp.created_by == operator),
+                      key=lambda inp: (ProductionInput.objects.get(id=inp.id).created_at, inp.id), reverse=True)
+        self.assertEqual([row['id'] for row in response.data['inputs']], [inp.id for inp in mine])
+        self.assertEqual({row['id']: row['has_output'] for row in response.data['inputs']},
+                         {inp.id: self.inputs.index(inp) % 3 == 0 for inp in mine})
+        self.assertIsNone(response.data['next_cursor'])
+        self.assertEqual(sum(self._pages(f'/api/staff/input-reports/{operator.id}/inputs/', limit=1), []),
+                         [inp.id for inp in mine])
+
+    def test_all_inputs_pages_are_one_query_each_and_filtered(self):
+        queries = []
+        with connection.execute_wrapper(lambda execute, sql, *args: queries.append(sql) or execute(sql, *args)):
+            pages = self._pages('/api/admin-panel/input-reports/inputs/', limit=3)
+
+        self.assertEqual([len(page) for page in pages], [3, 3, 1])
+        self.assertEqual(len(queries), len(pages))
+        self.assertEqual(sorted(sum(pages, [])), sorted(inp.id for inp in self.inputs))
+
+        rows = self.client.get('/api/staff/input-reports/inputs/', {'line': 'LINE_B', 'status': 'approved'}).data['inputs']
+        self.assertEqual({row['id'] for row in rows}, {self.inputs[3].id})
+        self.assertEqual(rows[0]['created_by__username'], 'reports_operator1')
+        since = (timezone.localdate() - timedelta(days=1)).isoformat()
+        self.assertEqual(len(self.client.get('/api/staff/input-reports/inputs/', {'since': since}).data['inputs']), 2)
+
+    def test_invalid_parameters_are_rejected(self):
+        for params in ({'cursor': 'bogus'}, {'limit': 0}, {'limit': 5000}, {'since': '30/06/2025'}):
+            with self.subTest(params=params):
+                self.assertEqual(self.client.get('/api/staff/input-reports/inputs/', params).status_code, 400)
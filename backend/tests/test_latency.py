@@ -0,0 +1,108 @@
+"""
+Unit tests for prediction latency analytics from the per-minute histograms.
+
+Run with Django's test runner:
+    python manage.py test backend.tests.test_latency
+"""
+import math
+import random
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import DatabaseError
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from backend.apps.core.models import PredictionLatencyRollup
+from backend.apps.core.utils import latency
+from backend.apps.prediction.models import ProductionInput, ProductionOutput, PredictionLog
+
+
+class LatencyTests(TestCase):
+
+    def setUp(self):
+        self.outputs = {}
+        for line in ('LINE_A', 'LINE_B'):
+            production_input = ProductionInput.objects.create(
+                production_line=line, temperature=960, pressure=101325, feed_rate=1000,
+                power_consumption=1500, anode_effect=0.3, bath_ratio=1.2, alumina_concentration=3.0
+            )
+            self.outputs[line] = ProductionOutput.objects.create(
+                input_data=production_input, predicted_output=820, output_quality=90, energy_efficiency=60
+            )
+
+    def _log(self, ms, line='LINE_A', version='v1', features=True):
+        return PredictionLog.objects.create(
+            production_output=self.outputs[line], confidence_score=0.9, q10_prediction=738,
+            q50_prediction=820, q90_prediction=902, model_version=version,
+            input_features={'production_line': line} if features else {}, execution_time_ms=ms
+        )
+
+    def _window(self):
+        now = timezone.now()
+        return now - timedelta(hours=1), now + timedelta(minutes=1)
+
+    def test_bucket_values_are_within_three_percent(self):
+        for ms in [1, 2, 7, 50, 333, 1000, 60000]:
+            self.assertLess(abs(latency.bucket_value(latency.bucket_for(ms)) - ms) / ms, 0.03)
+        self.assertEqual(latency.bucket_value(latency.bucket_for(0)), 0.0)
+
+    def test_percentiles_from_histograms_match_the_logs(self):
+        rng = random.Random(7)
+        samples = [int(rng.lognormvariate(3, 0.8)) + 1 for _ in range(300)]
+        for index, ms in enumerate(samples):
+            self._log(ms, version='v1' if index % 2 else 'v2')
+
+        summary = latency.latency_summary(*self._window())
+
+        samples.sort()
+        self.assertEqual(summary['overall']['count'], 300)
+        self.assertAlmostEqual(summary['overall']['mean_ms'], sum(samples) / 300, places=1)
+        for q in latency.PERCENTILES:
+            exact = samples[math.ceil(300 * q / 100) - 1]
+            self.assertLess(abs(summary['overall'][f'p{q}_ms'] - exact) / exact, 0.03)
+        self.assertEqual(sorted(summary['by_model_version']), ['v1', 'v2'])
+        self.assertGreater(summary['throughput']['peak_per_minute'], 0)
+
+    def test_breakdown_by_line_and_rebuild_match(self):
+        self._log(10, 'LINE_A')
+        self._log(20, 'LINE_B', features=False)
+        self._log(30, 'LINE_B')
+        incremental = latency.latency_summary(*self._window())
+
+        self.assertEqual(incremental['by_production_line']['LINE_B']['count'], 2)
+        self.assertEqual(incremental['by_production_line']['LINE_B']['mean_ms'], 25.0)
+
+        PredictionLatencyRollup.objects.all().delete()
+        self.assertEqual(latency.rebuild_range(*self._window()), 3)
+        self.assertEqual(latency.latency_summary(*self._window())['by_production_line'], incremental['by_production_line'])
+
+    def test_failed_histogram_update_is_rolled_back_alone(self):
+        def fail_midway(log):
+            PredictionLatencyRollup.objects.create(
+                minute=latency.truncate_minute(log.created_at), model_version=log.model_version,
+                production_line='LINE_A', bucket=0, count=1, total_ms=1
+            )
+            raise DatabaseError('deadlock detected')
+
+        with mock.patch.object(latency, 'record_prediction', fail_midway):
+            log = self._log(12)
+
+        self.assertFalse(PredictionLatencyRollup.objects.exists())
+        self.assertTrue(PredictionLog.objects.filter(pk=log.pk).exists())
+
+    def test_endpoint_filters_and_validates(self):
+        self._log(10, version='v1')
+        self._log(40, version='v2')
+        staff = get_user_model().objects.create_user(username='latency_staff', password='pass', is_staff=True)
+        client = APIClient()
+        client.force_authenticate(staff)
+
+        response = client.get('/api/admin-panel/prediction-latency/', {'model_version': 'v2'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['overall']['count'], 1)
+
+        response = client.get('/api/admin-panel/prediction-latency/', {'since': 'yesterday'})
+        self.assertEqual(response.status_code, 400)
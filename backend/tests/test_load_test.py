@@ -0,0 +1,70 @@
+"""
+Tests for the HTTP load-test harness (backend/utils/load_test.py) against a
+live test server.
+
+Run with Django's test runner:
+    python manage.py test backend.tests.test_load_test
+"""
+import asyncio
+import json
+import os
+import tempfile
+from contextlib import redirect_stdout
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.test import LiveServerTestCase
+
+from backend.apps.prediction.models import ProductionInput, ProductionOutput
+from backend.utils import load_test
+
+
+class LoadTestHarnessTests(LiveServerTestCase):
+
+    def setUp(self):
+        User = get_user_model()
+        User.objects.create_user(username='load_operator', password='pass')
+        User.objects.create_user(username='load_staff', password='pass', is_staff=True)
+
+    def _run(self, *args):
+        path = os.path.join(tempfile.mkdtemp(), 'results.json')
+        with redirect_stdout(StringIO()) as output:
+            load_test.main([
+                '--url', self.live_server_url, '--operator', 'load_operator:pass', '--staff', 'load_staff:pass',
+                '--duration', '2', '--seed', '1', '--json', path, *args,
+            ])
+        with open(path) as f:
+            return json.load(f)['endpoints'], output.getvalue()
+
+    def test_operator_and_staff_scenarios_run_without_errors(self):
+        endpoints, report = self._run('--mix', 'operator=1,staff=1', '--rate', '4', '--polls', '1')
+
+        self.assertIn('POST /api/prediction/inputs/', endpoints)
+        self.assertIn('GET /api/prediction/pending/', endpoints)
+        self.assertTrue(all(row['error_rate'] == 0 for row in endpoints.values()), endpoints)
+        self.assertEqual(endpoints['POST /api/auth/token/']['requests'], 2)
+        # Staff iterations approve what operators submitted
+        self.assertTrue(ProductionInput.objects.filter(created_by__username='load_operator').exists())
+        if 'POST /api/prediction/inputs/{id}/generate_prediction/' in endpoints:
+            self.assertTrue(ProductionOutput.objects.exists())
+        self.assertIn('p99', report)
+
+    def test_failures_are_counted_per_endpoint(self):
+        stats = load_test.Stats()
+        for seconds, status in [(0.010, 200), (0.020, 200), (0.030, 500), (0.040, 'timeout')]:
+            stats.record('GET /x/', seconds, status)
+
+        row = stats.summary(elapsed=2)['GET /x/']
+
+        self.assertEqual(row['error_rate'], 0.5)
+        self.assertEqual(row['per_second'], 2)
+        self.assertEqual((row['p50_ms'], row['p99_ms']), (20.0, 40.0))
+
+    def test_unknown_role_in_mix_is_rejected(self):
+        with self.assertRaises(load_test.argparse.ArgumentTypeError):
+            load_test.parse_mix('operator=1,auditor=2')
+        with self.assertRaises(SystemExit), redirect_stdout(StringIO()):
+            asyncio.run(load_test.run(load_test.argparse.Namespace(
+                seed=1, operator=None, staff=None, admin=None, url=self.live_server_url, timeout=5,
+                mix={'operator': 1},
+            )))
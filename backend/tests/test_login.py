@@ -0,0 +1,61 @@
+"""
+Unit tests for the login endpoint and password hashing work factor.
+
+Run with Django's test runner:
+    python manage.py test backend.tests.test_login
+"""
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import identify_hasher
+from django.db import connection
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from backend.apps.authapp.hashers import ConfigurablePBKDF2PasswordHasher
+
+User = get_user_model()
+
+
+@override_settings(PASSWORD_HASH_ITERATIONS=1000)
+class LoginTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='login_staff', password='pass', email='s@example.com', is_staff=True)
+        self.client = APIClient()
+
+    def _login(self, password='pass'):
+        return self.client.post('/api/auth/token/', {'username': 'login_staff', 'password': password}, format='json')
+
+    def test_login_checks_the_password_once(self):
+        verify = ConfigurablePBKDF2PasswordHasher.verify
+        with mock.patch.object(ConfigurablePBKDF2PasswordHasher, 'verify', autospec=True, side_effect=verify) as checked:
+            queries = []
+            with connection.execute_wrapper(lambda execute, sql, *args: queries.append(sql) or execute(sql, *args)):
+                response = self._login()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(checked.call_count, 1)
+        self.assertEqual(sum('FROM "auth_user"' in sql for sql in queries), 1)
+
+    def test_response_and_claims_carry_the_user(self):
+        response = self._login()
+
+        self.assertEqual(response.data['user'], {
+            'id': self.user.id, 'username': 'login_staff', 'email': 's@example.com',
+            'is_superuser': False, 'is_staff': True, 'role': 'staff',
+        })
+        claims = AccessToken(response.data['access'])
+        self.assertEqual((claims['user_id'], claims['username'], claims['role']), (self.user.id, 'login_staff', 'staff'))
+        self.assertEqual(self._login('wrong').status_code, 401)
+
+    def test_work_factor_is_configurable_and_upgraded_on_login(self):
+        self.assertEqual(identify_hasher(self.user.password).safe_summary(self.user.password)['iterations'], 1000)
+
+        with override_settings(PASSWORD_HASH_ITERATIONS=2000):
+            self.assertEqual(self._login().status_code, 200)
+
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith('pbkdf2_sha256$2000$'))
+        self.assertTrue(self.user.check_password('pass'))
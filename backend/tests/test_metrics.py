@@ -0,0 +1,119 @@
+"""
+Unit tests for the request metrics middleware and the /api/metrics/ endpoint.
+
+Run with Django's test runner:
+    python manage.py test backend.tests.test_metrics
+"""
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+
+from backend.apps.authapp.serializers import CustomTokenObtainPairSerializer
+from backend.apps.core import metrics
+
+User = get_user_model()
+
+
+class MetricsTests(TestCase):
+
+    def setUp(self):
+        self.metrics_dir = tempfile.mkdtemp()
+        self.settings_override = override_settings(METRICS_DIR=self.metrics_dir, METRICS_TOKEN='', METRICS_PUBLIC=True)
+        self.settings_override.enable()
+        self.registry_patch = mock.patch.object(metrics, 'registry', metrics.MetricsRegistry())
+        self.registry_patch.start()
+
+    def tearDown(self):
+        self.registry_patch.stop()
+        self.settings_override.disable()
+        shutil.rmtree(self.metrics_dir, ignore_errors=True)
+
+    def _write_snapshot(self, name, registry):
+        with open(os.path.join(self.metrics_dir, name), 'w') as f:
+            json.dump(registry.snapshot(), f)
+
+    def _scrape(self, **headers):
+        response = self.client.get('/api/metrics/', **headers)
+        return response, response.content.decode()
+
+    def test_requests_are_recorded_by_route(self):
+        self.client.get('/api/health/ready/')
+        self.client.get('/api/health/ready/')
+
+        _, text = self._scrape()
+
+        labels = 'view="/api/health/ready/",method="GET"'
+        self.assertIn(f'aluoptimize_http_requests_total{{{labels},status="200"}} 2', text)
+        self.assertIn(f'aluoptimize_db_queries_total{{{labels}}} 2', text)
+        self.assertIn(f'aluoptimize_http_request_duration_seconds_bucket{{{labels},le="+Inf"}} 2', text)
+        self.assertIn(f'aluoptimize_http_request_duration_seconds_count{{{labels}}} 2', text)
+        self.assertIn(f'aluoptimize_http_response_size_bytes_bucket{{{labels},le="256"}} 2', text)
+        self.assertIn(f'aluoptimize_http_response_size_bytes_count{{{labels}}} 2', text)
+
+    def test_histogram_buckets_are_cumulative(self):
+        registry = metrics.MetricsRegistry()
+        for seconds in (0.003, 0.2, 0.2, 30):
+            registry.observe('http_request_duration_seconds', ('/x/', 'GET'), seconds)
+
+        text = registry.render()
+
+        self.assertIn('aluoptimize_http_request_duration_seconds_bucket{view="/x/",method="GET",le="0.005"} 1', text)
+        self.assertIn('aluoptimize_http_request_duration_seconds_bucket{view="/x/",method="GET",le="0.25"} 3', text)
+        self.assertIn('aluoptimize_http_request_duration_seconds_bucket{view="/x/",method="GET",le="10"} 3', text)
+        self.assertIn('aluoptimize_http_request_duration_seconds_bucket{view="/x/",method="GET",le="+Inf"} 4', text)
+
+    def test_snapshots_of_other_workers_are_combined(self):
+        other = metrics.MetricsRegistry()
+        other.inc('http_requests_total', ('/api/health/ready/', 'GET', '200'), 5)
+        self._write_snapshot(f'{os.getppid()}-other.json', other)
+
+        self.client.get('/api/health/ready/')
+        _, text = self._scrape()
+
+        self.assertIn('aluoptimize_http_requests_total{view="/api/health/ready/",method="GET",status="200"} 6', text)
+
+    def test_snapshots_of_exited_workers_are_deleted(self):
+        exited = subprocess.Popen([sys.executable, '-c', ''])
+        exited.wait()
+        other = metrics.MetricsRegistry()
+        other.inc('http_requests_total', ('/api/health/ready/', 'GET', '200'), 5)
+        self._write_snapshot(f'{exited.pid}-gone.json', other)
+        self._write_snapshot(f'{os.getpid()}-earlier.json', other)
+
+        self.client.get('/api/health/ready/')
+        _, text = self._scrape()
+
+        self.assertIn('aluoptimize_http_requests_total{view="/api/health/ready/",method="GET",status="200"} 1', text)
+        self.assertEqual(os.listdir(self.metrics_dir), [f'{os.getpid()}-{metrics._process_token}.json'])
+
+    def test_metrics_stay_in_process_without_a_directory(self):
+        with override_settings(METRICS_DIR=None):
+            self.client.get('/api/health/ready/')
+            _, text = self._scrape()
+
+        self.assertIn('aluoptimize_http_requests_total{view="/api/health/ready/",method="GET",status="200"} 1', text)
+        self.assertEqual(os.listdir(self.metrics_dir), [])
+
+    @override_settings(METRICS_TOKEN='scrape-secret', METRICS_PUBLIC=False)
+    def test_token_is_required_when_configured(self):
+        response, _ = self._scrape()
+        self.assertEqual(response.status_code, 401)
+        response, _ = self._scrape(HTTP_AUTHORIZATION='Bearer scrape-secret')
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(METRICS_PUBLIC=False)
+    def test_only_staff_can_read_it_by_default(self):
+        self.assertEqual(self._scrape()[0].status_code, 401)
+
+        operator = User.objects.create_user(username='metrics_operator', password='pass')
+        staff = User.objects.create_user(username='metrics_staff', password='pass', is_staff=True)
+        for user, status in ((operator, 403), (staff, 200)):
+            token = CustomTokenObtainPairSerializer.get_token(user).access_token
+            self.assertEqual(self._scrape(HTTP_AUTHORIZATION=f'Bearer {token}')[0].status_code, status)
@@ -0,0 +1,99 @@
+"""
+Unit tests for on-demand request profiling.
+
+Run with Django's test runner:
+    python manage.py test backend.tests.test_profiling
+"""
+import json
+import pstats
+import shutil
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from backend.apps.core import profiling
+
+
+class ProfilingTests(TestCase):
+
+    def setUp(self):
+        self.profiling_dir = tempfile.mkdtemp()
+        self.settings_override = override_settings(PROFILING_DIR=self.profiling_dir, PROFILING_MAX_PROFILES=3)
+        self.settings_override.enable()
+        User = get_user_model()
+        self.staff = User.objects.create_user(username='profile_staff', password='pass', is_staff=True)
+        self.operator = User.objects.create_user(username='profile_operator', password='pass')
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.profiling_dir, ignore_errors=True)
+
+    def _token(self, mode='cprofile'):
+        response = self.client.post('/api/admin-panel/profiles/token/', {'mode': mode}, format='json')
+        self.assertEqual(response.status_code, 200)
+        return response.data['token']
+
+    def test_header_profiles_the_request_with_its_sql(self):
+        response = self.client.get('/api/staff/predictions/', HTTP_X_PROFILE=self._token())
+
+        profile_id = response['X-Profile-Id']
+        meta = self.client.get(f'/api/admin-panel/profiles/{profile_id}/').data
+        self.assertEqual((meta['view'], meta['status'], meta['mode']), ('GET /api/staff/predictions/', 200, 'cprofile'))
+        self.assertEqual(meta['requested_by'], 'profile_staff')
+        download = self.client.get(f'/api/admin-panel/profiles/{profile_id}/download/?output=pstats')
+        path = f'{self.profiling_dir}/{profile_id}.pstats'
+        with open(path, 'rb') as f:
+            self.assertEqual(b''.join(download.streaming_content), f.read())
+        self.assertTrue(pstats.Stats(path).total_calls)
+        sql = json.loads(b''.join(self.client.get(f'/api/admin-panel/profiles/{profile_id}/download/').streaming_content))
+        self.assertEqual(len(sql), meta['queries'])
+        self.assertTrue(any('prediction_productionoutput' in statement['sql'] for statement in sql))
+
+    def test_sampled_profiles_download_as_speedscope(self):
+        response = self.client.get('/api/prediction/logs/', HTTP_X_PROFILE=self._token('sample'))
+
+        profile_id = response['X-Profile-Id']
+        download = self.client.get(f'/api/admin-panel/profiles/{profile_id}/download/?output=speedscope')
+        speedscope = json.loads(b''.join(download.streaming_content))
+        self.assertEqual(speedscope['profiles'][0]['type'], 'sampled')
+        self.assertEqual(len(speedscope['profiles'][0]['samples']), len(speedscope['profiles'][0]['weights']))
+        self.assertEqual(self.client.get(f'/api/admin-panel/profiles/{profile_id}/download/?output=pstats').status_code, 404)
+
+    def test_invalid_or_non_staff_tokens_are_ignored(self):
+        forged = profiling.make_token(self.staff) + 'x'
+        non_staff = profiling.make_token(self.operator)
+
+        for token in (forged, non_staff):
+            response = self.client.get('/api/staff/predictions/', HTTP_X_PROFILE=token)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn('X-Profile-Id', response)
+        self.assertEqual(profiling.list_profiles(), [])
+        self.assertEqual(self.client.post('/api/admin-panel/profiles/token/', {'mode': 'trace'}).status_code, 400)
+
+    def test_tokens_only_profile_their_own_users_requests(self):
+        token = self._token()
+        other_staff = APIClient()
+        other_staff.force_authenticate(get_user_model().objects.create_user(username='other_staff', password='pass', is_staff=True))
+
+        responses = [
+            other_staff.get('/api/staff/predictions/', HTTP_X_PROFILE=token),
+            APIClient().get('/api/health/ready/', HTTP_X_PROFILE=token),
+            self.client.get('/api/staff/predictions/', {'_profile': token}),
+        ]
+        for response in responses:
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn('X-Profile-Id', response)
+        self.assertEqual(profiling.list_profiles(), [])
+
+    def test_store_keeps_only_the_newest_profiles(self):
+        token = self._token()
+        ids = [self.client.get('/api/prediction/pending/', HTTP_X_PROFILE=token)['X-Profile-Id'] for _ in range(5)]
+
+        listed = [meta['id'] for meta in self.client.get('/api/admin-panel/profiles/').data['profiles']]
+        self.assertEqual(listed, sorted(ids[2:], reverse=True))
+        self.assertEqual(self.client.get(f'/api/admin-panel/profiles/{ids[0]}/').status_code, 404)
+        self.assertEqual(self.client.get('/api/admin-panel/profiles/..%2Fsecret/').status_code, 404)
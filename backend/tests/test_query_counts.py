@@ -0,0 +1,165 @@
+"""
+Query-count and latency regression tests for the API endpoints.
+
+Every list, dashboard and action endpoint is called with N and then 10·N
+seeded production inputs. The number of SQL queries must not grow from one
+size to the other (an N+1 shows up as a count that grows with the rows) and
+must stay within the endpoint's budget, and read endpoints must answer
+within LATENCY_BUDGET_MS at the 95th percentile with 10·N rows.
+
+Run with Django's test runner on an in-memory database:
+    DB_ENGINE=sqlite-memory python manage.py test backend.tests.test_query_counts
+
+QUERY_COUNT_SCALE multiplies N for a heavier local run and
+LATENCY_BUDGET_SCALE relaxes the latency budget on slow machines. The
+unpaginated staff lists (all predictions, logs) serialize every row and set
+the budget; the other read endpoints answer well within it.
+"""
+import os
+import time
+from datetime import datetime, timezone as dt_timezone
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from backend.apps.core.utils.synthetic_data import generate
+from backend.apps.prediction.models import ProductionInput
+
+User = get_user_model()
+
+N = 60 * int(os.environ.get('QUERY_COUNT_SCALE', 1))
+END = datetime(2025, 6, 30, 12, tzinfo=dt_timezone.utc)
+LATENCY_RUNS = 10
+LATENCY_BUDGET_MS = 2000 * float(os.environ.get('LATENCY_BUDGET_SCALE', 1))
+
+INPUT = {
+    'production_line': 'LINE_A', 'temperature': 960, 'pressure': 101.3, 'feed_rate': 1200,
+    'power_consumption': 450, 'anode_effect': 0.2, 'bath_ratio': 1.15, 'alumina_concentration': 3.2,
+}
+
+# (name, query budget, role, method, path, body). Paths and bodies are
+# formatted with the rows picked by _targets(), so actions get fresh rows.
+# Submitting and reviewing inputs includes the profile counter update, and
+# generating a prediction the savepoint around its latency histogram update.
+# Approving a user records the invalidation of their token claims.
+ENDPOINTS = [
+    ('operator inputs', 1, 'operator', 'get', '/api/prediction/inputs/', None),
+    ('operator outputs', 3, 'operator', 'get', '/api/prediction/outputs/', None),
+    ('operator predictions', 3, 'operator', 'get', '/api/prediction/user/', None),
+    ('operator waste', 2, 'operator', 'get', '/api/waste/management/', None),
+    ('operator waste recommendations', 2, 'operator', 'get', '/api/waste/recommendations/', None),
+    ('operator sent waste', 2, 'operator', 'get', '/api/waste/user/', None),
+    ('operator sent recommendations', 3, 'operator', 'get', '/api/waste/user-recommendations/', None),
+    ('operator recommendations', 2, 'operator', 'get', '/api/recommendation/user/', None),
+    ('submit input', 3, 'operator', 'post', '/api/prediction/inputs/', INPUT),
+    ('pending queue', 1, 'staff', 'get', '/api/prediction/pending/', None),
+    ('all predictions', 3, 'staff', 'get', '/api/prediction/predictions/', None),
+    ('prediction logs', 3, 'staff', 'get', '/api/prediction/logs/', None),
+    ('user list', 1, 'staff', 'get', '/api/auth/users/', None),
+    ('staff dashboard', 4, 'staff', 'get', '/api/staff/dashboard/', None),
+    ('staff users', 1, 'staff', 'get', '/api/staff/users/', None),
+    ('staff predictions', 3, 'staff', 'get', '/api/staff/predictions/', None),
+    ('staff recommendations', 2, 'staff', 'get', '/api/staff/waste/recommendations/', None),
+    ('report users', 1, 'staff', 'get', '/api/staff/input-reports/users/', None),
+    ('report inputs', 1, 'staff', 'get', '/api/staff/input-reports/{operator}/inputs/', None),
+    ('all report inputs', 1, 'staff', 'get', '/api/staff/input-reports/inputs/?status=approved&limit=1000', None),
+    ('line summaries', 1, 'staff', 'get', '/api/staff/line-summaries/?date=2025-06-30', None),
+    ('prediction export', 1, 'staff', 'get', '/api/staff/exports/predictions/', None),
+    ('generate prediction', 29, 'staff', 'post', '/api/prediction/inputs/{pending}/generate_prediction/', {}),
+    ('send to user', 9, 'staff', 'post', '/api/prediction/inputs/{unsent}/send_to_user/', {}),
+    ('reject input', 3, 'staff', 'post', '/api/prediction/inputs/{rejectable}/reject/', {}),
+    ('generate report', 4, 'staff', 'post', '/api/staff/input-reports/generate/', {'input_id': '{unsent}'}),
+    ('approve user', 5, 'staff', 'post', '/api/staff/users/{inactive}/approve/', {}),
+    ('admin dashboard', 7, 'admin', 'get', '/api/admin-panel/dashboard/', None),
+    ('admin users', 1, 'admin', 'get', '/api/admin-panel/users/', None),
+    ('prediction latency', 4, 'admin', 'get', '/api/admin-panel/prediction-latency/', None),
+]
+
+
+class QueryCountTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.clients = {}
+        self.operator = None
+        for role, flags in (('staff', {'is_staff': True}), ('admin', {'is_staff': True, 'is_superuser': True})):
+            self._client(role, User.objects.create_user(username=f'qc_{role}', password='pass', **flags))
+
+    def _client(self, role, user):
+        self.clients[role] = APIClient()
+        self.clients[role].force_authenticate(user)
+
+    def _seed(self, inputs, seed):
+        generate(users=max(inputs // 20, 1), inputs=inputs, seed=seed, days=30, end=END, batch_size=500)
+        if self.operator is None:
+            self.operator = User.objects.filter(username__startswith='synthetic_', is_staff=False).earliest('id')
+            self._client('operator', self.operator)
+        # A fixed share of all inputs belongs to the operator, so their own lists grow with the data too
+        shared = [pk for pk in ProductionInput.objects.values_list('id', flat=True) if pk % 4 == 0]
+        ProductionInput.objects.filter(id__in=shared).update(created_by=self.operator)
+        newest = User.objects.filter(username__startswith='synthetic_', is_staff=False).latest('id')
+        User.objects.filter(id=newest.id).update(is_active=False)
+
+    def _targets(self):
+        mine = ProductionInput.objects.filter(created_by=self.operator).order_by('id')
+        pending = mine.filter(status='pending').values_list('id', flat=True)
+        return {
+            'operator': self.operator.id,
+            'pending': pending[0],
+            'rejectable': pending[1],
+            'unsent': mine.filter(status='approved', sent_to_user=False).values_list('id', flat=True)[0],
+            'inactive': User.objects.filter(is_active=False).values_list('id', flat=True)[0],
+        }
+
+    def _call(self, role, method, path, body, targets):
+        path = path.format(**targets)
+        if body is not None:
+            body = {key: value.format(**targets) if isinstance(value, str) else value for key, value in body.items()}
+        response = getattr(self.clients[role], method)(path, body, format='json')
+        if response.streaming:
+            b''.join(response.streaming_content)
+        self.assertLess(response.status_code, 300, f'{method.upper()} {path}: {response.status_code}')
+        return response
+
+    def _count_queries(self):
+        targets = self._targets()
+        counts = {}
+        for name, _, role, method, path, body in ENDPOINTS:
+            cache.clear()
+            queries = []
+            with connection.execute_wrapper(lambda execute, sql, *args: queries.append(sql) or execute(sql, *args)):
+                self._call(role, method, path, body, targets)
+            counts[name] = len(queries)
+        return counts
+
+    def test_query_counts_do_not_grow_with_the_data(self):
+        self._seed(N, seed=1)
+        small = self._count_queries()
+        self._seed(9 * N, seed=2)
+        large = self._count_queries()
+
+        # Upserts (latency rollups) may take the cheaper update path the second time round
+        for name, budget, *_ in ENDPOINTS:
+            with self.subTest(endpoint=name):
+                self.assertLessEqual(large[name], small[name], f'{name} issues more queries with more rows')
+                self.assertLessEqual(large[name], budget)
+
+    def test_read_endpoints_meet_the_latency_budget(self):
+        self._seed(10 * N, seed=1)
+        targets = self._targets()
+
+        for name, _, role, method, path, body in ENDPOINTS:
+            if method != 'get':
+                continue
+            timings = []
+            for _ in range(LATENCY_RUNS):
+                cache.clear()
+                started = time.perf_counter()
+                self._call(role, method, path, body, targets)
+                timings.append((time.perf_counter() - started) * 1000)
+            p95 = sorted(timings)[int(0.95 * (len(timings) - 1))]
+            with self.subTest(endpoint=name):
+                self.assertLess(p95, LATENCY_BUDGET_MS, f'{name} p95 {p95:.0f} ms')
@@ -0,0 +1,63 @@
+"""
+Unit tests for PDF report rendering with the shared styles.
+
+Run with Django's test runner:
+    python manage.py test backend.tests.test_report_generator
+"""
+import re
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase
+
+from backend.apps.core.utils.report_generator import ReportGenerator, static_paragraph
+from backend.apps.prediction.models import ProductionInput, ProductionOutput
+
+User = get_user_model()
+
+
+def sections(count):
+    """Unsaved inputs and outputs, so rendering never touches the database."""
+    user = User(username='report_user', email='report@example.com')
+    result = []
+    for i in range(1, count + 1):
+        production_input = ProductionInput(
+            id=i, production_line='LINE_A', temperature=960.0, pressure=101325.0, feed_rate=1200.0,
+            power_consumption=2500.0, anode_effect=0.3, bath_ratio=1.15, alumina_concentration=3.2,
+            created_by=user,
+        )
+        production_output = ProductionOutput(
+            input_data=production_input, predicted_output=984.0, output_quality=92.5, energy_efficiency=48.0,
+        )
+        result.append((production_input, production_output, None, []))
+    return result
+
+
+def page_count(pdf):
+    return len(re.findall(rb'/Type /Page\b(?!s)', pdf))
+
+
+class ReportGeneratorTests(SimpleTestCase):
+
+    def _combined(self, count):
+        buffer = BytesIO()
+        ReportGenerator().generate_combined_report(sections(count), buffer)
+        return buffer.getvalue()
+
+    def test_fixed_paragraphs_are_not_shared(self):
+        self.assertIsNot(static_paragraph('footer'), static_paragraph('footer'))
+
+    def test_concurrent_reports_match_sequential_ones(self):
+        expected = {count: page_count(self._combined(count)) for count in (3, 5)}
+        self.assertGreaterEqual(expected[3], 3)
+        self.assertEqual(expected[5], 5 * expected[3] // 3)
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            counts = [3, 5] * 4
+            pdfs = list(executor.map(self._combined, counts))
+            single = list(executor.map(lambda section: ReportGenerator().generate_input_report(*section),
+                                       sections(8)))
+
+        self.assertEqual([page_count(pdf) for pdf in pdfs], [expected[count] for count in counts])
+        self.assertTrue(all(buffer.getvalue().startswith(b'%PDF') for buffer in single))
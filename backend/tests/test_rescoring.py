@@ -0,0 +1,77 @@
+"""
+Unit tests for re-scoring historical outputs with a new model version.
+
+Run with Django's test runner:
+    python manage.py test backend.tests.test_rescoring
+"""
+from unittest import mock
+
+from django.test import TestCase
+
+from backend.apps.core.utils import rescoring
+from backend.apps.core.utils.batch_jobs import run_chunked
+from backend.apps.prediction.ml_engine import MODEL_VERSION, predict_batch, predict_output
+from backend.apps.prediction.models import ProductionInput, ProductionOutput, PredictionRescore
+
+
+class RescoringTests(TestCase):
+
+    def setUp(self):
+        self.outputs = []
+        for line, feed_rate in [('LINE_A', 1000), ('LINE_A', 1200), ('LINE_B', 900)]:
+            production_input = ProductionInput.objects.create(
+                production_line=line, temperature=960, pressure=101325, feed_rate=feed_rate,
+                power_consumption=1500, anode_effect=0.3, bath_ratio=1.2, alumina_concentration=3.0
+            )
+            prediction = predict_output(feed_rate, 960, 101325, 1500)
+            self.outputs.append(ProductionOutput.objects.create(
+                input_data=production_input, predicted_output=prediction['predicted_output'],
+                output_quality=prediction['output_quality'], energy_efficiency=prediction['energy_efficiency'],
+                waste_estimate=prediction['waste_amount']
+            ))
+
+    def _rescore(self):
+        return run_chunked(
+            rescoring.job_name(), 'default', ProductionOutput.objects.all(), rescoring.rescore_chunk, chunk_size=2
+        )
+
+    def test_batch_matches_single_predictions(self):
+        inputs = [(1000, 955, 101000, 1500), (0, 1100, 0, 0), (2500, 700, 300000, 900)]
+        batch = predict_batch(*zip(*inputs))
+        for index, args in enumerate(inputs):
+            self.assertEqual({name: values[index] for name, values in batch.items()}, predict_output(*args))
+
+    def test_rescore_writes_one_row_per_output_and_version(self):
+        self.assertEqual(self._rescore()['processed'], 3)
+        self._rescore()
+
+        self.assertEqual(PredictionRescore.objects.count(), 3)
+        rescore = PredictionRescore.objects.get(production_output=self.outputs[0])
+        self.assertEqual(rescore.predicted_output, 820.0)
+        self.assertEqual(rescore.waste_amount, 180.0)
+
+    def test_report_against_live_values(self):
+        ProductionOutput.objects.filter(pk=self.outputs[1].pk).update(predicted_output=900.0)
+        self._rescore()
+
+        report = rescoring.compare_versions(baseline=rescoring.LIVE)
+
+        total = report['total']['predicted_output']
+        self.assertEqual(report['total']['rows'], 3)
+        self.assertEqual(total['changed'], 1)
+        self.assertAlmostEqual(total['max_abs_diff'], 84.0)
+        self.assertEqual(sorted(report['lines']), ['LINE_A', 'LINE_B'])
+        self.assertEqual(report['lines']['LINE_B']['predicted_output']['changed'], 0)
+
+    def test_report_between_versions(self):
+        self._rescore()
+        with mock.patch.object(rescoring, 'MODEL_VERSION', 'v2-test'), \
+                mock.patch.object(rescoring, 'predict_batch', lambda *columns: {
+                    name: [value + 1 for value in values] for name, values in predict_batch(*columns).items()
+                }):
+            run_chunked('rescore:v2-test', 'default', ProductionOutput.objects.all(), rescoring.rescore_chunk)
+
+        report = rescoring.compare_versions('v2-test', baseline=MODEL_VERSION)
+
+        self.assertEqual(report['total']['waste_amount']['changed'], 3)
+        self.assertAlmostEqual(report['total']['waste_amount']['mean_abs_diff'], 1.0)
@@ -0,0 +1,155 @@
+"""
+Unit tests for JWT revocation (logout, refresh token rotation).
+
+Run with Django's test runner:
+    python manage.py test backend.tests.test_revocation
+"""
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import DatabaseError, connection
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from backend.apps.authapp import revocation
+from backend.apps.authapp.models import RevokedToken
+from backend.apps.authapp.serializers import CustomTokenObtainPairSerializer
+
+User = get_user_model()
+
+
+class BloomFilterTests(TestCase):
+
+    def test_no_false_negatives_and_few_false_positives(self):
+        bloom = revocation.BloomFilter(1000, 0.01)
+        for i in range(1000):
+            bloom.add(f'revoked-{i}')
+
+        self.assertTrue(all(f'revoked-{i}' in bloom for i in range(1000)))
+        false_positives = sum(f'other-{i}' in bloom for i in range(10000))
+        self.assertLess(false_positives, 300)
+
+
+@override_settings(PASSWORD_HASH_ITERATIONS=1000)
+class RevocationTests(TestCase):
+
+    def setUp(self):
+        revocation.reset()
+        self.user = User.objects.create_user(username='revoke_operator', password='pass')
+        self.refresh = CustomTokenObtainPairSerializer.get_token(self.user)
+        self.client = APIClient()
+
+    def _get(self, access):
+        return self.client.get('/api/prediction/inputs/', HTTP_AUTHORIZATION=f'Bearer {access}')
+
+    def _refresh(self, refresh):
+        return self.client.post('/api/auth/token/refresh/', {'refresh': str(refresh)}, format='json')
+
+    def test_logout_revokes_both_tokens(self):
+        access = str(self.refresh.access_token)
+        self.assertEqual(self._get(access).status_code, 200)
+
+        response = self.client.post('/api/auth/token/revoke/', {'refresh': str(self.refresh), 'access': access}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self._get(access).status_code, 401)
+        self.assertEqual(self._refresh(self.refresh).status_code, 401)
+        self.assertEqual(self.client.post('/api/auth/token/revoke/', {'refresh': 'x'}, format='json').status_code, 400)
+
+    @override_settings(REFRESH_TOKEN_REUSE_GRACE_SECONDS=0)
+    def test_rotated_refresh_tokens_cannot_be_reused(self):
+        rotated = self._refresh(self.refresh)
+
+        self.assertEqual(rotated.status_code, 200)
+        self.assertEqual(self._refresh(self.refresh).status_code, 401)
+        self.assertEqual(self._refresh(rotated.data['refresh']).status_code, 200)
+
+    @override_settings(REFRESH_TOKEN_REUSE_GRACE_SECONDS=5)
+    def test_rotated_refresh_token_can_be_reused_briefly(self):
+        first, second = self._refresh(self.refresh), self._refresh(self.refresh)
+        self.assertEqual((first.status_code, second.status_code), (200, 200))
+
+        RevokedToken.objects.filter(jti=self.refresh['jti']).update(revoked_at=timezone.now() - timedelta(seconds=6))
+        self.assertEqual(self._refresh(self.refresh).status_code, 401)
+
+    @override_settings(REFRESH_TOKEN_REUSE_GRACE_SECONDS=5)
+    def test_logout_ends_the_reuse_grace(self):
+        self.assertEqual(self._refresh(self.refresh).status_code, 200)
+
+        self.client.post('/api/auth/token/revoke/', {'refresh': str(self.refresh)}, format='json')
+
+        self.assertEqual(self._refresh(self.refresh).status_code, 401)
+
+    @override_settings(TOKEN_REVOCATION_REFRESH_SECONDS=60)
+    def test_checks_are_answered_from_memory(self):
+        access = str(self.refresh.access_token)
+        self._get(access)
+
+        queries = []
+        with connection.execute_wrapper(lambda execute, sql, *args: queries.append(sql) or execute(sql, *args)):
+            for _ in range(3):
+                self._get(access)
+        self.assertFalse([sql for sql in queries if 'authapp_revokedtoken' in sql])
+
+    @override_settings(TOKEN_REVOCATION_REFRESH_SECONDS=0)
+    def test_revocations_by_other_processes_are_loaded_incrementally(self):
+        access = self.refresh.access_token
+        self.assertEqual(self._get(access).status_code, 200)
+
+        RevokedToken.objects.create(jti=access['jti'], token_type='access', expires_at=timezone.now() + timedelta(minutes=5))
+
+        self.assertEqual(self._get(access).status_code, 401)
+
+    @override_settings(TOKEN_REVOCATION_REFRESH_SECONDS=0)
+    def test_revocations_committed_late_are_still_loaded(self):
+        access = self.refresh.access_token
+        expires_at = timezone.now() + timedelta(minutes=5)
+        RevokedToken.objects.create(id=10, jti='committed-first', token_type='access', expires_at=expires_at)
+        self.assertEqual(self._get(access).status_code, 200)
+
+        # A lower id, revoked earlier, whose transaction committed after the last load
+        RevokedToken.objects.create(id=5, jti=access['jti'], token_type='access', expires_at=expires_at)
+        RevokedToken.objects.filter(id=5).update(revoked_at=timezone.now() - timedelta(seconds=10))
+
+        self.assertEqual(self._get(access).status_code, 401)
+
+    @override_settings(TOKEN_REVOCATION_CAPACITY=4)
+    def test_filter_grows_when_unexpired_ids_exceed_its_capacity(self):
+        now = timezone.now()
+        RevokedToken.objects.bulk_create(
+            [RevokedToken(jti=f'expired-{i}', token_type='access', expires_at=now - timedelta(minutes=1)) for i in range(3)]
+            + [RevokedToken(jti=f'live-{i}', token_type='access', expires_at=now + timedelta(minutes=5)) for i in range(10)]
+        )
+        revocation.reset()
+        # Loaded incrementally, as a running process would: expired rows included
+        revocation._revoked.synced_at = timezone.now()
+
+        revocation._revoked.refresh(force=True)
+
+        self.assertTrue(all(f'live-{i}' in revocation._revoked for i in range(10)))
+        self.assertFalse(any(f'expired-{i}' in revocation._revoked.jtis for i in range(3)))
+        self.assertEqual(revocation._revoked.capacity, 20)
+
+    def test_failed_loads_refuse_instead_of_accepting(self):
+        access = str(self.refresh.access_token)
+        def lose_connection(execute, sql, *args):
+            if 'authapp_revokedtoken' in sql:
+                raise DatabaseError('connection lost')
+            return execute(sql, *args)
+
+        with connection.execute_wrapper(lose_connection), self.assertRaises(DatabaseError):
+            self._get(access)
+        self.assertEqual(self._get(access).status_code, 200)
+
+    def test_purge_deletes_expired_rows(self):
+        RevokedToken.objects.create(jti='expired', token_type='refresh', expires_at=timezone.now() - timedelta(minutes=1))
+        revocation.revoke(self.refresh)
+        out = StringIO()
+
+        call_command('purge_revoked_tokens', stdout=out)
+
+        self.assertIn('Purged 1', out.getvalue())
+        self.assertEqual(list(RevokedToken.objects.values_list('jti', flat=True)), [self.refresh['jti']])
@@ -0,0 +1,154 @@
+"""
+Unit tests for the daily production rollups and the line summaries built
+from them.
+
+Run with Django's test runner:
+    python manage.py test backend.tests.test_rollups
+"""
+import os
+import shutil
+import tempfile
+from datetime import date, datetime, time, timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from backend.apps.core.models import ProductionRollup, RecommendationRollup, WasteTypeRollup
+from backend.apps.core.utils import rollups
+from backend.apps.prediction.models import ProductionInput, ProductionOutput
+from backend.apps.waste.models import WasteManagement, WasteRecommendation
+
+from .test_query_counts import INPUT
+
+User = get_user_model()
+
+DAY = date(2025, 6, 2)  # a Monday
+
+
+def at(day, hour=10):
+    return timezone.make_aware(datetime.combine(day, time(hour)))
+
+
+class RollupData:
+    """Inputs of two lines on DAY, with outputs, waste and recommendations for the approved ones."""
+
+    def setUp(self):
+        self.operator = User.objects.create_user(username='rollup_operator', password='pass')
+        for line, status, predicted in (('LINE_A', 'approved', 900), ('LINE_A', 'approved', 1100),
+                                        ('LINE_A', 'rejected', None), ('LINE_B', 'pending', None)):
+            self._input(line, status, predicted)
+        # The next day is not part of DAY's rollup
+        self._input('LINE_A', 'approved', 5000, day=DAY + timedelta(days=1))
+
+    def _input(self, line, status, predicted, day=DAY):
+        production_input = ProductionInput.objects.create(
+            created_by=self.operator, **{**INPUT, 'production_line': line, 'status': status}
+        )
+        ProductionInput.objects.filter(id=production_input.id).update(created_at=at(day))
+        if predicted is None:
+            return production_input
+        output = ProductionOutput.objects.create(
+            input_data=production_input, predicted_output=predicted, output_quality=90, energy_efficiency=80
+        )
+        ProductionOutput.objects.filter(id=output.id).update(created_at=at(day))
+        waste = WasteManagement.objects.create(
+            production_input=production_input, waste_type='Aluminum Dross', waste_amount=predicted / 10,
+            date_recorded=day
+        )
+        recommendation = WasteRecommendation.objects.create(
+            waste_record=waste, recommendation_text='Skim the dross more often.', estimated_savings=25
+        )
+        WasteRecommendation.objects.filter(id=recommendation.id).update(created_at=at(day))
+        return production_input
+
+
+class RollupTests(RollupData, TestCase):
+
+    def test_refresh_day_totals(self):
+        self.assertEqual(rollups.refresh_day(DAY), 2)
+
+        line_a = ProductionRollup.objects.get(date=DAY, production_line='LINE_A')
+        self.assertEqual((line_a.inputs_submitted, line_a.inputs_approved, line_a.inputs_rejected), (3, 2, 1))
+        self.assertEqual((line_a.predictions, line_a.predicted_output_total), (2, 2000))
+        self.assertEqual((line_a.waste_records, line_a.waste_amount_total, line_a.estimated_savings_total), (2, 200, 50))
+        line_b = ProductionRollup.objects.get(date=DAY, production_line='LINE_B')
+        self.assertEqual((line_b.inputs_submitted, line_b.predictions), (1, 0))
+        self.assertEqual(WasteTypeRollup.objects.get(date=DAY).records, 2)
+        self.assertEqual(RecommendationRollup.objects.get(date=DAY).occurrences, 2)
+
+    def test_refresh_is_idempotent_and_replaces_the_day(self):
+        def day_rows():
+            return list(ProductionRollup.objects.filter(date=DAY).order_by('production_line').values(
+                *(field.name for field in ProductionRollup._meta.fields
+                  if field.name not in ('id', 'created_at', 'updated_at'))
+            ))
+
+        rollups.refresh_day(DAY)
+        first = day_rows()
+        rollups.refresh_day(DAY)
+        self.assertEqual(day_rows(), first)
+        self.assertEqual(ProductionRollup.objects.count(), 2)
+
+        ProductionInput.objects.filter(production_line='LINE_B').delete()
+        out = StringIO()
+        call_command('refresh_rollups', start=str(DAY), end=str(DAY), stdout=out)
+        self.assertIn('Refreshed rollups for 1 day(s)', out.getvalue())
+        self.assertEqual(list(ProductionRollup.objects.filter(date=DAY).values_list('production_line', flat=True)),
+                         ['LINE_A'])
+
+    def test_refresh_reads_one_day_with_a_fixed_number_of_queries(self):
+        for _ in range(5):
+            self._input('LINE_C', 'approved', 700)
+        # Grouped reads per table, then delete and insert each rollup table in one transaction
+        with self.assertNumQueries(12):
+            rollups.refresh_day(DAY)
+
+
+class LineSummaryTests(RollupData, TestCase):
+    """The summary endpoint and command read only the rollups."""
+
+    def setUp(self):
+        super().setUp()
+        rollups.refresh_range(DAY, DAY + timedelta(days=1))
+        self.staff = User.objects.create_user(username='rollup_staff', password='pass', is_staff=True)
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+
+    def test_summary_endpoint(self):
+        response = self.client.get('/api/staff/line-summaries/', {'period': 'weekly', 'date': str(DAY)})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['start_date'], response.data['end_date']), (DAY, DAY + timedelta(days=6)))
+        summaries = {summary['production_line']: summary for summary in response.data['summaries']}
+        self.assertEqual(sorted(summaries), ['LINE_A', 'LINE_B'])
+        totals = summaries['LINE_A']['totals']
+        self.assertEqual((totals['inputs_submitted'], totals['predictions'], totals['predicted_output']), (4, 3, 7000))
+        self.assertEqual(totals['avg_energy_efficiency'], 80)
+        self.assertEqual(summaries['LINE_A']['top_recommendations'][0]['occurrences'], 3)
+
+        daily = self.client.get('/api/staff/line-summaries/', {'period': 'daily', 'date': str(DAY), 'line': 'LINE_A'})
+        self.assertEqual(daily.data['summaries'][0]['totals']['predicted_output'], 2000)
+
+    def test_summary_pdf_and_errors(self):
+        response = self.client.get('/api/staff/line-summaries/', {'period': 'monthly', 'date': str(DAY),
+                                                                  'line': 'LINE_A', 'download': 'true'})
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertTrue(response.content.startswith(b'%PDF'))
+
+        for params in ({'period': 'yearly'}, {'date': '2025-13-01'}, {'download': 'true'}):
+            self.assertEqual(self.client.get('/api/staff/line-summaries/', params).status_code, 400, params)
+
+    def test_command_writes_one_pdf_per_line(self):
+        output_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, output_dir, ignore_errors=True)
+        out = StringIO()
+
+        with override_settings(MEDIA_ROOT=output_dir):
+            call_command('generate_line_summaries', period='weekly', date=str(DAY), output_dir=output_dir, stdout=out)
+
+        self.assertIn('Generated 2 weekly summary report(s)', out.getvalue())
+        self.assertEqual(len(os.listdir(output_dir)), 2)
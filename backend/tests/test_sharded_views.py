@@ -0,0 +1,193 @@
+"""
+Integration tests for the prediction workflow across two databases: an input
+is submitted, listed, approved and sent to its operator while its rows live
+on a production-line shard, the rollups, exports and batch reports read
+from every shard, and the copies of users and profiles kept on every shard.
+
+Needs a second database, so it is skipped unless DB_SHARDS configures one:
+    DB_ENGINE=sqlite DB_SHARDS='{"plant_north": {"lines": ["LINE_B"], "location": "/tmp/plant_north.sqlite3"}}' python manage.py test backend.tests.test_sharded_views
+"""
+import json
+from functools import partial
+from unittest import skipUnless
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connections
+from django.test import TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.pagination import LimitOffsetPagination
+from rest_framework.test import APIClient
+
+from backend.apps.authapp import authentication, revocation
+from backend.apps.authapp.models import UserProfile
+from backend.apps.core.models import ProductionRollup
+from backend.apps.core.utils import batch_reports, exports, rollups, sharding
+from backend.apps.prediction.views import ProductionInputViewSet
+from backend.apps.prediction.models import PredictionLog, ProductionInput, ProductionOutput
+from backend.apps.waste.models import WasteManagement
+from backend.config.shard_router import get_line_shards, get_shard_aliases
+
+from .test_query_counts import INPUT
+
+User = get_user_model()
+
+
+@skipUnless(len(get_shard_aliases()) > 1, 'DB_SHARDS configures no shard')
+class ShardedWorkflowTests(TransactionTestCase):
+    # Requests read through fan_out() worker threads, which only see committed rows
+    databases = '__all__'
+
+    def setUp(self):
+        cache.clear()
+        authentication.clear_user_cache()
+        revocation.reset()
+        self.line, self.shard = next(iter(get_line_shards().items()))
+        for index, alias in enumerate(get_shard_aliases()[1:], start=1):
+            sharding.reserve_id_range(alias, index)
+
+        self.staff = User.objects.create_user(username='shard_staff', password='pass', is_staff=True)
+        self.operator = User.objects.create_user(username='shard_operator', password='pass')
+        self.staff_client, self.operator_client = APIClient(), APIClient()
+        self.staff_client.force_authenticate(self.staff)
+        self.operator_client.force_authenticate(self.operator)
+
+    def _submit(self, production_line):
+        response = self.operator_client.post('/api/prediction/inputs/', dict(INPUT, production_line=production_line), format='json')
+        self.assertEqual(response.status_code, 201)
+        return response.data['id']
+
+    def test_submit_list_approve_and_send_on_a_shard(self):
+        local_id = self._submit('LINE_A')
+        shard_id = self._submit(self.line)
+
+        self.assertGreaterEqual(shard_id, sharding.SHARD_ID_SPAN)
+        self.assertTrue(ProductionInput.objects.using(self.shard).filter(id=shard_id).exists())
+        self.assertFalse(ProductionInput.objects.using('default').filter(id=shard_id).exists())
+
+        pending = self.staff_client.get('/api/prediction/pending/').data
+        self.assertEqual({row['id'] for row in pending}, {local_id, shard_id})
+        inputs = self.operator_client.get('/api/prediction/inputs/').data
+        self.assertEqual([row['id'] for row in inputs], [shard_id, local_id])
+        self.assertEqual(self.operator_client.get(f'/api/prediction/inputs/{shard_id}/').data['production_line'], self.line)
+
+        # Approving twice updates the shard's rows instead of adding new ones
+        for _ in range(2):
+            response = self.staff_client.post(f'/api/prediction/inputs/{shard_id}/generate_prediction/')
+            self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(ProductionOutput.objects.using(self.shard).filter(input_data_id=shard_id).count(), 1)
+        self.assertEqual(WasteManagement.objects.using(self.shard).filter(production_input_id=shard_id).count(), 1)
+        self.assertEqual(PredictionLog.objects.using(self.shard).count(), 2)
+        self.assertFalse(ProductionOutput.objects.using('default').exists())
+        self.assertEqual(ProductionInput.objects.using(self.shard).get(id=shard_id).status, 'approved')
+        self.assertEqual(self.staff_client.get('/api/prediction/pending/').data[0]['id'], local_id)
+
+        response = self.staff_client.post(f'/api/prediction/inputs/{shard_id}/send_to_user/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNotNone(response.data['waste_management'])
+
+        predictions = self.operator_client.get('/api/prediction/user/').data
+        self.assertEqual([row['input_data']['id'] for row in predictions], [shard_id])
+        self.assertEqual(len(self.staff_client.get('/api/prediction/predictions/').data), 1)
+
+        response = self.staff_client.post('/api/staff/input-reports/generate/', {'input_id': shard_id}, format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+
+    def test_pages_read_only_their_rows_from_each_shard(self):
+        ids = [self._submit(line) for line in ('LINE_A', self.line, 'LINE_A', self.line, self.line)]
+        newest_first = sorted(ids, key=ids.index, reverse=True)
+
+        # Read the shards in this thread so their queries are captured
+        inline = partial(sharding.fan_out, parallel=False)
+        with mock.patch.object(ProductionInputViewSet, 'pagination_class', LimitOffsetPagination), \
+                mock.patch.object(sharding, 'fan_out', inline), \
+                CaptureQueriesContext(connections[self.shard]) as shard_queries:
+            first = self.operator_client.get('/api/prediction/inputs/', {'limit': 2}).data
+            second = self.operator_client.get('/api/prediction/inputs/', {'limit': 2, 'offset': 2}).data
+
+        self.assertEqual(first['count'], 5)
+        self.assertEqual([row['id'] for row in first['results'] + second['results']], newest_first[:4])
+        reads = [query['sql'] for query in shard_queries if 'COUNT' not in query['sql']]
+        self.assertTrue(reads)
+        self.assertTrue(all('LIMIT' in sql for sql in reads))
+
+    def _approved_on_both_shards(self):
+        ids = [self._submit('LINE_A'), self._submit(self.line)]
+        for input_id in ids:
+            response = self.staff_client.post(f'/api/prediction/inputs/{input_id}/generate_prediction/')
+            self.assertEqual(response.status_code, 200, response.data)
+        return ids
+
+    def test_rollups_and_line_summaries_cover_every_shard(self):
+        self._approved_on_both_shards()
+        today = timezone.localdate()
+
+        self.assertEqual(rollups.refresh_day(today), 2)
+        for line in ('LINE_A', self.line):
+            rollup = ProductionRollup.objects.get(date=today, production_line=line)
+            self.assertEqual((rollup.inputs_approved, rollup.predictions, rollup.waste_records), (1, 1, 1))
+
+        response = self.staff_client.get('/api/staff/line-summaries/')
+        self.assertEqual(sorted(summary['production_line'] for summary in response.data['summaries']),
+                         sorted(['LINE_A', self.line]))
+
+    def test_exports_read_every_shard_in_id_order(self):
+        self._approved_on_both_shards()
+        output_ids = [ProductionOutput.objects.using(alias).get().id for alias in ('default', self.shard)]
+
+        spec = exports.DATASETS['predictions']
+        rows = list(exports.iter_rows(spec, exports.filtered_queryset(spec), chunk_size=1))
+        self.assertEqual([row[0] for row in rows], output_ids)
+        rows = list(exports.iter_rows(spec, exports.filtered_queryset(spec, production_line=self.line)))
+        self.assertEqual([row[0] for row in rows], output_ids[1:])
+
+        response = self.staff_client.get('/api/staff/exports/waste/', {'output': 'ndjson'})
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(sorted(json.loads(line)['production_line'] for line in lines), sorted(['LINE_A', self.line]))
+
+    def test_batch_reports_cover_every_shard(self):
+        ids = self._approved_on_both_shards()
+
+        queryset = batch_reports.get_batch_queryset(user_id=self.operator.id)
+        self.assertEqual(batch_reports.count_batch(queryset), 2)
+        sections = list(batch_reports.iter_sections(queryset))
+        self.assertEqual([section[0].id for section in sections], ids)
+        self.assertTrue(all(output is not None and waste is not None for _, output, waste, _ in sections))
+
+    def test_other_users_cannot_read_shard_rows(self):
+        shard_id = self._submit(self.line)
+        intruder = APIClient()
+        intruder.force_authenticate(User.objects.create_user(username='shard_intruder', password='pass'))
+
+        self.assertEqual(intruder.get(f'/api/prediction/inputs/{shard_id}/').status_code, 404)
+        self.assertEqual(intruder.get('/api/prediction/inputs/').data, [])
+        self.assertEqual(intruder.post(f'/api/prediction/inputs/{shard_id}/generate_prediction/').status_code, 403)
+
+
+@skipUnless(len(get_shard_aliases()) > 1, 'DB_SHARDS configures no shard')
+class UserReplicationTests(TransactionTestCase):
+    databases = '__all__'
+
+    def setUp(self):
+        self.shard = get_shard_aliases()[1]
+        self.user = User.objects.create_user(username='shard_copy', password='pass')
+
+    def test_users_and_profiles_are_copied(self):
+        self.assertTrue(User.objects.using(self.shard).filter(pk=self.user.pk).exists())
+        self.assertEqual(UserProfile.objects.using(self.shard).get(user_id=self.user.pk).pk, self.user.profile.pk)
+
+        self.user.profile.role = 'staff'
+        self.user.profile.save()
+        self.user.email = 'copy@example.com'
+        self.user.save(update_fields=['email'])
+        self.assertEqual(UserProfile.objects.using(self.shard).get(user_id=self.user.pk).role, 'staff')
+        self.assertEqual(User.objects.using(self.shard).get(pk=self.user.pk).email, 'copy@example.com')
+
+    def test_logins_are_not_copied(self):
+        with mock.patch.object(sharding, 'replicate_users') as replicate:
+            self.user.last_login = timezone.now()
+            self.user.save(update_fields=['last_login'])
+            self.assertTrue(self.client.login(username='shard_copy', password='pass'))
+        replicate.assert_not_called()
@@ -0,0 +1,64 @@
+"""
+Unit tests for production-line shard routing and cross-shard merging.
+
+Run with Django's test runner:
+    python manage.py test backend.tests.test_sharding
+"""
+from datetime import date, datetime, timezone as dt_timezone
+
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, override_settings
+
+from backend.apps.core.utils import sharding
+from backend.apps.prediction.models import ProductionInput, ProductionOutput
+from backend.apps.waste.models import WasteManagement
+from backend.config.shard_router import ProductionShardRouter, get_shard_aliases
+
+
+@override_settings(PRODUCTION_LINE_SHARDS={'LINE_B': 'plant_north', 'LINE_C': 'plant_north'})
+class ProductionShardRouterTests(SimpleTestCase):
+
+    def setUp(self):
+        self.router = ProductionShardRouter()
+
+    def test_rows_follow_their_production_line(self):
+        self.assertEqual(self.router.db_for_write(ProductionInput, instance=ProductionInput(production_line='LINE_B')), 'plant_north')
+        self.assertEqual(self.router.db_for_write(ProductionInput, instance=ProductionInput(production_line='LINE_A')), 'default')
+
+    def test_children_follow_their_parent(self):
+        parent = ProductionInput(production_line='LINE_C')
+        parent._state.db = 'plant_north'
+        parent._state.adding = False
+        output = ProductionOutput(input_data=parent)
+        waste = WasteManagement(production_input=parent, date_recorded=date.today())
+        self.assertEqual(self.router.db_for_write(ProductionOutput, instance=output), 'plant_north')
+        self.assertEqual(self.router.db_for_write(WasteManagement, instance=waste), 'plant_north')
+
+    def test_unsharded_models_and_plain_reads_are_left_to_other_routers(self):
+        self.assertIsNone(self.router.db_for_write(User, instance=User()))
+        self.assertIsNone(self.router.db_for_read(ProductionInput))
+
+    def test_relations(self):
+        north = ProductionInput(production_line='LINE_B')
+        north._state.db = 'plant_north'
+        default = ProductionOutput()
+        default._state.db = 'default'
+        user = User()
+        user._state.db = 'default'
+        self.assertFalse(self.router.allow_relation(north, default))
+        self.assertTrue(self.router.allow_relation(north, user))
+
+    def test_shards_get_full_schema(self):
+        self.assertEqual(get_shard_aliases(), ['default', 'plant_north'])
+        self.assertTrue(self.router.allow_migrate('plant_north', 'auth'))
+
+    def test_fan_out_runs_once_per_shard(self):
+        self.assertEqual(sharding.fan_out(lambda alias: alias), [None, 'plant_north'])
+
+    def test_merged_list_and_sums(self):
+        def stamp(day):
+            return datetime(2025, 1, day, tzinfo=dt_timezone.utc)
+        rows = {None: [stamp(9), stamp(4), stamp(1)], 'plant_north': [stamp(8), stamp(5)]}
+        merged = sharding.merged_list(lambda alias: rows[alias], key=lambda value: value, limit=4)
+        self.assertEqual([value.day for value in merged], [9, 8, 5, 4])
+        self.assertEqual(sharding.sum_results([{'total': 2, 'amount': None}, {'total': 3, 'amount': 1.5}]), {'total': 5, 'amount': 1.5})
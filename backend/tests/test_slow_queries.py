@@ -0,0 +1,79 @@
+"""
+Unit tests for slow query capture and the index advisor.
+
+Run with Django's test runner:
+    python manage.py test backend.tests.test_slow_queries
+"""
+import shutil
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from backend.apps.core import slow_queries
+from backend.apps.core.utils.index_advisor import advise, parse_statement
+from backend.apps.prediction.models import ProductionInput
+from backend.apps.waste.models import WasteManagement
+
+
+class SlowQueryTests(TestCase):
+
+    def setUp(self):
+        self.slow_query_dir = tempfile.mkdtemp()
+        self.settings_override = override_settings(
+            SLOW_QUERY_CAPTURE=True, SLOW_QUERY_THRESHOLD_MS=0, SLOW_QUERY_DIR=self.slow_query_dir
+        )
+        self.settings_override.enable()
+        slow_queries.clear()
+        self.user = get_user_model().objects.create_user(username='slow_user', password='pass')
+
+    def tearDown(self):
+        slow_queries.clear()
+        self.settings_override.disable()
+        shutil.rmtree(self.slow_query_dir, ignore_errors=True)
+
+    def test_normalized_sql_groups_repeats(self):
+        first = slow_queries.normalize_sql("SELECT * FROM t WHERE a = 5 AND b IN (%s, %s,  %s) AND c = 'x'")
+        second = slow_queries.normalize_sql("SELECT * FROM t WHERE a = 12 AND b IN (%s) AND c = 'it''s'")
+        self.assertEqual(first, 'SELECT * FROM t WHERE a = ? AND b IN (...) AND c = ?')
+        self.assertEqual(first, second)
+
+    def test_requests_capture_view_and_call_site(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        client.get('/api/waste/user/')
+
+        entries = slow_queries.load_captured()
+
+        waste = [entry for entry in entries if 'waste_wastemanagement' in entry['sql']]
+        self.assertTrue(waste)
+        self.assertEqual(waste[0]['view'], 'GET /api/waste/user/$')
+        self.assertIn('backend/apps/', waste[0]['call_site'])
+        self.assertEqual(waste[0]['params'], [self.user.pk])
+
+    def test_advisor_suggests_composite_index_for_user_lists(self):
+        with slow_queries.capture_queries('GET /api/prediction/inputs/'):
+            list(ProductionInput.objects.filter(created_by=self.user, sent_to_user=True).order_by('-created_at'))
+
+        suggestions, errors = advise(slow_queries.load_captured())
+
+        self.assertEqual(errors, [])
+        self.assertEqual(suggestions[0]['table'], 'prediction_productioninput')
+        self.assertEqual(suggestions[0]['fields'], ['created_by', 'sent_to_user', 'created_at'])
+        self.assertEqual(suggestions[0]['views'], {'GET /api/prediction/inputs/'})
+
+    def test_advisor_skips_statements_served_by_an_index(self):
+        with slow_queries.capture_queries('test'):
+            list(WasteManagement.objects.filter(waste_type='Dross').order_by())
+            list(ProductionInput.objects.filter(pk=1))
+
+        suggestions, _ = advise(slow_queries.load_captured())
+
+        self.assertEqual(suggestions, [])
+        usage, _ = parse_statement(str(WasteManagement.objects.filter(waste_type='Dross', waste_amount__gte=1).query))
+        self.assertEqual(usage['waste_wastemanagement']['range'], ['waste_amount'])
+        call_command('advise_indexes', '--clear', stdout=StringIO())
+        self.assertEqual(slow_queries.load_captured(), [])
@@ -0,0 +1,67 @@
+"""
+Unit tests for the synthetic data generator.
+
+Run with Django's test runner:
+    python manage.py test backend.tests.test_synthetic_data
+"""
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.db.models import F
+from django.test import TestCase, override_settings
+
+from backend.apps.core.models import Transaction
+from backend.apps.core.utils.synthetic_data import generate
+from backend.apps.prediction.models import PredictionLog, ProductionInput, ProductionOutput
+from backend.apps.waste.models import WasteManagement, WasteRecommendation
+
+END = datetime(2025, 6, 30, 12, tzinfo=dt_timezone.utc)
+
+
+class SyntheticDataTests(TestCase):
+
+    def _generate(self, **options):
+        return generate(**{'users': 20, 'inputs': 300, 'seed': 5, 'days': 30, 'end': END, 'batch_size': 120, **options})
+
+    def test_rows_are_linked_like_the_staff_workflow(self):
+        counts = self._generate()
+
+        approved = ProductionInput.objects.filter(status='approved').count()
+        self.assertEqual(counts['ProductionInput'], 300)
+        self.assertEqual(ProductionOutput.objects.count(), approved)
+        self.assertEqual(WasteManagement.objects.count(), approved)
+        self.assertEqual(WasteRecommendation.objects.count(), approved)
+        self.assertGreaterEqual(PredictionLog.objects.count(), approved)
+        self.assertFalse(ProductionOutput.objects.exclude(recommendation__waste_record=F('waste_record')).exists())
+        self.assertFalse(ProductionInput.objects.filter(status='pending', output__isnull=False).exists())
+        self.assertEqual(Transaction.objects.count(), counts['Transaction'])
+
+    def test_timestamps_and_lines_follow_the_profiles(self):
+        self._generate()
+
+        first, last = ProductionInput.objects.order_by('id').values_list('created_at', flat=True)[::299]
+        self.assertGreaterEqual(first, END - timedelta(days=30))
+        self.assertLessEqual(last, END)
+        self.assertLess(first, last)
+        lines = {line: ProductionInput.objects.filter(production_line=line).count() for line in ('LINE_A', 'LINE_C')}
+        self.assertGreater(lines['LINE_A'], lines['LINE_C'])
+
+    def test_same_seed_reproduces_the_rows(self):
+        def snapshot():
+            return list(ProductionInput.objects.order_by('created_at').values_list(
+                'production_line', 'temperature', 'feed_rate', 'status', 'created_at', 'output__predicted_output'
+            ))
+
+        self._generate()
+        first = snapshot()
+        ProductionInput.objects.all().delete()
+        self._generate()
+
+        self.assertEqual(snapshot(), first)
+        self.assertEqual(get_user_model().objects.filter(username__startswith='synthetic_').count(), 40)
+
+    @override_settings(DEBUG=False)
+    def test_command_requires_force_without_debug(self):
+        with self.assertRaises(CommandError):
+            call_command('generate_synthetic_data', '--inputs', '1')
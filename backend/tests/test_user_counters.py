@@ -0,0 +1,104 @@
+"""
+Unit tests for the per-user activity counters on UserProfile.
+
+Run with Django's test runner:
+    python manage.py test backend.tests.test_user_counters
+"""
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase
+from rest_framework.test import APIClient
+
+from backend.apps.authapp.models import UserProfile
+from backend.apps.prediction.models import ProductionInput
+
+from .test_query_counts import INPUT
+
+User = get_user_model()
+
+
+class UserCountersTests(TestCase):
+
+    def setUp(self):
+        self.staff = User.objects.create_user(username='counter_staff', password='pass', is_staff=True)
+        self.operator = User.objects.create_user(username='counter_operator', password='pass')
+        self.staff_client, self.operator_client = APIClient(), APIClient()
+        self.staff_client.force_authenticate(self.staff)
+        self.operator_client.force_authenticate(self.operator)
+
+    def _counters(self):
+        profile = UserProfile.objects.get(user=self.operator)
+        return profile.inputs_submitted, profile.inputs_approved, profile.inputs_rejected
+
+    def _submit(self, count):
+        return [self.operator_client.post('/api/prediction/inputs/', INPUT, format='json').data['id'] for _ in range(count)]
+
+    def test_counters_follow_the_input_workflow(self):
+        approved, rejected, edited, deleted = self._submit(4)
+        self.assertEqual(self._counters(), (4, 0, 0))
+        self.assertEqual(UserProfile.objects.get(user=self.operator).last_submission_at,
+                         ProductionInput.objects.get(id=deleted).created_at)
+
+        self.staff_client.post(f'/api/prediction/inputs/{approved}/generate_prediction/')
+        self.staff_client.post(f'/api/prediction/inputs/{approved}/generate_prediction/')
+        self.staff_client.post(f'/api/prediction/inputs/{rejected}/reject/')
+        self.operator_client.patch(f'/api/prediction/inputs/{edited}/', {**INPUT, 'status': 'rejected'}, format='json')
+        self.assertEqual(self._counters(), (4, 1, 2))
+
+        self.operator_client.patch(f'/api/prediction/inputs/{edited}/', {**INPUT, 'status': 'approved'}, format='json')
+        self.operator_client.delete(f'/api/prediction/inputs/{deleted}/')
+        self.assertEqual(self._counters(), (3, 2, 1))
+
+    def test_user_listings_read_the_counters_in_one_query(self):
+        self._submit(2)
+
+        for path, key in (('/api/staff/users/', None), ('/api/staff/input-reports/users/', 'users')):
+            queries = []
+            with connection.execute_wrapper(lambda execute, sql, *args: queries.append(sql) or execute(sql, *args)):
+                data = self.staff_client.get(path).data
+            users = {user['id']: user for user in (data[key] if key else data)}
+            self.assertEqual(len(queries), 1, path)
+            self.assertEqual((users[self.operator.id]['input_count'], users[self.operator.id]['approved_count']), (2, 0))
+
+    def test_repair_command_recomputes_drifted_counters(self):
+        self._submit(3)
+        ProductionInput.objects.filter(id=ProductionInput.objects.earliest('id').id).update(status='approved')
+        UserProfile.objects.filter(user=self.operator).update(inputs_submitted=7, inputs_rejected=5)
+        out = StringIO()
+
+        call_command('repair_user_counters', stdout=out)
+
+        self.assertIn('Repaired counters of 1', out.getvalue())
+        self.assertEqual(self._counters(), (3, 1, 0))
+
+
+class CountersMigrationTests(TransactionTestCase):
+    before = [('authapp', '0002_revokedtoken'), ('prediction', '0007_prediction_rescores')]
+    after = [('authapp', '0003_userprofile_counters')]
+
+    def setUp(self):
+        self.executor = MigrationExecutor(connection)
+        self.executor.migrate(self.before)
+
+    def tearDown(self):
+        self.executor.loader.build_graph()
+        self.executor.migrate(self.executor.loader.graph.leaf_nodes())
+
+    def test_migration_fills_the_counters_of_existing_users(self):
+        old_apps = self.executor.loader.project_state(self.before).apps
+        user = old_apps.get_model('auth', 'User').objects.create(username='counter_existing')
+        old_apps.get_model('authapp', 'UserProfile').objects.create(user=user)
+        ProductionInputBefore = old_apps.get_model('prediction', 'ProductionInput')
+        for status in ('pending', 'approved', 'approved', 'rejected'):
+            ProductionInputBefore.objects.create(created_by=user, status=status, **INPUT)
+
+        self.executor.loader.build_graph()
+        self.executor.migrate(self.after)
+
+        profile = UserProfile.objects.get(user_id=user.id)
+        self.assertEqual((profile.inputs_submitted, profile.inputs_approved, profile.inputs_rejected), (4, 2, 1))
+        self.assertIsNotNone(profile.last_submission_at)
@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+"""
+Microbenchmark for PDF report rendering.
+
+Renders the input report for an in-memory (unsaved) input/output/waste set
+the same way the staff views do - a new ReportGenerator per report - and
+prints the per-report render time. With --cold the process-wide style and
+template caches are cleared before every report, which reproduces the cost
+of rebuilding stylesheets and table styles on each call.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from datetime import date
+from decimal import Decimal
+
+import django
+
+# Setup Django environment
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.config.settings')
+django.setup()
+
+from django.contrib.auth import get_user_model
+from backend.apps.prediction.models import ProductionInput, ProductionOutput
+from backend.apps.waste.models import WasteManagement, WasteRecommendation
+from backend.apps.core.utils import report_generator
+from backend.apps.core.utils.report_generator import ReportGenerator
+
+User = get_user_model()
+
+
+def build_sample():
+    """Unsaved model instances, so the benchmark never touches the database."""
+    user = User(username='bench_user', email='bench@example.com')
+    production_input = ProductionInput(
+        id=1, production_line='LINE_A', temperature=960.0, pressure=101325.0,
+        feed_rate=1200.0, power_consumption=2500.0, anode_effect=0.3,
+        bath_ratio=1.15, alumina_concentration=3.2, created_by=user,
+    )
+    production_output = ProductionOutput(
+        input_data=production_input, predicted_output=984.0, output_quality=92.5,
+        energy_efficiency=48.0, status='Approved', is_approved=True,
+    )
+    waste_record = WasteManagement(
+        production_input=production_input, waste_type='Aluminum Dross',
+        waste_amount=216.0, unit='KG', date_recorded=date.today(), reuse_possible=False,
+    )
+    recommendations = [
+        WasteRecommendation(
+            waste_record=waste_record,
+            recommendation_text='Reduce power consumption or increase feed rate.',
+            estimated_savings=Decimal('324.00'),
+        )
+        for _ in range(2)
+    ]
+    return production_input, production_output, waste_record, recommendations
+
+
+def clear_caches():
+    for name in ('get_report_styles', 'get_table_styles'):
+        cached = getattr(report_generator, name, None)
+        if cached is not None:
+            cached.cache_clear()
+
+
+def run(iterations, cold):
+    section = build_sample()
+    timings = []
+    for _ in range(iterations):
+        if cold:
+            clear_caches()
+        started = time.perf_counter()
+        ReportGenerator().generate_input_report(*section)
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('-n', '--iterations', type=int, default=200)
+    parser.add_argument('--cold', action='store_true', help='Rebuild styles for every report')
+    args = parser.parse_args()
+
+    run(5, args.cold)  # warm up imports and font metrics
+    timings = run(args.iterations, args.cold)
+
+    print(f"mode:    {'cold (styles rebuilt per report)' if args.cold else 'warm (styles shared per process)'}")
+    print(f"reports: {len(timings)}")
+    print(f"mean:    {statistics.mean(timings):.2f} ms")
+    print(f"median:  {statistics.median(timings):.2f} ms")
+    print(f"p95:     {sorted(timings)[int(len(timings) * 0.95) - 1]:.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,345 @@
+#!/usr/bin/env python
+"""
+Load test for a running AluOptimize API with role-specific scenarios.
+
+Logs every account in through /api/auth/token/ (CustomTokenObtainPairView)
+and then starts scenario iterations at --rate per second for --duration
+seconds, each by an account of a role picked according to --mix:
+
+    operator  submit a production input, poll the user's predictions and waste
+    staff     list pending inputs, approve (generate prediction) and send a
+              batch of them, open the staff dashboard
+    admin     open the admin dashboard and latency analytics, pick a user's
+              predicted input and generate its PDF report
+
+Arrivals are open-loop (a slow server does not slow the schedule down)
+with at most --concurrency iterations in flight. Prints throughput,
+latency percentiles and error rates per endpoint. Uses only the standard
+library: one keep-alive HTTP/1.1 connection per account.
+"""
+import argparse
+import asyncio
+import json
+import math
+import random
+import ssl
+import sys
+import time
+from collections import defaultdict
+from urllib.parse import urlsplit
+
+TOKEN_PATH = '/api/auth/token/'
+PERCENTILES = (50, 90, 99)
+
+
+class HttpError(Exception):
+    pass
+
+
+class Connection:
+    """A keep-alive HTTP/1.1 connection that reconnects when the server closes it."""
+
+    def __init__(self, base_url, timeout):
+        parts = urlsplit(base_url)
+        self.host = parts.hostname
+        self.port = parts.port or (443 if parts.scheme == 'https' else 80)
+        self.ssl = ssl.create_default_context() if parts.scheme == 'https' else None
+        self.timeout = timeout
+        self.reader = self.writer = None
+
+    async def close(self):
+        if self.writer:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except (ConnectionError, OSError):
+                pass
+        self.reader = self.writer = None
+
+    async def request(self, method, path, body=None, headers=None):
+        """Send one request; returns (status, body bytes)."""
+        for attempt in range(2):
+            try:
+                if self.writer is None:
+                    self.reader, self.writer = await asyncio.open_connection(self.host, self.port, ssl=self.ssl)
+                return await asyncio.wait_for(self._exchange(method, path, body, headers or {}), self.timeout)
+            except (OSError, asyncio.IncompleteReadError) as e:
+                # A keep-alive connection the server already dropped: retry once on a new one
+                await self.close()
+                if attempt:
+                    raise HttpError(str(e) or type(e).__name__)
+            except asyncio.TimeoutError:
+                await self.close()
+                raise HttpError('timeout')
+
+    async def _exchange(self, method, path, body, headers):
+        payload = json.dumps(body).encode() if body is not None else b''
+        lines = [f'{method} {path} HTTP/1.1', f'Host: {self.host}:{self.port}', 'Accept: application/json',
+                 f'Content-Length: {len(payload)}']
+        if body is not None:
+            lines.append('Content-Type: application/json')
+        lines.extend(f'{name}: {value}' for name, value in headers.items())
+        self.writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode() + payload)
+        await self.writer.drain()
+
+        status_line = await self.reader.readuntil(b'\r\n')
+        status = int(status_line.split()[1])
+        response_headers = {}
+        while True:
+            line = await self.reader.readuntil(b'\r\n')
+            if line == b'\r\n':
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            response_headers[name.strip().lower()] = value.strip()
+
+        if response_headers.get('transfer-encoding', '').lower() == 'chunked':
+            chunks = []
+            while True:
+                size = int((await self.reader.readuntil(b'\r\n')).split(b';')[0], 16)
+                chunk = await self.reader.readexactly(size + 2)
+                if not size:
+                    break
+                chunks.append(chunk[:-2])
+            content = b''.join(chunks)
+        elif 'content-length' in response_headers:
+            content = await self.reader.readexactly(int(response_headers['content-length']))
+        else:
+            content = await self.reader.read()
+            response_headers['connection'] = 'close'
+
+        if response_headers.get('connection', '').lower() == 'close' or status_line.startswith(b'HTTP/1.0'):
+            await self.close()
+        return status, content
+
+
+class Stats:
+    """Latencies and errors per endpoint label."""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+
+    def record(self, label, seconds, status):
+        self.latencies[label].append(seconds)
+        self.statuses[label][status] += 1
+        if not isinstance(status, int) or status >= 400:
+            self.errors[label] += 1
+
+    def summary(self, elapsed):
+        rows = {}
+        for label in sorted(self.latencies):
+            timings = sorted(self.latencies[label])
+            count = len(timings)
+            rows[label] = {
+                'requests': count,
+                'per_second': round(count / elapsed, 2),
+                'error_rate': round(self.errors[label] / count, 4),
+                'mean_ms': round(sum(timings) / count * 1000, 1),
+                **{f'p{q}_ms': round(timings[max(math.ceil(count * q / 100) - 1, 0)] * 1000, 1) for q in PERCENTILES},
+                'max_ms': round(timings[-1] * 1000, 1),
+                'statuses': dict(self.statuses[label]),
+            }
+        return rows
+
+
+class Session:
+    """One logged-in account: its connection and bearer token."""
+
+    def __init__(self, role, username, password, base_url, stats, timeout):
+        self.role = role
+        self.username = username
+        self.password = password
+        self.stats = stats
+        self.connection = Connection(base_url, timeout)
+        self.token = None
+        self.lock = asyncio.Lock()
+
+    async def login(self):
+        status, data = await self.call('POST', TOKEN_PATH, {'username': self.username, 'password': self.password},
+                                       authenticate=False)
+        if status != 200:
+            raise HttpError(f'login of {self.username} failed with {status}')
+        self.token = data['access']
+
+    async def call(self, method, path, body=None, label=None, authenticate=True, relogin=True):
+        """Timed request; returns (status, parsed JSON or None). Logs in again once on 401."""
+        headers = {'Authorization': f'Bearer {self.token}'} if authenticate else {}
+        started = time.perf_counter()
+        try:
+            status, content = await self.connection.request(method, path, body, headers)
+        except HttpError as e:
+            self.stats.record(f'{method} {label or path}', time.perf_counter() - started, str(e))
+            return None, None
+        self.stats.record(f'{method} {label or path}', time.perf_counter() - started, status)
+        if status == 401 and authenticate and relogin:
+            # The access token expired during the run
+            await self.login()
+            return await self.call(method, path, body, label, relogin=False)
+        try:
+            return status, json.loads(content) if content else None
+        except ValueError:
+            return status, None
+
+
+def _results(data):
+    return data.get('results', []) if isinstance(data, dict) else data or []
+
+
+async def operator_scenario(session, rng, options):
+    await session.call('POST', '/api/prediction/inputs/', {
+        'production_line': rng.choice(['LINE_A', 'LINE_B', 'LINE_C']),
+        'temperature': round(rng.gauss(962, 8), 2),
+        'pressure': round(rng.gauss(101325, 900), 1),
+        'feed_rate': round(rng.gauss(1000, 120), 1),
+        'power_consumption': round(rng.gauss(1600, 150), 1),
+        'anode_effect': round(abs(rng.gauss(0.3, 0.1)), 3),
+        'bath_ratio': round(rng.gauss(1.2, 0.05), 3),
+        'alumina_concentration': round(rng.gauss(3.0, 0.3), 2),
+    })
+    for _ in range(options.polls):
+        await session.call('GET', '/api/prediction/user/')
+    await session.call('GET', '/api/waste/user/')
+
+
+async def staff_scenario(session, rng, options):
+    _, pending = await session.call('GET', '/api/prediction/pending/')
+    for row in _results(pending)[:options.batch]:
+        status, _ = await session.call('POST', f"/api/prediction/inputs/{row['id']}/generate_prediction/",
+                                       label='/api/prediction/inputs/{id}/generate_prediction/')
+        if status == 200:
+            await session.call('POST', f"/api/prediction/inputs/{row['id']}/send_to_user/",
+                               label='/api/prediction/inputs/{id}/send_to_user/')
+    await session.call('GET', '/api/staff/dashboard/')
+
+
+async def admin_scenario(session, rng, options):
+    await session.call('GET', '/api/admin-panel/dashboard/')
+    await session.call('GET', '/api/admin-panel/prediction-latency/')
+    # The report flow of the admin panel: pick a user, then one of their predicted inputs
+    _, users = await session.call('GET', '/api/admin-panel/input-reports/users/')
+    users = [user for user in (users or {}).get('users', []) if user.get('input_count')]
+    if not users:
+        return
+    _, inputs = await session.call('GET', f"/api/admin-panel/input-reports/{rng.choice(users)['id']}/inputs/",
+                                   label='/api/admin-panel/input-reports/{id}/inputs/')
+    inputs = [row for row in (inputs or {}).get('inputs', []) if row.get('has_output')]
+    if inputs:
+        await session.call('POST', '/api/admin-panel/input-reports/generate/', {'input_id': rng.choice(inputs)['id']})
+
+
+SCENARIOS = {'operator': operator_scenario, 'staff': staff_scenario, 'admin': admin_scenario}
+
+
+def parse_account(value):
+    username, _, password = value.partition(':')
+    if not username or not password:
+        raise argparse.ArgumentTypeError('accounts are given as username:password')
+    return username, password
+
+
+def parse_mix(value):
+    mix = {}
+    for part in value.split(','):
+        role, _, weight = part.partition('=')
+        if role not in SCENARIOS:
+            raise argparse.ArgumentTypeError(f'unknown role {role!r}, expected one of {", ".join(SCENARIOS)}')
+        mix[role] = float(weight or 1)
+    return mix
+
+
+async def run(options):
+    stats = Stats()
+    rng = random.Random(options.seed)
+    sessions = defaultdict(list)
+    for role in SCENARIOS:
+        for username, password in getattr(options, role) or []:
+            sessions[role].append(Session(role, username, password, options.url, stats, options.timeout))
+    mix = {role: weight for role, weight in options.mix.items() if sessions[role] and weight > 0}
+    if not mix:
+        raise SystemExit('No accounts for the roles in --mix; pass --operator/--staff/--admin username:password')
+
+    all_sessions = [session for group in sessions.values() for session in group]
+    await asyncio.gather(*(session.login() for session in all_sessions))
+
+    roles, weights = list(mix), list(mix.values())
+    in_flight = set()
+    slots = asyncio.Semaphore(options.concurrency)
+    skipped = 0
+
+    async def iteration(session):
+        try:
+            # One scenario at a time per account, like one person at one screen
+            async with session.lock:
+                await SCENARIOS[session.role](session, rng, options)
+        finally:
+            slots.release()
+
+    started = time.perf_counter()
+    interval = 1 / options.rate
+    for tick in range(int(options.duration * options.rate)):
+        delay = started + tick * interval - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if slots.locked():
+            skipped += 1
+            continue
+        await slots.acquire()
+        session = rng.choice(sessions[rng.choices(roles, weights)[0]])
+        task = asyncio.create_task(iteration(session))
+        in_flight.add(task)
+        task.add_done_callback(in_flight.discard)
+    if in_flight:
+        await asyncio.gather(*in_flight, return_exceptions=True)
+    elapsed = time.perf_counter() - started
+    await asyncio.gather(*(session.connection.close() for session in all_sessions))
+    return stats.summary(elapsed), elapsed, skipped
+
+
+def print_report(rows, elapsed, skipped):
+    width = max([len(label) for label in rows] + [8])
+    header = f"{'endpoint':<{width}}  {'reqs':>6}  {'req/s':>7}  {'err%':>6}  {'mean':>7}  " + \
+        '  '.join(f'{f"p{q}":>7}' for q in PERCENTILES) + f"  {'max':>7}"
+    print(header)
+    print('-' * len(header))
+    for label, row in rows.items():
+        print(f"{label:<{width}}  {row['requests']:>6}  {row['per_second']:>7.2f}  {row['error_rate'] * 100:>5.1f}%  "
+              f"{row['mean_ms']:>7.1f}  " + '  '.join(f"{row[f'p{q}_ms']:>7.1f}" for q in PERCENTILES) +
+              f"  {row['max_ms']:>7.1f}")
+    total = sum(row['requests'] for row in rows.values())
+    errors = sum(round(row['error_rate'] * row['requests']) for row in rows.values())
+    print(f"\n{total} requests in {elapsed:.1f} s ({total / elapsed:.1f} req/s), {errors} errors; "
+          f"latencies in ms; {skipped} iterations skipped at the concurrency limit")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--url', default='http://127.0.0.1:8000', help='Base URL of the server')
+    parser.add_argument('--operator', action='append', type=parse_account, metavar='USER:PASSWORD',
+                        help='Operator account (repeatable)')
+    parser.add_argument('--staff', action='append', type=parse_account, metavar='USER:PASSWORD',
+                        help='Staff account (repeatable)')
+    parser.add_argument('--admin', action='append', type=parse_account, metavar='USER:PASSWORD',
+                        help='Admin account (repeatable)')
+    parser.add_argument('--mix', type=parse_mix, default=parse_mix('operator=8,staff=2,admin=1'),
+                        help='Relative share of scenario iterations per role (default: operator=8,staff=2,admin=1)')
+    parser.add_argument('--rate', type=float, default=5, help='Scenario iterations started per second')
+    parser.add_argument('--duration', type=float, default=30, help='Seconds to keep starting iterations')
+    parser.add_argument('--concurrency', type=int, default=50, help='Most iterations in flight at once')
+    parser.add_argument('--polls', type=int, default=3, help='Prediction polls per operator iteration')
+    parser.add_argument('--batch', type=int, default=5, help='Pending inputs a staff iteration approves')
+    parser.add_argument('--timeout', type=float, default=30, help='Seconds before a request counts as failed')
+    parser.add_argument('--seed', type=int, default=None, help='Random seed for the schedule and inputs')
+    parser.add_argument('--json', dest='json_path', default=None, help='Also write the results to this file')
+    options = parser.parse_args(argv)
+
+    rows, elapsed, skipped = asyncio.run(run(options))
+    print_report(rows, elapsed, skipped)
+    if options.json_path:
+        with open(options.json_path, 'w') as f:
+            json.dump({'elapsed_seconds': round(elapsed, 3), 'skipped': skipped, 'endpoints': rows}, f, indent=2)
+    return 1 if not rows else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -20,7 +20,16 @@ import PeopleIcon from '@mui/icons-material/People';
 import PendingActionsIcon from '@mui/icons-material/PendingActions';
 import AssessmentIcon from '@mui/icons-material/Assessment';
 import SpeedIcon from '@mui/icons-material/Speed';
-import api from '../../services/api';
+import api, { API_BASE_URL, refreshAccessToken } from '../../services/api';
+import authService from '../../services/authService';
+
+const tokenExpired = (token) => {
+    try {
+        return JSON.parse(atob(token.split('.')[1])).exp * 1000 <= Date.now();
+    } catch (e) {
+        return true;
+    }
+};
 
 export default function StaffOverview() {
     const [stats, setStats] = React.useState({
@@ -37,6 +46,49 @@ export default function StaffOverview() {
         fetchDashboardData();
     }, []);
 
+    // Follow the pending queue over server-sent events instead of polling
+    React.useEffect(() => {
+        if (typeof EventSource === 'undefined') return undefined;
+        let source = null;
+        let retryTimer = null;
+        let stopped = false;
+
+        const adjustPending = (delta) => {
+            setStats(prev => ({ ...prev, pending_requests: Math.max(0, (prev.pending_requests || 0) + delta) }));
+        };
+
+        const connect = async () => {
+            let token = authService.getToken();
+            if (token && tokenExpired(token)) {
+                // Share the API client's refresh so a concurrent 401 does not rotate the token twice
+                token = await refreshAccessToken().catch(() => null);
+            }
+            if (!token || stopped) return;
+            source = new EventSource(`${API_BASE_URL}/api/staff/events/?token=${encodeURIComponent(token)}`);
+            source.addEventListener('new', (e) => {
+                if (JSON.parse(e.data).status === 'pending') adjustPending(1);
+            });
+            const reviewed = (e) => {
+                if (JSON.parse(e.data).previous_status === 'pending') adjustPending(-1);
+            };
+            source.addEventListener('approved', reviewed);
+            source.addEventListener('rejected', reviewed);
+            source.addEventListener('resync', fetchDashboardData);
+            source.onerror = () => {
+                // The stream ends when the access token expires: reconnect with a fresh one
+                source.close();
+                if (!stopped) retryTimer = setTimeout(connect, 5000);
+            };
+        };
+
+        connect();
+        return () => {
+            stopped = true;
+            clearTimeout(retryTimer);
+            if (source) source.close();
+        };
+    }, []);
+
     const fetchDashboardData = async () => {
         try {
             setLoading(true);
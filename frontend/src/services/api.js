@@ -27,6 +27,36 @@ api.interceptors.request.use(cfg => {
   return cfg
 }, e => Promise.reject(e))
 
+// Refresh the access token once for every caller waiting on it, so a rotated
+// refresh token is never presented twice
+export const refreshAccessToken = () => {
+  if (isRefreshing) {
+    return new Promise((resolve, reject) => {
+      failedQueue.push({ resolve, reject })
+    })
+  }
+  const refreshToken = localStorage.getItem('refreshToken')
+  if (!refreshToken) {
+    clearAuthStorage()
+    return Promise.reject(new Error('No refresh token'))
+  }
+  isRefreshing = true
+  return axios.post(`${API_BASE_URL}/api/auth/token/refresh/`, { refresh: refreshToken })
+    .then(({ data }) => {
+      const newToken = data.access
+      if (newToken) localStorage.setItem('accessToken', newToken)
+      if (data.refresh) localStorage.setItem('refreshToken', data.refresh)
+      processQueue(null, newToken)
+      return newToken
+    })
+    .catch(e => {
+      processQueue(e, null)
+      clearAuthStorage()
+      throw e
+    })
+    .finally(() => { isRefreshing = false })
+}
+
 api.interceptors.response.use(res => res, err => {
   const originalRequest = err.config
   if (!originalRequest) return Promise.reject(err)
@@ -38,36 +68,13 @@ api.interceptors.response.use(res => res, err => {
   
   if (err.response && err.response.status === 401 && !originalRequest._retry) {
     originalRequest._retry = true
-    if (isRefreshing) {
-      return new Promise((resolve, reject) => {
-        failedQueue.push({ resolve, reject })
-      }).then(token => {
-        originalRequest.headers.Authorization = `Bearer ${token}`
-        return api(originalRequest)
-      })
-    }
-    isRefreshing = true
-    const refreshToken = localStorage.getItem('refreshToken')
-    if (!refreshToken) {
+    if (!isRefreshing && !localStorage.getItem('refreshToken')) {
       clearAuthStorage()
       return Promise.reject(err)
     }
-    return new Promise((resolve, reject) => {
-      axios.post(`${API_BASE_URL}/api/auth/token/refresh/`, { refresh: refreshToken })
-        .then(({ data }) => {
-          const newToken = data.access
-          if (newToken) localStorage.setItem('accessToken', newToken)
-          if (data.refresh) localStorage.setItem('refreshToken', data.refresh)
-          processQueue(null, newToken)
-          originalRequest.headers.Authorization = `Bearer ${newToken}`
-          resolve(api(originalRequest))
-        })
-        .catch(e => {
-          processQueue(e, null)
-          clearAuthStorage()
-          reject(e)
-        })
-        .finally(() => { isRefreshing = false })
+    return refreshAccessToken().then(token => {
+      originalRequest.headers.Authorization = `Bearer ${token}`
+      return api(originalRequest)
     })
   }
   return Promise.reject(err)
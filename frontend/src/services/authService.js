@@ -59,6 +59,11 @@ const authService = {
   },
   
   logout: () => {
+    const refresh = localStorage.getItem('refreshToken');
+    if (refresh) {
+      // Revoke the tokens server-side; the local session ends either way
+      api.post('/auth/token/revoke/', { refresh, access: localStorage.getItem('accessToken') }).catch(() => {});
+    }
     localStorage.removeItem('accessToken');
     localStorage.removeItem('refreshToken');
     localStorage.removeItem('user');
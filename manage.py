@@ -29,6 +29,32 @@ JWT_REFRESH_TOKEN_LIFETIME = 1440
 # Database configuration is now centralized in backend/config/settings.py via db_driver.
 # The following block has been removed as it referenced XAMPP/MAMP setups.
 
+# Database engine: mysql, postgresql, sqlite or sqlite-memory. The DB_ENGINE
+# environment variable overrides it, and DB_NAME / DB_USER / DB_PASSWORD /
+# DB_HOST / DB_PORT override the connection details (see config/db_driver.py)
+DB_ENGINE = 'mysql'
+
+# Read replicas: hosts (or SQLite file paths) serving request reads; the
+# DB_REPLICAS environment variable (comma-separated) overrides the list.
+# After a write, a user's reads stay on the primary for DB_REPLICA_PIN_SECONDS
+DB_REPLICAS = []
+DB_REPLICA_PIN_SECONDS = 5
+
+# Production-line shards: alias -> {'lines': [...], 'location': host or SQLite
+# path}. Inputs, outputs, waste and logs of those lines are stored on that
+# database; other lines stay on the default one. Example:
+# DB_SHARDS = {'plant_north': {'lines': ['LINE_A'], 'location': 'db-north.internal'}}
+DB_SHARDS = {}
+
+# Database connection reuse: seconds to keep a connection open (0 closes it
+# after every request, None keeps it forever) and whether to ping it first
+DB_CONN_MAX_AGE = 60
+DB_CONN_HEALTH_CHECKS = True
+
+# Pooled mode: connections per process in a driver-side pool (0 disables it;
+# requires mysql-connector-python)
+DB_POOL_SIZE = 0
+
 
 def main():
     """Run administrative tasks."""